@@ -26,16 +26,18 @@ def main():
         total_leituras=total_leituras,
     )
 
-    # 4) Persiste leituras
-    total = 0
-    with Database.get_session() as s:
-        for sensor, leituras in sensores_e_leituras:
-            for leitura in leituras:
-                # leitura é um LeituraSensor já com sensor_id e data/valor
-                assert isinstance(leitura, LeituraSensor)
-                s.add(leitura)
-                total += 1
-        s.commit()
+    # 4) Persiste leituras em lote (COPY no PostgreSQL, executemany nos demais bancos)
+    linhas = []
+    for sensor, leituras in sensores_e_leituras:
+        for leitura in leituras:
+            # leitura é um LeituraSensor já com sensor_id e data/valor
+            assert isinstance(leitura, LeituraSensor)
+            linhas.append({
+                'sensor_id': leitura.sensor_id,
+                'data_leitura': leitura.data_leitura,
+                'valor': leitura.valor,
+            })
+    total = LeituraSensor.bulk_insert(linhas)
 
     print(f"Base populada! Leituras inseridas: {total}")
 
@@ -0,0 +1,289 @@
+"""
+Avaliação dos limiares de manutenção dos sensores durante a ingestão.
+
+Cada leitura gravada é comparada com Sensor.limiar_manutencao_menor/maior, que chegam junto com
+os sensores resolvidos pelo CacheSensores, sem nenhuma consulta adicional ao banco. As violações
+geram eventos em uma fila interna, consumida por uma thread que os entrega aos assinantes
+(por padrão, o log; opcionalmente, e-mail pelo SNS).
+
+Para não gerar uma enxurrada de alertas:
+- histerese: depois de violar um limiar, o sensor só volta ao normal quando o valor retorna
+  para dentro dos limites com uma margem (fração da faixa entre os limiares ou, com um único
+  limiar, do seu valor absoluto);
+- cooldown: um sensor que já gerou um alerta não gera outro antes de `cooldown_s` segundos,
+  mesmo que volte ao normal e viole o limiar de novo nesse intervalo; se a violação persistir,
+  o alerta é emitido na primeira leitura após o cooldown.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from enum import StrEnum
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from src.api.cache_sensores import SensorResolvido
+from src.utils.env_utils import parse_bool_env
+
+logger = logging.getLogger(__name__)
+
+
+class TipoViolacao(StrEnum):
+    ACIMA = "acima"
+    ABAIXO = "abaixo"
+
+
+class EventoLimiar(NamedTuple):
+    sensor_id: int
+    violacao: TipoViolacao
+    valor: float
+    limiar: float
+    data_leitura: datetime
+
+
+class AvaliadorLimiares:
+    """
+    Compara as leituras recebidas com os limiares dos sensores e enfileira um EventoLimiar
+    a cada violação que não esteja suprimida pela histerese ou pelo cooldown.
+    O estado de cada sensor fica em memória (por processo).
+    """
+
+    def __init__(self,
+                 histerese: float = 0.05,
+                 cooldown_s: float = 300,
+                 capacidade: int = 10000,
+                 ):
+        """
+        :param histerese: Margem, relativa à faixa dos limiares, que o valor precisa recuar para o sensor voltar ao normal.
+        :param cooldown_s: Intervalo mínimo, em segundos, entre dois alertas do mesmo sensor.
+        :param capacidade: Quantidade máxima de eventos aguardando entrega; os excedentes são descartados.
+        """
+        if histerese < 0 or cooldown_s < 0 or capacidade <= 0:
+            raise ValueError("histerese e cooldown_s não podem ser negativos e capacidade deve ser maior que zero")
+
+        self.histerese = histerese
+        self.cooldown_s = cooldown_s
+
+        self._fila: queue.Queue[Optional[EventoLimiar]] = queue.Queue(maxsize=capacidade)
+        self._assinantes: list[Callable[[EventoLimiar], None]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        # sensor_id -> (violação em andamento ou None, instante monotônico do último alerta)
+        self._estado: dict[int, tuple[Optional[TipoViolacao], float]] = {}
+
+        self._avaliadas = 0
+        self._violacoes = 0
+        self._alertas = 0
+        self._suprimidos = 0
+        self._descartados = 0
+        self._erros = 0
+
+    def assinar(self, assinante: Callable[[EventoLimiar], None]):
+        """
+        Registra uma função chamada, na thread de entrega, para cada evento.
+        """
+        self._assinantes.append(assinante)
+
+    def _margem(self, sensor: SensorResolvido, limiar: float) -> float:
+        if sensor.limiar_menor is not None and sensor.limiar_maior is not None:
+            return self.histerese * abs(sensor.limiar_maior - sensor.limiar_menor)
+        return self.histerese * abs(limiar)
+
+    def _violacao(self, sensor: SensorResolvido, valor: float, atual: Optional[TipoViolacao]) -> Optional[TipoViolacao]:
+        """Violação em que o sensor fica após o valor, considerando a histerese da violação atual."""
+        if sensor.limiar_maior is not None:
+            limiar = sensor.limiar_maior
+            if atual == TipoViolacao.ACIMA:
+                limiar -= self._margem(sensor, limiar)
+            if valor > limiar:
+                return TipoViolacao.ACIMA
+
+        if sensor.limiar_menor is not None:
+            limiar = sensor.limiar_menor
+            if atual == TipoViolacao.ABAIXO:
+                limiar += self._margem(sensor, limiar)
+            if valor < limiar:
+                return TipoViolacao.ABAIXO
+
+        return None
+
+    def avaliar(self, linhas: Iterable[dict], sensores: dict[int, SensorResolvido]) -> int:
+        """
+        Avalia as linhas gravadas contra os limiares dos seus sensores.
+        :param linhas: Linhas de LEITURA_SENSOR no formato {'sensor_id', 'data_leitura', 'valor'}.
+        :param sensores: Sensores das linhas, com os limiares, por sensor_id; linhas de outros sensores são ignoradas.
+        :return: Quantidade de eventos enfileirados.
+        """
+        eventos = []
+        agora = time.monotonic()
+
+        with self._lock:
+            for linha in linhas:
+                sensor = sensores.get(linha['sensor_id'])
+                if sensor is None or (sensor.limiar_menor is None and sensor.limiar_maior is None):
+                    continue
+
+                self._avaliadas += 1
+                atual, ultimo_alerta = self._estado.get(sensor.sensor_id, (None, None))
+                violacao = self._violacao(sensor, linha['valor'], atual)
+
+                if violacao is not None and violacao != atual:
+                    self._violacoes += 1
+                    if ultimo_alerta is not None and agora - ultimo_alerta < self.cooldown_s:
+                        # Sem mudar de estado, uma violação que persistir alerta assim que o cooldown terminar
+                        self._suprimidos += 1
+                        continue
+                    limiar = sensor.limiar_maior if violacao == TipoViolacao.ACIMA else sensor.limiar_menor
+                    eventos.append(EventoLimiar(sensor.sensor_id, violacao, linha['valor'], limiar, linha['data_leitura']))
+                    ultimo_alerta = agora
+
+                if violacao is not None or ultimo_alerta is not None:
+                    self._estado[sensor.sensor_id] = (violacao, ultimo_alerta)
+
+        enfileirados = 0
+        for evento in eventos:
+            try:
+                self._fila.put_nowait(evento)
+                enfileirados += 1
+            except queue.Full:
+                self._descartados += 1
+
+        if enfileirados:
+            with self._lock:
+                self._alertas += enfileirados
+
+        return enfileirados
+
+    def iniciar(self):
+        """Inicia a thread de entrega dos eventos."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._thread = threading.Thread(target=self._executar, name="alertas-limiar", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 10):
+        """
+        Para a thread de entrega, depois de entregar os eventos já enfileirados.
+        :param timeout: Tempo máximo de espera, em segundos.
+        """
+        if self._thread is None:
+            return
+
+        self._fila.put(None)
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning("Entrega de alertas de limiar não terminou em %s segundos.", timeout)
+        self._thread = None
+
+    def _executar(self):
+        while True:
+            evento = self._fila.get()
+            if evento is None:
+                return
+            self.entregar(evento)
+
+    def entregar(self, evento: EventoLimiar):
+        """Entrega um evento a todos os assinantes; a falha de um não impede os demais."""
+        for assinante in self._assinantes:
+            try:
+                assinante(evento)
+            except Exception:
+                self._erros += 1
+                logger.exception("Erro ao entregar alerta de limiar do sensor %s.", evento.sensor_id)
+
+    def pendentes(self) -> list[EventoLimiar]:
+        """Retira da fila e retorna os eventos ainda não entregues."""
+        eventos = []
+        while True:
+            try:
+                evento = self._fila.get_nowait()
+            except queue.Empty:
+                return eventos
+            if evento is not None:
+                eventos.append(evento)
+
+    def estatisticas(self) -> dict:
+        """Retorna os contadores do avaliador."""
+        return {
+            "sensores_em_violacao": sum(1 for violacao, _ in self._estado.values() if violacao is not None),
+            "leituras_avaliadas": self._avaliadas,
+            "violacoes": self._violacoes,
+            "alertas": self._alertas,
+            "suprimidos_cooldown": self._suprimidos,
+            "descartados": self._descartados,
+            "erros_entrega": self._erros,
+            "fila": self._fila.qsize(),
+        }
+
+
+def registrar_no_log(evento: EventoLimiar):
+    logger.warning(
+        "Sensor %s: valor %s %s do limiar %s em %s.",
+        evento.sensor_id, evento.valor, evento.violacao, evento.limiar, evento.data_leitura,
+        extra={"sensor_id": evento.sensor_id, "violacao": str(evento.violacao)},
+    )
+
+
+def enviar_por_email(evento: EventoLimiar):
+    from src.notificacoes.email import enviar_email
+
+    enviar_email(
+        f"Alerta de manutenção: sensor {evento.sensor_id}",
+        f"O sensor {evento.sensor_id} registrou {evento.valor} em {evento.data_leitura}, "
+        f"{evento.violacao} do limiar de manutenção ({evento.limiar}).",
+    )
+
+
+_avaliador: Optional[AvaliadorLimiares] = None
+
+
+def iniciar_alertas_from_env() -> Optional[AvaliadorLimiares]:
+    """
+    Inicia a avaliação de limiares na ingestão, a menos que API_ALERTAS_LIMIAR esteja desabilitada.
+
+    Variáveis de ambiente:
+    - API_ALERTAS_LIMIAR: habilita a avaliação (padrão: true).
+    - API_ALERTAS_HISTERESE: margem de retorno ao normal, relativa à faixa dos limiares (padrão: 0.05).
+    - API_ALERTAS_COOLDOWN_S: intervalo mínimo entre alertas do mesmo sensor (padrão: 300).
+    - API_ALERTAS_CAPACIDADE: eventos aguardando entrega (padrão: 10000).
+    - API_ALERTAS_EMAIL: também envia os alertas por e-mail, pelo SNS (padrão: false).
+    :return: O avaliador iniciado ou None se a avaliação estiver desabilitada.
+    """
+    global _avaliador
+
+    if not parse_bool_env("API_ALERTAS_LIMIAR", True):
+        return None
+
+    if _avaliador is None:
+        _avaliador = AvaliadorLimiares(
+            histerese=float(os.environ.get("API_ALERTAS_HISTERESE", 0.05)),
+            cooldown_s=float(os.environ.get("API_ALERTAS_COOLDOWN_S", 300)),
+            capacidade=int(os.environ.get("API_ALERTAS_CAPACIDADE", 10000)),
+        )
+        _avaliador.assinar(registrar_no_log)
+        if parse_bool_env("API_ALERTAS_EMAIL"):
+            _avaliador.assinar(enviar_por_email)
+
+    _avaliador.iniciar()
+    logger.info("Avaliação de limiares na ingestão iniciada.")
+    return _avaliador
+
+
+def obter_avaliador() -> Optional[AvaliadorLimiares]:
+    """Retorna o avaliador ativo ou None se os limiares não forem avaliados na ingestão."""
+    return _avaliador
+
+
+def parar_alertas(timeout: float = 10):
+    """Entrega os eventos pendentes e para o avaliador ativo, se houver."""
+    global _avaliador
+
+    if _avaliador is None:
+        return
+
+    _avaliador.parar(timeout=timeout)
+    _avaliador = None
+    logger.info("Avaliação de limiares na ingestão finalizada.")
@@ -3,17 +3,36 @@ from fastapi import FastAPI
 from src.settings import DEBUG
 from src.api.init_sensor import init_router
 from src.api.receber_leitura import receber_router
+from src.api.consulta_leituras import consulta_router
+from src.api.monitoramento import monitoramento_router, metricas_router
+from src.api.compressao import MiddlewareCompressaoResposta, MiddlewareDescompressao
+from src.api.metricas import MiddlewareMetricas, iniciar_metricas_from_env, parar_metricas
+from src.api.cache_sensores import CacheSensores
+from src.api.buffer_leituras import iniciar_buffer_from_env, parar_buffer
+from src.api.alertas_limiar import iniciar_alertas_from_env, parar_alertas
+from src.api.compressao_leituras import iniciar_compressao_from_env, parar_compressao
+from src.api.udp_leitura import iniciar_udp_from_env, parar_udp
 import uvicorn
 import threading
 import os
-from src.database.tipos_base.database import Database
+from src.database.tipos_base.database import ConfiguracaoPool, Database
 import atexit
 import signal
 from src.utils.env_utils import parse_bool_env
+from src.logger.config import configurar_logger
+import logging
 
+logger = logging.getLogger(__name__)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
+
+def iniciar_database_from_env(criar_tabelas: bool = True):
+    """
+    Inicializa o Database a partir das variáveis de ambiente e cria as tabelas que não existirem.
+    O pool de conexões usa as variáveis API_DB_* e, na ausência delas, DB_* (ver ConfiguracaoPool),
+    assim como a réplica de leitura opcional (API_DB_REPLICA_URL ou DB_REPLICA_URL).
+    :param criar_tabelas: Se False, apenas conecta, sem criar as tabelas e os índices que faltarem.
+    """
+    pool = ConfiguracaoPool.from_env("API_")
     sql_lite: bool = parse_bool_env("SQL_LITE")
     oracle = parse_bool_env("ORACLE_DB_FROM_ENV")
     postgre = parse_bool_env("POSTGRE_DB_FROM_ENV")
@@ -22,57 +41,99 @@ async def lifespan(app: FastAPI):
         user = os.environ.get('ORACLE_USER')
         senha = os.environ.get('ORACLE_PASSWORD')
         dsn = os.environ.get('ORACLE_DSN')
-        Database.init_oracledb(user, senha, dsn)
-        Database.create_all_tables()
+        Database.init_oracledb(user, senha, dsn, pool=pool)
     elif postgre:
         user = os.environ.get('POSTGRE_USER')
         senha = os.environ.get('POSTGRE_PASSWORD')
         database = os.environ.get('POSTGRE_DB')
         host = os.environ.get('POSTGRE_HOST')
         port = os.environ.get('POSTGRE_PORT')
-        Database.init_postgresdb(user, senha, host, int(port), database)
-        Database.create_all_tables()
+        Database.init_postgresdb(user, senha, host, int(port), database, pool=pool)
     elif sql_lite:
-        Database.init_sqlite()
-        Database.create_all_tables()
+        Database.init_sqlite(pool=pool)
     else:
-        print("WARNING: Nenhum banco de dados configurado. Usando SQLite como padrão.")
-        Database.init_sqlite()
+        logger.warning("Nenhum banco de dados configurado. Usando SQLite como padrão.")
+        Database.init_sqlite(pool=pool)
+
+    if criar_tabelas:
         Database.create_all_tables()
+
+    Database.init_replica_from_env("API_", pool)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nos workers do servidor multiprocesso ninguém configurou o logging; com o dashboard, ele já está configurado
+    if not logging.getLogger().handlers:
+        configurar_logger("api.log")
+    # No modo multiprocesso, o supervisor já criou as tabelas e desliga a criação nos workers
+    iniciar_database_from_env(criar_tabelas=parse_bool_env("API_CRIAR_TABELAS", True))
+    CacheSensores.aquecer()
+    iniciar_buffer_from_env()
+    iniciar_compressao_from_env()
+    iniciar_alertas_from_env()
+    await iniciar_udp_from_env()
+    iniciar_metricas_from_env()
     yield
+    # O canal UDP e a compressão gravam as leituras pendentes no buffer antes de ele ser descarregado
+    await parar_udp()
+    parar_compressao()
+    parar_buffer()
+    parar_alertas()
+    parar_metricas()
+    await Database.descartar_conexoes_async()
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(init_router, prefix='/init')
 app.include_router(receber_router, prefix='/leitura')
+app.include_router(consulta_router, prefix='/leitura')
+app.include_router(monitoramento_router, prefix='/monitoramento')
+app.include_router(metricas_router)
+app.add_middleware(MiddlewareDescompressao)
+app.add_middleware(MiddlewareCompressaoResposta)
+app.add_middleware(MiddlewareMetricas)
 
 
 def _print_routes(app):
     for route in app.routes:
         if hasattr(route, "methods"):
-            print(f"{list(route.methods)} {route.path}")
+            logger.info("%s %s", sorted(route.methods), route.path)
+
+_api_server: uvicorn.Server | None = None
 
 def iniciar_api():
     """
     Inicia a API
     """
+    global _api_server
+
     if DEBUG:
         _print_routes(app)
-    uvicorn.run(app, host="0.0.0.0", port=8180)
+    _api_server = uvicorn.Server(uvicorn.Config(app, host="0.0.0.0", port=8180))
+    _api_server.run()
 
 
 _api_thread = None
 _shutdown_event = threading.Event()
 
 def shutdown_api():
-    """Desliga a API graciosamente."""
-    print("Desligando API...")
+    """Desliga a API graciosamente, descarregando as leituras pendentes no buffer de escrita."""
+    logger.info("Desligando API...")
     _shutdown_event.set()
-    
+
+    if _api_server is not None:
+        # Faz o uvicorn encerrar, o que executa a finalização do lifespan
+        _api_server.should_exit = True
+
     if _api_thread is not None:
         if _api_thread.is_alive():
             _api_thread.join(timeout=10)
             if _api_thread.is_alive():
-                print("AVISO: API não respondeu ao shutdown em 10 segundos")
+                logger.warning("API não respondeu ao shutdown em 10 segundos.")
+
+    parar_compressao()
+    parar_buffer()
+    parar_alertas()
 
 def inciar_api_thread_paralelo():
     """
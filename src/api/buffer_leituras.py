@@ -0,0 +1,298 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from enum import StrEnum
+from typing import Callable, Optional
+
+from src.api.metricas import medir_insercao
+from src.api.ultimas_leituras import CacheUltimasLeituras
+from src.database.models.sensor import LeituraSensor
+from src.utils.env_utils import parse_bool_env
+
+logger = logging.getLogger(__name__)
+
+
+@medir_insercao
+def inserir_leituras(linhas: list[dict]) -> int:
+    """
+    Insere as linhas em LEITURA_SENSOR com um único insert em lote, registrando as métricas de inserção,
+    e atualiza o cache das leituras mais recentes.
+    """
+    total = LeituraSensor.bulk_insert(linhas)
+    CacheUltimasLeituras.atualizar(linhas)
+    return total
+
+
+@medir_insercao
+async def inserir_leituras_async(linhas: list[dict]) -> int:
+    """Versão assíncrona de inserir_leituras, pela sessão assíncrona do Database."""
+    total = await LeituraSensor.bulk_insert_async(linhas)
+    CacheUltimasLeituras.atualizar(linhas)
+    return total
+
+
+class PoliticaOverflow(StrEnum):
+    BLOQUEAR = "block"
+    REJEITAR = "503"
+
+
+class BufferCheioError(Exception):
+    """Lançada quando o buffer está cheio e a política de overflow é rejeitar."""
+
+
+class BufferLeituras:
+    """
+    Buffer de escrita (write-behind) para as leituras recebidas pela API.
+
+    As linhas de LEITURA_SENSOR são colocadas em uma fila limitada em memória e uma thread
+    em segundo plano as persiste com um único insert em lote sempre que a fila atinge
+    `max_linhas` ou a cada `intervalo_ms` milissegundos, o que ocorrer primeiro.
+    Assim a latência da API deixa de depender do tempo de commit do banco.
+
+    Um lote que falha volta para o início da fila e é tentado de novo na descarga seguinte, até
+    `max_tentativas` vezes. Depois disso ele é descartado e o `ao_descartar` de cada `adicionar` com
+    linhas no lote é chamado (a ingestão libera as sequências, para que o dispositivo possa reenviar).
+    A entrega é no máximo uma vez: a requisição já foi respondida, e as linhas em memória se perdem
+    se o processo terminar antes da descarga.
+    """
+
+    def __init__(self,
+                 capacidade: int = 10000,
+                 intervalo_ms: int = 500,
+                 max_linhas: int = 1000,
+                 politica: PoliticaOverflow = PoliticaOverflow.BLOQUEAR,
+                 persistir: Callable[[list[dict]], int] = inserir_leituras,
+                 max_tentativas: int = 3,
+                 ):
+        """
+        :param capacidade: Quantidade máxima de linhas aguardando persistência.
+        :param intervalo_ms: Intervalo máximo, em milissegundos, entre duas descargas.
+        :param max_linhas: Quantidade de linhas que dispara uma descarga imediata (e tamanho máximo de cada insert).
+        :param politica: O que fazer quando o buffer está cheio: bloquear a requisição ou rejeitá-la (503).
+        :param persistir: Função que recebe as linhas e as insere no banco.
+        :param max_tentativas: Quantidade de tentativas de persistir um lote antes de descartá-lo.
+        """
+        if capacidade <= 0 or max_linhas <= 0 or intervalo_ms <= 0 or max_tentativas <= 0:
+            raise ValueError("capacidade, intervalo_ms, max_linhas e max_tentativas devem ser maiores que zero")
+
+        self.capacidade = capacidade
+        self.intervalo_ms = intervalo_ms
+        self.max_linhas = max_linhas
+        self.politica = PoliticaOverflow(politica)
+        self._persistir = persistir
+        self.max_tentativas = max_tentativas
+
+        # (linha, ao_descartar do adicionar que a enfileirou)
+        self._fila: deque[tuple[dict, Optional[Callable[[], None]]]] = deque()
+        # Lote que falhou, aguardando a próxima descarga, e as tentativas já feitas
+        self._reenvio: Optional[tuple[list[tuple[dict, Optional[Callable[[], None]]]], int]] = None
+        self._condicao = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._parando = False
+
+        self._linhas_recebidas = 0
+        self._linhas_persistidas = 0
+        self._linhas_descartadas = 0
+        self._reenvios = 0
+        self._rejeicoes = 0
+        self._descargas = 0
+        self._erros = 0
+
+    def iniciar(self):
+        """Inicia a thread de descarga."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._parando = False
+        self._thread = threading.Thread(target=self._executar, name="buffer-leituras", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 10):
+        """
+        Para a thread de descarga, persistindo antes todas as linhas pendentes.
+        :param timeout: Tempo máximo de espera, em segundos.
+        """
+        with self._condicao:
+            self._parando = True
+            self._condicao.notify_all()
+
+        if self._thread is None:
+            self.descarregar()
+            while self._reenvio is not None:
+                self.descarregar()
+            return
+
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning("Buffer de leituras não terminou em %s segundos; %d linhas pendentes.", timeout, self._profundidade())
+        self._thread = None
+
+    def adicionar(self, linhas: list[dict], ao_descartar: Optional[Callable[[], None]] = None):
+        """
+        Enfileira linhas para persistência.
+        :param linhas: Linhas de LEITURA_SENSOR no formato {coluna: valor}.
+        :param ao_descartar: Chamada uma vez, na thread do buffer, se alguma destas linhas for descartada
+            depois de esgotar as tentativas.
+        :raises BufferCheioError: Se o buffer está cheio e a política é rejeitar.
+        """
+        if not linhas:
+            return
+
+        with self._condicao:
+            # Um lote maior que a capacidade é aceito quando a fila está vazia, para não bloquear para sempre.
+            while self._fila and len(self._fila) + len(linhas) > self.capacidade:
+                if self.politica == PoliticaOverflow.REJEITAR or self._parando:
+                    self._rejeicoes += 1
+                    raise BufferCheioError(f"Buffer de leituras cheio ({len(self._fila)}/{self.capacidade} linhas).")
+                self._condicao.wait()
+
+            self._fila.extend((linha, ao_descartar) for linha in linhas)
+            self._linhas_recebidas += len(linhas)
+
+            if len(self._fila) >= self.max_linhas:
+                self._condicao.notify_all()
+
+    def descarregar(self) -> int:
+        """
+        Persiste imediatamente todas as linhas pendentes. Se um lote falhar e ainda tiver tentativas,
+        ele volta para o início da fila e a descarga termina, para ser retomada na próxima.
+        :return: Quantidade de linhas persistidas.
+        """
+        total = 0
+        while True:
+            with self._condicao:
+                if self._reenvio is not None:
+                    lote, tentativas = self._reenvio
+                    self._reenvio = None
+                else:
+                    lote = [self._fila.popleft() for _ in range(min(self.max_linhas, len(self._fila)))]
+                    tentativas = 0
+                # libera produtores bloqueados pela capacidade
+                self._condicao.notify_all()
+
+            if not lote:
+                return total
+
+            self._descargas += 1
+            try:
+                self._persistir([linha for linha, _ in lote])
+            except Exception:
+                self._erros += 1
+                tentativas += 1
+                if tentativas < self.max_tentativas:
+                    self._reenvios += 1
+                    self._reenvio = (lote, tentativas)
+                    logger.exception("Erro ao persistir lote de %d leituras (tentativa %d/%d); lote mantido para nova tentativa.",
+                                     len(lote), tentativas, self.max_tentativas)
+                    return total
+
+                # ainda dentro do except, para o log do descarte levar o erro
+                self._descartar(lote)
+                continue
+
+            total += len(lote)
+            self._linhas_persistidas += len(lote)
+
+    def _descartar(self, lote: list[tuple[dict, Optional[Callable[[], None]]]]):
+        """Descarta um lote que esgotou as tentativas e avisa quem enfileirou as linhas."""
+        self._linhas_descartadas += len(lote)
+        logger.exception("Erro ao persistir lote de %d leituras após %d tentativas; lote descartado.", len(lote), self.max_tentativas)
+
+        for ao_descartar in dict.fromkeys(ao_descartar for _, ao_descartar in lote if ao_descartar is not None):
+            try:
+                ao_descartar()
+            except Exception:
+                logger.exception("Erro ao notificar o descarte de leituras do buffer.")
+
+    def _profundidade(self) -> int:
+        reenvio = self._reenvio
+        return len(self._fila) + (len(reenvio[0]) if reenvio is not None else 0)
+
+    def _executar(self):
+        intervalo = self.intervalo_ms / 1000
+        proxima_descarga = time.monotonic() + intervalo
+
+        while True:
+            with self._condicao:
+                while not self._parando and len(self._fila) < self.max_linhas:
+                    restante = proxima_descarga - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicao.wait(restante)
+                parando = self._parando
+
+            self.descarregar()
+            proxima_descarga = time.monotonic() + intervalo
+
+            # No encerramento, um lote que falhou é tentado de novo até esgotar as tentativas
+            if parando and self._reenvio is None:
+                return
+
+    def estatisticas(self) -> dict:
+        """Retorna os contadores do buffer."""
+        return {
+            "profundidade": self._profundidade(),
+            "capacidade": self.capacidade,
+            "politica": str(self.politica),
+            "linhas_recebidas": self._linhas_recebidas,
+            "linhas_persistidas": self._linhas_persistidas,
+            "linhas_descartadas": self._linhas_descartadas,
+            "reenvios": self._reenvios,
+            "rejeicoes": self._rejeicoes,
+            "descargas": self._descargas,
+            "erros": self._erros,
+        }
+
+
+_buffer: Optional[BufferLeituras] = None
+
+
+def iniciar_buffer_from_env() -> Optional[BufferLeituras]:
+    """
+    Inicia o buffer de escrita se a variável de ambiente API_BUFFER_ESCRITA estiver habilitada.
+
+    Variáveis de ambiente:
+    - API_BUFFER_ESCRITA: habilita o modo buffer (padrão: false).
+    - API_BUFFER_CAPACIDADE: linhas máximas em memória (padrão: 10000).
+    - API_BUFFER_INTERVALO_MS: intervalo máximo entre descargas (padrão: 500).
+    - API_BUFFER_MAX_LINHAS: linhas que disparam uma descarga (padrão: 1000).
+    - API_BUFFER_POLITICA: 'block' ou '503' (padrão: block).
+    - API_BUFFER_MAX_TENTATIVAS: tentativas de gravar um lote antes de descartá-lo (padrão: 3).
+    :return: O buffer iniciado ou None se o modo buffer estiver desabilitado.
+    """
+    global _buffer
+
+    if not parse_bool_env("API_BUFFER_ESCRITA"):
+        return None
+
+    if _buffer is None:
+        _buffer = BufferLeituras(
+            capacidade=int(os.environ.get("API_BUFFER_CAPACIDADE", 10000)),
+            intervalo_ms=int(os.environ.get("API_BUFFER_INTERVALO_MS", 500)),
+            max_linhas=int(os.environ.get("API_BUFFER_MAX_LINHAS", 1000)),
+            politica=PoliticaOverflow(os.environ.get("API_BUFFER_POLITICA", PoliticaOverflow.BLOQUEAR.value)),
+            max_tentativas=int(os.environ.get("API_BUFFER_MAX_TENTATIVAS", 3)),
+        )
+
+    _buffer.iniciar()
+    logger.info("Buffer de escrita de leituras iniciado.")
+    return _buffer
+
+
+def obter_buffer() -> Optional[BufferLeituras]:
+    """Retorna o buffer ativo ou None se as leituras forem gravadas de forma síncrona."""
+    return _buffer
+
+
+def parar_buffer(timeout: float = 10):
+    """Descarrega e para o buffer ativo, se houver."""
+    global _buffer
+
+    if _buffer is None:
+        return
+
+    _buffer.parar(timeout=timeout)
+    _buffer = None
+    logger.info("Buffer de escrita de leituras finalizado.")
@@ -0,0 +1,224 @@
+import logging
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from sqlalchemy import Select, event, select
+from sqlalchemy.orm import Session, object_session
+
+from src.database.models.sensor import Sensor, TipoSensor, TipoSensorEnum
+from src.database.tipos_base.database import Database
+
+logger = logging.getLogger(__name__)
+
+
+class SensorResolvido(NamedTuple):
+    sensor_id: int
+    tipo: TipoSensorEnum
+    limiar_menor: Optional[float] = None
+    limiar_maior: Optional[float] = None
+
+
+class CacheSensores:
+    """
+    Cache em memória (por processo) que resolve o código serial de um dispositivo
+    para os sensores cadastrados nele, evitando consultas ao banco a cada leitura recebida.
+
+    O cache é aquecido no início da API e invalidado sempre que um Sensor ou TipoSensor
+    é salvo ou removido, ou quando a rota /init cadastra um novo dispositivo.
+    Seriais não encontrados não são armazenados, para que um dispositivo recém-cadastrado
+    por outro processo seja encontrado na próxima leitura.
+
+    As invalidações só alcançam o próprio processo: alterações feitas por outro processo (ex.: os
+    limiares editados no dashboard, com a API em vários workers) são vistas quando a entrada expira,
+    após `ttl_s` segundos. Uma consulta iniciada antes de uma invalidação não guarda o seu resultado,
+    que pode ter sido lido antes da alteração.
+    """
+
+    # serial -> (sensores, instante em que foram consultados)
+    _sensores: dict[str, tuple[list[SensorResolvido], float]] = {}
+    _lock = threading.Lock()
+    _geracao: int = 0
+    _hits: int = 0
+    _misses: int = 0
+    _invalidacoes: int = 0
+
+    ttl_s: float = float(os.environ.get("API_CACHE_SENSORES_TTL_S", 60))
+
+    @staticmethod
+    def _query(seriais: Optional[set[str]] = None) -> Select:
+        query = select(
+            Sensor.cod_serial, Sensor.id, TipoSensor.tipo, Sensor.limiar_manutencao_menor, Sensor.limiar_manutencao_maior
+        ).join(
+            TipoSensor, TipoSensor.id == Sensor.tipo_sensor_id
+        )
+
+        if seriais is None:
+            return query.where(Sensor.cod_serial.is_not(None))
+        return query.where(Sensor.cod_serial.in_(seriais))
+
+    @staticmethod
+    def _agrupar(linhas) -> dict[str, list[SensorResolvido]]:
+        sensores: dict[str, list[SensorResolvido]] = {}
+        for serial, *sensor in linhas:
+            sensores.setdefault(serial, []).append(SensorResolvido(*sensor))
+        return sensores
+
+    @classmethod
+    def _consultar(cls, seriais: Optional[set[str]] = None) -> dict[str, list[SensorResolvido]]:
+        """
+        Busca os sensores no banco com uma única consulta.
+        :param seriais: Seriais a serem buscados. Se None, busca todos os sensores com serial.
+        :return: Dicionário {serial: [SensorResolvido, ...]}.
+        """
+        with Database.get_session() as session:
+            return cls._agrupar(session.execute(cls._query(seriais)))
+
+    @classmethod
+    async def _consultar_async(cls, seriais: set[str]) -> dict[str, list[SensorResolvido]]:
+        async with Database.get_async_session() as session:
+            return cls._agrupar(await session.execute(cls._query(seriais)))
+
+    @classmethod
+    def aquecer(cls) -> int:
+        """
+        Carrega todos os sensores cadastrados no cache.
+        :return: Quantidade de seriais carregados.
+        """
+        geracao = cls._geracao
+        agora = time.monotonic()
+        sensores = cls._consultar()
+
+        with cls._lock:
+            if geracao == cls._geracao:
+                cls._sensores = {serial: (sensores_serial, agora) for serial, sensores_serial in sensores.items()}
+
+        logger.info("Cache de sensores aquecido com %d seriais.", len(sensores))
+        return len(sensores)
+
+    @classmethod
+    def _em_cache(cls, seriais: set[str], agora: float) -> dict[str, list[SensorResolvido]]:
+        sensores = cls._sensores
+        encontrados = {}
+
+        for serial in seriais:
+            entrada = sensores.get(serial)
+            if entrada is not None and agora - entrada[1] < cls.ttl_s:
+                encontrados[serial] = entrada[0]
+
+        with cls._lock:
+            cls._hits += len(encontrados)
+            cls._misses += len(seriais) - len(encontrados)
+
+        return encontrados
+
+    @classmethod
+    def _guardar(cls, consultados: dict[str, list[SensorResolvido]], geracao: int, agora: float):
+        with cls._lock:
+            # Houve uma invalidação durante a consulta: o resultado pode ser anterior à alteração
+            if geracao != cls._geracao:
+                return
+            for serial, sensores in consultados.items():
+                cls._sensores[serial] = (sensores, agora)
+
+    @classmethod
+    def obter(cls, seriais: set[str]) -> dict[str, list[SensorResolvido]]:
+        """
+        Resolve os seriais informados, consultando o banco apenas para os que não estão em cache.
+        :param seriais: Seriais a serem resolvidos.
+        :return: Dicionário {serial: [SensorResolvido, ...]}. Seriais não cadastrados não aparecem no dicionário.
+        """
+        geracao = cls._geracao
+        agora = time.monotonic()
+        encontrados = cls._em_cache(seriais, agora)
+        faltantes = seriais - encontrados.keys()
+
+        if faltantes:
+            consultados = cls._consultar(faltantes)
+            cls._guardar(consultados, geracao, agora)
+            encontrados.update(consultados)
+
+        return encontrados
+
+    @classmethod
+    async def obter_async(cls, seriais: set[str]) -> dict[str, list[SensorResolvido]]:
+        """
+        Versão assíncrona de obter: os seriais fora do cache são consultados pela sessão assíncrona do Database.
+        """
+        geracao = cls._geracao
+        agora = time.monotonic()
+        encontrados = cls._em_cache(seriais, agora)
+        faltantes = seriais - encontrados.keys()
+
+        if faltantes:
+            consultados = await cls._consultar_async(faltantes)
+            cls._guardar(consultados, geracao, agora)
+            encontrados.update(consultados)
+
+        return encontrados
+
+    @classmethod
+    def invalidar(cls, serial: Optional[str] = None):
+        """
+        Remove entradas do cache.
+        :param serial: Serial a ser removido. Se None, limpa o cache inteiro.
+        """
+        with cls._lock:
+            if serial is None:
+                cls._sensores = {}
+            else:
+                cls._sensores.pop(serial, None)
+            cls._geracao += 1
+            cls._invalidacoes += 1
+
+    @classmethod
+    def estatisticas(cls) -> dict:
+        """
+        Retorna os contadores do cache.
+        """
+        total = cls._hits + cls._misses
+        return {
+            "seriais": len(cls._sensores),
+            "hits": cls._hits,
+            "misses": cls._misses,
+            "hit_ratio": cls._hits / total if total else None,
+            "invalidacoes": cls._invalidacoes,
+        }
+
+    @classmethod
+    def resetar_estatisticas(cls):
+        with cls._lock:
+            cls._hits = 0
+            cls._misses = 0
+            cls._invalidacoes = 0
+
+
+_SESSAO_ALTEROU_SENSORES = 'cache_sensores_alterado'
+
+
+def _marcar_sessao(mapper, connection, target):
+    # No flush a alteração ainda pode ser desfeita; a invalidação fica para o commit da sessão
+    session = object_session(target)
+    if session is not None:
+        session.info[_SESSAO_ALTEROU_SENSORES] = True
+
+
+def _invalidar_apos_commit(session):
+    if session.info.pop(_SESSAO_ALTEROU_SENSORES, False):
+        # Um update pode trocar o serial ou o tipo do sensor, então o cache inteiro é descartado.
+        CacheSensores.invalidar()
+
+
+def _desmarcar_apos_rollback(session, previous_transaction):
+    # O rollback de um savepoint desfaz só parte da transação; as alterações de antes dele continuam
+    if not previous_transaction.nested:
+        session.info.pop(_SESSAO_ALTEROU_SENSORES, None)
+
+
+for _model in (Sensor, TipoSensor):
+    for _evento in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _evento, _marcar_sessao)
+
+event.listen(Session, 'after_commit', _invalidar_apos_commit)
+event.listen(Session, 'after_soft_rollback', _desmarcar_apos_rollback)
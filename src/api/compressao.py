@@ -0,0 +1,258 @@
+"""
+Compressão dos corpos de requisição e de resposta da API (gzip e zstd).
+
+Requisições com Content-Encoding gzip ou zstd são descomprimidas à medida que o corpo é recebido,
+bloco a bloco, antes de chegar às rotas; o tamanho descomprimido é limitado para não aceitar
+"bombas" de compressão. Respostas das rotas de consulta (GET) são comprimidas conforme o
+Accept-Encoding do cliente, também bloco a bloco, de modo que as respostas em streaming
+continuam em streaming.
+
+O zstd depende do pacote opcional `zstandard`; sem ele, apenas o gzip é aceito e oferecido.
+"""
+import os
+import zlib
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+# Tipos de conteúdo que valem a pena comprimir; os demais são enviados como estão
+TIPOS_COMPRESSIVEIS = ("text/", "application/json", "application/x-ndjson", "application/vnd.apache.arrow")
+
+# Maior razão de expansão do zstd: um bloco RLE de 4 bytes (3 de cabeçalho + 1) gera até 128 KiB
+RAZAO_MAXIMA_ZSTD = 128 * 1024 // 4
+
+
+def codificacoes_disponiveis() -> list[str]:
+    """Codificações aceitas e oferecidas pela API, em ordem de preferência."""
+    return [ZSTD, GZIP] if zstandard is not None else [GZIP]
+
+
+def escolher_codificacao(accept_encoding: str) -> Optional[str]:
+    """
+    Escolhe a codificação da resposta a partir do cabeçalho Accept-Encoding do cliente,
+    pela maior qualidade (q) e, em caso de empate, pela preferência da API.
+    :return: A codificação escolhida ou None, se o cliente não aceitar nenhuma das disponíveis.
+    """
+    qualidades = {}
+
+    for item in accept_encoding.lower().split(','):
+        nome, _, parametros = item.strip().partition(';')
+        qualidade = 1.0
+        parametro, _, valor = parametros.strip().partition('=')
+        if parametro.strip() == 'q':
+            try:
+                qualidade = float(valor)
+            except ValueError:
+                qualidade = 0.0
+        if nome:
+            qualidades[nome.strip()] = qualidade
+
+    candidatas = [
+        (qualidades.get(codificacao, qualidades.get('*', 0.0)), -posicao, codificacao)
+        for posicao, codificacao in enumerate(codificacoes_disponiveis())
+    ]
+    qualidade, _, codificacao = max(candidatas)
+    return codificacao if qualidade > 0 else None
+
+
+class _Descompressor:
+    """Descomprime o corpo bloco a bloco, limitando o tamanho descomprimido."""
+
+    def __init__(self, codificacao: str, limite: int):
+        self.codificacao = codificacao
+        self.restante = limite
+        if codificacao == GZIP:
+            self._gzip = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            self._zstd = zstandard.ZstdDecompressor().decompressobj()
+
+    def descomprimir(self, dados: bytes, final: bool) -> bytes:
+        try:
+            if self.codificacao == GZIP:
+                # Descomprime no máximo um byte além do permitido, para não alocar o corpo inteiro de uma bomba
+                saida = self._gzip.decompress(dados, self.restante + 1)
+                if final and len(saida) <= self.restante:
+                    saida += self._gzip.flush()
+                    if not self._gzip.eof:
+                        raise HTTPException(status_code=400, detail="Corpo gzip incompleto.")
+            else:
+                saida = self._descomprimir_zstd(dados)
+                if final and self.restante >= len(saida) and not self._zstd.eof:
+                    raise HTTPException(status_code=400, detail="Corpo zstd incompleto.")
+        except (zlib.error, getattr(zstandard, 'ZstdError', zlib.error)) as e:
+            raise HTTPException(status_code=400, detail=f"Corpo {self.codificacao} inválido: {e}")
+
+        self.restante -= len(saida)
+        if self.restante < 0:
+            raise HTTPException(status_code=413, detail="Corpo descomprimido maior que o permitido.")
+        return saida
+
+    def _descomprimir_zstd(self, dados: bytes) -> bytes:
+        """
+        O decompressobj do zstandard não limita a saída de uma chamada; a entrada é dividida em fatias
+        que, mesmo na razão máxima de expansão, geram pouco mais que o restante permitido.
+        """
+        partes = []
+        restante = self.restante
+        posicao = 0
+
+        while posicao < len(dados) and restante >= 0 and not self._zstd.eof:
+            fatia = max(1, (restante + 1) // RAZAO_MAXIMA_ZSTD)
+            parte = self._zstd.decompress(dados[posicao:posicao + fatia])
+            posicao += fatia
+            restante -= len(parte)
+            partes.append(parte)
+
+        return b"".join(partes)
+
+
+class MiddlewareDescompressao:
+    """
+    Middleware ASGI que descomprime os corpos de requisição com Content-Encoding gzip ou zstd,
+    à medida que são recebidos. Para as rotas, a requisição chega como se não fosse comprimida.
+    Codificações não suportadas são respondidas com 415.
+    """
+
+    def __init__(self, app, limite_bytes: Optional[int] = None):
+        """
+        :param limite_bytes: Tamanho máximo do corpo descomprimido. Se None, usa a variável de ambiente
+                             API_MAX_CORPO_DESCOMPRIMIDO_MB (padrão: 64 MB).
+        """
+        self.app = app
+        if limite_bytes is None:
+            limite_bytes = int(float(os.environ.get("API_MAX_CORPO_DESCOMPRIMIDO_MB", 64)) * 1024 * 1024)
+        self.limite_bytes = limite_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codificacao = Headers(scope=scope).get("content-encoding", "").strip().lower()
+
+        if codificacao in ("", "identity"):
+            await self.app(scope, receive, send)
+            return
+
+        if codificacao not in codificacoes_disponiveis():
+            resposta = JSONResponse(
+                {"detail": f"Content-Encoding '{codificacao}' não suportado; use {' ou '.join(codificacoes_disponiveis())}."},
+                status_code=415,
+            )
+            await resposta(scope, receive, send)
+            return
+
+        descompressor = _Descompressor(codificacao, self.limite_bytes)
+        scope = dict(scope)
+        scope["headers"] = [
+            (nome, valor) for nome, valor in scope["headers"] if nome not in (b"content-encoding", b"content-length")
+        ]
+
+        async def receber():
+            mensagem = await receive()
+            if mensagem["type"] != "http.request":
+                return mensagem
+            final = not mensagem.get("more_body", False)
+            return {**mensagem, "body": descompressor.descomprimir(mensagem.get("body", b""), final)}
+
+        await self.app(scope, receber, send)
+
+
+class _Compressor:
+    """Comprime a resposta bloco a bloco; cada bloco enviado pode ser descomprimido assim que chega."""
+
+    def __init__(self, codificacao: str):
+        self.codificacao = codificacao
+        if codificacao == GZIP:
+            self._gzip = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            self._zstd = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def comprimir(self, dados: bytes, final: bool) -> bytes:
+        if self.codificacao == GZIP:
+            return self._gzip.compress(dados) + self._gzip.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        modo = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._zstd.compress(dados) + self._zstd.flush(modo)
+
+
+class MiddlewareCompressaoResposta:
+    """
+    Middleware ASGI que comprime as respostas das requisições GET com gzip ou zstd, conforme o
+    Accept-Encoding do cliente. Respostas pequenas, já codificadas ou de tipos pouco compressíveis
+    são enviadas como estão.
+    """
+
+    def __init__(self, app, minimo_bytes: int = 1024):
+        """
+        :param minimo_bytes: Tamanho mínimo de uma resposta de bloco único para ser comprimida.
+        """
+        self.app = app
+        self.minimo_bytes = minimo_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        codificacao = escolher_codificacao(Headers(scope=scope).get("accept-encoding", ""))
+
+        if codificacao is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = None
+        compressor: Optional[_Compressor] = None
+
+        async def enviar(mensagem):
+            nonlocal inicio, compressor
+
+            if mensagem["type"] == "http.response.start":
+                # Os cabeçalhos só são enviados com o primeiro bloco, quando se sabe se ele será comprimido
+                inicio = mensagem
+                return
+
+            if mensagem["type"] != "http.response.body" or (inicio is None and compressor is None):
+                await send(mensagem)
+                return
+
+            corpo = mensagem.get("body", b"")
+            final = not mensagem.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=inicio["headers"])
+                tipo = headers.get("content-type", "")
+
+                if "content-encoding" in headers or not tipo.startswith(TIPOS_COMPRESSIVEIS) \
+                        or (final and len(corpo) < self.minimo_bytes):
+                    await send(inicio)
+                    inicio = None
+                    await send(mensagem)
+                    return
+
+                compressor = _Compressor(codificacao)
+                headers["Content-Encoding"] = codificacao
+                headers.add_vary_header("Accept-Encoding")
+                dados = compressor.comprimir(corpo, final)
+
+                if final:
+                    headers["Content-Length"] = str(len(dados))
+                elif "content-length" in headers:
+                    del headers["Content-Length"]
+
+                await send(inicio)
+                await send({"type": "http.response.body", "body": dados, "more_body": not final})
+                return
+
+            await send({"type": "http.response.body", "body": compressor.comprimir(corpo, final), "more_body": not final})
+
+        await self.app(scope, receive, enviar)
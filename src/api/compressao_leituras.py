@@ -0,0 +1,292 @@
+"""
+Compressão das leituras na ingestão: grava apenas os pontos necessários para reconstruir o sinal
+de cada sensor dentro de uma tolerância.
+
+Dois modos:
+- deadband: grava a leitura apenas quando ela se afasta mais que a tolerância da última gravada.
+  O sinal é reconstruído mantendo o último valor gravado (degrau).
+- swinging_door: grava apenas os vértices de uma linha poligonal que passa a no máximo a tolerância
+  de todas as leituras recebidas. O sinal é reconstruído por interpolação linear entre os pontos
+  gravados. Uma leitura só é gravada quando a seguinte mostra que ela é um vértice, de modo que a
+  última leitura de cada sensor fica pendente em memória até lá (ou até a API ser finalizada).
+
+Em ambos os modos, um sensor nunca fica mais que `max_intervalo_s` segundos sem um ponto gravado
+enquanto continuar enviando leituras, e leituras fora de ordem (anteriores ao último ponto gravado)
+são gravadas como chegaram. O estado é por processo: com vários workers, a tolerância é garantida
+para as leituras de cada worker.
+"""
+import logging
+import os
+import threading
+from datetime import datetime
+from enum import StrEnum
+from typing import Optional
+
+from src.api.cache_sensores import SensorResolvido
+from src.database.models.sensor import TipoSensorEnum
+
+logger = logging.getLogger(__name__)
+
+
+class ModoCompressao(StrEnum):
+    DEADBAND = "deadband"
+    SWINGING_DOOR = "swinging_door"
+
+
+class _EstadoSensor:
+    __slots__ = ('instante', 'valor', 'inclinacao_minima', 'inclinacao_maxima', 'pendente')
+
+    def __init__(self, linha: dict):
+        self.arquivar(linha)
+
+    def copia(self) -> "_EstadoSensor":
+        copia = _EstadoSensor.__new__(_EstadoSensor)
+        for atributo in self.__slots__:
+            setattr(copia, atributo, getattr(self, atributo))
+        return copia
+
+    def arquivar(self, linha: dict):
+        """Torna a linha o último ponto gravado do sensor."""
+        self.instante: datetime = linha['data_leitura']
+        self.valor: float = linha['valor']
+        self.inclinacao_minima = float('-inf')
+        self.inclinacao_maxima = float('inf')
+        self.pendente: Optional[dict] = None
+
+
+class CompressorLeituras:
+    """
+    Filtra as linhas de LEITURA_SENSOR de cada sensor, mantendo apenas as necessárias para
+    reconstruir o sinal dentro da tolerância do sensor (ver o início do módulo).
+    """
+
+    def __init__(self,
+                 modo: ModoCompressao = ModoCompressao.SWINGING_DOOR,
+                 tolerancias: Optional[dict[TipoSensorEnum | int, float]] = None,
+                 max_intervalo_s: float = 300,
+                 ):
+        """
+        :param modo: Modo de compressão.
+        :param tolerancias: Tolerância por sensor_id ou por tipo de sensor; a do sensor tem precedência.
+                            Sensores sem tolerância não são comprimidos.
+        :param max_intervalo_s: Intervalo máximo, em segundos, entre dois pontos gravados de um sensor.
+        """
+        tolerancias = tolerancias or {}
+        if any(tolerancia < 0 for tolerancia in tolerancias.values()) or max_intervalo_s <= 0:
+            raise ValueError("as tolerâncias não podem ser negativas e max_intervalo_s deve ser maior que zero")
+
+        self.modo = ModoCompressao(modo)
+        self.tolerancias = tolerancias
+        self.max_intervalo_s = max_intervalo_s
+
+        self._estado: dict[int, _EstadoSensor] = {}
+        self._lock = threading.Lock()
+
+        self._recebidas = 0
+        self._gravadas = 0
+
+    def tolerancia(self, sensor: SensorResolvido) -> Optional[float]:
+        """Tolerância do sensor ou None, se ele não for comprimido."""
+        tolerancia = self.tolerancias.get(sensor.sensor_id)
+        return self.tolerancias.get(sensor.tipo) if tolerancia is None else tolerancia
+
+    def filtrar(self, linhas: list[dict], sensores: dict[int, SensorResolvido],
+                anteriores: Optional[dict[int, Optional[_EstadoSensor]]] = None) -> list[dict]:
+        """
+        Retorna as linhas que devem ser gravadas. Com o swinging door, podem ser devolvidas linhas
+        recebidas em chamadas anteriores, que ficaram pendentes.
+        :param linhas: Linhas no formato {'sensor_id', 'data_leitura', 'valor'}, em ordem de recebimento.
+        :param sensores: Sensores das linhas por sensor_id; linhas de sensores sem tolerância são gravadas todas.
+        :param anteriores: Se informado, recebe o estado de cada sensor afetado antes da chamada (None para
+                           sensores novos), para restaurar() se as linhas não forem gravadas.
+        """
+        gravar = []
+
+        with self._lock:
+            for linha in linhas:
+                sensor = sensores.get(linha['sensor_id'])
+                tolerancia = None if sensor is None else self.tolerancia(sensor)
+
+                if anteriores is not None and tolerancia is not None and linha['sensor_id'] not in anteriores:
+                    # O estado é copiado antes da primeira alteração; o original fica com a chamada
+                    estado = self._estado.get(linha['sensor_id'])
+                    anteriores[linha['sensor_id']] = estado
+                    if estado is not None:
+                        self._estado[linha['sensor_id']] = estado.copia()
+
+                if tolerancia is None:
+                    gravar.append(linha)
+                elif self.modo == ModoCompressao.DEADBAND:
+                    self._deadband(linha, tolerancia, gravar)
+                else:
+                    self._swinging_door(linha, tolerancia, gravar)
+
+            self._recebidas += len(linhas)
+            self._gravadas += len(gravar)
+
+        return gravar
+
+    def _deadband(self, linha: dict, tolerancia: float, gravar: list[dict]):
+        estado = self._estado.get(linha['sensor_id'])
+
+        if estado is None:
+            self._estado[linha['sensor_id']] = _EstadoSensor(linha)
+            gravar.append(linha)
+        elif linha['data_leitura'] <= estado.instante:
+            gravar.append(linha)
+        elif abs(linha['valor'] - estado.valor) > tolerancia \
+                or (linha['data_leitura'] - estado.instante).total_seconds() >= self.max_intervalo_s:
+            estado.arquivar(linha)
+            gravar.append(linha)
+
+    def _swinging_door(self, linha: dict, tolerancia: float, gravar: list[dict]):
+        estado = self._estado.get(linha['sensor_id'])
+
+        if estado is None:
+            self._estado[linha['sensor_id']] = _EstadoSensor(linha)
+            gravar.append(linha)
+            return
+
+        if linha['data_leitura'] <= estado.instante:
+            gravar.append(linha)
+            return
+
+        intervalo = (linha['data_leitura'] - estado.instante).total_seconds()
+
+        if estado.pendente is not None:
+            inclinacao = (linha['valor'] - estado.valor) / intervalo
+            # A reta do último ponto gravado até esta leitura sairia da tolerância de alguma leitura
+            # anterior: a leitura pendente é um vértice e passa a ser o ponto de partida
+            if intervalo > self.max_intervalo_s \
+                    or not estado.inclinacao_minima <= inclinacao <= estado.inclinacao_maxima:
+                gravar.append(estado.pendente)
+                estado.arquivar(estado.pendente)
+                intervalo = (linha['data_leitura'] - estado.instante).total_seconds()
+
+        if intervalo > self.max_intervalo_s:
+            gravar.append(linha)
+            estado.arquivar(linha)
+            return
+
+        # Leituras com o mesmo instante do ponto gravado não restringem a inclinação
+        if intervalo > 0:
+            estado.inclinacao_minima = max(estado.inclinacao_minima, (linha['valor'] - tolerancia - estado.valor) / intervalo)
+            estado.inclinacao_maxima = min(estado.inclinacao_maxima, (linha['valor'] + tolerancia - estado.valor) / intervalo)
+        estado.pendente = linha
+
+    def restaurar(self, anteriores: dict[int, Optional[_EstadoSensor]]):
+        """
+        Desfaz um filtrar() cujas linhas não foram gravadas: os sensores voltam ao estado anterior,
+        com as leituras pendentes que a chamada havia devolvido para gravação.
+        """
+        with self._lock:
+            for sensor_id, estado in anteriores.items():
+                if estado is None:
+                    self._estado.pop(sensor_id, None)
+                else:
+                    self._estado[sensor_id] = estado
+
+    def descarregar(self) -> list[dict]:
+        """
+        Retorna as leituras pendentes de todos os sensores, que passam a ser os pontos gravados.
+        Deve ser chamado antes de finalizar a API, para que a última leitura de cada sensor não se perca.
+        """
+        with self._lock:
+            pendentes = []
+            for estado in self._estado.values():
+                if estado.pendente is not None:
+                    pendentes.append(estado.pendente)
+                    estado.arquivar(estado.pendente)
+            self._gravadas += len(pendentes)
+
+        return pendentes
+
+    def estatisticas(self) -> dict:
+        """Retorna os contadores do compressor."""
+        return {
+            "modo": str(self.modo),
+            "sensores": len(self._estado),
+            "pendentes": sum(1 for estado in self._estado.values() if estado.pendente is not None),
+            "linhas_recebidas": self._recebidas,
+            "linhas_gravadas": self._gravadas,
+            "taxa_compressao": self._recebidas / self._gravadas if self._gravadas else None,
+        }
+
+
+def ler_tolerancias(texto: str) -> dict[TipoSensorEnum | int, float]:
+    """
+    Converte "TEMPERATURA=0.2,LUX=50,12=0.5" em tolerâncias por tipo de sensor (nome de TipoSensorEnum)
+    ou por sensor_id.
+    """
+    tolerancias = {}
+
+    for item in texto.split(','):
+        if not item.strip():
+            continue
+        chave, _, valor = item.partition('=')
+        chave = chave.strip()
+        if chave.isdigit():
+            tolerancias[int(chave)] = float(valor)
+        elif chave.upper() in TipoSensorEnum.__members__:
+            tolerancias[TipoSensorEnum[chave.upper()]] = float(valor)
+        else:
+            raise ValueError(f"Tolerância de compressão inválida: '{item}'; use TIPO=valor ou sensor_id=valor.")
+
+    return tolerancias
+
+
+_compressor: Optional[CompressorLeituras] = None
+
+
+def iniciar_compressao_from_env() -> Optional[CompressorLeituras]:
+    """
+    Inicia a compressão das leituras se a variável de ambiente API_COMPRESSAO_LEITURAS definir um modo.
+
+    Variáveis de ambiente:
+    - API_COMPRESSAO_LEITURAS: 'deadband' ou 'swinging_door' (padrão: desabilitada).
+    - API_COMPRESSAO_TOLERANCIA: tolerâncias por tipo ou sensor, ex.: 'TEMPERATURA=0.2,LUX=50,12=0.5'.
+    - API_COMPRESSAO_MAX_INTERVALO_S: intervalo máximo entre dois pontos gravados de um sensor (padrão: 300).
+    :return: O compressor iniciado ou None se a compressão estiver desabilitada.
+    """
+    global _compressor
+
+    modo = os.environ.get("API_COMPRESSAO_LEITURAS", "").strip().lower()
+    if not modo:
+        return None
+
+    if _compressor is None:
+        _compressor = CompressorLeituras(
+            modo=ModoCompressao(modo),
+            tolerancias=ler_tolerancias(os.environ.get("API_COMPRESSAO_TOLERANCIA", "")),
+            max_intervalo_s=float(os.environ.get("API_COMPRESSAO_MAX_INTERVALO_S", 300)),
+        )
+
+    logger.info("Compressão de leituras (%s) iniciada.", _compressor.modo)
+    return _compressor
+
+
+def obter_compressor() -> Optional[CompressorLeituras]:
+    """Retorna o compressor ativo ou None se todas as leituras forem gravadas."""
+    return _compressor
+
+
+def parar_compressao():
+    """Grava as leituras pendentes e finaliza o compressor ativo, se houver."""
+    global _compressor
+
+    if _compressor is None:
+        return
+
+    from src.api.ingestao import persistir_leituras
+
+    pendentes = _compressor.descarregar()
+    _compressor = None
+
+    try:
+        if pendentes:
+            persistir_leituras(pendentes)
+    except Exception:
+        logger.exception("Erro ao gravar %d leituras pendentes da compressão.", len(pendentes))
+        return
+
+    logger.info("Compressão de leituras finalizada; %d leituras pendentes gravadas.", len(pendentes))
@@ -0,0 +1,305 @@
+"""
+Consulta das leituras gravadas, para consumidores externos.
+
+As leituras são enviadas em streaming, lote a lote, à medida que são lidas do banco com um cursor
+no servidor, de modo que a memória usada pela API não depende da quantidade de leituras. A leitura
+é feita pela sessão assíncrona do Database, sem ocupar uma thread enquanto aguarda o banco.
+A paginação é por keyset sobre (data_leitura, id): para buscar a próxima página, informe em
+`apos_data_leitura` e `apos_id` os valores da última leitura recebida.
+
+Com a compressão de leituras ativa na ingestão (ver src/api/compressao_leituras.py), apenas os pontos
+necessários para reconstruir o sinal são gravados; com `passo_s`, a série de cada sensor é
+reconstruída em instantes espaçados de `passo_s` segundos, por interpolação linear (swinging door)
+ou mantendo o último valor (deadband). Com `inicio` e `fim`, a série cobre toda a janela, a partir dos
+pontos gravados antes e depois dela (ver _Reconstrucao).
+"""
+import csv
+import io
+import os
+from datetime import datetime, timedelta
+from enum import StrEnum
+from typing import AsyncIterable, AsyncIterator, Iterator, Optional
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.api.compressao_leituras import ModoCompressao, obter_compressor
+from src.database.models.sensor import LeituraSensor
+
+consulta_router = APIRouter()
+
+COLUNAS = ('id', 'sensor_id', 'data_leitura', 'valor')
+
+
+class FormatoLeituras(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+    ARROW = "arrow"
+
+
+class Interpolacao(StrEnum):
+    LINEAR = "linear"
+    DEGRAU = "degrau"
+
+
+MEDIA_TYPES: dict[FormatoLeituras, str] = {
+    FormatoLeituras.NDJSON: "application/x-ndjson",
+    FormatoLeituras.CSV: "text/csv",
+    FormatoLeituras.ARROW: "application/vnd.apache.arrow.stream",
+}
+
+
+async def _ndjson(lotes: AsyncIterable[list]) -> AsyncIterator[bytes]:
+    async for linhas in lotes:
+        yield b"".join(orjson.dumps(dict(zip(COLUNAS, linha))) + b"\n" for linha in linhas)
+
+
+async def _csv(lotes: AsyncIterable[list]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(COLUNAS)
+
+    async for linhas in lotes:
+        writer.writerows((id, sensor_id, data_leitura.isoformat(), valor) for id, sensor_id, data_leitura, valor in linhas)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Sem leituras, envia apenas o cabeçalho
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def _arrow(lotes: AsyncIterable[list]) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ('id', pa.int64()), ('sensor_id', pa.int64()), ('data_leitura', pa.timestamp('us')), ('valor', pa.float64()),
+    ])
+    buffer = io.BytesIO()
+
+    def enviar() -> bytes:
+        dados = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return dados
+
+    with pa.ipc.new_stream(buffer, schema) as writer:
+        async for linhas in lotes:
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(coluna, type=campo.type) for coluna, campo in zip(zip(*linhas), schema)], schema=schema
+            ))
+            yield enviar()
+
+    yield enviar()
+
+
+_EPOCA = datetime(1970, 1, 1)
+
+
+class _Reconstrucao:
+    """
+    Reconstrói a série de cada sensor nos instantes múltiplos de `passo` (contados a partir de 1970-01-01),
+    lote a lote. As linhas reconstruídas não têm id e ficam em ordem de data_leitura dentro de cada sensor.
+
+    Sem `inicio` e `fim`, a série vai do primeiro ao último ponto gravado. Com eles, a série cobre a janela:
+    os pontos gravados antes de `inicio` (ver semear) e depois de `fim` (ver finais) delimitam a reconstrução,
+    pois, com a compressão, o último ponto gravado pode estar até max_intervalo_s antes da janela. Depois do
+    último ponto de um sensor, a série se estende até `horizonte` além dele: sem pontos por mais tempo que o
+    max_intervalo_s da compressão, o sensor parou de enviar.
+    """
+
+    def __init__(self, passo: timedelta, interpolacao: Interpolacao, tamanho_bloco: int = 5000,
+                 inicio: Optional[datetime] = None, fim: Optional[datetime] = None,
+                 horizonte: Optional[timedelta] = None):
+        """
+        :param tamanho_bloco: Quantidade máxima de linhas reconstruídas em cada bloco, para que um intervalo
+                              longo entre dois pontos gravados (ou um passo pequeno) não seja montado inteiro em memória.
+        :param inicio: Início da janela; o primeiro instante da série é o primeiro da grade a partir dele.
+        :param fim: Fim da janela (inclusive); sem ele, a série termina no último ponto gravado.
+        :param horizonte: Até quanto depois do último ponto de um sensor a série é estendida, limitada a `fim`.
+        """
+        self.passo = passo
+        self.interpolacao = interpolacao
+        self.tamanho_bloco = tamanho_bloco
+        self.inicio = inicio
+        self.fim = fim
+        self.horizonte = horizonte
+        # sensor_id -> (data_leitura, valor) do último ponto lido e próximo instante a reconstruir
+        self._anteriores: dict[int, tuple[datetime, float]] = {}
+        self._proximos: dict[int, datetime] = {}
+
+    def _grade(self, instante: datetime) -> datetime:
+        """Primeiro instante da grade igual ou posterior a `instante`."""
+        return _EPOCA - ((_EPOCA - instante) // self.passo) * self.passo
+
+    def _valor(self, instante: datetime, anterior: tuple[datetime, float], posterior: Optional[tuple[datetime, float]]) -> float:
+        data_anterior, valor_anterior = anterior
+        if self.interpolacao == Interpolacao.DEGRAU or posterior is None or posterior[0] == data_anterior:
+            return valor_anterior
+        data_posterior, valor_posterior = posterior
+        return valor_anterior + (valor_posterior - valor_anterior) * ((instante - data_anterior) / (data_posterior - data_anterior))
+
+    def semear(self, linhas: list):
+        """
+        Registra o último ponto gravado de cada sensor antes de `inicio`, a partir do qual a série começa em `inicio`.
+        """
+        for _, sensor_id, data_leitura, valor in linhas:
+            self._anteriores[sensor_id] = (data_leitura, valor)
+            self._proximos[sensor_id] = self._grade(self.inicio)
+
+    def lote(self, linhas: list) -> Iterator[list]:
+        """Linhas reconstruídas até os pontos do lote, em blocos de no máximo `tamanho_bloco` linhas."""
+        passo = self.passo
+        reconstruidas = []
+
+        for _, sensor_id, data_leitura, valor in linhas:
+            anterior = self._anteriores.get(sensor_id)
+            proximo = self._proximos.get(sensor_id)
+
+            if anterior is None:
+                # Primeiro instante da grade igual ou posterior ao primeiro ponto
+                proximo = self._grade(data_leitura)
+            else:
+                while proximo < data_leitura:
+                    reconstruidas.append((None, sensor_id, proximo, self._valor(proximo, anterior, (data_leitura, valor))))
+                    proximo += passo
+
+                    if len(reconstruidas) >= self.tamanho_bloco:
+                        yield reconstruidas
+                        reconstruidas = []
+
+            self._anteriores[sensor_id] = (data_leitura, valor)
+            self._proximos[sensor_id] = proximo
+
+        if reconstruidas:
+            yield reconstruidas
+
+    def finais(self, posteriores: Optional[dict[int, tuple[datetime, float]]] = None) -> Iterator[list]:
+        """
+        Linhas depois do último ponto de cada sensor: sem `fim`, apenas o próprio ponto, se cair exatamente em um
+        dos instantes da grade; com `fim`, até ele (limitado ao horizonte), interpolando até o primeiro ponto
+        gravado depois de `fim`, se houver, ou mantendo o último valor.
+        :param posteriores: Primeiro ponto gravado de cada sensor depois de `fim`.
+        """
+        posteriores = posteriores or {}
+        reconstruidas = []
+
+        for sensor_id, anterior in self._anteriores.items():
+            data_leitura = anterior[0]
+            ultimo = data_leitura if self.fim is None else self.fim
+            if self.fim is not None and self.horizonte is not None:
+                ultimo = min(ultimo, data_leitura + self.horizonte)
+
+            proximo = self._proximos[sensor_id]
+            while proximo <= ultimo:
+                reconstruidas.append((None, sensor_id, proximo, self._valor(proximo, anterior, posteriores.get(sensor_id))))
+                proximo += self.passo
+
+                if len(reconstruidas) >= self.tamanho_bloco:
+                    yield reconstruidas
+                    reconstruidas = []
+
+        if reconstruidas:
+            yield reconstruidas
+
+
+def _por_sensor(linhas: list) -> dict[int, tuple[datetime, float]]:
+    # Com leituras no mesmo instante, vale a de maior id (a última gravada)
+    return {sensor_id: (data_leitura, valor) for _, sensor_id, data_leitura, valor in linhas}
+
+
+async def _reconstruir_async(lotes: AsyncIterable[list], reconstrucao: _Reconstrucao,
+                             sensor_ids: Optional[list[int]] = None) -> AsyncIterator[list]:
+    """
+    Série reconstruída a partir dos lotes de pontos gravados, lidos pela sessão assíncrona (ver _Reconstrucao).
+    Com `inicio` e `horizonte`, os pontos que delimitam a janela são consultados antes e depois dos lotes.
+    """
+    if reconstrucao.inicio is not None and reconstrucao.horizonte is not None:
+        reconstrucao.semear(await LeituraSensor.leituras_vizinhas_async(
+            sensor_ids, reconstrucao.inicio, reconstrucao.inicio - reconstrucao.horizonte, anteriores=True,
+        ))
+
+    async for linhas in lotes:
+        for reconstruidas in reconstrucao.lote(linhas):
+            yield reconstruidas
+
+    posteriores = {}
+    if reconstrucao.fim is not None and reconstrucao.horizonte is not None and reconstrucao.interpolacao == Interpolacao.LINEAR:
+        posteriores = _por_sensor(await LeituraSensor.leituras_vizinhas_async(
+            sensor_ids, reconstrucao.fim, reconstrucao.fim + reconstrucao.horizonte, anteriores=False,
+        ))
+
+    for finais in reconstrucao.finais(posteriores):
+        yield finais
+
+
+def _data_local(data: Optional[datetime]) -> Optional[datetime]:
+    # As leituras são gravadas no horário local do servidor, sem fuso
+    if data is not None and data.tzinfo is not None:
+        return data.astimezone().replace(tzinfo=None)
+    return data
+
+
+SERIALIZADORES = {
+    FormatoLeituras.NDJSON: _ndjson,
+    FormatoLeituras.CSV: _csv,
+    FormatoLeituras.ARROW: _arrow,
+}
+
+
+@consulta_router.get("/")
+async def consultar_leituras(
+        sensor_id: Optional[list[int]] = Query(None, description="Sensores das leituras; se ausente, todos."),
+        inicio: Optional[datetime] = Query(None, description="Início do intervalo (inclusive)."),
+        fim: Optional[datetime] = Query(None, description="Fim do intervalo (inclusive)."),
+        apos_data_leitura: Optional[datetime] = Query(None, description="data_leitura da última leitura da página anterior."),
+        apos_id: Optional[int] = Query(None, description="id da última leitura da página anterior."),
+        limite: Optional[int] = Query(None, ge=1, description="Quantidade máxima de leituras; se ausente, todas."),
+        formato: FormatoLeituras = FormatoLeituras.NDJSON,
+        passo_s: Optional[float] = Query(None, ge=0.001, description="Reconstrói a série de cada sensor a cada passo_s segundos."),
+        interpolacao: Optional[Interpolacao] = Query(
+            None, description="Reconstrução com passo_s; se ausente, 'degrau' com a compressão deadband e 'linear' nos demais casos."
+        ),
+):
+    """
+    Retorna as leituras em ordem de (data_leitura, id), em NDJSON, CSV ou Arrow IPC (stream).
+    Para paginar, use `limite` e informe em `apos_data_leitura` e `apos_id` a última leitura recebida.
+    Com `passo_s`, retorna a série reconstruída de cada sensor a partir dos pontos gravados (sem paginação).
+    """
+    if (apos_data_leitura is None) != (apos_id is None):
+        raise HTTPException(status_code=422, detail="Informe apos_data_leitura e apos_id juntos.")
+
+    if passo_s is not None and apos_id is not None:
+        raise HTTPException(status_code=422, detail="A série reconstruída (passo_s) não pode ser paginada.")
+
+    if formato == FormatoLeituras.ARROW:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Formato arrow indisponível: pyarrow não está instalado.")
+
+    inicio, fim = _data_local(inicio), _data_local(fim)
+
+    lotes = LeituraSensor.iterar_leituras_async(
+        sensor_ids=sensor_id,
+        data_inicial=inicio,
+        data_final=fim,
+        apos=None if apos_id is None else (_data_local(apos_data_leitura), apos_id),
+        limite=limite,
+    )
+
+    if passo_s is not None:
+        compressor = obter_compressor()
+        if interpolacao is None:
+            deadband = compressor is not None and compressor.modo == ModoCompressao.DEADBAND
+            interpolacao = Interpolacao.DEGRAU if deadband else Interpolacao.LINEAR
+        # Intervalo máximo entre dois pontos gravados enquanto o sensor envia leituras (ver compressao_leituras)
+        max_intervalo_s = compressor.max_intervalo_s if compressor is not None \
+            else float(os.environ.get("API_COMPRESSAO_MAX_INTERVALO_S", 300))
+        reconstrucao = _Reconstrucao(timedelta(seconds=passo_s), interpolacao, inicio=inicio, fim=fim,
+                                     horizonte=timedelta(seconds=max_intervalo_s))
+        lotes = _reconstruir_async(lotes, reconstrucao, sensor_id)
+
+    return StreamingResponse(SERIALIZADORES[formato](lotes), media_type=MEDIA_TYPES[formato])
@@ -0,0 +1,198 @@
+"""
+Formato binário compacto para envio de leituras pelos dispositivos.
+
+Todos os campos são little-endian.
+
+Cabeçalho:
+    - assinatura: 2 bytes, b'RL'
+    - versão: uint8 (1 ou 2)
+    - quantidade de seriais: uint8
+    - para cada serial: tamanho (uint8) seguido do serial em UTF-8
+    - quantidade de registros: uint32
+
+Registros da versão 1 (13 bytes cada, sem alinhamento):
+    - índice do serial no dicionário do cabeçalho: uint8
+    - lux: float32
+    - temperatura: float32
+    - vibracao_media: float32
+
+Registros da versão 2 (29 bytes cada), para leituras acumuladas pelo dispositivo:
+    - índice do serial no dicionário do cabeçalho: uint8
+    - sequencia: int64 (-1 se ausente)
+    - data_leitura: int64, milissegundos desde 1970-01-01 UTC (-1 se ausente)
+    - lux, temperatura, vibracao_media: float32
+
+Valores ausentes são enviados como NaN. Os campos do acelerômetro não são transmitidos.
+"""
+import struct
+from datetime import datetime
+from typing import Iterable
+
+import numpy as np
+
+CONTENT_TYPE_BINARIO = "application/x-leitura-binaria"
+
+ASSINATURA = b'RL'
+VERSAO = 1
+VERSAO_COM_TEMPO = 2
+AUSENTE = -1
+# 9999-12-30 UTC: o último dia representável em datetime, com folga para o fuso horário local
+MAX_DATA_LEITURA_MS = 253402128000000
+
+DTYPE_REGISTRO = np.dtype([
+    ('serial', '<u1'),
+    ('lux', '<f4'),
+    ('temperatura', '<f4'),
+    ('vibracao_media', '<f4'),
+])
+
+DTYPE_REGISTRO_COM_TEMPO = np.dtype([
+    ('serial', '<u1'),
+    ('sequencia', '<i8'),
+    ('data_leitura', '<i8'),
+    ('lux', '<f4'),
+    ('temperatura', '<f4'),
+    ('vibracao_media', '<f4'),
+])
+
+_DTYPES = {VERSAO: DTYPE_REGISTRO, VERSAO_COM_TEMPO: DTYPE_REGISTRO_COM_TEMPO}
+
+
+class PayloadBinarioInvalido(ValueError):
+    """Lançada quando o corpo binário não segue o formato esperado."""
+
+
+def _data_leitura(milissegundos: int) -> datetime:
+    try:
+        return datetime.fromtimestamp(milissegundos / 1000)
+    except (ValueError, OverflowError, OSError) as e:
+        raise PayloadBinarioInvalido(f"data_leitura inválida ({milissegundos} ms): {e}")
+
+
+def codificar_leituras(leituras: Iterable[dict]) -> bytes:
+    """
+    Codifica leituras no formato binário. A versão 2 é usada quando alguma leitura tem
+    data_leitura (datetime; sem fuso é considerado o horário local) ou sequencia.
+    :param leituras: Leituras no mesmo formato do JSON (chaves serial, lux, temperatura, vibracao_media).
+    :return: Corpo binário.
+    """
+    leituras = list(leituras)
+    com_tempo = any(leitura.get('data_leitura') is not None or leitura.get('sequencia') is not None for leitura in leituras)
+    versao = VERSAO_COM_TEMPO if com_tempo else VERSAO
+    seriais = list(dict.fromkeys(leitura['serial'] for leitura in leituras))
+
+    if len(seriais) > 255:
+        raise ValueError("O formato binário suporta no máximo 255 seriais por envio.")
+
+    indices = {serial: indice for indice, serial in enumerate(seriais)}
+
+    cabecalho = bytearray(ASSINATURA)
+    cabecalho += struct.pack('<BB', versao, len(seriais))
+    for serial in seriais:
+        serial_bytes = serial.encode('utf-8')
+        cabecalho += struct.pack('<B', len(serial_bytes)) + serial_bytes
+    cabecalho += struct.pack('<I', len(leituras))
+
+    registros = np.empty(len(leituras), dtype=_DTYPES[versao])
+    for i, leitura in enumerate(leituras):
+        valores = (
+            np.nan if leitura.get('lux') is None else leitura['lux'],
+            np.nan if leitura.get('temperatura') is None else leitura['temperatura'],
+            np.nan if leitura.get('vibracao_media') is None else leitura['vibracao_media'],
+        )
+        if com_tempo:
+            data_leitura = leitura.get('data_leitura')
+            registros[i] = (
+                indices[leitura['serial']],
+                AUSENTE if leitura.get('sequencia') is None else leitura['sequencia'],
+                AUSENTE if data_leitura is None else round(data_leitura.timestamp() * 1000),
+                *valores,
+            )
+        else:
+            registros[i] = (indices[leitura['serial']], *valores)
+
+    return bytes(cabecalho) + registros.tobytes()
+
+
+def decodificar_leituras(corpo: bytes) -> list[dict]:
+    """
+    Decodifica um corpo binário, lendo todos os registros de uma só vez com NumPy.
+    :param corpo: Corpo binário recebido.
+    :return: Lista de leituras no formato {serial, lux, temperatura, vibracao_media}, com None para valores ausentes.
+             Na versão 2, cada leitura também tem sequencia e data_leitura (datetime no horário local).
+    :raises PayloadBinarioInvalido: Se o corpo não seguir o formato.
+    """
+    try:
+        if corpo[:2] != ASSINATURA:
+            raise PayloadBinarioInvalido("Assinatura inválida.")
+
+        versao, quantidade_seriais = struct.unpack_from('<BB', corpo, 2)
+        if versao not in _DTYPES:
+            raise PayloadBinarioInvalido(f"Versão {versao} não suportada.")
+
+        posicao = 4
+        seriais = []
+        for _ in range(quantidade_seriais):
+            (tamanho,) = struct.unpack_from('<B', corpo, posicao)
+            seriais.append(corpo[posicao + 1:posicao + 1 + tamanho].decode('utf-8'))
+            posicao += 1 + tamanho
+
+        (quantidade,) = struct.unpack_from('<I', corpo, posicao)
+        posicao += 4
+    except (struct.error, UnicodeDecodeError) as e:
+        raise PayloadBinarioInvalido(f"Cabeçalho inválido: {e}")
+
+    dtype = _DTYPES[versao]
+
+    if len(corpo) - posicao != quantidade * dtype.itemsize:
+        raise PayloadBinarioInvalido(
+            f"Tamanho inválido: esperados {quantidade} registros de {dtype.itemsize} bytes."
+        )
+
+    registros = np.frombuffer(corpo, dtype=dtype, count=quantidade, offset=posicao)
+
+    if quantidade and registros['serial'].max() >= len(seriais):
+        raise PayloadBinarioInvalido("Registro referencia um serial inexistente no cabeçalho.")
+
+    if versao == VERSAO_COM_TEMPO and quantidade and registros['sequencia'].min() < AUSENTE:
+        raise PayloadBinarioInvalido("Sequência negativa.")
+
+    if versao == VERSAO_COM_TEMPO and quantidade and (
+            registros['data_leitura'].min() < AUSENTE or registros['data_leitura'].max() > MAX_DATA_LEITURA_MS):
+        raise PayloadBinarioInvalido("data_leitura fora do intervalo suportado.")
+
+    colunas = {}
+    for campo in ('lux', 'temperatura', 'vibracao_media'):
+        valores = registros[campo].astype(object)
+        valores[np.isnan(registros[campo])] = None
+        colunas[campo] = valores.tolist()
+
+    serial_por_registro = [seriais[indice] for indice in registros['serial'].tolist()]
+
+    if versao == VERSAO_COM_TEMPO:
+        return [
+            {
+                'serial': serial,
+                'sequencia': None if sequencia == AUSENTE else sequencia,
+                'data_leitura': None if data_leitura == AUSENTE else _data_leitura(data_leitura),
+                'lux': lux,
+                'temperatura': temperatura,
+                'vibracao_media': vibracao_media,
+            }
+            for serial, sequencia, data_leitura, lux, temperatura, vibracao_media in zip(
+                serial_por_registro, registros['sequencia'].tolist(), registros['data_leitura'].tolist(),
+                colunas['lux'], colunas['temperatura'], colunas['vibracao_media']
+            )
+        ]
+
+    return [
+        {
+            'serial': serial,
+            'lux': lux,
+            'temperatura': temperatura,
+            'vibracao_media': vibracao_media,
+        }
+        for serial, lux, temperatura, vibracao_media in zip(
+            serial_por_registro, colunas['lux'], colunas['temperatura'], colunas['vibracao_media']
+        )
+    ]
@@ -0,0 +1,289 @@
+"""
+Gerador de carga para a API de ingestão: simula uma frota de dispositivos ESP32.
+
+Uso:
+    python -m src.api.gerador_carga --dispositivos 200 --taxa 1 --duracao 60
+    python -m src.api.gerador_carga --dispositivos 50 --taxa 10 --lote 20 --formato binario --gzip
+
+Cada dispositivo virtual chama /init/ uma vez e depois envia leituras a `taxa` leituras por segundo,
+como o sketch do Wokwi: com `--lote 1`, uma leitura por requisição em /leitura/; com lotes maiores,
+acumula as leituras (com data_leitura e sequencia) e as envia em /leitura/batch.
+Cada dispositivo envia uma requisição por vez, como o ESP32, em uma conexão própria.
+
+A latência é medida a partir do instante em que o envio estava programado, e não de quando ele
+de fato começou: se a API atrasa, o atraso acumulado do dispositivo entra na latência, em vez de
+ser escondido por um envio que simplesmente aconteceu mais tarde (omissão coordenada).
+
+A API alvo é qualquer instância acessível por `--url`; com `--iniciar-api`, uma instância local é
+iniciada com src/api/servidor.py, usando o banco configurado nas variáveis de ambiente (SQLite ou PostgreSQL).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import httpx
+import numpy as np
+
+from src.api.formato_binario import CONTENT_TYPE_BINARIO, codificar_leituras
+
+FORMATOS = ("json", "binario")
+
+
+class ResultadoCarga(NamedTuple):
+    dispositivos: int
+    duracao_s: float
+    requisicoes: int
+    leituras: int
+    status: dict[str, int]
+    latencias_ms: list[float]
+
+    @property
+    def leituras_por_segundo(self) -> float:
+        return self.leituras / self.duracao_s if self.duracao_s else 0.0
+
+    @property
+    def requisicoes_por_segundo(self) -> float:
+        return self.requisicoes / self.duracao_s if self.duracao_s else 0.0
+
+    def percentis(self) -> dict[str, Optional[float]]:
+        """Percentis p50, p95 e p99 da latência, em milissegundos."""
+        if not self.latencias_ms:
+            return {"p50": None, "p95": None, "p99": None}
+        p50, p95, p99 = np.percentile(self.latencias_ms, [50, 95, 99])
+        return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+    def resumo(self) -> dict:
+        return {
+            "dispositivos": self.dispositivos,
+            "duracao_s": round(self.duracao_s, 3),
+            "requisicoes": self.requisicoes,
+            "leituras": self.leituras,
+            "leituras_por_segundo": round(self.leituras_por_segundo, 1),
+            "requisicoes_por_segundo": round(self.requisicoes_por_segundo, 1),
+            "status": self.status,
+            "latencia_ms": {nome: None if valor is None else round(valor, 2) for nome, valor in self.percentis().items()},
+        }
+
+
+class DispositivoVirtual:
+    """Dispositivo simulado: gera leituras com valores plausíveis e número de sequência crescente."""
+
+    def __init__(self, serial: str):
+        self.serial = serial
+        self.sequencia = 0
+
+    def ler(self, com_tempo: bool) -> dict:
+        leitura = {
+            "serial": self.serial,
+            "lux": round(random.uniform(100.0, 80000.0), 2),
+            "temperatura": round(random.uniform(15.0, 45.0), 2),
+            "vibracao_media": round(random.uniform(0.0, 3.0), 3),
+            "acelerometro_x": round(random.uniform(-1.0, 1.0), 3),
+            "acelerometro_y": round(random.uniform(-1.0, 1.0), 3),
+            "acelerometro_z": round(random.uniform(-1.0, 1.0), 3),
+        }
+        if com_tempo:
+            leitura["data_leitura"] = datetime.now()
+            leitura["sequencia"] = self.sequencia
+        self.sequencia += 1
+        return leitura
+
+
+def _corpo(leituras: list[dict], formato: str, unica: bool) -> tuple[bytes, str]:
+    if formato == "binario":
+        return codificar_leituras(leituras), CONTENT_TYPE_BINARIO
+
+    documento = leituras[0] if unica else leituras
+    return json.dumps(documento, default=datetime.isoformat).encode(), "application/json"
+
+
+def _leituras_aceitas(response: httpx.Response, enviadas: int, serial: str) -> int:
+    """
+    Leituras aceitas pela API, segundo o corpo da resposta: as rotas respondem 200 também para
+    seriais não cadastrados (status "error" em /leitura/, seriais_nao_encontrados em /leitura/batch),
+    para seriais limitados no lote e para leituras com sequência já recebida (leituras_duplicadas).
+    """
+    if not response.is_success:
+        return 0
+
+    corpo = response.json()
+    if corpo.get("status") != "success" \
+            or serial in corpo.get("seriais_nao_encontrados", ()) or serial in corpo.get("seriais_limitados", ()):
+        return 0
+    return enviadas - corpo.get("leituras_duplicadas", 0)
+
+
+class _Coleta:
+    def __init__(self):
+        self.latencias_ms: list[float] = []
+        self.status: Counter = Counter()
+        self.leituras = 0
+
+
+async def _simular_dispositivo(cliente: httpx.AsyncClient, dispositivo: DispositivoVirtual, coleta: _Coleta,
+                               taxa: float, lote: int, formato: str, jitter: float, comprimir: bool,
+                               inicio: float, fim: float):
+    intervalo = 1 / taxa
+    # Os dispositivos começam defasados, como uma frota que não foi ligada no mesmo instante
+    programado = inicio + random.uniform(0, intervalo)
+    pendentes = []
+
+    while True:
+        programado += intervalo * random.uniform(1 - jitter, 1 + jitter)
+        if programado >= fim:
+            break
+
+        espera = programado - time.perf_counter()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+        pendentes.append(dispositivo.ler(com_tempo=lote > 1))
+        if len(pendentes) < lote:
+            continue
+
+        unica = lote == 1
+        corpo, content_type = _corpo(pendentes, formato, unica)
+        headers = {"Content-Type": content_type}
+        if comprimir:
+            corpo = gzip.compress(corpo)
+            headers["Content-Encoding"] = "gzip"
+
+        try:
+            response = await cliente.post("/leitura/" if unica else "/leitura/batch", content=corpo, headers=headers)
+            coleta.status[str(response.status_code)] += 1
+            coleta.leituras += _leituras_aceitas(response, len(pendentes), dispositivo.serial)
+        except httpx.HTTPError as e:
+            coleta.status[type(e).__name__] += 1
+
+        coleta.latencias_ms.append((time.perf_counter() - programado) * 1000)
+        pendentes = []
+
+
+async def gerar_carga(url: str = "http://localhost:8180",
+                      dispositivos: int = 10,
+                      taxa: float = 1.0,
+                      duracao: float = 10.0,
+                      lote: int = 1,
+                      formato: str = "json",
+                      jitter: float = 0.1,
+                      comprimir: bool = False,
+                      prefixo_serial: str = "CARGA",
+                      transport: Optional[httpx.AsyncBaseTransport] = None,
+                      ) -> ResultadoCarga:
+    """
+    Simula `dispositivos` dispositivos enviando leituras à API durante `duracao` segundos.
+    :param url: Endereço base da API.
+    :param dispositivos: Quantidade de dispositivos virtuais.
+    :param taxa: Leituras por segundo de cada dispositivo.
+    :param duracao: Duração da carga, em segundos (sem contar o /init/).
+    :param lote: Leituras acumuladas por requisição; 1 envia cada leitura em /leitura/, como o sketch do Wokwi.
+    :param formato: "json" ou "binario" (ver src/api/formato_binario.py).
+    :param jitter: Variação relativa do intervalo entre leituras (0.1 = ±10%).
+    :param comprimir: Envia os corpos comprimidos com gzip.
+    :param prefixo_serial: Prefixo dos seriais dos dispositivos virtuais.
+    :param transport: Transporte do httpx (ex.: httpx.ASGITransport, para testar sem servidor).
+    :return: Resultado com a vazão obtida e as latências das requisições de leitura.
+    :raises RuntimeError: Se o /init/ de algum dispositivo falhar.
+    """
+    if dispositivos <= 0 or taxa <= 0 or duracao <= 0 or lote <= 0:
+        raise ValueError("dispositivos, taxa, duracao e lote devem ser maiores que zero")
+    if formato not in FORMATOS:
+        raise ValueError(f"formato deve ser um de {FORMATOS}")
+    if not 0 <= jitter < 1:
+        raise ValueError("jitter deve estar entre 0 e 1")
+
+    coleta = _Coleta()
+    limites = httpx.Limits(max_connections=dispositivos, max_keepalive_connections=dispositivos)
+
+    frota = [DispositivoVirtual(f"{prefixo_serial}-{indice:05d}") for indice in range(dispositivos)]
+
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=30, transport=transport) as cliente:
+        # O /init/ de todos os dispositivos é feito antes, fora da medição
+        respostas = await asyncio.gather(*[
+            cliente.post("/init/", json={"serial": dispositivo.serial}) for dispositivo in frota
+        ])
+        for dispositivo, response in zip(frota, respostas):
+            if not response.is_success or response.json().get("status") != "success":
+                raise RuntimeError(f"/init/ do dispositivo {dispositivo.serial} falhou: {response.status_code} {response.text}")
+
+        inicio = time.perf_counter()
+        fim = inicio + duracao
+        await asyncio.gather(*[
+            _simular_dispositivo(cliente, dispositivo, coleta, taxa, lote, formato, jitter, comprimir, inicio, fim)
+            for dispositivo in frota
+        ])
+        duracao_real = time.perf_counter() - inicio
+
+    return ResultadoCarga(dispositivos, duracao_real, sum(coleta.status.values()), coleta.leituras,
+                          dict(coleta.status), coleta.latencias_ms)
+
+
+def _aguardar_api(url: str, timeout: float = 60):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            httpx.get(f"{url}/monitoramento/", timeout=2)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    raise TimeoutError(f"A API em {url} não respondeu em {timeout} segundos.")
+
+
+def imprimir_resultado(resultado: ResultadoCarga):
+    resumo = resultado.resumo()
+    latencia = resumo["latencia_ms"]
+    print(f"Dispositivos:       {resumo['dispositivos']}")
+    print(f"Duração:            {resumo['duracao_s']} s")
+    print(f"Requisições:        {resumo['requisicoes']} ({resumo['requisicoes_por_segundo']}/s)")
+    print(f"Leituras aceitas:   {resumo['leituras']} ({resumo['leituras_por_segundo']}/s)")
+    print(f"Status:             {resumo['status']}")
+    print(f"Latência (ms):      p50={latencia['p50']} p95={latencia['p95']} p99={latencia['p99']}")
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Simula uma frota de dispositivos ESP32 enviando leituras à API.")
+    parser.add_argument("--url", default="http://localhost:8180", help="Endereço base da API.")
+    parser.add_argument("--dispositivos", type=int, default=10, help="Quantidade de dispositivos virtuais.")
+    parser.add_argument("--taxa", type=float, default=1.0, help="Leituras por segundo de cada dispositivo.")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Duração da carga, em segundos.")
+    parser.add_argument("--lote", type=int, default=1, help="Leituras por requisição (1 = /leitura/, >1 = /leitura/batch).")
+    parser.add_argument("--formato", choices=FORMATOS, default="json")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Variação relativa do intervalo entre leituras.")
+    parser.add_argument("--gzip", action="store_true", help="Envia os corpos comprimidos com gzip.")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    parser.add_argument("--iniciar-api", action="store_true",
+                        help="Inicia uma instância local da API (src/api/servidor.py) antes da carga.")
+    parser.add_argument("--workers", type=int, default=None, help="Workers da API iniciada com --iniciar-api.")
+    args = parser.parse_args(argv)
+
+    if args.iniciar_api:
+        from urllib.parse import urlparse
+        from src.api.servidor import iniciar_api_subprocesso, parar_api_subprocesso
+
+        endereco = urlparse(args.url)
+        iniciar_api_subprocesso(args.workers, endereco.hostname, endereco.port or 80)
+        _aguardar_api(args.url)
+
+    try:
+        resultado = asyncio.run(gerar_carga(
+            url=args.url, dispositivos=args.dispositivos, taxa=args.taxa, duracao=args.duracao, lote=args.lote,
+            formato=args.formato, jitter=args.jitter, comprimir=args.gzip,
+        ))
+    finally:
+        if args.iniciar_api:
+            parar_api_subprocesso()
+
+    if args.json:
+        print(json.dumps(resultado.resumo(), indent=2))
+    else:
+        imprimir_resultado(resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Etapas da ingestão de leituras compartilhadas pelos canais da API (HTTP, WebSocket e UDP).
+"""
+from datetime import datetime
+from functools import partial
+from typing import Callable, NamedTuple, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, field_validator
+
+from src.api.alertas_limiar import obter_avaliador
+from src.api.buffer_leituras import PoliticaOverflow, obter_buffer, inserir_leituras, inserir_leituras_async
+from src.api.cache_sensores import SensorResolvido
+from src.api.compressao_leituras import obter_compressor
+from src.api.limitador import obter_limitador
+from src.api.sequencia_dispositivos import obter_rastreador
+from src.api.ultimas_leituras import CacheUltimasLeituras
+from src.database.models.sensor import TipoSensorEnum
+
+
+class LeituraRequest(BaseModel):
+    """Leitura de um dispositivo, recebida por qualquer um dos canais (HTTP, WebSocket ou UDP)."""
+    serial: str
+    lux: float or None
+    temperatura: float or None
+    vibracao_media: float or None
+    acelerometro_x: float or None # não utilizado
+    acelerometro_y: float or None # não utilizado
+    acelerometro_z: float or None # não utilizado
+    data_leitura: Optional[datetime] = None # instante da leitura no dispositivo; se ausente, o de recebimento
+    sequencia: Optional[int] = Field(default=None, ge=0) # contador do dispositivo, usado para descartar reenvios
+    boot: Optional[int] = Field(default=None, ge=0) # inicialização do dispositivo; a sequência recomeça a cada boot
+
+    @field_validator('data_leitura')
+    @classmethod
+    def _data_local(cls, data_leitura: Optional[datetime]) -> Optional[datetime]:
+        # As leituras são gravadas no horário local do servidor, sem fuso, como datetime.now()
+        if data_leitura is not None and data_leitura.tzinfo is not None:
+            return data_leitura.astimezone().replace(tzinfo=None)
+        return data_leitura
+
+
+def valor_para_tipo(leitura, tipo: TipoSensorEnum) -> Optional[float]:
+    """
+    Retorna o valor da leitura correspondente ao tipo do sensor.
+    :param leitura: Objeto com os atributos lux, temperatura e vibracao_media (ex.: LeituraRequest).
+    """
+    if tipo == TipoSensorEnum.LUX:
+        return leitura.lux
+    elif tipo == TipoSensorEnum.TEMPERATURA:
+        return leitura.temperatura
+    elif tipo == TipoSensorEnum.VIBRACAO:
+        return leitura.vibracao_media
+    return None
+
+
+def montar_leituras(leitura, sensores: list[SensorResolvido], data_leitura: datetime) -> list[dict]:
+    """
+    Converte uma leitura recebida nas linhas de LEITURA_SENSOR, uma por sensor do dispositivo.
+    :param leitura: Objeto com os atributos lux, temperatura e vibracao_media (ex.: LeituraRequest).
+    """
+    linhas = []
+
+    for sensor in sensores:
+        valor = valor_para_tipo(leitura, sensor.tipo)
+
+        if valor is None:
+            continue
+
+        linhas.append({
+            'sensor_id': sensor.sensor_id,
+            'data_leitura': data_leitura,
+            'valor': valor,
+        })
+
+    return linhas
+
+
+def persistir_leituras(linhas: list[dict], ao_descartar: Optional[Callable[[], None]] = None) -> int:
+    """
+    Persiste as linhas no banco, diretamente ou pelo buffer de escrita, se estiver ativo.
+    A escrita direta respeita o limite global de escritas simultâneas.
+    :param ao_descartar: Chamada se o buffer descartar as linhas depois de esgotar as tentativas de gravação.
+    :return: Quantidade de linhas aceitas.
+    :raises LimiteExcedidoError: Se não houver vaga de escrita no banco.
+    :raises BufferCheioError: Se o buffer estiver cheio e a política for rejeitar.
+    """
+    buffer = obter_buffer()
+
+    if buffer is None:
+        with obter_limitador().escrita():
+            return inserir_leituras(linhas)
+
+    buffer.adicionar(linhas, ao_descartar)
+    return len(linhas)
+
+
+async def persistir_leituras_async(linhas: list[dict], ao_descartar: Optional[Callable[[], None]] = None) -> int:
+    """
+    Versão assíncrona de persistir_leituras: a escrita direta usa a sessão assíncrona do Database.
+    Com o buffer de escrita ativo e a política de bloquear, a espera por espaço no buffer é feita
+    em uma thread, para não bloquear o event loop.
+    """
+    buffer = obter_buffer()
+
+    if buffer is None:
+        async with obter_limitador().escrita_async():
+            return await inserir_leituras_async(linhas)
+
+    if buffer.politica == PoliticaOverflow.BLOQUEAR:
+        await run_in_threadpool(buffer.adicionar, linhas, ao_descartar)
+    else:
+        buffer.adicionar(linhas, ao_descartar)
+    return len(linhas)
+
+
+class ResultadoGravacao(NamedTuple):
+    linhas: int
+    duplicadas: int
+
+
+class _Gravacao(NamedTuple):
+    linhas: list[dict]
+    gravar: list[dict]
+    reservadas: dict[tuple[str, Optional[int]], list[Optional[int]]]
+    duplicadas: int
+    sensores: dict[int, SensorResolvido]
+    comprimida: bool
+    # Estado do compressor antes da filtragem, restaurado se a gravação falhar
+    estado_compressao: dict
+
+
+def _preparar_gravacao(pendentes: list[tuple], sensores: dict[str, list[SensorResolvido]]) -> _Gravacao:
+    """Reserva as sequências, monta as linhas e aplica a compressão (ver gravar_leituras)."""
+    rastreador = obter_rastreador()
+
+    por_serial: dict[tuple[str, Optional[int]], list[tuple]] = {}
+    for leitura, recebido_em in pendentes:
+        if leitura.serial in sensores:
+            por_serial.setdefault((leitura.serial, leitura.boot), []).append((leitura, recebido_em))
+
+    linhas = []
+    reservadas: dict[tuple[str, Optional[int]], list[Optional[int]]] = {}
+    duplicadas = 0
+
+    for (serial, boot), leituras in por_serial.items():
+        sequencias = [leitura.sequencia for leitura, _ in leituras]
+        aceitas = rastreador.reservar(serial, sequencias, boot)
+        reservadas[(serial, boot)] = [sequencia for sequencia, aceita in zip(sequencias, aceitas) if aceita]
+
+        for (leitura, recebido_em), aceita in zip(leituras, aceitas):
+            if not aceita:
+                duplicadas += 1
+                continue
+            linhas.extend(montar_leituras(leitura, sensores[serial], leitura.data_leitura or recebido_em))
+
+    por_id = {sensor.sensor_id: sensor for serial, _ in por_serial for sensor in sensores[serial]}
+    compressor = obter_compressor()
+    estado_compressao = {}
+    gravar = linhas if compressor is None else compressor.filtrar(linhas, por_id, estado_compressao)
+
+    return _Gravacao(linhas, gravar, reservadas, duplicadas, por_id, compressor is not None, estado_compressao)
+
+
+def _liberar_sequencias(reservadas: dict[tuple[str, Optional[int]], list[Optional[int]]]):
+    """Libera as sequências reservadas, para que o reenvio das leituras seja aceito."""
+    rastreador = obter_rastreador()
+    for (serial, boot), sequencias in reservadas.items():
+        rastreador.liberar(serial, sequencias, boot)
+
+
+def _desfazer_gravacao(gravacao: _Gravacao):
+    """Libera as sequências e restaura o estado do compressor de uma gravação que falhou."""
+    _liberar_sequencias(gravacao.reservadas)
+
+    compressor = obter_compressor()
+    if compressor is not None and gravacao.estado_compressao:
+        compressor.restaurar(gravacao.estado_compressao)
+
+
+def _concluir_gravacao(gravacao: _Gravacao, total: int) -> ResultadoGravacao:
+    """Atualiza o cache das leituras mais recentes e avalia os limiares das linhas gravadas."""
+    if gravacao.comprimida:
+        # As leituras descartadas pela compressão continuam sendo as mais recentes dos seus sensores
+        CacheUltimasLeituras.atualizar(gravacao.linhas)
+        total = len(gravacao.linhas)
+
+    avaliador = obter_avaliador()
+    if avaliador is not None and gravacao.linhas:
+        # Os limiares vêm com os sensores resolvidos pelo cache, sem consulta ao banco
+        avaliador.avaliar(gravacao.linhas, gravacao.sensores)
+
+    return ResultadoGravacao(total, gravacao.duplicadas)
+
+
+def gravar_leituras(pendentes: list[tuple], sensores: dict[str, list[SensorResolvido]]) -> ResultadoGravacao:
+    """
+    Descarta as leituras repetidas (pelo número de sequência do dispositivo), monta as linhas das
+    demais e as persiste. Cada leitura é datada com o instante informado pelo dispositivo ou,
+    se ausente, com o instante em que foi recebida. Com a compressão de leituras ativa, só são
+    gravadas as linhas necessárias para reconstruir o sinal. As linhas aceitas são avaliadas
+    contra os limiares dos sensores, se a avaliação de limiares estiver ativa.
+    Se a gravação falhar, as sequências são liberadas e o estado do compressor é restaurado, para que
+    o reenvio seja aceito e comprimido como se fosse a primeira vez. Com o buffer de escrita, as
+    sequências também são liberadas se o buffer descartar as linhas mais tarde.
+    :param pendentes: Pares (leitura, recebido_em); leitura com os atributos de LeituraRequest.
+    :param sensores: Sensores dos seriais das leituras; leituras de outros seriais são ignoradas.
+    :raises LimiteExcedidoError: Se não houver vaga de escrita no banco.
+    :raises BufferCheioError: Se o buffer estiver cheio e a política for rejeitar.
+    """
+    gravacao = _preparar_gravacao(pendentes, sensores)
+
+    try:
+        total = persistir_leituras(gravacao.gravar, partial(_liberar_sequencias, gravacao.reservadas)) if gravacao.gravar else 0
+    except Exception:
+        _desfazer_gravacao(gravacao)
+        raise
+
+    return _concluir_gravacao(gravacao, total)
+
+
+async def gravar_leituras_async(pendentes: list[tuple], sensores: dict[str, list[SensorResolvido]]) -> ResultadoGravacao:
+    """
+    Versão assíncrona de gravar_leituras, para as rotas `async def`: as linhas são persistidas
+    por persistir_leituras_async. Os parâmetros, o retorno e as exceções são os de gravar_leituras.
+    """
+    gravacao = _preparar_gravacao(pendentes, sensores)
+
+    try:
+        total = await persistir_leituras_async(gravacao.gravar, partial(_liberar_sequencias, gravacao.reservadas)) if gravacao.gravar else 0
+    except BaseException:
+        # Inclui o cancelamento da requisição, para que o reenvio seja aceito
+        _desfazer_gravacao(gravacao)
+        raise
+
+    return _concluir_gravacao(gravacao, total)
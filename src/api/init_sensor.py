@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from src.database.models.sensor import Sensor, TipoSensor, TipoSensorEnum
 from src.database.tipos_base.database import Database
+from src.api.cache_sensores import CacheSensores, SensorResolvido
 from fastapi import APIRouter
 
 init_router = APIRouter()
@@ -9,64 +10,107 @@ init_router = APIRouter()
 class InitSensorRequest(BaseModel):
     serial: str
 
-@init_router.post('/')
-def init_sensor(request:InitSensorRequest):
+
+# Prefixo das chaves de limiar na resposta do /init, por tipo de sensor
+PREFIXO_LIMIAR: dict[TipoSensorEnum, str] = {
+    TipoSensorEnum.VIBRACAO: 'vibration',
+    TipoSensorEnum.TEMPERATURA: 'temperature',
+    TipoSensorEnum.LUX: 'lux',
+}
+
+
+def _tipos_faltantes(sensores: list[SensorResolvido]) -> set[TipoSensorEnum]:
+    return set(TipoSensorEnum) - {sensor.tipo for sensor in sensores}
+
+
+def cadastrar_dispositivos(seriais: list[str]) -> dict[str, list[SensorResolvido]]:
     """
-    Cadastra o Sensor na base de dados
+    Cadastra um sensor de cada tipo para os seriais informados, em uma única transação.
+    Seriais já cadastrados são resolvidos pelo cache, sem acessar o banco; para os demais,
+    os tipos e os sensores faltantes são criados com bulk upsert, de modo que dispositivos
+    se registrando ao mesmo tempo (ex.: após uma queda de energia) não geram uma transação por sensor
+    nem falham por cadastro duplicado.
+    :param seriais: Seriais dos dispositivos.
+    :return: Dicionário {serial: [SensorResolvido, ...]} com os sensores de cada serial.
     """
+    sensores = CacheSensores.obter(set(seriais))
+    faltantes = {serial: _tipos_faltantes(sensores.get(serial, [])) for serial in seriais}
+    faltantes = {serial: tipos for serial, tipos in faltantes.items() if tipos}
 
-    response:dict[str, str] = {
-        "status": "success",
-        "message": "ESP32 iniciado com sucesso"
-    }
+    if not faltantes:
+        return sensores
 
     with Database.get_session() as session:
+        tipos = dict(session.query(TipoSensor.tipo, TipoSensor.id).all())
+        tipos_novos = [{'tipo': tipo, 'nome': str(tipo)} for tipo in TipoSensorEnum if tipo not in tipos]
+
+        if tipos_novos:
+            TipoSensor.bulk_upsert(tipos_novos, ['nome'], session=session)
+            tipos = dict(session.query(TipoSensor.tipo, TipoSensor.id).all())
+
+        Sensor.bulk_upsert([
+            {
+                'nome': f"Sensor {tipo.value} - {serial}",
+                'cod_serial': serial,
+                'tipo_sensor_id': tipos[tipo],
+                'descricao': "Sensor cadastrado via API",
+            }
+            for serial, tipos_serial in faltantes.items()
+            for tipo in TipoSensorEnum if tipo in tipos_serial
+        ], ['nome'], session=session)
 
-        for tipo in TipoSensorEnum:
-            # Verifica se o tipo de sensor já existe
-            tipo_sensor = session.query(TipoSensor).filter(
-                TipoSensor.tipo == tipo.value
-            ).first()
+        session.commit()
 
-            if not tipo_sensor:
-                # Cria o tipo de sensor se não existir
-                tipo_sensor = TipoSensor(tipo=tipo.value, nome=str(tipo))
-                session.add(tipo_sensor)
-                session.commit()
+    # O bulk upsert não dispara os eventos do ORM que invalidam o cache
+    for serial in faltantes:
+        CacheSensores.invalidar(serial)
 
+    sensores.update(CacheSensores.obter(set(faltantes)))
+    return sensores
 
-            old_sensor = session.query(Sensor).filter(
-                Sensor.cod_serial == request.serial,
-                Sensor.tipo_sensor_id == tipo_sensor.id
-            ).first()
 
-            if not old_sensor:
+def _limiares(sensores: list[SensorResolvido]) -> dict[str, float | None]:
+    """
+    Limiares de manutenção de cada tipo de sensor do dispositivo, no formato da resposta do /init.
+    """
+    limiares = {}
 
-                new_sensor = Sensor(
-                    nome=f"Sensor {tipo.value} - {request.serial}",
-                    cod_serial=request.serial,
-                    tipo_sensor_id=tipo_sensor.id,
-                    descricao="Sensor cadastrado via API",
-                )
+    for tipo, prefixo in PREFIXO_LIMIAR.items():
+        sensor = next((sensor for sensor in sensores if sensor.tipo == tipo), None)
+        limiares[f'{prefixo}_threshold_min'] = None if sensor is None else sensor.limiar_menor
+        limiares[f'{prefixo}_threshold_max'] = None if sensor is None else sensor.limiar_maior
 
-                session.add(new_sensor)
+    return limiares
 
-            if tipo == TipoSensorEnum.VIBRACAO:
-                response['vibration_threshold_min'] = None if not old_sensor else old_sensor.limiar_manutencao_menor
-                response['vibration_threshold_max'] = None if not old_sensor else old_sensor.limiar_manutencao_maior
 
-            elif tipo == TipoSensorEnum.TEMPERATURA:
-                response['temperature_threshold_min'] = None if not old_sensor else old_sensor.limiar_manutencao_menor
-                response['temperature_threshold_max'] = None if not old_sensor else old_sensor.limiar_manutencao_maior
+@init_router.post('/')
+def init_sensor(request:InitSensorRequest):
+    """
+    Cadastra o Sensor na base de dados
+    """
+    sensores = cadastrar_dispositivos([request.serial])
 
-            elif tipo == TipoSensorEnum.LUX:
-                response['lux_threshold_min'] = None if not old_sensor else old_sensor.limiar_manutencao_menor
-                response['lux_threshold_max'] = None if not old_sensor else old_sensor.limiar_manutencao_maior
+    return {
+        "status": "success",
+        "message": "ESP32 iniciado com sucesso",
+        **_limiares(sensores.get(request.serial, [])),
+    }
 
 
-        session.commit()
+@init_router.post('/batch')
+def init_sensores_batch(requests: list[InitSensorRequest]):
+    """
+    Cadastra vários dispositivos de uma vez (ex.: um gateway registrando os dispositivos conectados a ele).
+    Retorna os limiares de cada serial, no mesmo formato da rota /init.
+    """
+    seriais = list(dict.fromkeys(request.serial for request in requests))
+    sensores = cadastrar_dispositivos(seriais)
 
-    return response
+    return {
+        "status": "success",
+        "message": f"{len(seriais)} dispositivos iniciados com sucesso",
+        "dispositivos": {serial: _limiares(sensores.get(serial, [])) for serial in seriais},
+    }
 
 
 @init_router.get('/test')
@@ -0,0 +1,283 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+
+class LimiteExcedidoError(Exception):
+    """
+    Lançada quando a requisição deve ser recusada com 429.
+    :param retry_after: Segundos que o cliente deve aguardar antes de tentar novamente.
+    """
+
+    def __init__(self, mensagem: str, retry_after: float):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+def _acordar(futuro: asyncio.Future):
+    if not futuro.done():
+        futuro.set_result(None)
+
+
+class LimitadorIngestao:
+    """
+    Controle de admissão da ingestão de leituras.
+
+    - Um token bucket por serial limita quantas leituras cada dispositivo pode enviar por segundo,
+      permitindo rajadas de até `rajada` leituras. Os canais de alta frequência (UDP e WebSocket),
+      usados por dispositivos que enviam dezenas de leituras por segundo, têm um bucket próprio por
+      serial, com taxa e rajada próprias.
+    - Um semáforo global limita quantas escritas no banco ficam em andamento ao mesmo tempo.
+
+    Assim um dispositivo com defeito, enviando em loop, não consegue esgotar os recursos da API.
+
+    Os buckets ficam em ordem de uso: a cada consumo, os mais antigos que já estariam cheios de novo
+    (equivalentes a um dispositivo novo) são descartados, e acima de `max_dispositivos` o menos usado
+    recentemente é descartado, de modo que seriais inventados não fazem a memória crescer sem limite.
+    Os limites são por processo: com vários workers, cada um mantém os seus buckets e o seu semáforo.
+    """
+
+    def __init__(self,
+                 leituras_por_segundo: float = 10.0,
+                 rajada: int = 50,
+                 leituras_por_segundo_alta_frequencia: float = 200.0,
+                 rajada_alta_frequencia: int = 1000,
+                 max_escritas_simultaneas: int = 32,
+                 espera_escrita_ms: int = 100,
+                 max_dispositivos: int = 100000,
+                 ):
+        """
+        :param leituras_por_segundo: Taxa de reposição do bucket de cada serial. 0 desabilita o limite por dispositivo.
+        :param rajada: Capacidade do bucket (leituras aceitas de uma vez).
+        :param leituras_por_segundo_alta_frequencia: Taxa dos canais de alta frequência. 0 desabilita o limite nesses canais.
+        :param rajada_alta_frequencia: Capacidade do bucket dos canais de alta frequência.
+        :param max_escritas_simultaneas: Escritas no banco em andamento ao mesmo tempo. 0 desabilita o limite.
+        :param espera_escrita_ms: Tempo de espera por uma vaga de escrita antes de recusar a requisição.
+        :param max_dispositivos: Quantidade máxima de buckets mantidos em memória.
+        """
+        self.leituras_por_segundo = leituras_por_segundo
+        self.rajada = rajada
+        self.leituras_por_segundo_alta_frequencia = leituras_por_segundo_alta_frequencia
+        self.rajada_alta_frequencia = rajada_alta_frequencia
+        self.max_escritas_simultaneas = max_escritas_simultaneas
+        self.espera_escrita_ms = espera_escrita_ms
+        self.max_dispositivos = max_dispositivos
+
+        # (serial, alta_frequencia) -> [tokens disponíveis, instante da última atualização], do menos
+        # para o mais recentemente usado
+        self._buckets: dict[tuple[str, bool], list[float]] = {}
+        self._lock = threading.Lock()
+        self._semaforo = threading.BoundedSemaphore(max_escritas_simultaneas) if max_escritas_simultaneas > 0 else None
+        # Corrotinas aguardando uma vaga de escrita: (event loop, future acordado quando uma vaga é liberada)
+        self._esperas_async: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+        self._aceitas = 0
+        self._limitadas_dispositivo = 0
+        self._limitadas_alta_frequencia = 0
+        self._limitadas_concorrencia = 0
+        self._escritas_em_andamento = 0
+
+    def _taxa(self, alta_frequencia: bool) -> tuple[float, int]:
+        if alta_frequencia:
+            return self.leituras_por_segundo_alta_frequencia, self.rajada_alta_frequencia
+        return self.leituras_por_segundo, self.rajada
+
+    def consumir(self, serial: str, quantidade: int = 1, alta_frequencia: bool = False):
+        """
+        Consome `quantidade` tokens do bucket do serial.
+        :param alta_frequencia: Usa o bucket dos canais de alta frequência (UDP e WebSocket).
+        :raises LimiteExcedidoError: Se o dispositivo excedeu a taxa permitida.
+        """
+        leituras_por_segundo, rajada = self._taxa(alta_frequencia)
+        if leituras_por_segundo <= 0:
+            return
+
+        agora = time.monotonic()
+        chave = (serial, alta_frequencia)
+
+        with self._lock:
+            bucket = self._buckets.pop(chave, None)
+
+            if bucket is None:
+                bucket = [float(rajada), agora]
+            else:
+                bucket[0] = min(rajada, bucket[0] + (agora - bucket[1]) * leituras_por_segundo)
+                bucket[1] = agora
+
+            self._descartar_ociosos(agora)
+            self._buckets[chave] = bucket
+
+            # Lotes maiores que a rajada são aceitos com o bucket cheio e deixam o saldo negativo,
+            # o que mantém a taxa média sem impedir o envio de leituras acumuladas.
+            necessario = min(quantidade, rajada)
+
+            if bucket[0] >= necessario:
+                bucket[0] -= quantidade
+                self._aceitas += quantidade
+                return
+
+            if alta_frequencia:
+                self._limitadas_alta_frequencia += quantidade
+            else:
+                self._limitadas_dispositivo += quantidade
+            faltante = necessario - bucket[0]
+
+        raise LimiteExcedidoError(
+            f"Limite de {leituras_por_segundo} leituras/s excedido para o serial '{serial}'.",
+            retry_after=faltante / leituras_por_segundo,
+        )
+
+    def _descartar_ociosos(self, agora: float):
+        # Buckets que já estariam cheios de novo equivalem a um dispositivo novo e podem ser descartados;
+        # como o dicionário está em ordem de uso, basta olhar o início dele
+        buckets = self._buckets
+        while buckets:
+            chave, (tokens, ultimo) = next(iter(buckets.items()))
+            leituras_por_segundo, rajada = self._taxa(chave[1])
+            if tokens + (agora - ultimo) * leituras_por_segundo < rajada and len(buckets) < self.max_dispositivos:
+                break
+            del buckets[chave]
+
+    @contextmanager
+    def escrita(self):
+        """
+        Reserva uma vaga de escrita no banco durante o bloco.
+        :raises LimiteExcedidoError: Se nenhuma vaga foi liberada dentro de `espera_escrita_ms`.
+        """
+        if self._semaforo is None:
+            yield
+            return
+
+        if not self._semaforo.acquire(timeout=self.espera_escrita_ms / 1000):
+            self._recusar_escrita()
+
+        self._iniciar_escrita()
+        try:
+            yield
+        finally:
+            self._terminar_escrita()
+
+    @asynccontextmanager
+    async def escrita_async(self):
+        """
+        Versão de `escrita` para corrotinas: a espera por uma vaga não bloqueia o event loop.
+        As vagas são as mesmas de `escrita`, compartilhadas com as gravações feitas em threads.
+        :raises LimiteExcedidoError: Se nenhuma vaga foi liberada dentro de `espera_escrita_ms`.
+        """
+        if self._semaforo is None:
+            yield
+            return
+
+        # O semáforo é de threads: sem vaga, a corrotina aguarda ser acordada por uma liberação
+        # (de uma thread ou de outra corrotina) e tenta de novo, até o prazo
+        loop = asyncio.get_running_loop()
+        prazo = loop.time() + self.espera_escrita_ms / 1000
+        while not self._semaforo.acquire(blocking=False):
+            restante = prazo - loop.time()
+            if restante <= 0:
+                self._recusar_escrita()
+
+            espera = (loop, loop.create_future())
+            with self._lock:
+                self._esperas_async.append(espera)
+            try:
+                # Uma vaga liberada antes do registro da espera não a acordaria
+                if self._semaforo.acquire(blocking=False):
+                    break
+                await asyncio.wait_for(espera[1], restante)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._lock:
+                    if espera in self._esperas_async:
+                        self._esperas_async.remove(espera)
+
+        self._iniciar_escrita()
+        try:
+            yield
+        finally:
+            self._terminar_escrita()
+
+    def _recusar_escrita(self):
+        with self._lock:
+            self._limitadas_concorrencia += 1
+        raise LimiteExcedidoError("Muitas escritas simultâneas no banco de dados.", retry_after=1)
+
+    def _iniciar_escrita(self):
+        with self._lock:
+            self._escritas_em_andamento += 1
+
+    def _terminar_escrita(self):
+        with self._lock:
+            self._escritas_em_andamento -= 1
+            esperas, self._esperas_async = self._esperas_async, []
+        self._semaforo.release()
+
+        # Acorda todas as corrotinas em espera; a que não conseguir a vaga volta a aguardar
+        for loop, futuro in esperas:
+            try:
+                loop.call_soon_threadsafe(_acordar, futuro)
+            except RuntimeError:
+                # event loop já encerrado
+                pass
+
+    def estatisticas(self) -> dict:
+        """Retorna os contadores do limitador."""
+        return {
+            "leituras_por_segundo": self.leituras_por_segundo,
+            "rajada": self.rajada,
+            "leituras_por_segundo_alta_frequencia": self.leituras_por_segundo_alta_frequencia,
+            "rajada_alta_frequencia": self.rajada_alta_frequencia,
+            "max_escritas_simultaneas": self.max_escritas_simultaneas,
+            "dispositivos_rastreados": len(self._buckets),
+            "leituras_aceitas": self._aceitas,
+            "leituras_limitadas_dispositivo": self._limitadas_dispositivo,
+            "leituras_limitadas_alta_frequencia": self._limitadas_alta_frequencia,
+            "requisicoes_limitadas_concorrencia": self._limitadas_concorrencia,
+            "escritas_em_andamento": self._escritas_em_andamento,
+        }
+
+
+_limitador: Optional[LimitadorIngestao] = None
+
+
+def obter_limitador() -> LimitadorIngestao:
+    """
+    Retorna o limitador da API, criando-o a partir das variáveis de ambiente na primeira chamada.
+
+    Variáveis de ambiente:
+    - API_LIMITE_LEITURAS_POR_SEGUNDO: leituras/s por serial, 0 desabilita (padrão: 10).
+    - API_LIMITE_RAJADA: leituras aceitas de uma vez por serial (padrão: 50).
+    - API_LIMITE_ALTA_FREQUENCIA_LEITURAS_POR_SEGUNDO: leituras/s por serial nos canais UDP e WebSocket,
+      0 desabilita (padrão: 200).
+    - API_LIMITE_ALTA_FREQUENCIA_RAJADA: leituras aceitas de uma vez por serial nos canais UDP e WebSocket (padrão: 1000).
+    - API_MAX_ESCRITAS_SIMULTANEAS: escritas no banco em andamento, 0 desabilita (padrão: 32).
+    - API_ESPERA_ESCRITA_MS: espera por uma vaga de escrita antes de responder 429 (padrão: 100).
+    """
+    global _limitador
+
+    if _limitador is None:
+        _limitador = LimitadorIngestao(
+            leituras_por_segundo=float(os.environ.get("API_LIMITE_LEITURAS_POR_SEGUNDO", 10)),
+            rajada=int(os.environ.get("API_LIMITE_RAJADA", 50)),
+            leituras_por_segundo_alta_frequencia=float(os.environ.get("API_LIMITE_ALTA_FREQUENCIA_LEITURAS_POR_SEGUNDO", 200)),
+            rajada_alta_frequencia=int(os.environ.get("API_LIMITE_ALTA_FREQUENCIA_RAJADA", 1000)),
+            max_escritas_simultaneas=int(os.environ.get("API_MAX_ESCRITAS_SIMULTANEAS", 32)),
+            espera_escrita_ms=int(os.environ.get("API_ESPERA_ESCRITA_MS", 100)),
+        )
+
+    return _limitador
+
+
+def resetar_limitador():
+    """Descarta o limitador atual; o próximo obter_limitador() lê novamente as variáveis de ambiente."""
+    global _limitador
+    _limitador = None
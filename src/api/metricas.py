@@ -0,0 +1,480 @@
+"""
+Métricas da API no formato de exposição de texto do Prometheus (GET /metrics).
+
+Os contadores e histogramas são fragmentados por thread: cada thread do servidor incrementa apenas
+o seu próprio fragmento, sem lock, e os fragmentos são somados somente quando as métricas são lidas.
+Valores instantâneos (profundidade do buffer, contadores do cache) vêm de coletores chamados na leitura.
+
+Com vários workers (src/api/servidor.py), se a variável API_METRICAS_DIR estiver definida, cada worker
+grava periodicamente um resumo das suas métricas nesse diretório e a leitura de /metrics soma os
+resumos de todos os workers, qualquer que seja o worker que atenda a requisição. O worker remove o seu
+resumo ao parar; resumos de processos que não existem mais ou que não são atualizados há mais de
+três intervalos (ex.: worker morto com SIGKILL) são ignorados.
+"""
+import bisect
+import glob
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE_METRICAS = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Fragmento:
+    __slots__ = ('contadores', 'histogramas')
+
+    def __init__(self):
+        # (nome, rótulos) -> valor
+        self.contadores: dict[tuple, float] = {}
+        # (nome, rótulos) -> [contagem por bucket..., contagem acima do último bucket, soma]
+        self.histogramas: dict[tuple, list[float]] = {}
+
+
+def _rotulos(rotulos: dict) -> tuple:
+    return tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatar_rotulos(rotulos: Iterable, extra: Optional[tuple] = None) -> str:
+    pares = list(rotulos) + ([extra] if extra else [])
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in pares) + "}"
+
+
+def _formatar_valor(valor: float) -> str:
+    if valor == float('inf'):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class RegistroMetricas:
+    """
+    Registro das métricas de um processo.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._fragmentos: list[_Fragmento] = []
+        self._lock = threading.Lock()
+
+        # nome -> (tipo, ajuda, buckets)
+        self._descricoes: dict[str, tuple[str, str, Optional[tuple]]] = {}
+        self._coletores: list[Callable[[], Iterable[tuple[str, dict, float]]]] = []
+        # nome -> (ajuda, numerador, [parcelas do denominador])
+        self._razoes: dict[str, tuple[str, str, list[str]]] = {}
+
+    def contador(self, nome: str, ajuda: str):
+        """Declara um contador (valor que só aumenta)."""
+        self._descricoes[nome] = ("counter", ajuda, None)
+
+    def gauge(self, nome: str, ajuda: str):
+        """Declara um gauge (valor instantâneo, informado por um coletor)."""
+        self._descricoes[nome] = ("gauge", ajuda, None)
+
+    def histograma(self, nome: str, ajuda: str, buckets: tuple = BUCKETS_PADRAO):
+        """Declara um histograma com os limites superiores `buckets`."""
+        self._descricoes[nome] = ("histogram", ajuda, tuple(sorted(buckets)))
+
+    def razao(self, nome: str, ajuda: str, numerador: str, parcelas: list[str]):
+        """
+        Declara um gauge calculado na leitura como numerador / soma(parcelas), depois de somados
+        os valores de todos os workers (ex.: taxa de acerto do cache = hits / (hits + misses)).
+        """
+        self._razoes[nome] = (ajuda, numerador, parcelas)
+
+    def registrar_coletor(self, coletor: Callable[[], Iterable[tuple[str, dict, float]]]):
+        """
+        Registra uma função chamada a cada leitura, que retorna tuplas (nome, rótulos, valor)
+        de métricas já declaradas.
+        """
+        self._coletores.append(coletor)
+
+    def _fragmento(self) -> _Fragmento:
+        fragmento = getattr(self._local, 'fragmento', None)
+        if fragmento is None:
+            fragmento = _Fragmento()
+            self._local.fragmento = fragmento
+            with self._lock:
+                self._fragmentos.append(fragmento)
+        return fragmento
+
+    def incrementar(self, nome: str, valor: float = 1, **rotulos):
+        """Soma `valor` ao contador `nome` com os rótulos informados."""
+        contadores = self._fragmento().contadores
+        chave = (nome, _rotulos(rotulos))
+        contadores[chave] = contadores.get(chave, 0) + valor
+
+    def observar(self, nome: str, valor: float, **rotulos):
+        """Registra uma observação (ex.: duração em segundos) no histograma `nome`."""
+        histogramas = self._fragmento().histogramas
+        chave = (nome, _rotulos(rotulos))
+        buckets = self._descricoes[nome][2]
+
+        contagens = histogramas.get(chave)
+        if contagens is None:
+            contagens = [0] * (len(buckets) + 2)
+            histogramas[chave] = contagens
+
+        contagens[bisect.bisect_left(buckets, valor)] += 1
+        contagens[-1] += valor
+
+    def resumo(self) -> dict:
+        """
+        Soma os fragmentos de todas as threads e os valores dos coletores.
+        :return: {"contadores": {nome: {rótulos: valor}}, "histogramas": {...}, "gauges": {...}},
+                 com os rótulos serializados em JSON.
+        """
+        resumo = {"contadores": {}, "histogramas": {}, "gauges": {}}
+
+        with self._lock:
+            fragmentos = list(self._fragmentos)
+
+        for fragmento in fragmentos:
+            # dict.copy() é atômico, então a thread dona do fragmento pode continuar incrementando
+            for (nome, rotulos), valor in fragmento.contadores.copy().items():
+                series = resumo["contadores"].setdefault(nome, {})
+                chave = json.dumps(rotulos)
+                series[chave] = series.get(chave, 0) + valor
+
+            for (nome, rotulos), contagens in fragmento.histogramas.copy().items():
+                series = resumo["histogramas"].setdefault(nome, {})
+                chave = json.dumps(rotulos)
+                atual = series.setdefault(chave, [0] * len(contagens))
+                for i, contagem in enumerate(list(contagens)):
+                    atual[i] += contagem
+
+        for coletor in self._coletores:
+            try:
+                valores = list(coletor())
+            except Exception:
+                logger.exception("Erro ao coletar métricas.")
+                continue
+
+            for nome, rotulos, valor in valores:
+                grupo = "contadores" if self._descricoes[nome][0] == "counter" else "gauges"
+                series = resumo[grupo].setdefault(nome, {})
+                chave = json.dumps(_rotulos(rotulos))
+                series[chave] = series.get(chave, 0) + valor
+
+        return resumo
+
+    @staticmethod
+    def somar_resumos(resumos: list[dict]) -> dict:
+        """Soma os resumos de vários processos."""
+        total = {"contadores": {}, "histogramas": {}, "gauges": {}}
+
+        for resumo in resumos:
+            for grupo in ("contadores", "gauges"):
+                for nome, series in resumo.get(grupo, {}).items():
+                    destino = total[grupo].setdefault(nome, {})
+                    for chave, valor in series.items():
+                        destino[chave] = destino.get(chave, 0) + valor
+
+            for nome, series in resumo.get("histogramas", {}).items():
+                destino = total["histogramas"].setdefault(nome, {})
+                for chave, contagens in series.items():
+                    atual = destino.setdefault(chave, [0] * len(contagens))
+                    for i, contagem in enumerate(contagens):
+                        atual[i] += contagem
+
+        return total
+
+    def exportar(self, resumo: Optional[dict] = None) -> str:
+        """
+        Gera o texto no formato de exposição do Prometheus.
+        :param resumo: Resumo a exportar; se None, o resumo deste processo.
+        """
+        resumo = self.resumo() if resumo is None else resumo
+        linhas = []
+
+        for nome, (tipo, ajuda, buckets) in sorted(self._descricoes.items()):
+            grupo = {"counter": "contadores", "gauge": "gauges", "histogram": "histogramas"}[tipo]
+            series = resumo[grupo].get(nome)
+            if not series:
+                continue
+
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+            for chave, valor in sorted(series.items()):
+                rotulos = [tuple(par) for par in json.loads(chave)]
+
+                if tipo != "histogram":
+                    linhas.append(f"{nome}{_formatar_rotulos(rotulos)} {_formatar_valor(valor)}")
+                    continue
+
+                acumulado = 0
+                for limite, contagem in zip(list(buckets) + [float('inf')], valor[:-1]):
+                    acumulado += contagem
+                    linhas.append(f"{nome}_bucket{_formatar_rotulos(rotulos, ('le', _formatar_valor(limite)))} {_formatar_valor(acumulado)}")
+                linhas.append(f"{nome}_sum{_formatar_rotulos(rotulos)} {_formatar_valor(valor[-1])}")
+                linhas.append(f"{nome}_count{_formatar_rotulos(rotulos)} {_formatar_valor(acumulado)}")
+
+        for nome, (ajuda, numerador, parcelas) in sorted(self._razoes.items()):
+            def total(metrica: str) -> float:
+                return sum(resumo["contadores"].get(metrica, {}).values()) + sum(resumo["gauges"].get(metrica, {}).values())
+
+            denominador = sum(total(parcela) for parcela in parcelas)
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} gauge")
+            linhas.append(f"{nome} {_formatar_valor(total(numerador) / denominador if denominador else 0.0)}")
+
+        return "\n".join(linhas) + "\n"
+
+
+registro = RegistroMetricas()
+
+registro.contador("api_requisicoes_total", "Requisições HTTP atendidas, por rota, método e status.")
+registro.histograma("api_requisicao_duracao_segundos", "Duração das requisições HTTP, por rota e método.")
+registro.histograma("db_commit_duracao_segundos", "Duração dos commits no banco de dados.")
+registro.contador("ingestao_linhas_inseridas_total", "Linhas inseridas em LEITURA_SENSOR (use rate() para linhas/s).")
+registro.histograma("ingestao_insercao_duracao_segundos", "Duração de cada inserção em lote de leituras.")
+registro.contador("db_pool_checkouts_total", "Conexões retiradas do pool.")
+registro.contador("db_pool_conexoes_criadas_total", "Conexões novas abertas pelo pool.")
+registro.contador("db_pool_invalidacoes_total", "Conexões descartadas pelo pool (ex.: falha no pre-ping).")
+registro.histograma("db_pool_uso_conexao_segundos", "Tempo entre a retirada de uma conexão do pool e a sua devolução.")
+
+
+@event.listens_for(Session, "before_commit")
+def _inicio_commit(session):
+    session.info['_metricas_inicio_commit'] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _fim_commit(session):
+    inicio = session.info.pop('_metricas_inicio_commit', None)
+    if inicio is not None:
+        registro.observar("db_commit_duracao_segundos", time.perf_counter() - inicio)
+
+
+@event.listens_for(Session, "after_rollback")
+def _rollback(session):
+    session.info.pop('_metricas_inicio_commit', None)
+
+
+@event.listens_for(Pool, "connect")
+def _conexao_criada(dbapi_connection, connection_record):
+    registro.incrementar("db_pool_conexoes_criadas_total")
+
+
+@event.listens_for(Pool, "checkout")
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info['_metricas_checkout'] = time.perf_counter()
+    registro.incrementar("db_pool_checkouts_total")
+
+
+@event.listens_for(Pool, "checkin")
+def _checkin(dbapi_connection, connection_record):
+    inicio = connection_record.info.pop('_metricas_checkout', None)
+    if inicio is not None:
+        registro.observar("db_pool_uso_conexao_segundos", time.perf_counter() - inicio)
+
+
+@event.listens_for(Pool, "invalidate")
+def _invalidada(dbapi_connection, connection_record, exception):
+    registro.incrementar("db_pool_invalidacoes_total")
+
+
+def medir_insercao(inserir: Callable[[list[dict]], int]) -> Callable[[list[dict]], int]:
+    """
+    Envolve uma função de inserção em lote de leituras, registrando a duração e as linhas inseridas.
+    Aceita também funções assíncronas.
+    """
+    if inspect.iscoroutinefunction(inserir):
+        async def inserir_medindo_async(linhas: list[dict]) -> int:
+            inicio = time.perf_counter()
+            total = await inserir(linhas)
+            registro.observar("ingestao_insercao_duracao_segundos", time.perf_counter() - inicio)
+            registro.incrementar("ingestao_linhas_inseridas_total", total)
+            return total
+
+        return inserir_medindo_async
+
+    def inserir_medindo(linhas: list[dict]) -> int:
+        inicio = time.perf_counter()
+        total = inserir(linhas)
+        registro.observar("ingestao_insercao_duracao_segundos", time.perf_counter() - inicio)
+        registro.incrementar("ingestao_linhas_inseridas_total", total)
+        return total
+
+    return inserir_medindo
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que conta as requisições HTTP e mede a sua duração por rota.
+    A rota é o caminho declarado (ex.: /leitura/batch), não o caminho recebido, para limitar a
+    quantidade de séries; requisições que não correspondem a nenhuma rota são agrupadas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = 500
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            route = scope.get("route")
+            rota = getattr(route, "path", None) or "sem_rota"
+            metodo = scope.get("method", "")
+            registro.incrementar("api_requisicoes_total", rota=rota, metodo=metodo, status=status)
+            registro.observar("api_requisicao_duracao_segundos", time.perf_counter() - inicio, rota=rota, metodo=metodo)
+
+
+class _GravadorResumo:
+    """Grava periodicamente o resumo das métricas do processo em API_METRICAS_DIR."""
+
+    def __init__(self, diretorio: str, intervalo: float):
+        self.diretorio = diretorio
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def arquivo(self) -> str:
+        return os.path.join(self.diretorio, f"metricas-{os.getpid()}.json")
+
+    def gravar(self):
+        temporario = f"{self.arquivo}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(registro.resumo(), f)
+        os.replace(temporario, self.arquivo)
+
+    def iniciar(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._thread = threading.Thread(target=self._executar, name="metricas", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        try:
+            os.remove(self.arquivo)
+        except FileNotFoundError:
+            pass
+
+    def ativo(self, arquivo: str, agora: float) -> bool:
+        """
+        Indica se o resumo é de um worker em execução: o arquivo foi atualizado nos últimos três
+        intervalos e, fora do Windows, o processo do pid no nome do arquivo ainda existe.
+        """
+        try:
+            if os.path.getmtime(arquivo) < agora - 3 * self.intervalo:
+                return False
+        except OSError:
+            return False
+
+        if os.name == "nt":
+            # No Windows, os.kill(pid, 0) encerraria o processo
+            return True
+
+        try:
+            os.kill(int(os.path.basename(arquivo)[len("metricas-"):-len(".json")]), 0)
+        except (ValueError, ProcessLookupError):
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.gravar()
+            except OSError:
+                logger.exception("Erro ao gravar o resumo de métricas.")
+
+
+_gravador: Optional[_GravadorResumo] = None
+
+
+def iniciar_metricas_from_env():
+    """
+    Inicia a gravação periódica do resumo de métricas, se API_METRICAS_DIR estiver definida.
+
+    Variáveis de ambiente:
+    - API_METRICAS_DIR: diretório compartilhado pelos workers para somar as métricas (padrão: desabilitado).
+    - API_METRICAS_INTERVALO_S: intervalo entre gravações do resumo (padrão: 5).
+    """
+    global _gravador
+
+    diretorio = os.environ.get("API_METRICAS_DIR")
+    if not diretorio or _gravador is not None:
+        return
+
+    _gravador = _GravadorResumo(diretorio, float(os.environ.get("API_METRICAS_INTERVALO_S", 5)))
+    _gravador.iniciar()
+
+
+def parar_metricas():
+    """Para a gravação periódica e remove o resumo do processo."""
+    global _gravador
+
+    if _gravador is None:
+        return
+
+    _gravador.parar()
+    _gravador = None
+
+
+def limpar_metricas_dir():
+    """Remove os resumos de execuções anteriores; chamada pelo supervisor antes de iniciar os workers."""
+    diretorio = os.environ.get("API_METRICAS_DIR")
+    if not diretorio:
+        return
+
+    for arquivo in glob.glob(os.path.join(diretorio, "metricas-*.json")):
+        os.remove(arquivo)
+
+
+def exportar_metricas() -> str:
+    """
+    Texto de /metrics: as métricas deste processo ou, com API_METRICAS_DIR, a soma de todos os workers.
+    """
+    if _gravador is None:
+        return registro.exportar()
+
+    _gravador.gravar()
+
+    resumos = []
+    agora = time.time()
+    for arquivo in glob.glob(os.path.join(_gravador.diretorio, "metricas-*.json")):
+        if not _gravador.ativo(arquivo, agora):
+            continue
+        try:
+            with open(arquivo, encoding="utf-8") as f:
+                resumos.append(json.load(f))
+        except (OSError, ValueError):
+            # arquivo removido ou sendo substituído por outro worker
+            continue
+
+    return registro.exportar(RegistroMetricas.somar_resumos(resumos))
@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Response
+from src.api.alertas_limiar import obter_avaliador
+from src.api.cache_sensores import CacheSensores
+from src.api.compressao_leituras import obter_compressor
+from src.api.buffer_leituras import obter_buffer
+from src.api.limitador import obter_limitador
+from src.api.metricas import registro, exportar_metricas, CONTENT_TYPE_METRICAS
+from src.api.sequencia_dispositivos import obter_rastreador
+from src.api.ultimas_leituras import CacheUltimasLeituras
+from src.api.udp_leitura import obter_servidor_udp
+from src.database.tipos_base.database import Database
+
+monitoramento_router = APIRouter()
+metricas_router = APIRouter()
+
+registro.gauge("buffer_leituras_profundidade", "Linhas aguardando gravação no buffer de escrita.")
+registro.gauge("buffer_leituras_capacidade", "Capacidade do buffer de escrita, em linhas.")
+registro.contador("buffer_leituras_rejeicoes_total", "Requisições rejeitadas com o buffer cheio.")
+registro.contador("cache_sensores_hits_total", "Seriais resolvidos pelo cache de sensores.")
+registro.contador("cache_sensores_misses_total", "Seriais consultados no banco por não estarem no cache.")
+registro.contador("cache_sensores_invalidacoes_total", "Invalidações do cache de sensores.")
+registro.razao("cache_sensores_taxa_acerto", "Fração dos seriais resolvidos pelo cache.",
+               "cache_sensores_hits_total", ["cache_sensores_hits_total", "cache_sensores_misses_total"])
+registro.contador("ultimas_leituras_hits_total", "Sensores resolvidos pelo cache das leituras mais recentes.")
+registro.contador("ultimas_leituras_misses_total", "Sensores consultados no banco por não estarem no cache das leituras mais recentes.")
+registro.contador("limitador_leituras_limitadas_total", "Leituras recusadas pelo limite por dispositivo.")
+registro.contador("limitador_escritas_limitadas_total", "Requisições recusadas pelo limite de escritas simultâneas.")
+registro.gauge("limitador_escritas_em_andamento", "Escritas no banco em andamento.")
+registro.contador("alertas_limiar_total", "Alertas de violação de limiar emitidos na ingestão.")
+registro.contador("alertas_limiar_suprimidos_total", "Violações de limiar suprimidas pelo cooldown.")
+registro.contador("alertas_limiar_descartados_total", "Alertas de limiar descartados com a fila cheia.")
+registro.gauge("alertas_limiar_sensores_em_violacao", "Sensores com um limiar violado.")
+registro.gauge("db_pool_conexoes_em_uso", "Conexões do pool em uso.")
+registro.gauge("db_pool_conexoes_ociosas", "Conexões abertas disponíveis no pool.")
+registro.gauge("db_pool_overflow", "Conexões abertas além do tamanho do pool.")
+registro.contador("compressao_leituras_recebidas_total", "Linhas de leitura recebidas pela compressão.")
+registro.contador("compressao_leituras_gravadas_total", "Linhas de leitura mantidas pela compressão e gravadas.")
+registro.gauge("compressao_leituras_pendentes", "Leituras retidas pela compressão aguardando o próximo ponto.")
+
+
+def _coletar():
+    buffer = obter_buffer()
+    if buffer is not None:
+        estatisticas_buffer = buffer.estatisticas()
+        yield "buffer_leituras_profundidade", {}, estatisticas_buffer["profundidade"]
+        yield "buffer_leituras_capacidade", {}, estatisticas_buffer["capacidade"]
+        yield "buffer_leituras_rejeicoes_total", {}, estatisticas_buffer["rejeicoes"]
+
+    cache = CacheSensores.estatisticas()
+    yield "cache_sensores_hits_total", {}, cache["hits"]
+    yield "cache_sensores_misses_total", {}, cache["misses"]
+    yield "cache_sensores_invalidacoes_total", {}, cache["invalidacoes"]
+
+    ultimas = CacheUltimasLeituras.estatisticas()
+    yield "ultimas_leituras_hits_total", {}, ultimas["hits"]
+    yield "ultimas_leituras_misses_total", {}, ultimas["misses"]
+
+    limitador = obter_limitador().estatisticas()
+    yield "limitador_leituras_limitadas_total", {}, limitador["leituras_limitadas_dispositivo"]
+    yield "limitador_escritas_limitadas_total", {}, limitador["requisicoes_limitadas_concorrencia"]
+    yield "limitador_escritas_em_andamento", {}, limitador["escritas_em_andamento"]
+
+    pool = Database.estatisticas_pool() or {}
+    for metrica, chave in (("db_pool_conexoes_em_uso", "em_uso"), ("db_pool_conexoes_ociosas", "ociosas"),
+                           ("db_pool_overflow", "overflow")):
+        if chave in pool:
+            yield metrica, {}, pool[chave]
+    for engine in ("assincrono", "replica"):
+        if engine in pool:
+            yield "db_pool_conexoes_em_uso", {"engine": engine}, pool[engine]["em_uso"]
+            yield "db_pool_conexoes_ociosas", {"engine": engine}, pool[engine]["ociosas"]
+
+    avaliador = obter_avaliador()
+    if avaliador is not None:
+        alertas = avaliador.estatisticas()
+        yield "alertas_limiar_total", {}, alertas["alertas"]
+        yield "alertas_limiar_suprimidos_total", {}, alertas["suprimidos_cooldown"]
+        yield "alertas_limiar_descartados_total", {}, alertas["descartados"]
+        yield "alertas_limiar_sensores_em_violacao", {}, alertas["sensores_em_violacao"]
+
+    compressor = obter_compressor()
+    if compressor is not None:
+        compressao = compressor.estatisticas()
+        yield "compressao_leituras_recebidas_total", {}, compressao["linhas_recebidas"]
+        yield "compressao_leituras_gravadas_total", {}, compressao["linhas_gravadas"]
+        yield "compressao_leituras_pendentes", {}, compressao["pendentes"]
+
+
+registro.registrar_coletor(_coletar)
+
+
+@monitoramento_router.get('/')
+def estatisticas():
+    """
+    Retorna os contadores internos da API de ingestão.
+    """
+    buffer = obter_buffer()
+    servidor_udp = obter_servidor_udp()
+    avaliador = obter_avaliador()
+    compressor = obter_compressor()
+
+    return {
+        "pool_conexoes": Database.estatisticas_pool(),
+        "cache_sensores": CacheSensores.estatisticas(),
+        "ultimas_leituras": CacheUltimasLeituras.estatisticas(),
+        "buffer_leituras": None if buffer is None else buffer.estatisticas(),
+        "limitador": obter_limitador().estatisticas(),
+        "sequencia": obter_rastreador().estatisticas(),
+        "udp": None if servidor_udp is None else servidor_udp.estatisticas(),
+        "alertas_limiar": None if avaliador is None else avaliador.estatisticas(),
+        "compressao_leituras": None if compressor is None else compressor.estatisticas(),
+    }
+
+
+@metricas_router.get('/metrics')
+def metricas():
+    """
+    Métricas da API no formato de texto do Prometheus.
+    """
+    return Response(content=exportar_metricas(), media_type=CONTENT_TYPE_METRICAS)
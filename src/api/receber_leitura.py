@@ -1,75 +1,419 @@
-from pydantic import BaseModel
-from src.database.tipos_base.database import Database
-from src.database.models.sensor import Sensor, TipoSensor, TipoSensorEnum, LeituraSensor
-from datetime import datetime
-from fastapi import APIRouter
+import asyncio
+import json
+import logging
+import os
+import numpy as np
+from typing import Optional
+from pydantic import TypeAdapter, ValidationError
+from src.api.buffer_leituras import BufferCheioError
+from src.api.formato_binario import CONTENT_TYPE_BINARIO, PayloadBinarioInvalido, decodificar_leituras
+from src.api.cache_sensores import CacheSensores
+from src.api.limitador import obter_limitador, LimiteExcedidoError
+from src.api.ingestao import LeituraRequest, gravar_leituras, gravar_leituras_async, ResultadoGravacao
+from src.api.ultimas_leituras import CacheUltimasLeituras
+from src.logger.config import FiltroAmostragem
+from src.database.models.sensor import EixoAcelerometroEnum, FormaOndaSensor, TipoSensorEnum
+from collections import Counter
+from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Request, Depends, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
 
 receber_router = APIRouter()
 
+logger = logging.getLogger(__name__)
 
-class LeituraRequest(BaseModel):
-    serial: str
-    lux: float or None
-    temperatura: float or None
-    vibracao_media: float or None
-    acelerometro_x: float or None # não utilizado
-    acelerometro_y: float or None # não utilizado
-    acelerometro_z: float or None # não utilizado
+# Eventos por leitura (DEBUG) são amostrados: 1 a cada API_LOG_AMOSTRAGEM é registrado
+logger_leituras = logging.getLogger(f"{__name__}.leituras")
+logger_leituras.addFilter(FiltroAmostragem(int(os.environ.get("API_LOG_AMOSTRAGEM", 100))))
 
 
-@receber_router.post("/")
-def receber_leitura(request: LeituraRequest):
+_lista_leituras_adapter = TypeAdapter(list[LeituraRequest])
 
-    print(f"Recebendo leitura para o sensor com serial: {request.serial}", request)
+# Tamanho máximo do corpo de POST /leitura/forma_onda (16 MB: 4 milhões de amostras float32)
+MAX_CORPO_FORMA_ONDA_BYTES = int(float(os.environ.get("API_MAX_CORPO_FORMA_ONDA_MB", 16)) * 1024 * 1024)
+
+
+async def _ler_corpo_limitado(request: Request, limite: int) -> bytes:
+    """
+    Lê o corpo da requisição à medida que é recebido, sem guardar mais que `limite` bytes.
+    :raises HTTPException: 413 se o corpo (já descomprimido, se for o caso) passar do limite.
+    """
+    tamanho = request.headers.get('content-length', '')
+    if tamanho.isdigit() and int(tamanho) > limite:
+        raise HTTPException(status_code=413, detail=f"Corpo maior que o permitido ({limite} bytes).")
+
+    partes = []
+    total = 0
+    async for parte in request.stream():
+        total += len(parte)
+        if total > limite:
+            raise HTTPException(status_code=413, detail=f"Corpo maior que o permitido ({limite} bytes).")
+        partes.append(parte)
+
+    return b"".join(partes)
+
+
+async def _ler_leituras(request: Request) -> list[LeituraRequest]:
+    """
+    Lê as leituras do corpo da requisição de acordo com o Content-Type:
+    JSON (padrão) ou o formato binário compacto (ver src/api/formato_binario.py).
+    """
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    corpo = await request.body()
+
+    if content_type == CONTENT_TYPE_BINARIO:
+        try:
+            leituras = decodificar_leituras(corpo)
+        except PayloadBinarioInvalido as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Os valores já foram validados pela decodificação, não é necessário validar novamente
+        return [
+            LeituraRequest.model_construct(acelerometro_x=None, acelerometro_y=None, acelerometro_z=None, **leitura)
+            for leitura in leituras
+        ]
+
+    try:
+        if corpo.lstrip()[:1] == b'[':
+            return _lista_leituras_adapter.validate_json(corpo)
+        return [LeituraRequest.model_validate_json(corpo)]
+    except ValidationError as e:
+        raise RequestValidationError([{**erro, 'loc': ('body', *erro['loc'])} for erro in e.errors(include_url=False)])
+
+
+async def ler_leitura_unica(leituras: list[LeituraRequest] = Depends(_ler_leituras)) -> LeituraRequest:
+    if len(leituras) != 1:
+        raise HTTPException(status_code=400, detail=f"Esperada uma leitura, recebidas {len(leituras)}. Use /leitura/batch.")
+    return leituras[0]
+
+
+def _corpo_openapi(schema: dict) -> dict:
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema},
+                CONTENT_TYPE_BINARIO: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    }
+
+
+def _erro_limite(erro: LimiteExcedidoError) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(erro), headers={"Retry-After": erro.retry_after_header})
+
+
+def _gravar_leituras(pendentes: list[tuple[LeituraRequest, datetime]], sensores: dict) -> ResultadoGravacao:
+    """
+    Grava as leituras (ver ingestao.gravar_leituras), convertendo as recusas em respostas HTTP.
+    """
+    try:
+        return gravar_leituras(pendentes, sensores)
+    except LimiteExcedidoError as e:
+        raise _erro_limite(e)
+    except BufferCheioError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def _gravar_leituras_async(pendentes: list[tuple[LeituraRequest, datetime]], sensores: dict) -> ResultadoGravacao:
+    """
+    Versão assíncrona de _gravar_leituras (ver ingestao.gravar_leituras_async).
+    """
+    try:
+        return await gravar_leituras_async(pendentes, sensores)
+    except LimiteExcedidoError as e:
+        raise _erro_limite(e)
+    except BufferCheioError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@receber_router.post("/", openapi_extra=_corpo_openapi(LeituraRequest.model_json_schema()))
+async def receber_leitura(request: LeituraRequest = Depends(ler_leitura_unica)):
+
+    logger_leituras.debug("Leitura recebida: serial=%s sequencia=%s", request.serial, request.sequencia,
+                          extra={"serial": request.serial, "sequencia": request.sequencia})
+
+    try:
+        obter_limitador().consumir(request.serial)
+    except LimiteExcedidoError as e:
+        raise _erro_limite(e)
 
     now = datetime.now()
 
-    with Database.get_session() as session:
-        sensores = session.query(Sensor).filter(Sensor.cod_serial == request.serial).filter().all()
-
-        if not sensores:
-            return {
-                "status": "error",
-                "message": f"Sensor com serial '{request.serial}' não encontrado."
-            }
-
-        for sensor in sensores:
-
-            tipo = session.query(TipoSensor).filter(TipoSensor.id == sensor.tipo_sensor_id).first()
-
-            if not tipo:
-                return {
-                    "status": "error",
-                    "message": f"Tipo de sensor para o sensor com serial '{request.serial}' não encontrado."
-                }
-
-            if tipo.tipo == TipoSensorEnum.LUX and request.lux is not None:
-                nova_leitura = LeituraSensor(
-                    sensor_id=sensor.id,
-                    data_leitura=now,
-                    valor= request.lux
-                )
-            elif tipo.tipo == TipoSensorEnum.TEMPERATURA and request.temperatura is not None:
-                nova_leitura = LeituraSensor(
-                    sensor_id=sensor.id,
-                    data_leitura=now,
-                    valor=request.temperatura
-                )
-            elif tipo.tipo == TipoSensorEnum.VIBRACAO and request.vibracao_media is not None:
-                nova_leitura = LeituraSensor(
-                    sensor_id=sensor.id,
-                    data_leitura=now,
-                    valor=request.vibracao_media
-                )
-            else:
-                continue
-            session.add(nova_leitura)
-            print('Nova leitura salva:', nova_leitura)
+    sensores = await CacheSensores.obter_async({request.serial})
 
-        session.commit()
+    if not sensores:
+        return {
+            "status": "error",
+            "message": f"Sensor com serial '{request.serial}' não encontrado."
+        }
 
+    resultado = await _gravar_leituras_async([(request, now)], sensores)
+
+    if resultado.duplicadas:
+        return {
+            "status": "success",
+            "message": f"Leitura com sequência {request.sequencia} já recebida; ignorada.",
+            "leituras_duplicadas": resultado.duplicadas,
+        }
+
+    logger_leituras.debug("Leituras salvas: serial=%s linhas=%d", request.serial, resultado.linhas,
+                          extra={"serial": request.serial, "linhas": resultado.linhas})
 
     return {
         "status": "success",
         "message": "Leitura recebida com sucesso",
     }
+
+
+@receber_router.post("/batch", openapi_extra=_corpo_openapi({"type": "array", "items": LeituraRequest.model_json_schema()}))
+async def receber_leituras_batch(requests: list[LeituraRequest] = Depends(_ler_leituras)):
+    """
+    Recebe várias leituras (de um ou mais dispositivos) em uma única requisição e
+    as persiste com um único insert em lote.
+    Aceita JSON ou o formato binário compacto (Content-Type application/x-leitura-binaria).
+    Leituras de seriais não cadastrados ou que excederam o limite de leituras por segundo
+    são ignoradas e informadas na resposta. Se todas excederem o limite, responde 429.
+    Leituras com data_leitura são gravadas com o instante do dispositivo, o que permite enviar
+    de uma vez leituras acumuladas; as com uma sequência já recebida são descartadas.
+    """
+
+    limitador = obter_limitador()
+    limitados: dict[str, LimiteExcedidoError] = {}
+
+    for serial, quantidade in Counter(request.serial for request in requests).items():
+        try:
+            limitador.consumir(serial, quantidade)
+        except LimiteExcedidoError as e:
+            limitados[serial] = e
+
+    if limitados:
+        requests = [request for request in requests if request.serial not in limitados]
+        if not requests:
+            raise _erro_limite(min(limitados.values(), key=lambda e: e.retry_after))
+
+    now = datetime.now()
+
+    sensores = await CacheSensores.obter_async({request.serial for request in requests})
+
+    nao_encontrados = {request.serial for request in requests if request.serial not in sensores}
+
+    resultado = await _gravar_leituras_async([(request, now) for request in requests], sensores)
+
+    return {
+        "status": "success",
+        "message": f"{len(requests)} leituras recebidas com sucesso",
+        "leituras_salvas": resultado.linhas,
+        "leituras_duplicadas": resultado.duplicadas,
+        "seriais_nao_encontrados": sorted(nao_encontrados),
+        "seriais_limitados": sorted(limitados),
+    }
+
+
+@receber_router.get("/latest")
+async def leituras_mais_recentes(sensor_id: list[int] = Query(..., min_length=1, max_length=1000)):
+    """
+    Retorna a leitura mais recente de cada sensor informado (ex.: ?sensor_id=1&sensor_id=2).
+    Atendida pelo cache das leituras mais recentes, atualizado pela ingestão; o banco só é
+    consultado para sensores fora do cache.
+    Sensores sem leituras (ou inexistentes) retornam null.
+    """
+    leituras = await CacheUltimasLeituras.obter_async(set(sensor_id))
+
+    return {
+        "leituras": {
+            str(sensor): None if leitura is None else leitura._asdict()
+            for sensor, leitura in sorted(leituras.items())
+        }
+    }
+
+
+@receber_router.post("/forma_onda", openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+    }
+})
+async def receber_forma_onda(request: Request,
+                             serial: str,
+                             eixo: EixoAcelerometroEnum,
+                             taxa_amostragem: float,
+                             data_inicio: Optional[datetime] = None,
+                             ):
+    """
+    Recebe a forma de onda bruta de um eixo do acelerômetro: o corpo são as amostras float32
+    little-endian, igualmente espaçadas a `taxa_amostragem` amostras por segundo.
+    As amostras são gravadas no sensor de vibração do dispositivo, em blocos comprimidos
+    (FORMA_ONDA_SENSOR). Sem `data_inicio`, considera-se que a última amostra foi feita no recebimento.
+    Corpos maiores que API_MAX_CORPO_FORMA_ONDA_MB são recusados com 413.
+    """
+    corpo = await _ler_corpo_limitado(request, MAX_CORPO_FORMA_ONDA_BYTES)
+
+    if taxa_amostragem <= 0:
+        raise HTTPException(status_code=400, detail="taxa_amostragem deve ser maior que zero.")
+    if not corpo or len(corpo) % 4:
+        raise HTTPException(status_code=400, detail="O corpo deve conter amostras float32 (múltiplo de 4 bytes).")
+
+    amostras = np.frombuffer(corpo, dtype='<f4')
+
+    if data_inicio is None:
+        data_inicio = datetime.now() - timedelta(seconds=len(amostras) / taxa_amostragem)
+    elif data_inicio.tzinfo is not None:
+        data_inicio = data_inicio.astimezone().replace(tzinfo=None)
+
+    try:
+        obter_limitador().consumir(serial)
+    except LimiteExcedidoError as e:
+        raise _erro_limite(e)
+
+    sensores = await CacheSensores.obter_async({serial})
+    vibracao = [sensor.sensor_id for sensor in sensores.get(serial, []) if sensor.tipo == TipoSensorEnum.VIBRACAO]
+
+    if not vibracao:
+        return {
+            "status": "error",
+            "message": f"Sensor de vibração com serial '{serial}' não encontrado."
+        }
+
+    def gravar() -> int:
+        with obter_limitador().escrita():
+            return FormaOndaSensor.salvar_forma_onda(vibracao[0], eixo, data_inicio, taxa_amostragem, amostras)
+
+    try:
+        blocos = await run_in_threadpool(gravar)
+    except LimiteExcedidoError as e:
+        raise _erro_limite(e)
+
+    return {
+        "status": "success",
+        "message": f"{len(amostras)} amostras recebidas com sucesso",
+        "blocos_salvos": blocos,
+    }
+
+
+def _ler_frame_websocket(mensagem: dict, serial: str) -> list[LeituraRequest]:
+    """
+    Converte um frame recebido pelo WebSocket em leituras do dispositivo autenticado.
+    Frames de texto são JSON (uma leitura ou uma lista, com o serial opcional);
+    frames binários seguem o formato binário compacto.
+    :raises ValueError: Se o frame for inválido ou trouxer leituras de outro serial.
+    """
+    binario = mensagem.get("bytes") is not None
+
+    if binario:
+        leituras = decodificar_leituras(mensagem["bytes"])
+    else:
+        leituras = json.loads(mensagem.get("text") or "null")
+        if isinstance(leituras, dict):
+            leituras = [leituras]
+        if not isinstance(leituras, list) or not all(isinstance(leitura, dict) for leitura in leituras):
+            raise ValueError("Frame deve conter uma leitura ou uma lista de leituras.")
+
+    for leitura in leituras:
+        if leitura.setdefault('serial', serial) != serial:
+            raise ValueError(f"Leitura do serial '{leitura['serial']}' enviada pela conexão do serial '{serial}'.")
+        for campo in ('lux', 'temperatura', 'vibracao_media', 'acelerometro_x', 'acelerometro_y', 'acelerometro_z',
+                      'data_leitura', 'sequencia', 'boot'):
+            leitura.setdefault(campo, None)
+
+    if binario:
+        # Os valores já foram validados pela decodificação
+        return [LeituraRequest.model_construct(**leitura) for leitura in leituras]
+    return [LeituraRequest.model_validate(leitura) for leitura in leituras]
+
+
+def _gravar_pendentes_ao_encerrar(serial: str, pendentes: list[tuple[LeituraRequest, datetime]]):
+    try:
+        # Executada em uma thread (ver o final de receber_leituras_websocket), pelo caminho síncrono
+        _gravar_leituras(pendentes, CacheSensores.obter({serial}))
+    except HTTPException as e:
+        logger.warning("%d leituras do serial '%s' descartadas ao encerrar o WebSocket: %s", len(pendentes), serial, e.detail,
+                       extra={"serial": serial, "descartadas": len(pendentes)})
+
+
+@receber_router.websocket("/ws")
+async def receber_leituras_websocket(websocket: WebSocket, serial: str):
+    """
+    Canal persistente para dispositivos com alta frequência de leituras.
+
+    O dispositivo se conecta uma única vez em /leitura/ws?serial=<serial> e envia leituras como frames
+    (JSON ou binário). As leituras são gravadas em lote pelo mesmo caminho das rotas HTTP, a cada
+    API_WS_ACK_LEITURAS leituras ou API_WS_ACK_INTERVALO_MS milissegundos, e cada lote é confirmado com
+    {"ack": <número do último frame gravado>, "leituras_salvas": <linhas>}, acrescido de
+    "leituras_duplicadas" quando houver leituras com sequência já recebida. Se a gravação falhar, o
+    servidor responde {"nack": <número do último frame do lote>, "erro": ...} e o dispositivo deve reenviar.
+    Frames inválidos ou acima do limite de leituras por segundo são respondidos com {"frame": n, "erro": ...}.
+    """
+    sensores = await CacheSensores.obter_async({serial})
+
+    if serial not in sensores:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=f"Sensor com serial '{serial}' não encontrado.")
+        return
+
+    await websocket.accept()
+
+    ack_leituras = int(os.environ.get("API_WS_ACK_LEITURAS", 50))
+    ack_intervalo = int(os.environ.get("API_WS_ACK_INTERVALO_MS", 1000)) / 1000
+    limitador = obter_limitador()
+    loop = asyncio.get_running_loop()
+
+    pendentes: list[tuple[LeituraRequest, datetime]] = []
+    frames = 0
+    prazo: Optional[float] = None
+
+    async def confirmar():
+        nonlocal pendentes, prazo
+        lote, pendentes, prazo = pendentes, [], None
+
+        try:
+            resultado = await _gravar_leituras_async(lote, await CacheSensores.obter_async({serial}))
+        except HTTPException as e:
+            await websocket.send_json({"nack": frames, "erro": e.detail})
+            return
+
+        ack = {"ack": frames, "leituras_salvas": resultado.linhas}
+        if resultado.duplicadas:
+            ack["leituras_duplicadas"] = resultado.duplicadas
+        await websocket.send_json(ack)
+
+    try:
+        while True:
+            timeout = None if prazo is None else max(0.0, prazo - loop.time())
+            try:
+                mensagem = await asyncio.wait_for(websocket.receive(), timeout)
+            except asyncio.TimeoutError:
+                await confirmar()
+                continue
+
+            if mensagem["type"] == "websocket.disconnect":
+                break
+
+            frames += 1
+
+            try:
+                leituras = _ler_frame_websocket(mensagem, serial)
+                limitador.consumir(serial, len(leituras), alta_frequencia=True)
+            except LimiteExcedidoError as e:
+                await websocket.send_json({"frame": frames, "erro": str(e), "retry_after": e.retry_after})
+                continue
+            except (ValueError, ValidationError) as e:
+                await websocket.send_json({"frame": frames, "erro": str(e)})
+                continue
+
+            recebido_em = datetime.now()
+            pendentes.extend((leitura, recebido_em) for leitura in leituras)
+
+            if prazo is None:
+                prazo = loop.time() + ack_intervalo
+
+            if len(pendentes) >= ack_leituras:
+                await confirmar()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Leituras recebidas após o último ack são gravadas mesmo com a conexão encerrada.
+        # run_in_executor entrega a gravação ao executor imediatamente, então ela termina mesmo
+        # que a tarefa da conexão seja cancelada ou o event loop encerrado em seguida.
+        if pendentes:
+            await asyncio.shield(loop.run_in_executor(None, _gravar_pendentes_ao_encerrar, serial, pendentes))
@@ -0,0 +1,154 @@
+import os
+import threading
+from typing import Iterable, Optional
+
+
+class RastreadorSequencia:
+    """
+    Descarta leituras repetidas pelo número de sequência enviado pelo dispositivo,
+    sem consultar o banco (ou um índice único) a cada linha.
+
+    Para cada serial e boot são mantidos o maior número de sequência já aceito e uma janela de bits
+    com os `janela` números anteriores a ele, como na proteção contra replay do IPsec:
+    - um número acima do maior aceito é novo e avança a janela;
+    - um número dentro da janela é novo se o seu bit ainda não estiver marcado, o que permite
+      enviar fora de ordem leituras guardadas enquanto o dispositivo estava offline;
+    - um número mais antigo que a janela é descartado como repetido, já que não há como saber
+      se ele foi recebido.
+
+    O reinício da contagem no dispositivo é identificado pelo boot enviado com as leituras
+    (ex.: um contador de inicializações gravado na flash): cada boot tem a sua própria janela,
+    e leituras guardadas de um boot anterior continuam sendo aceitas uma única vez. Sem boot,
+    o reinício só é reconhecido pela volta da sequência a zero: nesse caso, o reenvio de um
+    histórico a partir da sequência 0 mais longo que a janela não é distinguível de um reinício.
+
+    O estado é mantido em memória, por processo: com vários workers, um reenvio atendido por
+    outro worker não é detectado.
+    """
+
+    def __init__(self, janela: int = 1024, max_dispositivos: int = 100000):
+        """
+        :param janela: Quantidade de números anteriores ao maior aceito que ainda são verificados.
+        :param max_dispositivos: Pares de serial e boot rastreados antes de reiniciar o rastreamento de todos.
+        """
+        if janela <= 0:
+            raise ValueError("janela deve ser maior que zero")
+
+        self.janela = janela
+        self.max_dispositivos = max_dispositivos
+
+        # (serial, boot) -> [maior sequência aceita, bits das sequências aceitas (bit i = maior - i)]
+        self._dispositivos: dict[tuple[str, Optional[int]], list[int]] = {}
+        self._lock = threading.Lock()
+
+        self._aceitas = 0
+        self._duplicadas = 0
+        self._fora_da_janela = 0
+        self._reinicios = 0
+
+    def reservar(self, serial: str, sequencias: Iterable[Optional[int]], boot: Optional[int] = None) -> list[bool]:
+        """
+        Verifica e marca como recebidas as sequências de um dispositivo, na ordem informada.
+        Leituras sem sequência (None) são sempre aceitas.
+        Se a gravação falhar, as sequências aceitas devem ser devolvidas com liberar().
+        :param boot: Inicialização do dispositivo em que as sequências foram geradas, se ele a informar.
+        :return: Para cada sequência, True se é nova e a leitura deve ser gravada.
+        """
+        resultado = []
+        chave = (serial, boot)
+
+        with self._lock:
+            estado = self._dispositivos.get(chave)
+
+            for sequencia in sequencias:
+                if sequencia is None:
+                    resultado.append(True)
+                    continue
+
+                if estado is None:
+                    if len(self._dispositivos) >= self.max_dispositivos:
+                        self._dispositivos.clear()
+                    estado = [sequencia, 1]
+                    self._dispositivos[chave] = estado
+                    resultado.append(True)
+                    continue
+
+                maior, bits = estado
+                distancia = maior - sequencia
+
+                if distancia < 0:
+                    estado[0] = sequencia
+                    estado[1] = ((bits << -distancia) | 1) & ((1 << self.janela) - 1) if -distancia < self.janela else 1
+                    resultado.append(True)
+                elif distancia >= self.janela and boot is None and sequencia == 0:
+                    # Sem boot, a volta da contagem a zero é tomada como reinício do dispositivo
+                    self._reinicios += 1
+                    estado[0] = sequencia
+                    estado[1] = 1
+                    resultado.append(True)
+                elif distancia >= self.janela:
+                    self._fora_da_janela += 1
+                    resultado.append(False)
+                elif bits >> distancia & 1:
+                    resultado.append(False)
+                else:
+                    estado[1] = bits | (1 << distancia)
+                    resultado.append(True)
+
+            aceitas = sum(resultado)
+            self._aceitas += aceitas
+            self._duplicadas += len(resultado) - aceitas
+
+        return resultado
+
+    def liberar(self, serial: str, sequencias: Iterable[Optional[int]], boot: Optional[int] = None):
+        """
+        Desmarca sequências reservadas cuja gravação falhou, para que o reenvio seja aceito.
+        """
+        with self._lock:
+            estado = self._dispositivos.get((serial, boot))
+            if estado is None:
+                return
+
+            for sequencia in sequencias:
+                if sequencia is None:
+                    continue
+                distancia = estado[0] - sequencia
+                if 0 <= distancia < self.janela:
+                    estado[1] &= ~(1 << distancia)
+
+    def estatisticas(self) -> dict:
+        """Retorna os contadores do rastreador."""
+        return {
+            "janela": self.janela,
+            "dispositivos_rastreados": len(self._dispositivos),
+            "leituras_aceitas": self._aceitas,
+            "leituras_duplicadas": self._duplicadas,
+            "leituras_fora_da_janela": self._fora_da_janela,
+            "reinicios": self._reinicios,
+        }
+
+
+_rastreador: Optional[RastreadorSequencia] = None
+
+
+def obter_rastreador() -> RastreadorSequencia:
+    """
+    Retorna o rastreador de sequência da API, criando-o na primeira chamada.
+
+    Variáveis de ambiente:
+    - API_JANELA_SEQUENCIA: quantidade de sequências anteriores à maior recebida que ainda
+      são verificadas contra duplicidade (padrão: 1024).
+    """
+    global _rastreador
+
+    if _rastreador is None:
+        _rastreador = RastreadorSequencia(janela=int(os.environ.get("API_JANELA_SEQUENCIA", 1024)))
+
+    return _rastreador
+
+
+def resetar_rastreador():
+    """Descarta o rastreador atual e todo o estado de sequência dos dispositivos."""
+    global _rastreador
+    _rastreador = None
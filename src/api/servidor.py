@@ -0,0 +1,207 @@
+"""
+Modo de execução da API com vários processos (workers) uvicorn.
+
+Uso:
+    python -m src.api.servidor --workers 4 --port 8180
+
+Cada worker é um processo independente que executa o lifespan da API, portanto tem seu próprio
+engine/pool de conexões com o banco, seus próprios caches e buffer de escrita. Os workers
+compartilham o mesmo socket de escuta, aberto pelo processo supervisor.
+
+Sinais aceitos pelo supervisor:
+- SIGHUP: reinício gradual (rolling restart), um worker por vez, sem deixar de atender.
+- SIGTTIN / SIGTTOU: aumenta / diminui a quantidade de workers.
+- SIGINT / SIGTERM: encerra todos os workers graciosamente.
+
+O supervisor estende o Multiprocess do uvicorn e usa o seu Process, que não fazem parte da API
+documentada; por isso o uvicorn é fixado em uma versão no requirements.txt, e os testes verificam
+a interface usada aqui.
+"""
+import argparse
+import atexit
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+from typing import Optional
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from uvicorn.supervisors.multiprocess import Process
+
+logger = logging.getLogger(__name__)
+
+APP = "src.api.api_basica:app"
+TIMEOUT_PRONTO = 30
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8180
+
+# Mesmo contexto usado pelo uvicorn para criar os workers
+_spawn = multiprocessing.get_context("spawn")
+
+
+class ServidorWorker(uvicorn.Server):
+    """
+    Servidor uvicorn de um worker que avisa o supervisor quando está pronto para atender,
+    isto é, depois de o lifespan da API terminar de iniciar e o socket passar a ser atendido.
+    """
+
+    def __init__(self, config: uvicorn.Config, pronto=None):
+        """
+        :param pronto: Evento de multiprocessing sinalizado quando o worker está pronto, ou None
+            se ninguém aguarda o worker (ex.: os workers iniciais).
+        """
+        super().__init__(config)
+        self.pronto = pronto
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if self.started and self.pronto is not None:
+            self.pronto.set()
+
+
+class SupervisorApi(Multiprocess):
+    """
+    Supervisor de workers uvicorn com reinício gradual.
+
+    O reinício padrão do uvicorn encerra o worker antigo antes de iniciar o novo; aqui o novo
+    worker é iniciado e precisa terminar o lifespan antes de o antigo ser encerrado, de modo que a
+    quantidade de workers atendendo nunca diminui durante o reinício. O ping do uvicorn não serve
+    para isso: o worker responde a ele assim que o processo inicia, antes do lifespan.
+    """
+
+    def novo_worker(self):
+        """
+        Cria (sem iniciar) um worker que sinaliza quando está pronto.
+        :return: O processo e o evento de pronto.
+        """
+        pronto = _spawn.Event()
+        return Process(self.config, ServidorWorker(self.config, pronto).run, self.sockets), pronto
+
+    @staticmethod
+    def aguardar_pronto(processo: Process, pronto, timeout: float = TIMEOUT_PRONTO) -> bool:
+        """
+        Aguarda o worker sinalizar que está pronto.
+        :return: False se o worker terminou ou não ficou pronto dentro do timeout.
+        """
+        limite = time.monotonic() + timeout
+
+        while not pronto.wait(0.1):
+            if not processo.process.is_alive() or time.monotonic() >= limite:
+                return False
+
+        return True
+
+    def restart_all(self) -> None:
+        for idx, antigo in enumerate(self.processes):
+            novo, pronto = self.novo_worker()
+            novo.start()
+
+            if not self.aguardar_pronto(novo, pronto):
+                logger.error("Novo worker [%s] não ficou pronto; mantendo o worker [%s].", novo.pid, antigo.pid)
+                novo.kill()
+                novo.join()
+                continue
+
+            # SIGTERM: o worker antigo termina as requisições em andamento e descarrega o buffer de escrita
+            antigo.terminate()
+            antigo.join()
+            self.processes[idx] = novo
+            logger.info("Worker [%s] substituído por [%s].", antigo.pid, novo.pid)
+
+
+def quantidade_workers_padrao() -> int:
+    """
+    Quantidade de workers definida na variável de ambiente API_WORKERS ou, se ausente,
+    a quantidade de CPUs da máquina.
+    """
+    return int(os.environ.get("API_WORKERS", os.cpu_count() or 1))
+
+
+def iniciar_api_multiprocesso(workers: Optional[int] = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """
+    Inicia a API com `workers` processos uvicorn sob um supervisor. Bloqueia até o encerramento.
+    :param workers: Quantidade de workers. Se None, usa quantidade_workers_padrao().
+    :param host: Endereço de escuta.
+    :param port: Porta de escuta.
+    """
+    workers = workers or quantidade_workers_padrao()
+
+    config = uvicorn.Config(APP, host=host, port=port, workers=workers)
+
+    if workers == 1:
+        ServidorWorker(config).run()
+        return
+
+    # Cria as tabelas uma única vez antes de iniciar os workers, evitando que vários
+    # processos executem o mesmo CREATE TABLE ao mesmo tempo; os workers herdam
+    # API_CRIAR_TABELAS=false e apenas conectam. O engine do supervisor é
+    # descartado para que nenhuma conexão seja herdada pelos workers.
+    from src.api.api_basica import iniciar_database_from_env
+    from src.api.metricas import limpar_metricas_dir
+    from src.database.tipos_base.database import Database
+
+    iniciar_database_from_env()
+    Database.descartar_conexoes()
+    limpar_metricas_dir()
+    os.environ["API_CRIAR_TABELAS"] = "false"
+
+    sock = config.bind_socket()
+    # Os workers iniciais e os recriados pelo uvicorn (queda de um worker, SIGTTIN) usam o mesmo
+    # ServidorWorker dos reinícios graduais
+    SupervisorApi(config, target=ServidorWorker(config).run, sockets=[sock]).run()
+
+
+_api_processo: Optional[subprocess.Popen] = None
+
+
+def iniciar_api_subprocesso(workers: Optional[int] = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> subprocess.Popen:
+    """
+    Inicia a API multiprocesso fora do processo atual (ex.: a partir do dashboard), para que a
+    ingestão não dispute o GIL com o Streamlit. O processo é encerrado graciosamente na saída.
+    :return: O processo supervisor iniciado.
+    """
+    global _api_processo
+
+    if _api_processo is not None and _api_processo.poll() is None:
+        return _api_processo
+
+    comando = [sys.executable, "-m", "src.api.servidor", "--host", host, "--port", str(port)]
+    if workers:
+        comando += ["--workers", str(workers)]
+
+    _api_processo = subprocess.Popen(comando)
+    atexit.register(parar_api_subprocesso)
+    return _api_processo
+
+
+def parar_api_subprocesso(timeout: float = 30):
+    """Encerra graciosamente (SIGTERM) a API iniciada por iniciar_api_subprocesso."""
+    global _api_processo
+
+    if _api_processo is None or _api_processo.poll() is not None:
+        return
+
+    _api_processo.terminate()
+    try:
+        _api_processo.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logger.warning("API não encerrou em %s segundos; forçando o encerramento.", timeout)
+        _api_processo.kill()
+    _api_processo = None
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Inicia a API de ingestão com vários workers.")
+    parser.add_argument("--workers", type=int, default=None, help="Quantidade de workers (padrão: API_WORKERS ou nº de CPUs).")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    iniciar_api_multiprocesso(args.workers, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""
+Canal UDP para dispositivos que enviam leituras em alta frequência e toleram perdas.
+
+Cada datagrama carrega exatamente uma leitura, em formato fixo de 35 bytes (little-endian):
+    - assinatura: 2 bytes, b'RU'
+    - versão: uint8 (atualmente 1)
+    - serial: 16 bytes em UTF-8, completado com bytes nulos
+    - sequência: uint32, incrementada pelo dispositivo a cada datagrama
+    - lux: float32
+    - temperatura: float32
+    - vibracao_media: float32
+
+Valores ausentes são enviados como NaN. Não há confirmação de recebimento: as leituras são
+agregadas em memória e gravadas em lote pelo mesmo caminho das rotas HTTP (gravar_leituras, com a
+compressão e a avaliação de limiares), e as lacunas na
+sequência de cada dispositivo são contabilizadas como perdas (ver /monitoramento).
+"""
+import asyncio
+import logging
+import math
+import os
+import socket
+import struct
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+from src.api.cache_sensores import CacheSensores, SensorResolvido
+from src.api.ingestao import LeituraRequest, ResultadoGravacao, gravar_leituras
+from src.api.limitador import obter_limitador, LimiteExcedidoError
+from src.utils.env_utils import parse_bool_env
+
+logger = logging.getLogger(__name__)
+
+ASSINATURA = b'RU'
+VERSAO = 1
+TAMANHO_SERIAL = 16
+FORMATO_DATAGRAMA = struct.Struct(f'<2sB{TAMANHO_SERIAL}sIfff')
+
+MODULO_SEQUENCIA = 2 ** 32
+
+
+class DatagramaInvalido(ValueError):
+    """Lançada quando o datagrama não segue o formato esperado."""
+
+
+class LeituraUdp(NamedTuple):
+    serial: str
+    sequencia: int
+    lux: Optional[float]
+    temperatura: Optional[float]
+    vibracao_media: Optional[float]
+
+
+def codificar_datagrama(serial: str,
+                        sequencia: int,
+                        lux: Optional[float] = None,
+                        temperatura: Optional[float] = None,
+                        vibracao_media: Optional[float] = None,
+                        ) -> bytes:
+    """
+    Codifica uma leitura no formato do datagrama.
+    :param sequencia: Número de sequência do datagrama no dispositivo (módulo 2^32).
+    :return: Datagrama de 35 bytes.
+    """
+    serial_bytes = serial.encode('utf-8')
+
+    if len(serial_bytes) > TAMANHO_SERIAL:
+        raise ValueError(f"O serial deve ter no máximo {TAMANHO_SERIAL} bytes.")
+
+    return FORMATO_DATAGRAMA.pack(
+        ASSINATURA,
+        VERSAO,
+        serial_bytes,
+        sequencia % MODULO_SEQUENCIA,
+        math.nan if lux is None else lux,
+        math.nan if temperatura is None else temperatura,
+        math.nan if vibracao_media is None else vibracao_media,
+    )
+
+
+def decodificar_datagrama(datagrama: bytes) -> LeituraUdp:
+    """
+    Decodifica um datagrama recebido.
+    :raises DatagramaInvalido: Se o datagrama não seguir o formato.
+    """
+    if len(datagrama) != FORMATO_DATAGRAMA.size:
+        raise DatagramaInvalido(f"Tamanho inválido: esperados {FORMATO_DATAGRAMA.size} bytes, recebidos {len(datagrama)}.")
+
+    assinatura, versao, serial, sequencia, lux, temperatura, vibracao_media = FORMATO_DATAGRAMA.unpack(datagrama)
+
+    if assinatura != ASSINATURA:
+        raise DatagramaInvalido("Assinatura inválida.")
+    if versao != VERSAO:
+        raise DatagramaInvalido(f"Versão {versao} não suportada.")
+
+    try:
+        serial = serial.rstrip(b'\x00').decode('utf-8')
+    except UnicodeDecodeError as e:
+        raise DatagramaInvalido(f"Serial inválido: {e}")
+
+    if not serial:
+        raise DatagramaInvalido("Serial vazio.")
+
+    return LeituraUdp(
+        serial,
+        sequencia,
+        None if math.isnan(lux) else lux,
+        None if math.isnan(temperatura) else temperatura,
+        None if math.isnan(vibracao_media) else vibracao_media,
+    )
+
+
+class PerdasDispositivo:
+    """
+    Contabiliza as perdas de um dispositivo a partir das lacunas na sequência dos datagramas.
+
+    Como o RastreadorSequencia (src/api/sequencia_dispositivos.py), mantém o maior número recebido e uma
+    janela de bits com os `janela` números anteriores a ele:
+    - Um salto para frente conta os números pulados como perdidos.
+    - Um datagrama atrasado (dentro da janela, com o bit ainda não marcado) é aceito e desconta uma perda.
+    - Um número já marcado na janela é duplicado e descartado, assim como todas as repetições dele.
+    - A sequência 0 já recebida (ou fora da janela) indica que o dispositivo reiniciou a contagem, assim
+      como qualquer número muito atrás do maior recebido. Se o datagrama 0 do novo boot se perder, os
+      números seguintes já marcados são descartados até a contagem passar do maior recebido antes do reinício.
+    """
+
+    __slots__ = ('janela', 'ultima', 'bits', 'recebidos', 'perdidos', 'duplicados', 'fora_de_ordem', 'reinicios')
+
+    def __init__(self, sequencia: int, janela: int = 1024):
+        self.janela = janela
+        self.ultima = sequencia
+        # bit i = número ultima - i recebido
+        self.bits = 1
+        self.recebidos = 1
+        self.perdidos = 0
+        self.duplicados = 0
+        self.fora_de_ordem = 0
+        self.reinicios = 0
+
+    def registrar(self, sequencia: int) -> bool:
+        """
+        Registra um datagrama recebido.
+        :return: False se o datagrama é duplicado e deve ser descartado.
+        """
+        avanco = (sequencia - self.ultima) % MODULO_SEQUENCIA
+
+        if 0 < avanco < MODULO_SEQUENCIA // 2:
+            self.recebidos += 1
+            self.perdidos += avanco - 1
+            self.ultima = sequencia
+            self.bits = ((self.bits << avanco) | 1) & ((1 << self.janela) - 1) if avanco < self.janela else 1
+            return True
+
+        distancia = (self.ultima - sequencia) % MODULO_SEQUENCIA
+        recebido = distancia < self.janela and self.bits >> distancia & 1
+
+        if distancia >= self.janela or (sequencia == 0 and recebido and distancia > 0):
+            self.recebidos += 1
+            self.reinicios += 1
+            self.ultima = sequencia
+            self.bits = 1
+            return True
+
+        if recebido:
+            self.duplicados += 1
+            return False
+
+        self.recebidos += 1
+        self.fora_de_ordem += 1
+        self.perdidos = max(0, self.perdidos - 1)
+        self.bits |= 1 << distancia
+        return True
+
+    def estatisticas(self) -> dict:
+        esperados = self.recebidos + self.perdidos
+        return {
+            "ultima_sequencia": self.ultima,
+            "recebidos": self.recebidos,
+            "perdidos": self.perdidos,
+            "duplicados": self.duplicados,
+            "fora_de_ordem": self.fora_de_ordem,
+            "reinicios": self.reinicios,
+            "taxa_perda": round(self.perdidos / esperados, 6) if esperados else 0.0,
+        }
+
+
+class ServidorUdpLeituras(asyncio.DatagramProtocol):
+    """
+    Recebe datagramas de leitura no event loop da API e os grava em lote.
+
+    O recebimento apenas decodifica o datagrama, atualiza as estatísticas de perda e enfileira a
+    leitura; a resolução dos seriais e a gravação acontecem fora do event loop, a cada
+    `intervalo_ms` milissegundos ou quando `max_leituras` leituras estiverem pendentes.
+    """
+
+    def __init__(self,
+                 intervalo_ms: int = 1000,
+                 max_leituras: int = 1000,
+                 capacidade: int = 100000,
+                 max_dispositivos: int = 100000,
+                 resolver: Callable[[set[str]], dict[str, list[SensorResolvido]]] = CacheSensores.obter,
+                 gravar: Callable[[list[tuple], dict[str, list[SensorResolvido]]], ResultadoGravacao] = gravar_leituras,
+                 ):
+        """
+        :param intervalo_ms: Intervalo máximo, em milissegundos, entre duas gravações.
+        :param max_leituras: Leituras pendentes que disparam uma gravação imediata.
+        :param capacidade: Leituras pendentes máximas; acima disso os datagramas são descartados.
+        :param max_dispositivos: Dispositivos com estatísticas de perda mantidas em memória.
+        :param resolver: Função que resolve os seriais para os sensores cadastrados.
+        :param gravar: Função que recebe os pares (leitura, recebido_em) e os sensores dos seriais e os grava.
+        """
+        if intervalo_ms <= 0 or max_leituras <= 0 or capacidade <= 0:
+            raise ValueError("intervalo_ms, max_leituras e capacidade devem ser maiores que zero")
+
+        self.intervalo_ms = intervalo_ms
+        self.max_leituras = max_leituras
+        self.capacidade = capacidade
+        self.max_dispositivos = max_dispositivos
+        self._resolver = resolver
+        self._gravar = gravar
+
+        self._transporte: Optional[asyncio.DatagramTransport] = None
+        self._tarefa: Optional[asyncio.Task] = None
+        self._gravacao_solicitada: Optional[asyncio.Event] = None
+        self._pendentes: list[tuple[LeituraUdp, datetime]] = []
+        self._dispositivos: dict[str, PerdasDispositivo] = {}
+
+        self._datagramas = 0
+        self._invalidos = 0
+        self._limitados = 0
+        self._descartados_fila_cheia = 0
+        self._nao_encontrados = 0
+        self._leituras_persistidas = 0
+        self._leituras_descartadas = 0
+        self._gravacoes = 0
+        self._erros = 0
+
+    async def iniciar(self, host: str, porta: int):
+        """
+        Abre o socket UDP e inicia a tarefa de gravação.
+        Com vários workers, todos escutam na mesma porta (SO_REUSEPORT) e o sistema distribui os datagramas.
+        """
+        loop = asyncio.get_running_loop()
+        self._gravacao_solicitada = asyncio.Event()
+
+        self._transporte, _ = await loop.create_datagram_endpoint(
+            lambda: self,
+            local_addr=(host, porta),
+            reuse_port=hasattr(socket, 'SO_REUSEPORT'),
+        )
+        self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self):
+        """Fecha o socket e grava as leituras pendentes."""
+        if self._transporte is not None:
+            self._transporte.close()
+            self._transporte = None
+
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+
+        await self.gravar()
+
+    @property
+    def endereco(self) -> Optional[tuple]:
+        """Endereço (host, porta) em que o socket está escutando."""
+        if self._transporte is None:
+            return None
+        return self._transporte.get_extra_info('sockname')
+
+    def datagram_received(self, data: bytes, addr):
+        self._datagramas += 1
+
+        try:
+            leitura = decodificar_datagrama(data)
+        except DatagramaInvalido:
+            self._invalidos += 1
+            return
+
+        if not self._registrar_sequencia(leitura):
+            return
+
+        try:
+            obter_limitador().consumir(leitura.serial, alta_frequencia=True)
+        except LimiteExcedidoError:
+            self._limitados += 1
+            return
+
+        if len(self._pendentes) >= self.capacidade:
+            self._descartados_fila_cheia += 1
+            return
+
+        self._pendentes.append((leitura, datetime.now()))
+
+        if len(self._pendentes) >= self.max_leituras and self._gravacao_solicitada is not None:
+            self._gravacao_solicitada.set()
+
+    def error_received(self, exc: Exception):
+        logger.warning("Erro no socket UDP de leituras: %s", exc)
+
+    def _registrar_sequencia(self, leitura: LeituraUdp) -> bool:
+        perdas = self._dispositivos.get(leitura.serial)
+
+        if perdas is not None:
+            return perdas.registrar(leitura.sequencia)
+
+        # Seriais são validados apenas na gravação; o limite evita que datagramas com seriais
+        # arbitrários façam o dicionário crescer sem controle.
+        if len(self._dispositivos) < self.max_dispositivos:
+            self._dispositivos[leitura.serial] = PerdasDispositivo(leitura.sequencia)
+        return True
+
+    async def _executar(self):
+        intervalo = self.intervalo_ms / 1000
+
+        while True:
+            try:
+                await asyncio.wait_for(self._gravacao_solicitada.wait(), intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._gravacao_solicitada.clear()
+            await self.gravar()
+
+    async def gravar(self) -> int:
+        """
+        Grava imediatamente todas as leituras pendentes, fora do event loop.
+        :return: Quantidade de linhas gravadas.
+        """
+        lote, self._pendentes = self._pendentes, []
+
+        if not lote:
+            return 0
+
+        loop = asyncio.get_running_loop()
+        # shield: a gravação em andamento termina mesmo que a tarefa seja cancelada no encerramento
+        total, nao_encontrados = await asyncio.shield(loop.run_in_executor(None, self._gravar_lote, lote))
+
+        # Estatísticas de perda são mantidas apenas para dispositivos cadastrados; o dicionário só é
+        # alterado no event loop, que o usa a cada datagrama
+        for serial in nao_encontrados:
+            self._dispositivos.pop(serial, None)
+
+        return total
+
+    def _gravar_lote(self, lote: list[tuple[LeituraUdp, datetime]]) -> tuple[int, set[str]]:
+        """
+        Grava o lote na thread do executor.
+        :return: Quantidade de linhas gravadas e seriais não cadastrados.
+        """
+        try:
+            sensores = self._resolver({leitura.serial for leitura, _ in lote})
+
+            pendentes = []
+            nao_encontrados = set()
+            for leitura, recebido_em in lote:
+                if leitura.serial not in sensores:
+                    self._nao_encontrados += 1
+                    nao_encontrados.add(leitura.serial)
+                    continue
+                # A sequência do datagrama já foi verificada por PerdasDispositivo; ela não é a mesma
+                # contagem das leituras HTTP e não passa pelo rastreador de reenvios
+                pendentes.append((LeituraRequest.model_construct(
+                    serial=leitura.serial, lux=leitura.lux, temperatura=leitura.temperatura,
+                    vibracao_media=leitura.vibracao_media, acelerometro_x=None, acelerometro_y=None, acelerometro_z=None,
+                ), recebido_em))
+
+            total = self._gravar(pendentes, sensores).linhas if pendentes else 0
+        except Exception:
+            self._erros += 1
+            self._leituras_descartadas += len(lote)
+            logger.exception("Erro ao gravar lote de %d leituras UDP; lote descartado.", len(lote))
+            return 0, set()
+
+        self._gravacoes += 1
+        self._leituras_persistidas += total
+        return total, nao_encontrados
+
+    def estatisticas(self) -> dict:
+        """Retorna os contadores do canal UDP e as perdas por dispositivo."""
+        return {
+            "endereco": None if self.endereco is None else f"{self.endereco[0]}:{self.endereco[1]}",
+            "pendentes": len(self._pendentes),
+            "datagramas": self._datagramas,
+            "invalidos": self._invalidos,
+            "limitados": self._limitados,
+            "descartados_fila_cheia": self._descartados_fila_cheia,
+            "seriais_nao_encontrados": self._nao_encontrados,
+            "linhas_persistidas": self._leituras_persistidas,
+            "leituras_descartadas": self._leituras_descartadas,
+            "gravacoes": self._gravacoes,
+            "erros": self._erros,
+            "dispositivos": {serial: perdas.estatisticas() for serial, perdas in list(self._dispositivos.items())},
+        }
+
+
+_servidor: Optional[ServidorUdpLeituras] = None
+
+
+async def iniciar_udp_from_env() -> Optional[ServidorUdpLeituras]:
+    """
+    Inicia o canal UDP se a variável de ambiente API_UDP estiver habilitada.
+
+    Variáveis de ambiente:
+    - API_UDP: habilita o canal UDP (padrão: false).
+    - API_UDP_HOST: endereço de escuta (padrão: 0.0.0.0).
+    - API_UDP_PORTA: porta de escuta (padrão: 8181).
+    - API_UDP_INTERVALO_MS: intervalo máximo entre gravações (padrão: 1000).
+    - API_UDP_MAX_LEITURAS: leituras pendentes que disparam uma gravação (padrão: 1000).
+    - API_UDP_CAPACIDADE: leituras pendentes máximas antes de descartar datagramas (padrão: 100000).
+    :return: O servidor iniciado ou None se o canal estiver desabilitado.
+    """
+    global _servidor
+
+    if not parse_bool_env("API_UDP") or _servidor is not None:
+        return _servidor
+
+    servidor = ServidorUdpLeituras(
+        intervalo_ms=int(os.environ.get("API_UDP_INTERVALO_MS", 1000)),
+        max_leituras=int(os.environ.get("API_UDP_MAX_LEITURAS", 1000)),
+        capacidade=int(os.environ.get("API_UDP_CAPACIDADE", 100000)),
+    )
+    await servidor.iniciar(os.environ.get("API_UDP_HOST", "0.0.0.0"), int(os.environ.get("API_UDP_PORTA", 8181)))
+
+    _servidor = servidor
+    logger.info("Canal UDP de leituras escutando em %s.", servidor.endereco)
+    return _servidor
+
+
+def obter_servidor_udp() -> Optional[ServidorUdpLeituras]:
+    """Retorna o canal UDP ativo ou None se estiver desabilitado."""
+    return _servidor
+
+
+async def parar_udp():
+    """Fecha o canal UDP ativo, se houver, gravando as leituras pendentes."""
+    global _servidor
+
+    if _servidor is None:
+        return
+
+    await _servidor.parar()
+    _servidor = None
+    logger.info("Canal UDP de leituras finalizado.")
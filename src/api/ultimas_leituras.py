@@ -0,0 +1,177 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import event
+
+from src.database.models.sensor import LeituraSensor
+
+
+class UltimaLeitura(NamedTuple):
+    data_leitura: datetime
+    valor: float
+
+
+class CacheUltimasLeituras:
+    """
+    Cache em memória (por processo) da leitura mais recente de cada sensor.
+
+    A ingestão atualiza o cache a cada insert em LEITURA_SENSOR, de modo que consultar o valor
+    atual de um sensor não acessa o banco. Sensores que não estão no cache são buscados com uma
+    única consulta para todos eles, e o resultado (inclusive a ausência de leituras) fica em cache.
+
+    Com vários processos (workers), as leituras gravadas por outro processo só são vistas quando
+    a entrada expira: entradas mais antigas que `ttl_s` segundos são consultadas de novo.
+
+    O cache é da API, alimentado pela ingestão; fora dela (dashboard, ferramentas do chat), que roda
+    em outro processo, a leitura mais recente é consultada em LeituraSensor.mais_recentes.
+    """
+
+    _leituras: dict[int, tuple[Optional[UltimaLeitura], float]] = {}
+    _lock = threading.Lock()
+    _hits: int = 0
+    _misses: int = 0
+
+    ttl_s: float = float(os.environ.get("API_ULTIMAS_LEITURAS_TTL_S", 5))
+
+    @classmethod
+    def _consultar(cls, sensor_ids: set[int]) -> dict[int, UltimaLeitura]:
+        """
+        Busca no banco a leitura mais recente de cada sensor, com uma única consulta.
+        """
+        return {
+            sensor_id: UltimaLeitura(linha.data_leitura, linha.valor)
+            for sensor_id, linha in LeituraSensor.mais_recentes(sensor_ids).items()
+        }
+
+    @classmethod
+    async def _consultar_async(cls, sensor_ids: set[int]) -> dict[int, UltimaLeitura]:
+        return {
+            sensor_id: UltimaLeitura(linha.data_leitura, linha.valor)
+            for sensor_id, linha in (await LeituraSensor.mais_recentes_async(sensor_ids)).items()
+        }
+
+    @classmethod
+    def _em_cache(cls, sensor_ids: set[int], agora: float) -> dict[int, Optional[UltimaLeitura]]:
+        leituras = cls._leituras
+        encontradas = {}
+
+        for sensor_id in sensor_ids:
+            entrada = leituras.get(sensor_id)
+            if entrada is not None and agora - entrada[1] < cls.ttl_s:
+                encontradas[sensor_id] = entrada[0]
+
+        with cls._lock:
+            cls._hits += len(encontradas)
+            cls._misses += len(sensor_ids) - len(encontradas)
+
+        return encontradas
+
+    @classmethod
+    def _guardar(cls, faltantes: set[int], consultadas: dict[int, UltimaLeitura], agora: float,
+                 encontradas: dict[int, Optional[UltimaLeitura]]):
+        with cls._lock:
+            for sensor_id in faltantes:
+                leitura = cls._mais_recente(cls._leituras.get(sensor_id), consultadas.get(sensor_id))
+                cls._leituras[sensor_id] = (leitura, agora)
+                encontradas[sensor_id] = leitura
+
+    @classmethod
+    def obter(cls, sensor_ids: set[int]) -> dict[int, Optional[UltimaLeitura]]:
+        """
+        Retorna a leitura mais recente dos sensores informados.
+        :param sensor_ids: IDs dos sensores.
+        :return: Dicionário {sensor_id: UltimaLeitura}; None para sensores sem leituras.
+        """
+        agora = time.monotonic()
+        encontradas = cls._em_cache(sensor_ids, agora)
+        faltantes = sensor_ids - encontradas.keys()
+
+        if faltantes:
+            cls._guardar(faltantes, cls._consultar(faltantes), agora, encontradas)
+
+        return encontradas
+
+    @classmethod
+    async def obter_async(cls, sensor_ids: set[int]) -> dict[int, Optional[UltimaLeitura]]:
+        """
+        Versão assíncrona de obter: os sensores fora do cache são consultados pela sessão assíncrona do Database.
+        """
+        agora = time.monotonic()
+        encontradas = cls._em_cache(sensor_ids, agora)
+        faltantes = sensor_ids - encontradas.keys()
+
+        if faltantes:
+            cls._guardar(faltantes, await cls._consultar_async(faltantes), agora, encontradas)
+
+        return encontradas
+
+    @staticmethod
+    def _mais_recente(entrada: Optional[tuple[Optional[UltimaLeitura], float]],
+                      leitura: Optional[UltimaLeitura]) -> Optional[UltimaLeitura]:
+        # Uma leitura gravada por este processo durante a consulta não é sobrescrita por uma mais antiga
+        atual = None if entrada is None else entrada[0]
+        if atual is None or (leitura is not None and leitura.data_leitura >= atual.data_leitura):
+            return leitura
+        return atual
+
+    @classmethod
+    def atualizar(cls, linhas: list[dict]):
+        """
+        Atualiza o cache com linhas gravadas em LEITURA_SENSOR. Leituras mais antigas que a
+        que está em cache (ex.: enviadas com atraso pelo dispositivo) são ignoradas.
+        :param linhas: Linhas no formato {'sensor_id', 'data_leitura', 'valor'}.
+        """
+        agora = time.monotonic()
+
+        with cls._lock:
+            for linha in linhas:
+                leitura = UltimaLeitura(linha['data_leitura'], linha['valor'])
+                cls._leituras[linha['sensor_id']] = (cls._mais_recente(cls._leituras.get(linha['sensor_id']), leitura), agora)
+
+    @classmethod
+    def invalidar(cls, sensor_id: Optional[int] = None):
+        """
+        Remove entradas do cache.
+        :param sensor_id: Sensor a ser removido. Se None, limpa o cache inteiro.
+        """
+        with cls._lock:
+            if sensor_id is None:
+                cls._leituras = {}
+            else:
+                cls._leituras.pop(sensor_id, None)
+
+    @classmethod
+    def estatisticas(cls) -> dict:
+        """
+        Retorna os contadores do cache.
+        """
+        total = cls._hits + cls._misses
+        return {
+            "sensores": len(cls._leituras),
+            "hits": cls._hits,
+            "misses": cls._misses,
+            "hit_ratio": cls._hits / total if total else None,
+        }
+
+    @classmethod
+    def resetar_estatisticas(cls):
+        with cls._lock:
+            cls._hits = 0
+            cls._misses = 0
+
+
+def _atualizar_ao_inserir(mapper, connection, target):
+    CacheUltimasLeituras.atualizar([{'sensor_id': target.sensor_id, 'data_leitura': target.data_leitura, 'valor': target.valor}])
+
+
+def _invalidar_leitura(mapper, connection, target):
+    # Um update pode trocar o sensor da leitura, então o cache inteiro é descartado.
+    CacheUltimasLeituras.invalidar()
+
+
+event.listen(LeituraSensor, 'after_insert', _atualizar_ao_inserir)
+event.listen(LeituraSensor, 'after_update', _invalidar_leitura)
+event.listen(LeituraSensor, 'after_delete', _invalidar_leitura)
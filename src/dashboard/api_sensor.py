@@ -2,6 +2,8 @@ import logging
 import os
 import streamlit as st
 from src.api.api_basica import inciar_api_thread_paralelo
+from src.api.servidor import iniciar_api_subprocesso
+from src.utils.env_utils import parse_bool_env
 
 def iniciar_api_sensor():
 
@@ -10,8 +12,12 @@ def iniciar_api_sensor():
         return
 
     if not st.session_state.get('api_sensor', False):
-        logging.info("Iniciando API Sensor em uma thread separada.")
-        inciar_api_thread_paralelo()
+        if parse_bool_env("API_MULTIPROCESSO"):
+            logging.info("Iniciando API Sensor em processos separados.")
+            iniciar_api_subprocesso()
+        else:
+            logging.info("Iniciando API Sensor em uma thread separada.")
+            inciar_api_thread_paralelo()
         st.session_state['api_sensor'] = True
         logging.info("API Sensor iniciada com sucesso.")
         st.toast("API Sensor iniciada com sucesso.")
@@ -1,6 +1,5 @@
 import streamlit as st
-from sqlalchemy.exc import DatabaseError, IntegrityError
-from src.database.export_import_db import import_database_zip
+from src.database.export_import_db import import_database_zip, salvar_importacao
 import pandas as pd
 
 from src.database.reset_contador_ids import reset_contador_ids
@@ -28,24 +27,7 @@ def importar_database():
         if st.button("Salvar no Banco de Dados"):
             with st.spinner("Salvando no banco de dados..."):
                 # Salva os dados no banco de dados
-                for model, rows in models:
-                    for row in rows:
-                        try:
-                            row.save()
-                        except IntegrityError as e:
-                            if e.code == "gkpj":
-                                print('record already exists')
-                                row.merge()
-                            else:
-                                print(e.code)
-                                raise
-                        except DatabaseError as e:
-                            print('aqui')
-                            if e.code == " DPY-4011":
-                                row.save()
-                            else:
-                                print(e.code)
-                                raise
+                salvar_importacao(models)
 
                 # Atualiza o contador de IDs
                 reset_contador_ids()
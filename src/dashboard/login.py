@@ -1,8 +1,11 @@
 import logging
-from src.database.tipos_base.database import Database, DEFAULT_DSN
+from src.database.tipos_base.database import ConfiguracaoPool, Database, DEFAULT_DSN
 import streamlit as st
 import os
 
+# O pool de conexões e a réplica de leitura do dashboard usam as variáveis DASHBOARD_DB_* e, na ausência delas, DB_*
+PREFIXO_POOL = "DASHBOARD_"
+
 
 def cached_login(username, password, dsn):
     """
@@ -14,7 +17,8 @@ def cached_login(username, password, dsn):
     """
 
     if not st.session_state.get('logged_in', False):
-        Database.init_oracledb(username, password, dsn)
+        Database.init_oracledb(username, password, dsn, pool=ConfiguracaoPool.from_env(PREFIXO_POOL))
+        Database.init_replica_from_env(PREFIXO_POOL, ConfiguracaoPool.from_env(PREFIXO_POOL))
         logging.info("Conexão bem-sucedida ao banco de dados Oracle!")
         st.session_state.logged_in = True
         st.session_state.engine = Database.get_engine()
@@ -60,7 +64,8 @@ def login_sqlite():
     # Theme applied centrally in main.py
 
     if not st.session_state.get('logged_in', False):
-        Database.init_sqlite()
+        Database.init_sqlite(pool=ConfiguracaoPool.from_env(PREFIXO_POOL))
+        Database.init_replica_from_env(PREFIXO_POOL, ConfiguracaoPool.from_env(PREFIXO_POOL))
         st.session_state.logged_in = True
         st.session_state.engine = Database.get_engine()
         st.session_state.session = Database.get_session_maker()
@@ -92,7 +97,8 @@ def logint_postgres_from_env():
         raise ValueError("As variáveis de ambiente POSTGRE_USER, POSTGRE_PASSWORD, POSTGRE_DB, POSTGRE_HOST e POSTGRE_PORT devem estar definidas.")
 
     if not st.session_state.get('logged_in', False):
-        Database.init_postgresdb(user, senha, host, int(port), database)
+        Database.init_postgresdb(user, senha, host, int(port), database, pool=ConfiguracaoPool.from_env(PREFIXO_POOL))
+        Database.init_replica_from_env(PREFIXO_POOL, ConfiguracaoPool.from_env(PREFIXO_POOL))
         st.session_state.logged_in = True
         st.session_state.engine = Database.get_engine()
         st.session_state.session = Database.get_session_maker()
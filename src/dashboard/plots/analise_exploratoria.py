@@ -51,7 +51,7 @@ def analise_exploratoria_view():
     data_inicial = datetime.combine(data_inicial, time.min)
     data_final = datetime.combine(data_final, time.max)
 
-    with Database.get_session() as session:
+    with Database.get_session(read_only=True) as session:
         leituras = session.query(LeituraSensor).filter(
             LeituraSensor.data_leitura >= data_inicial,
             LeituraSensor.data_leitura <= data_final
@@ -16,10 +16,10 @@ def prever_necessidade_de_manutencao(
         sensor_vibracao_id: int,
 ):
 
-    with Database.get_session() as session:
-        ultima_leitura_lux = session.query(LeituraSensor).filter(LeituraSensor.sensor_id == sensor_lux_id).order_by(LeituraSensor.data_leitura.desc()).first()
-        ultima_leitura_temperatura = session.query(LeituraSensor).filter(LeituraSensor.sensor_id == sensor_temperatura_id).order_by(LeituraSensor.data_leitura.desc()).first()
-        ultima_leitura_vibracao = session.query(LeituraSensor).filter(LeituraSensor.sensor_id == sensor_vibracao_id).order_by(LeituraSensor.data_leitura.desc()).first()
+    ultimas_leituras = LeituraSensor.mais_recentes({sensor_lux_id, sensor_temperatura_id, sensor_vibracao_id}, read_only=True)
+    ultima_leitura_lux = ultimas_leituras.get(sensor_lux_id)
+    ultima_leitura_temperatura = ultimas_leituras.get(sensor_temperatura_id)
+    ultima_leitura_vibracao = ultimas_leituras.get(sensor_vibracao_id)
 
     if not ultima_leitura_lux or not ultima_leitura_temperatura or not ultima_leitura_vibracao:
         st.warning("Não há leituras suficientes para fazer a previsão de manutenção.")
@@ -47,7 +47,7 @@ def prever_necessidade_manutencao():
         "Selecione os sensores correspondentes para prever a necessidade de manutenção com base nas últimas leituras."
     )
 
-    with Database.get_session() as session:
+    with Database.get_session(read_only=True) as session:
         sensores = session.query(Sensor).all()
         tipos = session.query(TipoSensor).all()
 
@@ -1,4 +1,4 @@
-from sqlalchemy.exc import DatabaseError
+from sqlalchemy.exc import DatabaseError, IntegrityError
 from src.database.dynamic_import import import_models, get_model_by_table_name
 import io
 import zipfile
@@ -80,3 +80,49 @@ def import_database_zip(zip_file: io.BytesIO) -> list[tuple[Model, List[Model]]]
 
     return response
 
+
+def _salvar_linha_a_linha(rows: List[Model]):
+    """
+    Salva os registros um a um, fazendo merge dos que já existem no banco.
+    """
+    for row in rows:
+        try:
+            row.save()
+        except IntegrityError as e:
+            if e.code == "gkpj":
+                print('record already exists')
+                row.merge()
+            else:
+                print(e.code)
+                raise
+        except DatabaseError as e:
+            if e.code == " DPY-4011":
+                row.save()
+            else:
+                print(e.code)
+                raise
+
+
+def salvar_importacao(models: list[tuple[type[Model], List[Model]]]) -> int:
+    """
+    Salva no banco os registros retornados por import_database_zip.
+    Cada tabela é inserida em lote (COPY no PostgreSQL); se o lote falhar por registros
+    já existentes, a tabela é salva registro a registro, com merge dos existentes.
+    ATENÇÃO: após salvar, atualize o contador de IDs (reset_contador_ids).
+    :param models: Lista de tuplas (model, registros).
+    :return: Quantidade de registros salvos.
+    """
+    total = 0
+
+    for model, rows in models:
+        if not rows:
+            continue
+
+        try:
+            model.bulk_insert([row.to_dict() for row in rows])
+        except IntegrityError:
+            _salvar_linha_a_linha(rows)
+
+        total += len(rows)
+
+    return total
@@ -1,8 +1,9 @@
+import zlib
 from enum import StrEnum
-from typing import List, Self, Union, Any
+from typing import List, Self, Union, Any, NamedTuple, Iterator, AsyncIterator
 from datetime import datetime, date, time, timedelta
 
-from sqlalchemy import Sequence, String, ForeignKey, Float, DateTime, Enum
+from sqlalchemy import Sequence, String, ForeignKey, Float, DateTime, Enum, Integer, LargeBinary, Select, select, and_, or_, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship, joinedload
 
 import numpy as np
@@ -11,6 +12,7 @@ from src.database.models.equipamento import Equipamento
 from src.database.tipos_base.database import Database
 from src.database.tipos_base.model import Model
 from src.database.tipos_base.model_mixins.display import SimpleTableFilter
+from src.database.tipos_base.model_mixins.indices import IndiceModel
 from src.plots.plot_config import GenericPlot, PlotField, TipoGrafico, OrderBy
 
 
@@ -105,6 +107,11 @@ class Sensor(Model):
         SimpleTableFilter(field='tipo_sensor_id', label='Tipo de Sensor', operator='==')
     ]
 
+    # Resolução dos seriais na ingestão (CacheSensores)
+    __indices__ = (
+        IndiceModel(('cod_serial',), onde="cod_serial IS NOT NULL"),
+    )
+
     @classmethod
     def display_name_plural(cls) -> str:
         return "Sensores"
@@ -158,6 +165,8 @@ class Sensor(Model):
 
     leituras: Mapped[List['LeituraSensor']] = relationship('LeituraSensor', back_populates='sensor', cascade="all, delete-orphan")
 
+    formas_onda: Mapped[List['FormaOndaSensor']] = relationship('FormaOndaSensor', back_populates='sensor', cascade="all, delete-orphan")
+
     def __str__(self):
         return f"{self.id} - {self.nome}"
 
@@ -182,6 +191,11 @@ class LeituraSensor(Model):
         SimpleTableFilter(field='data_leitura', label='Data da Leitura Final', operator='<=', optional=True)
     ]
 
+    # Consultas por sensor e intervalo de tempo; no PostgreSQL o valor fica no índice e a tabela não é lida
+    __indices__ = (
+        IndiceModel(('sensor_id', 'data_leitura'), nome='IX_LEITURA_SENSOR_DATA', incluir=('valor',)),
+    )
+
     __generic_plot__ = GenericPlot(
         eixo_x=[PlotField(field='data_leitura', display_name='Data da Leitura')],
         eixo_y=[PlotField(field='valor', display_name='Valor')],
@@ -226,7 +240,8 @@ class LeituraSensor(Model):
 
     @classmethod
     def get_leituras_for_sensor(cls, sensor_id: int, data_inicial: date=None, data_final: date=None) -> List['LeituraSensor']:
-        with Database.get_session() as session:
+        # Consulta de análise (dashboard, ferramentas do chat): vai para a réplica de leitura, se houver
+        with Database.get_session(read_only=True) as session:
             query = session.query(cls).filter(cls.sensor_id == sensor_id)
             if data_inicial is not None:
                 query = query.filter(cls.data_leitura >= datetime.combine(data_inicial, time.min))
@@ -234,6 +249,119 @@ class LeituraSensor(Model):
                 query = query.filter(cls.data_leitura <= datetime.combine(data_final, time.max))
             return query.order_by(cls.data_leitura).all()
 
+    @classmethod
+    def iterar_leituras(cls, sensor_ids: List[int] = None, data_inicial: datetime = None, data_final: datetime = None,
+                        apos: tuple[datetime, int] = None, limite: int = None, lote: int = 5000) -> Iterator[list]:
+        """
+        Percorre as leituras em ordem de (data_leitura, id), em lotes, com um cursor no servidor do banco,
+        de modo que a memória usada não depende da quantidade de leituras.
+        A paginação é por keyset: a próxima página começa após a (data_leitura, id) da última linha recebida,
+        sem o custo de OFFSET crescente.
+        :param sensor_ids: Sensores das leituras. Se None, todos.
+        :param data_inicial: Início do intervalo (inclusive).
+        :param data_final: Fim do intervalo (inclusive).
+        :param apos: (data_leitura, id) da última linha da página anterior.
+        :param limite: Quantidade máxima de leituras. Se None, todas.
+        :param lote: Quantidade de linhas buscadas do banco de cada vez.
+        :return: Iterador de lotes de linhas (id, sensor_id, data_leitura, valor).
+        """
+        with Database.get_session() as session:
+            resultado = session.execute(cls._query_leituras(sensor_ids, data_inicial, data_final, apos, limite)
+                                        .execution_options(stream_results=True, yield_per=lote))
+            for linhas in resultado.partitions():
+                yield linhas
+
+    @classmethod
+    async def iterar_leituras_async(cls, sensor_ids: List[int] = None, data_inicial: datetime = None,
+                                    data_final: datetime = None, apos: tuple[datetime, int] = None, limite: int = None,
+                                    lote: int = 5000) -> AsyncIterator[list]:
+        """
+        Versão assíncrona de iterar_leituras, pela sessão assíncrona do Database: cada lote é aguardado
+        sem ocupar uma thread. Os parâmetros e o retorno são os de iterar_leituras.
+        """
+        async with Database.get_async_session() as session:
+            resultado = await session.stream(cls._query_leituras(sensor_ids, data_inicial, data_final, apos, limite)
+                                             .execution_options(yield_per=lote))
+            async for linhas in resultado.partitions():
+                yield linhas
+
+    @classmethod
+    async def leituras_vizinhas_async(cls, sensor_ids: List[int] = None, instante: datetime = None,
+                                      limite: datetime = None, anteriores: bool = True) -> list:
+        """
+        Última leitura de cada sensor antes de `instante` (anteriores=True) ou primeira depois dele, entre
+        `instante` e `limite` (ex.: os pontos que delimitam uma janela de consulta de dados comprimidos).
+        :param sensor_ids: Sensores das leituras. Se None, todos.
+        :param instante: Instante de referência (exclusive).
+        :param limite: Instante mais afastado em que a leitura é procurada (inclusive).
+        :param anteriores: Se True, procura antes de `instante`; se False, depois.
+        :return: Linhas (id, sensor_id, data_leitura, valor); leituras com o mesmo instante vêm todas, em ordem de id.
+        """
+        extremo = func.max(cls.data_leitura) if anteriores else func.min(cls.data_leitura)
+        intervalo = and_(cls.data_leitura < instante, cls.data_leitura >= limite) if anteriores \
+            else and_(cls.data_leitura > instante, cls.data_leitura <= limite)
+
+        subquery = select(cls.sensor_id, extremo.label('data_leitura')).where(intervalo)
+        if sensor_ids is not None:
+            subquery = subquery.where(cls.sensor_id.in_(sensor_ids))
+        subquery = subquery.group_by(cls.sensor_id).subquery()
+
+        query = (
+            select(cls.id, cls.sensor_id, cls.data_leitura, cls.valor)
+            .join(subquery, and_(cls.sensor_id == subquery.c.sensor_id, cls.data_leitura == subquery.c.data_leitura))
+            .order_by(cls.sensor_id, cls.id)
+        )
+
+        async with Database.get_async_session() as session:
+            return list((await session.execute(query)).all())
+
+    @classmethod
+    def _query_mais_recentes(cls, sensor_ids: set[int]) -> Select:
+        mais_recentes = select(
+            cls.sensor_id, func.max(cls.data_leitura).label('data_leitura')
+        ).where(cls.sensor_id.in_(sensor_ids)).group_by(cls.sensor_id).subquery()
+
+        # Com duas leituras no mesmo instante, vale a inserida por último (a última linha de cada sensor)
+        return select(cls.sensor_id, cls.data_leitura, cls.valor).join(
+            mais_recentes,
+            (cls.sensor_id == mais_recentes.c.sensor_id) & (cls.data_leitura == mais_recentes.c.data_leitura)
+        ).order_by(cls.id)
+
+    @classmethod
+    def mais_recentes(cls, sensor_ids: set[int], read_only: bool = False) -> dict[int, Any]:
+        """
+        Leitura mais recente de cada sensor, com uma única consulta.
+        :param sensor_ids: IDs dos sensores.
+        :param read_only: Consulta pela réplica de leitura, se houver (dashboard, ferramentas do chat).
+        :return: Dicionário {sensor_id: linha com data_leitura e valor}; sensores sem leituras ficam de fora.
+        """
+        with Database.get_session(read_only=read_only) as session:
+            return {linha.sensor_id: linha for linha in session.execute(cls._query_mais_recentes(sensor_ids))}
+
+    @classmethod
+    async def mais_recentes_async(cls, sensor_ids: set[int]) -> dict[int, Any]:
+        """Versão assíncrona de mais_recentes, pela sessão assíncrona do Database."""
+        async with Database.get_async_session() as session:
+            return {linha.sensor_id: linha for linha in await session.execute(cls._query_mais_recentes(sensor_ids))}
+
+    @classmethod
+    def _query_leituras(cls, sensor_ids: List[int] = None, data_inicial: datetime = None, data_final: datetime = None,
+                        apos: tuple[datetime, int] = None, limite: int = None) -> Select:
+        query = select(cls.id, cls.sensor_id, cls.data_leitura, cls.valor)
+
+        if sensor_ids is not None:
+            query = query.where(cls.sensor_id.in_(sensor_ids))
+        if data_inicial is not None:
+            query = query.where(cls.data_leitura >= data_inicial)
+        if data_final is not None:
+            query = query.where(cls.data_leitura <= data_final)
+        if apos is not None:
+            data_leitura, id = apos
+            # Comparação de tuplas expandida, pois nem todo banco aceita (a, b) > (x, y)
+            query = query.where(or_(cls.data_leitura > data_leitura, and_(cls.data_leitura == data_leitura, cls.id > id)))
+
+        return query.order_by(cls.data_leitura, cls.id).limit(limite)
+
     @classmethod
     def random_range(cls, nullable: bool = True, quantity: int = 100, **kwargs) -> List[Self]:
         data_inicial = kwargs.get('values_by_name', {}).get(
@@ -249,3 +377,197 @@ class LeituraSensor(Model):
             )
             for i in range(quantity)
         ]
+
+
+class EixoAcelerometroEnum(StrEnum):
+    X = "X"
+    Y = "Y"
+    Z = "Z"
+
+
+class FormaOnda(NamedTuple):
+    instantes: np.ndarray  # datetime64[us]
+    amostras: np.ndarray  # float32
+
+
+class FormaOndaSensor(Model):
+    """
+    Forma de onda bruta do acelerômetro, armazenada em blocos de duração fixa.
+
+    Cada linha guarda as amostras float32 de um intervalo [data_inicio, data_fim) de um eixo,
+    comprimidas com zlib em uma única coluna binária, em vez de uma linha de LEITURA_SENSOR por amostra.
+    """
+    __tablename__ = 'FORMA_ONDA_SENSOR'
+    __menu_group__ = "Sensores"
+    __menu_order__ = 4
+    __database_import_order__ = 13
+
+    __table_view_filters__ = [
+        SimpleTableFilter(field='sensor_id', label='Sensor', operator='=='),
+        SimpleTableFilter(field='data_inicio', label='Data Inicial', operator='>=', optional=True),
+        SimpleTableFilter(field='data_fim', label='Data Final', operator='<=', optional=True)
+    ]
+
+    __indices__ = (
+        IndiceModel(('sensor_id', 'eixo', 'data_inicio'), nome='IX_FORMA_ONDA_SENSOR_DATA'),
+    )
+
+    NIVEL_COMPRESSAO = 6
+
+    @classmethod
+    def display_name(cls) -> str:
+        return "Forma de Onda do Sensor"
+
+    @classmethod
+    def display_name_plural(cls) -> str:
+        return "Formas de Onda dos Sensores"
+
+    def __str__(self):
+        return f"Sensor_id: {self.sensor_id} - {self.eixo} - {self.data_inicio.strftime('%Y-%m-%d %H:%M:%S')} - {self.quantidade_amostras} amostras"
+
+    id: Mapped[int] = mapped_column(
+        Sequence(f"{__tablename__}_SEQ_ID"), primary_key=True, autoincrement=True, nullable=False
+    )
+
+    sensor_id: Mapped[int] = mapped_column(
+        ForeignKey('SENSOR.id'), nullable=False, info={'label': 'Sensor'}
+    )
+
+    sensor: Mapped[Sensor] = relationship('Sensor', back_populates='formas_onda')
+
+    eixo: Mapped[EixoAcelerometroEnum] = mapped_column(
+        Enum(EixoAcelerometroEnum, length=1), nullable=False, info={'label': 'Eixo'}
+    )
+
+    data_inicio: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, info={'label': 'Início'},
+        comment="Instante da primeira amostra do bloco"
+    )
+
+    data_fim: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, info={'label': 'Fim'},
+        comment="Instante seguinte à última amostra do bloco (exclusivo)"
+    )
+
+    taxa_amostragem: Mapped[float] = mapped_column(
+        Float, nullable=False, info={'label': 'Taxa de Amostragem (Hz)'}
+    )
+
+    quantidade_amostras: Mapped[int] = mapped_column(
+        Integer, nullable=False, info={'label': 'Quantidade de Amostras'}
+    )
+
+    amostras: Mapped[bytes] = mapped_column(
+        LargeBinary, nullable=False, info={'label': 'Amostras'},
+        comment="Amostras float32 little-endian comprimidas com zlib"
+    )
+
+    @classmethod
+    def comprimir(cls, amostras: np.ndarray) -> bytes:
+        """
+        Comprime as amostras no formato da coluna `amostras`.
+        :param amostras: Amostras do bloco; são convertidas para float32.
+        """
+        return zlib.compress(np.ascontiguousarray(amostras, dtype='<f4').tobytes(), cls.NIVEL_COMPRESSAO)
+
+    def amostras_array(self) -> np.ndarray:
+        """Descomprime as amostras do bloco."""
+        return np.frombuffer(zlib.decompress(self.amostras), dtype='<f4')
+
+    @classmethod
+    def salvar_forma_onda(cls,
+                          sensor_id: int,
+                          eixo: EixoAcelerometroEnum,
+                          data_inicio: datetime,
+                          taxa_amostragem: float,
+                          amostras: np.ndarray,
+                          duracao_bloco: timedelta = timedelta(seconds=1),
+                          ) -> int:
+        """
+        Divide as amostras em blocos de `duracao_bloco` e os insere em lote.
+        :param data_inicio: Instante da primeira amostra.
+        :param taxa_amostragem: Amostras por segundo.
+        :param amostras: Amostras consecutivas, igualmente espaçadas.
+        :param duracao_bloco: Duração de cada bloco; o último pode ser menor.
+        :return: Quantidade de blocos inseridos.
+        """
+        if taxa_amostragem <= 0:
+            raise ValueError("taxa_amostragem deve ser maior que zero")
+
+        amostras = np.asarray(amostras, dtype='<f4')
+        por_bloco = max(1, round(duracao_bloco.total_seconds() * taxa_amostragem))
+
+        linhas = []
+        for inicio in range(0, len(amostras), por_bloco):
+            bloco = amostras[inicio:inicio + por_bloco]
+            linhas.append({
+                'sensor_id': sensor_id,
+                'eixo': EixoAcelerometroEnum(eixo),
+                'data_inicio': data_inicio + timedelta(seconds=inicio / taxa_amostragem),
+                'data_fim': data_inicio + timedelta(seconds=(inicio + len(bloco)) / taxa_amostragem),
+                'taxa_amostragem': taxa_amostragem,
+                'quantidade_amostras': len(bloco),
+                'amostras': cls.comprimir(bloco),
+            })
+
+        return cls.bulk_insert(linhas)
+
+    @classmethod
+    def ler_forma_onda(cls,
+                       sensor_id: int,
+                       eixo: EixoAcelerometroEnum,
+                       data_inicial: datetime,
+                       data_final: datetime,
+                       ) -> FormaOnda:
+        """
+        Lê as amostras de um eixo no intervalo [data_inicial, data_final).
+        Apenas os blocos que se sobrepõem ao intervalo são lidos do banco e descomprimidos.
+        :return: FormaOnda com o instante e o valor de cada amostra, em ordem cronológica.
+        """
+        # Consulta de análise: vai para a réplica de leitura, se houver
+        with Database.get_session(read_only=True) as session:
+            blocos = session.query(
+                cls.data_inicio, cls.taxa_amostragem, cls.amostras
+            ).filter(
+                cls.sensor_id == sensor_id,
+                cls.eixo == EixoAcelerometroEnum(eixo),
+                cls.data_inicio < data_final,
+                cls.data_fim > data_inicial,
+            ).order_by(cls.data_inicio).all()
+
+        inicio_intervalo = np.datetime64(data_inicial, 'us')
+        fim_intervalo = np.datetime64(data_final, 'us')
+
+        instantes = []
+        valores = []
+
+        for data_inicio, taxa_amostragem, amostras in blocos:
+            bloco = np.frombuffer(zlib.decompress(amostras), dtype='<f4')
+            deslocamentos = np.round(np.arange(len(bloco)) * (1e6 / taxa_amostragem)).astype('timedelta64[us]')
+            tempos = np.datetime64(data_inicio, 'us') + deslocamentos
+
+            dentro = (tempos >= inicio_intervalo) & (tempos < fim_intervalo)
+            instantes.append(tempos[dentro])
+            valores.append(bloco[dentro])
+
+        if not blocos:
+            return FormaOnda(np.empty(0, dtype='datetime64[us]'), np.empty(0, dtype='<f4'))
+
+        return FormaOnda(np.concatenate(instantes), np.concatenate(valores))
+
+    @classmethod
+    def random(cls, nullable: bool = True) -> Self:
+        taxa_amostragem = 1000.0
+        data_inicio = datetime.now().replace(microsecond=0)
+        tempos = np.arange(int(taxa_amostragem)) / taxa_amostragem
+        amostras = np.sin(2 * np.pi * 50 * tempos) + np.random.normal(0, 0.05, len(tempos))
+
+        return cls(
+            sensor_id=1,
+            eixo=list(EixoAcelerometroEnum)[np.random.randint(len(EixoAcelerometroEnum))],
+            data_inicio=data_inicio,
+            data_fim=data_inicio + timedelta(seconds=1),
+            taxa_amostragem=taxa_amostragem,
+            quantidade_amostras=len(amostras),
+            amostras=cls.comprimir(amostras),
+        )
@@ -1,30 +1,291 @@
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from io import StringIO
-from typing import Optional
-from sqlalchemy import create_engine, Engine, MetaData
+from typing import Any, NamedTuple, Optional
+from sqlalchemy import create_engine, event, Engine, MetaData, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from typing import AsyncGenerator, Generator
+import asyncio
 import json
 import os
-from sqlalchemy.sql.ddl import CreateTable
+from sqlalchemy.sql.ddl import CreateTable, CreateIndex
 import threading
 import tempfile
 
 from src.settings import SQL_ALCHEMY_DEBUG
+from src.utils.env_utils import parse_bool
 
 DEFAULT_DSN = "oracle.fiap.com.br:1521/ORCL"
 
+# Driver usado pelas sessões assíncronas de cada banco
+DRIVERS_ASSINCRONOS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'oracle': 'oracledb_async',
+}
+
+
+class ConfiguracaoPool(NamedTuple):
+    """
+    Configuração do pool de conexões do engine. Os valores padrão são os do SQLAlchemy.
+    """
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
+    query_cache_size: int = 500
+    # psycopg2: 'values_only' ou 'values_plus_batch' (executemany com execute_batch para UPDATE/DELETE)
+    executemany_mode: str = "values_only"
+    # oracledb: usa o pool de sessões do driver em vez do pool do SQLAlchemy
+    oracle_pool_sessoes: bool = False
+    oracle_pool_min: int = 1
+    oracle_pool_max: int = 10
+    oracle_pool_incremento: int = 1
+
+    @classmethod
+    def from_env(cls, prefixo: str = "") -> "ConfiguracaoPool":
+        """
+        Lê a configuração das variáveis de ambiente DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+        DB_POOL_PRE_PING, DB_POOL_RECYCLE, DB_QUERY_CACHE_SIZE, DB_PG_EXECUTEMANY_MODE,
+        DB_ORACLE_POOL_SESSOES, DB_ORACLE_POOL_MIN, DB_ORACLE_POOL_MAX e DB_ORACLE_POOL_INCREMENTO.
+        :param prefixo: Prefixo do processo (ex.: 'API_'); API_DB_POOL_SIZE tem precedência sobre DB_POOL_SIZE.
+        """
+        def ler(nome: str) -> Optional[str]:
+            return os.environ.get(f"{prefixo}DB_{nome}", os.environ.get(f"DB_{nome}"))
+
+        valores = {}
+        for campo, nome in (
+                ('pool_size', 'POOL_SIZE'), ('max_overflow', 'MAX_OVERFLOW'), ('pool_timeout', 'POOL_TIMEOUT'),
+                ('pool_pre_ping', 'POOL_PRE_PING'), ('pool_recycle', 'POOL_RECYCLE'),
+                ('query_cache_size', 'QUERY_CACHE_SIZE'), ('executemany_mode', 'PG_EXECUTEMANY_MODE'),
+                ('oracle_pool_sessoes', 'ORACLE_POOL_SESSOES'), ('oracle_pool_min', 'ORACLE_POOL_MIN'),
+                ('oracle_pool_max', 'ORACLE_POOL_MAX'), ('oracle_pool_incremento', 'ORACLE_POOL_INCREMENTO'),
+        ):
+            valor = ler(nome)
+            if valor is None:
+                continue
+            tipo = type(cls._field_defaults[campo])
+            valores[campo] = parse_bool(valor) if tipo is bool else tipo(valor)
+
+        return cls(**valores)
+
+    def argumentos_engine(self, dialeto: str, assincrono: bool = False) -> dict[str, Any]:
+        """
+        Argumentos de create_engine para o dialeto ('sqlite', 'postgresql' ou 'oracle').
+        :param assincrono: Argumentos de create_async_engine, para o driver assíncrono do dialeto.
+        """
+        argumentos = {'query_cache_size': self.query_cache_size}
+
+        if dialeto == 'oracle' and self.oracle_pool_sessoes and not assincrono:
+            # As conexões vêm do pool do driver; o SQLAlchemy não mantém outro pool por cima
+            argumentos['poolclass'] = NullPool
+            return argumentos
+
+        argumentos.update(
+            poolclass=AsyncAdaptedQueuePool if assincrono else QueuePool,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout,
+            pool_pre_ping=self.pool_pre_ping,
+            pool_recycle=self.pool_recycle,
+        )
+
+        if dialeto == 'postgresql' and not assincrono:
+            argumentos['executemany_mode'] = self.executemany_mode
+
+        return argumentos
+
+
+class PerfilSQLite(NamedTuple):
+    """
+    Perfil do SQLite para leituras e escritas concorrentes (ex.: dashboard lendo enquanto a API grava).
+
+    Com o journal em WAL, leitores não bloqueiam o escritor nem são bloqueados por ele. Como o SQLite
+    aceita um único escritor por vez, as escritas das sessões de cada engine são feitas por uma única
+    conexão (um pool de tamanho 1), de modo que esperam a vez na fila do pool em vez de disputar o lock
+    do banco. O escritor é único por engine: as sessões síncronas e as assíncronas têm cada uma o seu,
+    e esses dois escritores (e os de outros processos) ainda disputam o lock, esperando até busy_timeout_ms.
+    """
+    wal: bool = True
+    synchronous: str = "NORMAL"
+    mmap_size_mb: int = 256
+    cache_size_mb: int = 64
+    busy_timeout_ms: int = 5000
+    temp_store_memoria: bool = True
+    escritor_unico: bool = True
+
+    @classmethod
+    def from_env(cls) -> Optional["PerfilSQLite"]:
+        """
+        Lê o perfil das variáveis de ambiente, se SQLITE_ALTA_CONCORRENCIA estiver habilitada:
+        SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE_MB, SQLITE_CACHE_SIZE_MB, SQLITE_BUSY_TIMEOUT_MS e SQLITE_ESCRITOR_UNICO.
+        :return: O perfil ou None, para usar o SQLite com as configurações padrão.
+        """
+        if not parse_bool(os.environ.get("SQLITE_ALTA_CONCORRENCIA")):
+            return None
+
+        padrao = cls()
+        return cls(
+            synchronous=os.environ.get("SQLITE_SYNCHRONOUS", padrao.synchronous),
+            mmap_size_mb=int(os.environ.get("SQLITE_MMAP_SIZE_MB", padrao.mmap_size_mb)),
+            cache_size_mb=int(os.environ.get("SQLITE_CACHE_SIZE_MB", padrao.cache_size_mb)),
+            busy_timeout_ms=int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", padrao.busy_timeout_ms)),
+            escritor_unico=parse_bool(os.environ.get("SQLITE_ESCRITOR_UNICO"), padrao.escritor_unico),
+        )
+
+    def pragmas(self) -> list[str]:
+        """Comandos PRAGMA executados em cada conexão nova."""
+        pragmas = [
+            f"PRAGMA busy_timeout = {self.busy_timeout_ms}",
+            f"PRAGMA synchronous = {self.synchronous}",
+            f"PRAGMA mmap_size = {self.mmap_size_mb * 1024 * 1024}",
+            # Valores negativos são em KiB, independentemente do tamanho da página
+            f"PRAGMA cache_size = {-self.cache_size_mb * 1024}",
+        ]
+        if self.wal:
+            pragmas.insert(1, "PRAGMA journal_mode = WAL")
+        if self.temp_store_memoria:
+            pragmas.append("PRAGMA temp_store = MEMORY")
+        return pragmas
+
+    def aplicar(self, engine: Engine):
+        """Registra os pragmas para todas as conexões abertas pelo engine."""
+        pragmas = self.pragmas()
+
+        @event.listens_for(engine, "connect")
+        def _aplicar_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+
+class SessaoEscritorUnico(Session):
+    """
+    Sessão que lê pelo engine principal e escreve pelo engine de escrita (uma única conexão).
+    As sessões síncronas e as assíncronas usam engines de escrita distintos.
+    Depois da primeira escrita, a transação continua no engine de escrita, para que as leituras
+    seguintes vejam o que a própria sessão gravou. O flush é marcado como escrita pelo evento
+    before_flush, antes de a sessão pedir a conexão.
+    """
+
+    def __init__(self, *args, engine_escrita: Engine, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.engine_escrita = engine_escrita
+        self._escrevendo = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._escrevendo or isinstance(clause, UpdateBase):
+            self._escrevendo = True
+            return self.engine_escrita
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(SessaoEscritorUnico, "before_flush")
+def _inicio_escrita(session, flush_context, instances):
+    session._escrevendo = True
+
+
+@event.listens_for(SessaoEscritorUnico, "after_commit")
+@event.listens_for(SessaoEscritorUnico, "after_rollback")
+def _fim_escrita(session):
+    session._escrevendo = False
+
+
 class Database:
 
     _engine: Optional[Engine] = None
+    _engine_escrita: Optional[Engine] = None
     _session: Optional[sessionmaker] = None
+    # Réplica de leitura opcional, usada pelas sessões com read_only=True
+    _engine_leitura: Optional[Engine] = None
+    _session_leitura: Optional[sessionmaker] = None
+    _replica_propria: bool = False
+    _pool_oracle = None
     _lock = threading.Lock()
 
+    # Sessões assíncronas: o engine é criado na primeira sessão, com a URL e as configurações do init_*
+    _url: Optional[URL] = None
+    _configuracao_pool: Optional[ConfiguracaoPool] = None
+    _perfil_sqlite: Optional[PerfilSQLite] = None
+    _engine_async: Optional[AsyncEngine] = None
+    _engine_escrita_async: Optional[AsyncEngine] = None
+    _session_async: Optional[async_sessionmaker] = None
+
+    @staticmethod
+    def _descartar_engine():
+        """Fecha o engine atual, os engines assíncronos e o pool de sessões do Oracle, se houver."""
+        if Database._engine is not None:
+            Database._engine.dispose()
+        if Database._engine_escrita is not None:
+            Database._engine_escrita.dispose()
+            Database._engine_escrita = None
+        if Database._pool_oracle is not None:
+            Database._pool_oracle.close(force=True)
+            Database._pool_oracle = None
+        Database._descartar_replica()
+
+        for engine in (Database._engine_async, Database._engine_escrita_async):
+            if engine is not None:
+                Database._descartar_engine_async(engine)
+        Database._engine_async = Database._engine_escrita_async = Database._session_async = None
+        Database._url = Database._configuracao_pool = Database._perfil_sqlite = None
+
+    @staticmethod
+    def _descartar_replica():
+        # Uma réplica informada já criada (Engine) é de quem a criou e não é fechada aqui
+        if Database._engine_leitura is not None and Database._replica_propria:
+            Database._engine_leitura.dispose()
+        Database._engine_leitura = Database._session_leitura = None
+
     @staticmethod
-    def init_sqlite(path:Optional[str] = None):
+    def _descartar_engine_async(engine: AsyncEngine):
+        # As conexões dos drivers assíncronos só podem ser fechadas dentro de um event loop. Com um loop
+        # em execução nesta thread, elas são apenas soltas do pool e fechadas quando coletadas.
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(engine.dispose())
+        else:
+            engine.sync_engine.dispose(close=False)
+
+    @classmethod
+    def descartar_conexoes(cls):
+        """
+        Fecha as conexões abertas nos pools, sem finalizar o Database; novas conexões são abertas sob demanda.
+        Usado antes de criar processos, para que nenhuma conexão seja herdada.
+        """
+        for engine in (cls._engine, cls._engine_escrita, cls._engine_leitura):
+            if engine is not None:
+                engine.dispose()
+        for engine in (cls._engine_async, cls._engine_escrita_async):
+            if engine is not None:
+                cls._descartar_engine_async(engine)
+
+    @classmethod
+    async def descartar_conexoes_async(cls):
+        """
+        Fecha as conexões abertas nos pools assíncronos. Deve ser chamado no event loop que as usou,
+        antes de ele ser encerrado (ex.: na finalização do lifespan da API).
+        """
+        for engine in (cls._engine_async, cls._engine_escrita_async):
+            if engine is not None:
+                await engine.dispose()
+
+    @staticmethod
+    def init_sqlite(path:Optional[str] = None, pool: Optional[ConfiguracaoPool] = None,
+                    perfil: Optional[PerfilSQLite] = None):
         """
         Inicializa a conexão com o banco de dados SQLite com validação de tipos e path.
         :param path: Caminho do banco de dados SQLite.
+        :param pool: Configuração do pool de conexões. Se None, lida das variáveis de ambiente DB_*.
+        :param perfil: Perfil de alta concorrência (WAL, pragmas e escritor único). Se None, lido das
+                       variáveis de ambiente SQLITE_* (ver PerfilSQLite.from_env).
         :return:
         """
         # Validação de tipo
@@ -35,10 +296,12 @@ class Database:
         if path is not None and not path.strip():
             raise ValueError("path não pode ser string vazia")
 
+        pool = pool or ConfiguracaoPool.from_env()
+        perfil = perfil or PerfilSQLite.from_env()
+
         with Database._lock:
             # Fecha engine antigo se existir
-            if Database._engine is not None:
-                Database._engine.dispose()
+            Database._descartar_engine()
 
             if path is None:
                 path = os.path.join(os.getcwd(), "database.db")
@@ -56,29 +319,63 @@ class Database:
             directory = os.path.dirname(path)
             os.makedirs(directory, exist_ok=True)
 
-            Database._engine = create_engine(f"sqlite:///{path}", echo=SQL_ALCHEMY_DEBUG)
-            Database._session = sessionmaker(autocommit=False, autoflush=False, bind=Database._engine)
+            Database._engine = create_engine(f"sqlite:///{path}", echo=SQL_ALCHEMY_DEBUG, **pool.argumentos_engine('sqlite'))
+            Database._url, Database._configuracao_pool, Database._perfil_sqlite = Database._engine.url, pool, perfil
+
+            if perfil is not None:
+                perfil.aplicar(Database._engine)
+
+            if perfil is not None and perfil.escritor_unico:
+                Database._engine_escrita = create_engine(
+                    f"sqlite:///{path}", echo=SQL_ALCHEMY_DEBUG,
+                    **pool._replace(pool_size=1, max_overflow=0).argumentos_engine('sqlite'),
+                )
+                perfil.aplicar(Database._engine_escrita)
+                Database._session = sessionmaker(
+                    class_=SessaoEscritorUnico, autocommit=False, autoflush=False, bind=Database._engine,
+                    engine_escrita=Database._engine_escrita,
+                )
+            else:
+                Database._session = sessionmaker(autocommit=False, autoflush=False, bind=Database._engine)
 
             # Testa a conexão
             with Database._engine.connect() as _:
                 print(f"Conexão bem-sucedida ao banco de dados SQLite!\n Path: {path}")
 
     @staticmethod
-    def init_oracledb(user:str, password:str, dsn:str=DEFAULT_DSN):
+    def init_oracledb(user:str, password:str, dsn:str=DEFAULT_DSN, pool: Optional[ConfiguracaoPool] = None):
         '''
         Inicializa a conexão com o banco de dados Oracle.
         :param user: Nome do usuário do banco de dados.
         :param password: Senha do usuário do banco de dados.
         :param dsn: DSN do banco de dados.
+        :param pool: Configuração do pool de conexões. Se None, lida das variáveis de ambiente DB_*.
         :return:
         '''
+        pool = pool or ConfiguracaoPool.from_env()
+
         with Database._lock:
             # Fecha engine antigo se existir
-            if Database._engine is not None:
-                Database._engine.dispose()
+            Database._descartar_engine()
+
+            # As sessões assíncronas usam o pool do SQLAlchemy mesmo com o pool de sessões do driver
+            Database._url = make_url(f"oracle+oracledb://{user}:{password}@{dsn}")
+            Database._configuracao_pool = pool
 
             # Cria o engine de conexão
-            Database._engine = create_engine(f"oracle+oracledb://{user}:{password}@{dsn}", echo=SQL_ALCHEMY_DEBUG)
+            if pool.oracle_pool_sessoes:
+                import oracledb
+
+                Database._pool_oracle = oracledb.create_pool(
+                    user=user, password=password, dsn=dsn,
+                    min=pool.oracle_pool_min, max=pool.oracle_pool_max, increment=pool.oracle_pool_incremento,
+                )
+                Database._engine = create_engine(
+                    "oracle+oracledb://", creator=Database._pool_oracle.acquire, echo=SQL_ALCHEMY_DEBUG,
+                    **pool.argumentos_engine('oracle'),
+                )
+            else:
+                Database._engine = create_engine(Database._url, echo=SQL_ALCHEMY_DEBUG, **pool.argumentos_engine('oracle'))
             Database._session = sessionmaker(autocommit=False, autoflush=False, bind=Database._engine)
 
             # Testa a conexão
@@ -86,7 +383,8 @@ class Database:
                 print("Conexão bem-sucedida ao banco de dados Oracle!")
 
     @staticmethod
-    def init_postgresdb(user: str, password: str, host: str = "localhost", port: int = 5432, dbname: str = "postgres"):
+    def init_postgresdb(user: str, password: str, host: str = "localhost", port: int = 5432, dbname: str = "postgres",
+                        pool: Optional[ConfiguracaoPool] = None):
         """
         Inicializa a conexão com o banco de dados PostgreSQL.
         :param user: Nome do usuário do banco de dados.
@@ -94,14 +392,20 @@ class Database:
         :param host: Host do banco de dados.
         :param port: Porta do banco de dados.
         :param dbname: Nome do banco de dados.
+        :param pool: Configuração do pool de conexões. Se None, lida das variáveis de ambiente DB_*.
         :return:
         """
+        pool = pool or ConfiguracaoPool.from_env()
+
         with Database._lock:
             # Fecha engine antigo se existir
-            if Database._engine is not None:
-                Database._engine.dispose()
+            Database._descartar_engine()
 
-            Database._engine = create_engine(f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}", echo=SQL_ALCHEMY_DEBUG)
+            Database._engine = create_engine(
+                f"postgresql+psycopg2://{user}:{password}@{host}:{port}/{dbname}", echo=SQL_ALCHEMY_DEBUG,
+                **pool.argumentos_engine('postgresql'),
+            )
+            Database._url, Database._configuracao_pool = Database._engine.url, pool
             Database._session = sessionmaker(autocommit=False, autoflush=False, bind=Database._engine)
 
             with Database._engine.connect() as _:
@@ -117,11 +421,11 @@ class Database:
         """
         with Database._lock:
             # Fecha engine antigo se existir
-            if Database._engine is not None:
-                Database._engine.dispose()
+            Database._descartar_engine()
 
             Database._engine = engine
             Database._session = session_maker
+            Database._url = engine.url
 
     @staticmethod
     def init_with_old_instance(session: sessionmaker, engine: Engine):
@@ -134,6 +438,7 @@ class Database:
         with Database._lock:
             Database._session = session
             Database._engine = engine
+            Database._url = engine.url
 
 
     @staticmethod
@@ -147,18 +452,127 @@ class Database:
         with Database._lock:
             Database._session = session
             Database._engine = engine
+            Database._url = engine.url
+
+    @staticmethod
+    def init_replica(replica: Engine | URL | str, pool: Optional[ConfiguracaoPool] = None):
+        """
+        Configura uma réplica de leitura para as sessões com read_only=True (ex.: os DataFrames e as
+        telas do dashboard), de modo que consultas pesadas não disputem o banco principal com a ingestão.
+        Deve ser chamado depois do init_*, que descarta a réplica anterior.
+        As leituras pela réplica podem estar atrasadas em relação ao banco principal.
+        :param replica: Engine já criado ou URL do SQLAlchemy da réplica (ex.: 'postgresql+psycopg2://...'
+                        ou, no SQLite, 'sqlite:///file:database.db?mode=ro&uri=true' para um pool só de leitura).
+        :param pool: Configuração do pool, quando a réplica é uma URL. Se None, lida das variáveis de ambiente DB_*.
+        """
+        if Database._session is None:
+            raise RuntimeError("Database não inicializada. Chame um método init_* primeiro.")
+
+        with Database._lock:
+            Database._descartar_replica()
+
+            if isinstance(replica, Engine):
+                engine, Database._replica_propria = replica, False
+            else:
+                url = make_url(replica)
+                pool = pool or ConfiguracaoPool.from_env()
+                engine = create_engine(url, echo=SQL_ALCHEMY_DEBUG, **pool.argumentos_engine(url.get_backend_name()))
+                if url.get_backend_name() == 'sqlite' and Database._perfil_sqlite is not None:
+                    Database._perfil_sqlite.aplicar(engine)
+                Database._replica_propria = True
+
+            Database._engine_leitura = engine
+            Database._session_leitura = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    @staticmethod
+    def init_replica_from_env(prefixo: str = "", pool: Optional[ConfiguracaoPool] = None) -> bool:
+        """
+        Configura a réplica de leitura a partir da variável de ambiente DB_REPLICA_URL, se definida.
+        :param prefixo: Prefixo do processo (ex.: 'API_'); API_DB_REPLICA_URL tem precedência sobre DB_REPLICA_URL.
+        :param pool: Configuração do pool da réplica. Se None, lida das variáveis de ambiente DB_*.
+        :return: True se a réplica foi configurada.
+        """
+        url = os.environ.get(f"{prefixo}DB_REPLICA_URL", os.environ.get("DB_REPLICA_URL"))
+        if not url:
+            return False
+
+        Database.init_replica(url, pool)
+        return True
 
     @staticmethod
     @contextmanager
-    def get_session() -> Generator[Session, None, None]:
+    def get_session(read_only: bool = False) -> Generator[Session, None, None]:
+        """
+        Sessão no banco do último init_*.
+        :param read_only: Sessão apenas para consultas, pela réplica de leitura se houver uma (ver init_replica);
+                          sem réplica, usa o banco principal.
+        """
         if Database._session is None:
             raise RuntimeError("Database não inicializada. Chame um método init_* primeiro.")
-        db = Database._session()
+        session_maker = Database._session_leitura if read_only and Database._session_leitura is not None else Database._session
+        db = session_maker()
         try:
             yield db
         finally:
             db.close()
 
+    @staticmethod
+    def init_async() -> async_sessionmaker:
+        """
+        Cria o engine assíncrono para o banco do último init_*, com o driver assíncrono do dialeto
+        (ver DRIVERS_ASSINCRONOS), a mesma configuração de pool e, no SQLite, o mesmo perfil.
+        Chamado pela primeira get_async_session(); não é necessário chamá-lo diretamente.
+        :return: O sessionmaker assíncrono.
+        """
+        with Database._lock:
+            if Database._session_async is not None:
+                return Database._session_async
+
+            if Database._url is None:
+                raise RuntimeError("Database não inicializada. Chame um método init_* primeiro.")
+
+            dialeto = Database._url.get_backend_name()
+            if dialeto not in DRIVERS_ASSINCRONOS:
+                raise RuntimeError(f"Sessões assíncronas não são suportadas para o banco '{dialeto}'.")
+
+            url = Database._url.set(drivername=f"{dialeto}+{DRIVERS_ASSINCRONOS[dialeto]}")
+            pool = Database._configuracao_pool or ConfiguracaoPool.from_env()
+            perfil = Database._perfil_sqlite
+
+            Database._engine_async = create_async_engine(
+                url, echo=SQL_ALCHEMY_DEBUG, **pool.argumentos_engine(dialeto, assincrono=True)
+            )
+            if perfil is not None:
+                perfil.aplicar(Database._engine_async.sync_engine)
+
+            if perfil is not None and perfil.escritor_unico:
+                Database._engine_escrita_async = create_async_engine(
+                    url, echo=SQL_ALCHEMY_DEBUG,
+                    **pool._replace(pool_size=1, max_overflow=0).argumentos_engine(dialeto, assincrono=True),
+                )
+                perfil.aplicar(Database._engine_escrita_async.sync_engine)
+                Database._session_async = async_sessionmaker(
+                    bind=Database._engine_async, autoflush=False, expire_on_commit=False,
+                    sync_session_class=SessaoEscritorUnico, engine_escrita=Database._engine_escrita_async.sync_engine,
+                )
+            else:
+                Database._session_async = async_sessionmaker(
+                    bind=Database._engine_async, autoflush=False, expire_on_commit=False,
+                )
+
+            return Database._session_async
+
+    @staticmethod
+    @asynccontextmanager
+    async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+        """
+        Sessão assíncrona no banco do último init_*, para uso com `async with` em rotas `async def`:
+        as consultas aguardam o banco sem ocupar uma thread.
+        """
+        session_maker = Database._session_async or Database.init_async()
+        async with session_maker() as db:
+            yield db
+
     @classmethod
     def list_tables(cls) -> list[str]:
         """
@@ -200,6 +614,11 @@ class Database:
 
         try:
             Model.metadata.create_all(bind=cls._engine)
+            # O create_all só cria os índices junto com a tabela; os declarados depois em __indices__
+            # precisam ser criados nas tabelas que já existem
+            for table in Model.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=cls._engine, checkfirst=True)
             print("Tabelas criadas com sucesso.")
         except Exception as e:
             print("Erro ao criar tabelas no banco de dados.")
@@ -226,7 +645,7 @@ class Database:
     @classmethod
     def generate_ddl(cls,) -> str:
         """
-        Gera os comandos SQL (DDL) para criar as tabelas baseadas nos models.
+        Gera os comandos SQL (DDL) para criar as tabelas baseadas nos models e os seus índices.
         """
 
         #Os imports são feitos dentro da função para evitar problemas de importação circular.
@@ -242,6 +661,9 @@ class Database:
             ddl_statement = str(CreateTable(table).compile(cls._engine))
             output.write(ddl_statement + ";\n\n")
 
+            for index in table.indexes:
+                output.write(str(CreateIndex(index).compile(cls._engine)) + ";\n\n")
+
         return output.getvalue()
 
     @classmethod
@@ -271,6 +693,49 @@ class Database:
 
         return mer_output
 
+    @classmethod
+    def estatisticas_pool(cls) -> Optional[dict]:
+        """
+        Retorna a ocupação do pool de conexões do engine atual.
+        :return: Dicionário com o tamanho do pool e as conexões em uso, ociosas e excedentes (overflow),
+                 ou None se o Database não foi inicializado.
+        """
+        if cls._engine is None:
+            return None
+
+        pool = cls._engine.pool
+        estatisticas = {"classe": type(pool).__name__}
+
+        if isinstance(pool, QueuePool):
+            estatisticas.update(
+                tamanho=pool.size(),
+                em_uso=pool.checkedout(),
+                ociosas=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                timeout=pool.timeout(),
+            )
+
+        if cls._engine_escrita is not None:
+            escrita = cls._engine_escrita.pool
+            estatisticas["escrita"] = {"em_uso": escrita.checkedout(), "timeout": escrita.timeout()}
+
+        if cls._engine_leitura is not None and isinstance(cls._engine_leitura.pool, QueuePool):
+            replica = cls._engine_leitura.pool
+            estatisticas["replica"] = {"em_uso": replica.checkedout(), "ociosas": replica.checkedin()}
+
+        if cls._engine_async is not None:
+            assincrono = cls._engine_async.sync_engine.pool
+            estatisticas["assincrono"] = {"em_uso": assincrono.checkedout(), "ociosas": assincrono.checkedin()}
+
+        if cls._pool_oracle is not None:
+            estatisticas.update(
+                em_uso=cls._pool_oracle.busy,
+                abertas=cls._pool_oracle.opened,
+                tamanho=cls._pool_oracle.max,
+            )
+
+        return estatisticas
+
     @classmethod
     def get_engine(cls):
         """Método para compatibilidade com testes existentes."""
@@ -8,6 +8,7 @@ from src.database.tipos_base.database import Database
 from src.database.tipos_base.model_mixins.crud import _ModelCrudMixin # noqa
 from src.database.tipos_base.model_mixins.display import _ModelDisplayMixin # noqa
 from src.database.tipos_base.model_mixins.fields import _ModelFieldsMixin # noqa
+from src.database.tipos_base.model_mixins.indices import _ModelIndicesMixin # noqa
 from src.database.tipos_base.model_mixins.serialization import _ModelSerializationMixin # noqa
 from src.plots.plot_config import GenericPlot
 from sqlalchemy.sql.elements import BinaryExpression, UnaryExpression
@@ -22,6 +23,7 @@ class Model(DeclarativeBase,
             _ModelFieldsMixin,
             _ModelDisplayMixin,
             _ModelCrudMixin,
+            _ModelIndicesMixin,
             ):
 
     __database_import_order__:int = 100000
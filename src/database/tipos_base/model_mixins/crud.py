@@ -1,12 +1,33 @@
 from abc import abstractmethod
 
+import csv
+import io
 import logging
 
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import selectinload
 
 from src.database.tipos_base.database import Database
-from sqlalchemy import inspect, BinaryExpression, UnaryExpression
+from sqlalchemy import inspect, insert, update, text, bindparam, tuple_, Sequence, BinaryExpression, UnaryExpression
+from sqlalchemy.orm import Session
 from typing import Self
+from enum import Enum
+
+
+def _valor_para_copy(valor):
+    """
+    Converte um valor Python para o formato CSV aceito pelo COPY do PostgreSQL.
+    None vira \\N, usado como marcador de NULL no comando COPY.
+    """
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, (bytes, bytearray)):
+        return '\\x' + valor.hex()
+    if isinstance(valor, Enum):
+        # o tipo Enum do SQLAlchemy persiste o nome do membro
+        return valor.name
+    return valor
+
 
 class _ModelCrudMixin:
     """
@@ -104,6 +125,202 @@ class _ModelCrudMixin:
 
         return self
 
+    @classmethod
+    def bulk_insert(cls, rows: list[dict]) -> int:
+        """
+        Insere várias linhas de uma só vez, em uma única transação, sem passar pelo unit-of-work do ORM.
+        Indicado para cargas grandes (ex.: leituras de sensores), onde criar uma instância por linha é caro.
+        No PostgreSQL (psycopg2) usa COPY FROM STDIN; nos demais bancos usa um INSERT com executemany.
+        :param rows: list[dict] - Linhas a serem inseridas, no formato {coluna: valor}. Todas devem ter as mesmas chaves.
+        :return: int - Quantidade de linhas inseridas.
+        """
+        if not rows:
+            return 0
+
+        with Database.get_session() as session:
+            dialect = session.get_bind().dialect
+
+            try:
+                if dialect.name == 'postgresql' and dialect.driver == 'psycopg2':
+                    cls._copy_from_stdin(session, rows)
+                else:
+                    session.execute(insert(cls), rows)
+            except DBAPIError:
+                session.rollback()
+                raise
+
+            session.commit()
+
+        return len(rows)
+
+    @classmethod
+    async def bulk_insert_async(cls, rows: list[dict]) -> int:
+        """
+        Versão assíncrona de bulk_insert, pela sessão assíncrona do Database (ver Database.get_async_session).
+        Usa um INSERT com executemany em todos os bancos: os drivers assíncronos não têm o COPY do psycopg2.
+        :param rows: list[dict] - Linhas a serem inseridas, no formato {coluna: valor}. Todas devem ter as mesmas chaves.
+        :return: int - Quantidade de linhas inseridas.
+        """
+        if not rows:
+            return 0
+
+        async with Database.get_async_session() as session:
+            await session.execute(insert(cls), rows)
+            await session.commit()
+
+        return len(rows)
+
+    @classmethod
+    def bulk_upsert(cls, rows: list[dict], chaves: list[str], atualizar: list[str] | None = None,
+                    session: Session | None = None) -> int:
+        """
+        Insere várias linhas de uma só vez; as que conflitam com uma linha existente nas colunas `chaves`
+        têm as colunas `atualizar` atualizadas ou, se `atualizar` não for informado, são ignoradas.
+        No PostgreSQL e no SQLite usa INSERT ... ON CONFLICT e no Oracle usa MERGE, de modo que
+        cadastros simultâneos da mesma linha não falham. Nos demais bancos consulta as linhas existentes
+        e insere as restantes.
+        :param rows: list[dict] - Linhas no formato {coluna: valor}. Todas devem ter as mesmas chaves.
+        :param chaves: list[str] - Colunas de uma restrição de unicidade da tabela.
+        :param atualizar: list[str] or None - Colunas atualizadas nas linhas que já existem.
+        :param session: Session or None - Sessão onde executar, sem commit, para compor uma transação maior.
+                        Se None, abre uma sessão e faz o commit.
+        :return: int - Quantidade de linhas enviadas.
+        """
+        if not rows:
+            return 0
+
+        if session is None:
+            with Database.get_session() as session:
+                cls.bulk_upsert(rows, chaves, atualizar, session)
+                session.commit()
+            return len(rows)
+
+        dialect = session.get_bind().dialect
+
+        if dialect.name in ('postgresql', 'sqlite'):
+            if dialect.name == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+            else:
+                from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+
+            comando = insert_dialeto(cls)
+            if atualizar:
+                comando = comando.on_conflict_do_update(
+                    index_elements=chaves, set_={coluna: comando.excluded[coluna] for coluna in atualizar}
+                )
+            else:
+                comando = comando.on_conflict_do_nothing(index_elements=chaves)
+            session.execute(comando, rows)
+        elif dialect.name == 'oracle':
+            cls._merge(session, rows, chaves, atualizar)
+        else:
+            cls._upsert_consultando(session, rows, chaves, atualizar)
+
+        return len(rows)
+
+    @classmethod
+    def _merge(cls, session: Session, rows: list[dict], chaves: list[str], atualizar: list[str] | None):
+        """
+        Upsert com MERGE (Oracle), executado uma vez por linha em um único executemany.
+        """
+        table = cls.__table__
+        preparer = session.get_bind().dialect.identifier_preparer
+        colunas = [table.c[key] for key in rows[0].keys() if key in table.c]
+
+        def nome(coluna: str) -> str:
+            return preparer.format_column(table.c[coluna])
+
+        origem = ', '.join(f":{c.key} AS {preparer.format_column(c)}" for c in colunas)
+        condicao = ' AND '.join(f"t.{nome(c)} = s.{nome(c)}" for c in chaves)
+        destino = [preparer.format_column(c) for c in colunas]
+        valores = [f"s.{preparer.format_column(c)}" for c in colunas]
+
+        id_column = table.c.get('id')
+        if id_column is not None and id_column.key not in rows[0] and isinstance(id_column.default, Sequence):
+            destino.insert(0, preparer.format_column(id_column))
+            valores.insert(0, f"{preparer.format_sequence(id_column.default)}.NEXTVAL")
+
+        comando = f"MERGE INTO {preparer.format_table(table)} t USING (SELECT {origem} FROM dual) s ON ({condicao})"
+        if atualizar:
+            comando += f" WHEN MATCHED THEN UPDATE SET {', '.join(f't.{nome(c)} = s.{nome(c)}' for c in atualizar)}"
+        comando += f" WHEN NOT MATCHED THEN INSERT ({', '.join(destino)}) VALUES ({', '.join(valores)})"
+
+        # Os tipos das colunas convertem os valores (ex.: Enum) como em um INSERT do ORM
+        session.execute(text(comando).bindparams(*[bindparam(c.key, type_=c.type) for c in colunas]), rows)
+
+    @classmethod
+    def _upsert_consultando(cls, session: Session, rows: list[dict], chaves: list[str], atualizar: list[str] | None):
+        """
+        Upsert para bancos sem ON CONFLICT/MERGE: consulta as chaves existentes e insere as demais linhas.
+        """
+        colunas_chave = [getattr(cls, chave) for chave in chaves]
+        existentes = {
+            tuple(linha) for linha in
+            session.query(*colunas_chave).filter(tuple_(*colunas_chave).in_([tuple(row[c] for c in chaves) for row in rows]))
+        }
+
+        novas = [row for row in rows if tuple(row[c] for c in chaves) not in existentes]
+        if novas:
+            session.execute(insert(cls), novas)
+
+        if atualizar and existentes:
+            comando = update(cls.__table__).where(
+                *[coluna == bindparam(f"chave_{coluna.key}") for coluna in colunas_chave]
+            ).values({coluna: bindparam(f"novo_{coluna}") for coluna in atualizar})
+            session.connection().execute(comando, [
+                {**{f"chave_{c}": row[c] for c in chaves}, **{f"novo_{c}": row[c] for c in atualizar}}
+                for row in rows if tuple(row[c] for c in chaves) in existentes
+            ])
+
+    @classmethod
+    def _copy_from_stdin(cls, session: Session, rows: list[dict], chunk_size: int = 100000):
+        """
+        Insere as linhas com COPY FROM STDIN (psycopg2), em blocos de `chunk_size` linhas, na transação da sessão.
+        Se as linhas não trazem o id e a coluna usa uma Sequence, os ids são reservados antes com uma única consulta.
+        Os erros do psycopg2 são convertidos nas exceções do SQLAlchemy (ex.: UniqueViolation -> IntegrityError).
+        """
+        table = cls.__table__
+        colunas = [table.c[key] for key in rows[0].keys() if key in table.c]
+        dialect = session.get_bind().dialect
+        preparer = dialect.identifier_preparer
+        erro_dbapi = dialect.dbapi.Error if dialect.dbapi is not None else ()
+
+        id_column = table.c.get('id')
+        ids = None
+
+        if id_column is not None and id_column not in colunas and isinstance(id_column.default, Sequence):
+            sequence = preparer.format_sequence(id_column.default)
+            ids = session.execute(
+                text(f"SELECT nextval('{sequence}') FROM generate_series(1, :total)"), {'total': len(rows)}
+            ).scalars().all()
+            colunas = [id_column] + colunas
+
+        comando = (
+            f"COPY {preparer.format_table(table)} ({', '.join(preparer.format_column(c) for c in colunas)}) "
+            f"FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+        chaves = [c.key for c in colunas if c is not id_column or ids is None]
+
+        cursor = session.connection().connection.cursor()
+        try:
+            for inicio in range(0, len(rows), chunk_size):
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator='\n')
+
+                for posicao, row in enumerate(rows[inicio:inicio + chunk_size], start=inicio):
+                    valores = [_valor_para_copy(row.get(chave)) for chave in chaves]
+                    if ids is not None:
+                        valores.insert(0, ids[posicao])
+                    writer.writerow(valores)
+
+                buffer.seek(0)
+                cursor.copy_expert(comando, buffer)
+        except erro_dbapi as e:
+            # O cursor do psycopg2 é usado diretamente, sem a conversão de erros que o SQLAlchemy faz no execute
+            raise DBAPIError.instance(comando, None, e, erro_dbapi, dialect=dialect) from e
+        finally:
+            cursor.close()
+
     @classmethod
     def count(cls, filters:list[BinaryExpression] or None = None) -> int:
         """
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Index, text
+from sqlalchemy.orm import declared_attr
+
+
+@dataclass(frozen=True)
+class IndiceModel:
+    """
+    Classe para declarar um índice de um Model em __indices__.
+
+    Args:
+        colunas (tuple[str, ...]): Colunas do índice, na ordem da chave.
+        nome (str or None): Nome do índice; o padrão é IX_<TABELA>_<COLUNAS>. No Oracle anterior ao 12.2,
+            os nomes são limitados a 30 caracteres.
+        unico (bool): Indica se o índice é único.
+        incluir (tuple[str, ...]): Colunas incluídas nas folhas do índice, sem fazer parte da chave (índice de cobertura).
+            Apenas no PostgreSQL; nos demais bancos, declare-as no final de `colunas` se a cobertura for necessária.
+        onde (str or None): Condição SQL de um índice parcial, ex.: "cod_serial IS NOT NULL".
+            Apenas no PostgreSQL e no SQLite; no Oracle o índice é criado completo.
+    """
+
+    colunas: tuple[str, ...]
+    nome: Optional[str] = None
+    unico: bool = False
+    incluir: tuple[str, ...] = ()
+    onde: Optional[str] = None
+
+    def nome_para(self, tabela: str) -> str:
+        """
+        Retorna o nome do índice na tabela informada.
+        """
+        return self.nome or f"IX_{tabela}_{'_'.join(self.colunas)}".upper()
+
+    def criar(self, tabela: str) -> Index:
+        """
+        Cria o Index do SQLAlchemy correspondente, com as opções de cada dialeto.
+        """
+        opcoes = {}
+
+        if self.incluir:
+            opcoes['postgresql_include'] = list(self.incluir)
+
+        if self.onde:
+            opcoes['postgresql_where'] = text(self.onde)
+            opcoes['sqlite_where'] = text(self.onde)
+
+        return Index(self.nome_para(tabela), *self.colunas, unique=self.unico, **opcoes)
+
+
+class _ModelIndicesMixin:
+
+    __indices__: tuple[IndiceModel, ...] = ()
+
+    @declared_attr.directive
+    def __table_args__(cls) -> tuple:
+        """
+        Gera os índices declarados em __indices__ para a tabela do Model.
+        Models que definirem __table_args__ devem incluir os índices com cls.table_indexes().
+        """
+        return cls.table_indexes()
+
+    @classmethod
+    def table_indexes(cls) -> tuple[Index, ...]:
+        """
+        Retorna os Index do SQLAlchemy dos índices declarados em __indices__.
+        """
+        return tuple(indice.criar(cls.__tablename__) for indice in cls.__indices__)
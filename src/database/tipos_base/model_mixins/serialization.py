@@ -102,10 +102,10 @@ class _ModelSerializationMixin(_ModelFieldsMixin):
     @classmethod
     def as_dataframe_all(cls, select_fields: Optional[List[str]] = None) -> pd.DataFrame:
         """
-        Retorna os dados da tabela como um DataFrame.
+        Retorna os dados da tabela como um DataFrame, consultando a réplica de leitura, se houver.
         :return: DataFrame - Dados da tabela.
         """
-        with Database.get_session() as session:
+        with Database.get_session(read_only=True) as session:
             query = session.query(cls).order_by(cls.id)
 
             campos_para_retornar = []
@@ -174,12 +174,12 @@ class _ModelSerializationMixin(_ModelFieldsMixin):
                          limit: Optional[int] = None
                          ) -> pd.DataFrame:
         """
-        Obtém os dados da instância formatados para plotagem.
+        Obtém os dados da instância formatados para plotagem, consultando a réplica de leitura, se houver.
         """
 
         # faz um query com o sqlalchemy filtrando pelos filters do generic_plot e ordernando pelos order_by do generic_plot
 
-        with Database.get_session() as session:
+        with Database.get_session(read_only=True) as session:
             query = session.query(cls)
 
             if filters is not None:
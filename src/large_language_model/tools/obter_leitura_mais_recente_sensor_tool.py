@@ -3,7 +3,7 @@ Tool for getting the most recent sensor reading by sensor ID.
 Retrieves the latest reading from a specific sensor including timestamp and value.
 """
 from src.large_language_model.tipos_base.base_tools import BaseTool
-from src.database.models.sensor import LeituraSensor, Sensor
+from src.database.models.sensor import Sensor, LeituraSensor
 from src.database.tipos_base.database import Database
 from sqlalchemy.orm import joinedload
 
@@ -31,10 +31,7 @@ def obter_leitura_mais_recente_sensor(sensor_id: int) -> str:
             return f"Erro: Sensor com ID {sensor_id} não encontrado."
         
         # Buscar a leitura mais recente
-        with Database.get_session() as session:
-            leitura_recente = session.query(LeituraSensor).filter(
-                LeituraSensor.sensor_id == sensor_id
-            ).order_by(LeituraSensor.data_leitura.desc()).first()
+        leitura_recente = LeituraSensor.mais_recentes({sensor_id}, read_only=True).get(sensor_id)
         
         if not leitura_recente:
             return f"Nenhuma leitura encontrada para o sensor {sensor.nome or sensor_id}."
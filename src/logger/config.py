@@ -1,5 +1,9 @@
+import atexit
+import itertools
 import logging
+import logging.handlers
 import os
+import queue
 
 from src.logger.color_text import makeCyan, makeBlue, makeYellow, makeRed, makePink
 from src.settings import DEBUG
@@ -27,14 +31,64 @@ class LoggerColorFormatter(logging.Formatter):
         return super().format(record)
 
 
+class FiltroAmostragem(logging.Filter):
+    """
+    Deixa passar apenas 1 a cada `taxa` registros de nível DEBUG (ou inferior); os demais níveis
+    passam sempre. Indicado para eventos por leitura, que em carga alta seriam milhares por segundo.
+    """
+
+    def __init__(self, taxa: int = 100):
+        super().__init__()
+        self.taxa = max(1, taxa)
+        self._contador = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        return next(self._contador) % self.taxa == 0
+
+
+class QueueHandlerNaoBloqueante(logging.handlers.QueueHandler):
+    """
+    QueueHandler que descarta o registro, em vez de bloquear quem registrou, se a fila estiver cheia.
+    """
+
+    def __init__(self, fila: queue.Queue):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def parar_logger():
+    """Grava os registros pendentes na fila e para a thread de escrita dos logs."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def configurar_logger(file_name: str = 'app.log', level: int = None, force_reconfigure: bool = False):
     """
     Configura o logger para o aplicativo.
+
+    O logger raiz recebe apenas um QueueHandler, que coloca os registros em uma fila em memória;
+    uma thread (QueueListener) os escreve no console e no arquivo. Assim quem registra um log
+    não espera pela escrita em disco ou no terminal.
     :param file_name: nome do arquivo de log. Se não for fornecido, o nome padrão é 'app.log'.
     :param level: nível de log. Se não for fornecido, o nível padrão é DEBUG se DEBUG for True, caso contrário, INFO.
     :param force_reconfigure: Se True, remove handlers existentes antes
     :return:
     """
+    global _listener
 
     if not os.environ.get("LOGGING_ENABLED", "true").lower() == "true":
         return
@@ -44,6 +98,7 @@ def configurar_logger(file_name: str = 'app.log', level: int = None, force_recon
 
     if force_reconfigure:
         # Remove handlers existentes
+        parar_logger()
         for handler in logger.handlers[:]:
             handler.close()
             logger.removeHandler(handler)
@@ -52,27 +107,28 @@ def configurar_logger(file_name: str = 'app.log', level: int = None, force_recon
 
     logger.setLevel(level)
 
-    format_string = '[%(levelname)s] %(asctime)s %(filename)s: %(message)s'
-
-    if not any(getattr(h, "name", None) == "console_handler_format" for h in logger.handlers):
-
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(level)
-        console_handler.name = 'console_handler_format'
+    if any(getattr(h, "name", None) == "queue_handler_format" for h in logger.handlers):
+        return
 
-        formatter = LoggerColorFormatter(format_string)
-        console_handler.setFormatter(formatter)
+    format_string = '[%(levelname)s] %(asctime)s %(filename)s: %(message)s'
 
-        logger.addHandler(console_handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(level)
+    console_handler.name = 'console_handler_format'
+    console_handler.setFormatter(LoggerColorFormatter(format_string))
 
+    file_handler = logging.FileHandler(file_name)
+    file_handler.setLevel(level)
+    file_handler.setFormatter(logging.Formatter(format_string))
+    file_handler.name = 'file_handler_format'
 
-    if not any(getattr(h, "name", None) == "file_handler_format" for h in logger.handlers):
+    queue_handler = QueueHandlerNaoBloqueante(queue.Queue(int(os.environ.get("LOGGING_QUEUE_SIZE", 10000))))
+    queue_handler.name = 'queue_handler_format'
+    logger.addHandler(queue_handler)
 
-        file_handler = logging.FileHandler(file_name)
-        file_handler.setLevel(level)
-        file_handler.setFormatter(logging.Formatter(format_string))
-        file_handler.name = 'file_handler_format'
-        logger.addHandler(file_handler)
+    _listener = logging.handlers.QueueListener(queue_handler.queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(parar_logger)
 
 if __name__ == '__main__':
     configurar_logger()
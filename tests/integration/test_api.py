@@ -141,3 +141,896 @@ class TestAPIThreadSafety:
         RECOMENDAÇÃO: Implementar shutdown gracioso.
         """
         pass
+
+
+@pytest.fixture
+def api_client_db(test_database):
+    """Cliente de teste com banco SQLite temporário e um dispositivo cadastrado."""
+    from src.api.api_basica import app
+    from src.api.cache_sensores import CacheSensores
+    from src.api.limitador import resetar_limitador
+    from src.api.sequencia_dispositivos import resetar_rastreador
+    from src.api.ultimas_leituras import CacheUltimasLeituras
+    CacheSensores.invalidar()
+    CacheUltimasLeituras.invalidar()
+    CacheSensores.resetar_estatisticas()
+    resetar_limitador()
+    resetar_rastreador()
+    client = TestClient(app)
+    response = client.post("/init/", json={"serial": "ESP-TESTE"})
+    assert response.status_code == 200
+    yield client
+
+
+def _leitura(serial: str = "ESP-TESTE", **kwargs) -> dict:
+    leitura = {
+        "serial": serial,
+        "lux": 10.0,
+        "temperatura": 25.0,
+        "vibracao_media": 0.5,
+        "acelerometro_x": 0.0,
+        "acelerometro_y": 0.0,
+        "acelerometro_z": 0.0,
+    }
+    leitura.update(kwargs)
+    return leitura
+
+
+class TestLeituraBatchEndpoint:
+    """Testes para o endpoint /leitura/batch."""
+
+    def test_receber_leitura_unica(self, api_client_db):
+        """Uma leitura gera uma linha por sensor do dispositivo."""
+        from src.database.models.sensor import LeituraSensor
+
+        response = api_client_db.post("/leitura/", json=_leitura())
+
+        assert response.json()["status"] == "success"
+        assert LeituraSensor.count() == 3
+
+    def test_receber_leitura_serial_desconhecido(self, api_client_db):
+        response = api_client_db.post("/leitura/", json=_leitura(serial="NAO-EXISTE"))
+        assert response.json()["status"] == "error"
+
+    def test_receber_batch(self, api_client_db):
+        """Várias leituras são persistidas em uma única requisição."""
+        from src.database.models.sensor import LeituraSensor
+
+        leituras = [_leitura(temperatura=20.0 + i) for i in range(5)]
+        leituras.append(_leitura(serial="NAO-EXISTE"))
+
+        response = api_client_db.post("/leitura/batch", json=leituras)
+        body = response.json()
+
+        assert response.status_code == 200
+        assert body["leituras_salvas"] == 15
+        assert body["seriais_nao_encontrados"] == ["NAO-EXISTE"]
+        assert LeituraSensor.count() == 15
+
+    def test_receber_batch_vazio(self, api_client_db):
+        response = api_client_db.post("/leitura/batch", json=[])
+        assert response.json()["leituras_salvas"] == 0
+
+
+class TestLeiturasAcumuladas:
+    """Leituras com instante e sequência informados pelo dispositivo."""
+
+    def test_data_do_dispositivo(self, api_client_db):
+        from datetime import datetime
+        from src.database.models.sensor import LeituraSensor
+
+        api_client_db.post("/leitura/batch", json=[
+            _leitura(data_leitura="2024-05-01T10:00:00", sequencia=2),
+            _leitura(data_leitura="2024-05-01T09:59:00", sequencia=1),
+        ])
+
+        datas = sorted({leitura.data_leitura for leitura in LeituraSensor.all()})
+        assert datas == [datetime(2024, 5, 1, 9, 59), datetime(2024, 5, 1, 10, 0)]
+
+    def test_data_com_fuso_convertida_para_horario_local(self, api_client_db):
+        from datetime import datetime, timezone
+        from src.database.models.sensor import LeituraSensor
+
+        api_client_db.post("/leitura/", json=_leitura(data_leitura="2024-05-01T10:00:00+00:00"))
+
+        esperado = datetime(2024, 5, 1, 10, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        assert {leitura.data_leitura for leitura in LeituraSensor.all()} == {esperado}
+
+    def test_reenvio_descartado(self, api_client_db):
+        from src.database.models.sensor import LeituraSensor
+
+        lote = [_leitura(sequencia=i) for i in range(3)]
+        api_client_db.post("/leitura/batch", json=lote)
+        body = api_client_db.post("/leitura/batch", json=lote + [_leitura(sequencia=3)]).json()
+
+        assert body["leituras_salvas"] == 3
+        assert body["leituras_duplicadas"] == 3
+        assert LeituraSensor.count() == 12
+
+        response = api_client_db.post("/leitura/", json=_leitura(sequencia=1))
+        assert response.json()["status"] == "success"
+        assert response.json()["leituras_duplicadas"] == 1
+        assert LeituraSensor.count() == 12
+
+    def test_novo_boot_recomeca_a_sequencia(self, api_client_db):
+        lote = [_leitura(sequencia=i, boot=1) for i in range(3)]
+        api_client_db.post("/leitura/batch", json=lote)
+
+        assert api_client_db.post("/leitura/batch", json=lote).json()["leituras_duplicadas"] == 3
+        body = api_client_db.post("/leitura/batch", json=[_leitura(sequencia=i, boot=2) for i in range(3)]).json()
+        assert body["leituras_duplicadas"] == 0
+
+    def test_reenvio_aceito_apos_falha_na_gravacao(self, api_client_db):
+        from src.database.models.sensor import LeituraSensor
+
+        with patch.object(LeituraSensor, 'bulk_insert_async', side_effect=RuntimeError("falha")):
+            with pytest.raises(RuntimeError):
+                api_client_db.post("/leitura/", json=_leitura(sequencia=7))
+
+        api_client_db.post("/leitura/", json=_leitura(sequencia=7))
+        assert LeituraSensor.count() == 3
+
+    def test_batch_binario_com_tempo(self, api_client_db):
+        from datetime import datetime
+        from src.api.formato_binario import CONTENT_TYPE_BINARIO, codificar_leituras
+        from src.database.models.sensor import LeituraSensor
+
+        corpo = codificar_leituras([_leitura(sequencia=1, data_leitura=datetime(2024, 5, 1, 8, 0))] * 2)
+        body = api_client_db.post("/leitura/batch", content=corpo, headers={"Content-Type": CONTENT_TYPE_BINARIO}).json()
+
+        assert body["leituras_duplicadas"] == 1
+        assert {leitura.data_leitura for leitura in LeituraSensor.all()} == {datetime(2024, 5, 1, 8, 0)}
+
+    def test_sequencia_negativa_retorna_422(self, api_client_db):
+        response = api_client_db.post("/leitura/", json=_leitura(sequencia=-1))
+        assert response.status_code == 422
+
+
+class TestInitBulk:
+    """Testes do cadastro de dispositivos por /init e /init/batch."""
+
+    def test_cadastra_um_sensor_por_tipo(self, api_client_db):
+        from src.database.models.sensor import Sensor
+
+        response = api_client_db.post("/init/", json={"serial": "ESP-NOVO"})
+
+        assert response.json()["lux_threshold_max"] is None
+        assert Sensor.count(filters=[Sensor.cod_serial == "ESP-NOVO"]) == 3
+
+    def test_dispositivo_cadastrado_sem_consulta(self, api_client_db, test_database):
+        """Um dispositivo já cadastrado é respondido pelo cache, limiares incluídos."""
+        from sqlalchemy import event
+        from src.database.models.sensor import Sensor, TipoSensor, TipoSensorEnum
+
+        sensor = Sensor.first(filters=[Sensor.cod_serial == "ESP-TESTE", Sensor.tipo_sensor_id == TipoSensor.first(
+            filters=[TipoSensor.tipo == TipoSensorEnum.TEMPERATURA]).id])
+        sensor.update(limiar_manutencao_maior=80.0)
+        api_client_db.post("/init/", json={"serial": "ESP-TESTE"})
+
+        consultas = []
+        engine = test_database.get_engine()
+        registrar = lambda conn, cursor, statement, *args: consultas.append(statement)
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            response = api_client_db.post("/init/", json={"serial": "ESP-TESTE"})
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+        assert response.json()["temperature_threshold_max"] == 80.0
+        assert consultas == []
+
+    def test_completa_tipos_faltantes(self, api_client_db):
+        from src.database.models.sensor import Sensor
+
+        Sensor.first(filters=[Sensor.cod_serial == "ESP-TESTE"]).delete()
+        api_client_db.post("/init/", json={"serial": "ESP-TESTE"})
+
+        assert Sensor.count(filters=[Sensor.cod_serial == "ESP-TESTE"]) == 3
+
+    def test_batch(self, api_client_db):
+        from src.database.models.sensor import Sensor, TipoSensor
+
+        response = api_client_db.post("/init/batch", json=[{"serial": "ESP-A"}, {"serial": "ESP-B"}, {"serial": "ESP-A"}])
+
+        dispositivos = response.json()["dispositivos"]
+        assert set(dispositivos) == {"ESP-A", "ESP-B"}
+        assert dispositivos["ESP-B"]["vibration_threshold_min"] is None
+        assert Sensor.count() == 9
+        assert TipoSensor.count() == 3
+
+
+class TestCacheSensores:
+    """Testes do cache de resolução serial -> sensores."""
+
+    def test_leituras_sem_consulta_de_sensor(self, api_client_db, test_database):
+        """Após o aquecimento, a ingestão não consulta SENSOR nem TIPO_SENSOR."""
+        from sqlalchemy import event
+        from src.api.cache_sensores import CacheSensores
+
+        CacheSensores.aquecer()
+        consultas = []
+
+        def registrar(conn, cursor, statement, *args):
+            consultas.append(statement)
+
+        engine = test_database.get_engine()
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            for _ in range(3):
+                api_client_db.post("/leitura/", json=_leitura())
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+        assert not [c for c in consultas if c.lstrip().upper().startswith("SELECT")]
+        assert CacheSensores.estatisticas()["hits"] == 3
+
+    def test_miss_consulta_e_armazena(self, api_client_db):
+        from src.api.cache_sensores import CacheSensores
+
+        CacheSensores.invalidar()
+        CacheSensores.resetar_estatisticas()
+
+        assert "ESP-TESTE" in CacheSensores.obter({"ESP-TESTE"})
+        assert "ESP-TESTE" in CacheSensores.obter({"ESP-TESTE"})
+
+        estatisticas = CacheSensores.estatisticas()
+        assert estatisticas["misses"] == 1
+        assert estatisticas["hits"] == 1
+
+    def test_invalidacao_ao_salvar_sensor(self, api_client_db):
+        from src.api.cache_sensores import CacheSensores
+        from src.database.models.sensor import Sensor
+
+        CacheSensores.aquecer()
+        sensor = Sensor.first(filters=[Sensor.cod_serial == "ESP-TESTE"])
+        sensor.delete()
+
+        assert "ESP-TESTE" not in CacheSensores._sensores
+        assert len(CacheSensores.obter({"ESP-TESTE"})["ESP-TESTE"]) == 2
+
+    def test_invalidacao_so_no_commit(self, api_client_db, test_database):
+        from src.api.cache_sensores import CacheSensores
+        from src.database.models.sensor import Sensor
+
+        CacheSensores.aquecer()
+        with test_database.get_session() as session:
+            sensor = session.query(Sensor).filter(Sensor.cod_serial == "ESP-TESTE").first()
+            sensor.limiar_manutencao_maior = 99
+            session.flush()
+            assert "ESP-TESTE" in CacheSensores._sensores
+
+            session.rollback()
+            assert "ESP-TESTE" in CacheSensores._sensores
+
+            sensor.limiar_manutencao_maior = 98
+            session.commit()
+
+        assert "ESP-TESTE" not in CacheSensores._sensores
+        assert 98 in {sensor.limiar_maior for sensor in CacheSensores.obter({"ESP-TESTE"})["ESP-TESTE"]}
+
+    def test_alteracao_de_outro_processo_vista_apos_o_ttl(self, api_client_db, test_database, monkeypatch):
+        from sqlalchemy import text
+        from src.api.cache_sensores import CacheSensores
+
+        CacheSensores.aquecer()
+        # Alteração sem passar pelo ORM deste processo, como a feita pelo dashboard em outro processo
+        with test_database.get_engine().begin() as connection:
+            connection.execute(text('UPDATE "SENSOR" SET limiar_manutencao_maior = 99 WHERE cod_serial = \'ESP-TESTE\''))
+
+        assert 99 not in {sensor.limiar_maior for sensor in CacheSensores.obter({"ESP-TESTE"})["ESP-TESTE"]}
+
+        monkeypatch.setattr(CacheSensores, "ttl_s", 0)
+        assert 99 in {sensor.limiar_maior for sensor in CacheSensores.obter({"ESP-TESTE"})["ESP-TESTE"]}
+
+    def test_consulta_anterior_a_invalidacao_nao_e_guardada(self, api_client_db, monkeypatch):
+        from src.api.cache_sensores import CacheSensores
+
+        CacheSensores.invalidar()
+        consultar = CacheSensores._consultar.__func__
+
+        def consultar_e_invalidar(cls, seriais=None):
+            sensores = consultar(cls, seriais)
+            # O sensor é alterado por outra requisição enquanto a consulta está em andamento
+            CacheSensores.invalidar()
+            return sensores
+
+        monkeypatch.setattr(CacheSensores, "_consultar", classmethod(consultar_e_invalidar))
+
+        assert "ESP-TESTE" in CacheSensores.obter({"ESP-TESTE"})
+        assert "ESP-TESTE" not in CacheSensores._sensores
+
+    def test_monitoramento_expoe_contadores(self, api_client_db):
+        response = api_client_db.get("/monitoramento/")
+        assert "hits" in response.json()["cache_sensores"]
+
+
+class TestUltimasLeituras:
+    """Testes da rota /leitura/latest."""
+
+    def _sensor_ids(self) -> dict:
+        from src.database.models.sensor import Sensor, TipoSensor
+        tipos = {tipo.id: tipo.tipo for tipo in TipoSensor.all()}
+        return {tipos[sensor.tipo_sensor_id].name: sensor.id for sensor in Sensor.all()}
+
+    def test_atualizada_pela_ingestao_sem_consulta(self, api_client_db, test_database):
+        from sqlalchemy import event
+
+        ids = self._sensor_ids()
+        api_client_db.get("/leitura/latest", params={"sensor_id": list(ids.values())})
+        api_client_db.post("/leitura/", json=_leitura(temperatura=31.5, data_leitura="2030-01-01T10:00:00"))
+
+        consultas = []
+        engine = test_database.get_engine()
+        registrar = lambda conn, cursor, statement, *args: consultas.append(statement)
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            response = api_client_db.get("/leitura/latest", params={"sensor_id": list(ids.values())})
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+        leituras = response.json()["leituras"]
+        assert leituras[str(ids["TEMPERATURA"])] == {"data_leitura": "2030-01-01T10:00:00", "valor": 31.5}
+        assert consultas == []
+
+    def test_consulta_o_banco_fora_do_cache(self, api_client_db):
+        from src.api.ultimas_leituras import CacheUltimasLeituras
+
+        ids = self._sensor_ids()
+        api_client_db.post("/leitura/batch", json=[
+            _leitura(lux=1.0, data_leitura="2030-01-01T10:00:00"),
+            _leitura(lux=2.0, data_leitura="2030-01-01T09:00:00"),
+        ])
+        CacheUltimasLeituras.invalidar()
+
+        leituras = api_client_db.get("/leitura/latest", params={"sensor_id": [ids["LUX"], 99999]}).json()["leituras"]
+
+        assert leituras[str(ids["LUX"])]["valor"] == 1.0
+        assert leituras["99999"] is None
+
+    def test_sem_sensor_id(self, api_client_db):
+        assert api_client_db.get("/leitura/latest").status_code == 422
+
+
+class TestConsultaLeituras:
+    """Testes da rota GET /leitura/ (consulta paginada por keyset, em streaming)."""
+
+    @pytest.fixture
+    def sensor_lux(self, api_client_db) -> int:
+        from src.database.models.sensor import Sensor, TipoSensorEnum
+
+        api_client_db.post("/leitura/batch", json=[
+            _leitura(data_leitura=f"2030-01-01T10:00:0{i}", lux=float(i)) for i in range(5)
+        ])
+        return Sensor.filter_by_tiposensor(TipoSensorEnum.LUX)[0].id
+
+    def test_ndjson_ordenado(self, api_client_db, sensor_lux):
+        import orjson
+
+        response = api_client_db.get("/leitura/", params={"sensor_id": sensor_lux})
+
+        assert response.headers["content-type"] == "application/x-ndjson"
+        linhas = [orjson.loads(linha) for linha in response.text.splitlines()]
+        assert [linha["valor"] for linha in linhas] == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert linhas[0]["data_leitura"] == "2030-01-01T10:00:00"
+
+    def test_paginacao_por_keyset(self, api_client_db, sensor_lux):
+        import orjson
+
+        linhas = []
+        parametros = {"limite": 2}
+        while True:
+            pagina = [orjson.loads(linha) for linha in api_client_db.get("/leitura/", params=parametros).text.splitlines()]
+            if not pagina:
+                break
+            linhas.extend(pagina)
+            parametros.update(apos_data_leitura=pagina[-1]["data_leitura"], apos_id=pagina[-1]["id"])
+
+        # Três sensores por leitura, várias linhas com a mesma data_leitura desempatadas pelo id
+        assert len(linhas) == 15
+        assert len({linha["id"] for linha in linhas}) == 15
+        assert [linha["valor"] for linha in linhas if linha["sensor_id"] == sensor_lux] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    def test_filtros_e_csv(self, api_client_db, sensor_lux):
+        response = api_client_db.get("/leitura/", params={
+            "sensor_id": [sensor_lux], "inicio": "2030-01-01T10:00:01", "fim": "2030-01-01T10:00:02", "formato": "csv",
+        })
+
+        linhas = response.text.splitlines()
+        assert linhas[0] == "id,sensor_id,data_leitura,valor"
+        assert [linha.split(",")[3] for linha in linhas[1:]] == ["1.0", "2.0"]
+
+    def test_csv_vazio(self, api_client_db):
+        assert api_client_db.get("/leitura/", params={"formato": "csv"}).text == "id,sensor_id,data_leitura,valor\n"
+
+    def test_arrow(self, api_client_db, sensor_lux):
+        pa = pytest.importorskip("pyarrow", exc_type=ImportError)
+
+        response = api_client_db.get("/leitura/", params={"sensor_id": sensor_lux, "formato": "arrow"})
+
+        tabela = pa.ipc.open_stream(response.content).read_all()
+        assert tabela.column("valor").to_pylist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    def test_cursor_incompleto(self, api_client_db):
+        assert api_client_db.get("/leitura/", params={"apos_id": 3}).status_code == 422
+
+
+class TestCompressao:
+    """Testes dos corpos comprimidos de requisição e de resposta."""
+
+    def test_batch_gzip(self, api_client_db):
+        import gzip
+        import json
+
+        corpo = gzip.compress(json.dumps([_leitura(), _leitura()]).encode())
+        response = api_client_db.post("/leitura/batch", content=corpo,
+                                      headers={"Content-Type": "application/json", "Content-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.json()["leituras_salvas"] == 6
+
+    def test_codificacao_nao_suportada(self, api_client_db):
+        response = api_client_db.post("/leitura/batch", content=b"...", headers={"Content-Encoding": "br"})
+        assert response.status_code == 415
+
+    def test_corpo_gzip_invalido(self, api_client_db):
+        response = api_client_db.post("/leitura/batch", content=b"nao e gzip", headers={"Content-Encoding": "gzip"})
+        assert response.status_code == 400
+
+    def test_consulta_comprimida_em_streaming(self, api_client_db):
+        api_client_db.post("/leitura/batch", json=[_leitura(lux=float(i)) for i in range(200)])
+
+        response = api_client_db.get("/leitura/", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert len(response.text.splitlines()) == 600
+
+    def test_resposta_pequena_nao_comprimida(self, api_client_db):
+        response = api_client_db.get("/monitoramento/", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_sem_accept_encoding(self, api_client_db):
+        api_client_db.post("/leitura/batch", json=[_leitura(lux=float(i)) for i in range(200)])
+
+        response = api_client_db.get("/leitura/", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+
+class TestBufferEscrita:
+    """Testes da ingestão com buffer de escrita habilitado."""
+
+    def test_leituras_persistidas_apos_parar_buffer(self, api_client_db):
+        from src.api.buffer_leituras import iniciar_buffer_from_env, parar_buffer
+        from src.database.models.sensor import LeituraSensor
+
+        with patch.dict(os.environ, {'API_BUFFER_ESCRITA': 'true', 'API_BUFFER_INTERVALO_MS': '60000'}):
+            iniciar_buffer_from_env()
+        try:
+            response = api_client_db.post("/leitura/batch", json=[_leitura(), _leitura()])
+            assert response.json()["leituras_salvas"] == 6
+            assert api_client_db.get("/monitoramento/").json()["buffer_leituras"]["linhas_recebidas"] == 6
+        finally:
+            parar_buffer()
+
+        assert LeituraSensor.count() == 6
+
+    def test_buffer_cheio_retorna_503(self, api_client_db):
+        from src.api.buffer_leituras import iniciar_buffer_from_env, parar_buffer
+
+        with patch.dict(os.environ, {
+            'API_BUFFER_ESCRITA': 'true',
+            'API_BUFFER_INTERVALO_MS': '60000',
+            'API_BUFFER_CAPACIDADE': '3',
+            'API_BUFFER_POLITICA': '503',
+        }):
+            iniciar_buffer_from_env()
+        try:
+            assert api_client_db.post("/leitura/", json=_leitura()).status_code == 200
+            assert api_client_db.post("/leitura/", json=_leitura()).status_code == 503
+        finally:
+            parar_buffer()
+
+    def test_reenvio_aceito_apos_descarte_do_buffer(self, api_client_db):
+        from src.api.buffer_leituras import iniciar_buffer_from_env, parar_buffer
+        from src.database.models.sensor import LeituraSensor
+
+        with patch.dict(os.environ, {'API_BUFFER_ESCRITA': 'true', 'API_BUFFER_INTERVALO_MS': '60000'}):
+            try:
+                iniciar_buffer_from_env()
+                with patch.object(LeituraSensor, 'bulk_insert', side_effect=RuntimeError("falha")):
+                    assert api_client_db.post("/leitura/", json=_leitura(sequencia=7)).status_code == 200
+                    parar_buffer()
+
+                assert LeituraSensor.count() == 0
+                iniciar_buffer_from_env()
+                assert "leituras_duplicadas" not in api_client_db.post("/leitura/", json=_leitura(sequencia=7)).json()
+            finally:
+                parar_buffer()
+
+        assert LeituraSensor.count() == 3
+
+
+class TestFormatoBinarioEndpoint:
+    """Testes de ingestão com o corpo no formato binário compacto."""
+
+    CONTENT_TYPE = {"Content-Type": "application/x-leitura-binaria"}
+
+    def test_batch_binario(self, api_client_db):
+        from src.api.formato_binario import codificar_leituras
+        from src.database.models.sensor import LeituraSensor
+
+        corpo = codificar_leituras([_leitura(), _leitura(lux=None), _leitura(serial="NAO-EXISTE")])
+        response = api_client_db.post("/leitura/batch", content=corpo, headers=self.CONTENT_TYPE)
+
+        assert response.status_code == 200
+        assert response.json()["leituras_salvas"] == 5
+        assert LeituraSensor.count() == 5
+
+    def test_leitura_unica_binaria(self, api_client_db):
+        from src.api.formato_binario import codificar_leituras
+
+        corpo = codificar_leituras([_leitura()])
+        response = api_client_db.post("/leitura/", content=corpo, headers=self.CONTENT_TYPE)
+        assert response.json()["status"] == "success"
+
+        corpo = codificar_leituras([_leitura(), _leitura()])
+        response = api_client_db.post("/leitura/", content=corpo, headers=self.CONTENT_TYPE)
+        assert response.status_code == 400
+
+    def test_binario_invalido(self, api_client_db):
+        response = api_client_db.post("/leitura/batch", content=b"invalido", headers=self.CONTENT_TYPE)
+        assert response.status_code == 400
+
+    def test_binario_com_data_leitura_invalida(self, api_client_db):
+        import struct
+        from datetime import datetime
+        from src.api.formato_binario import codificar_leituras
+
+        data_leitura = datetime(2024, 5, 1)
+        corpo = codificar_leituras([{**_leitura(), 'data_leitura': data_leitura}])
+        corpo = corpo.replace(struct.pack('<q', round(data_leitura.timestamp() * 1000)), struct.pack('<q', 2 ** 62))
+
+        response = api_client_db.post("/leitura/batch", content=corpo, headers=self.CONTENT_TYPE)
+        assert response.status_code == 400
+
+    def test_json_invalido_retorna_422(self, api_client_db):
+        response = api_client_db.post("/leitura/", json={"serial": "ESP-TESTE"})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][0] == "body"
+
+
+class TestLimitadorEndpoint:
+    """Testes do limite de leituras por dispositivo na API."""
+
+    def test_leitura_unica_retorna_429(self, api_client_db):
+        with patch.dict(os.environ, {'API_LIMITE_LEITURAS_POR_SEGUNDO': '0.001', 'API_LIMITE_RAJADA': '2'}):
+            from src.api.limitador import resetar_limitador
+            resetar_limitador()
+
+            assert api_client_db.post("/leitura/", json=_leitura()).status_code == 200
+            assert api_client_db.post("/leitura/", json=_leitura()).status_code == 200
+            response = api_client_db.post("/leitura/", json=_leitura())
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        limitador = api_client_db.get("/monitoramento/").json()["limitador"]
+        assert limitador["leituras_limitadas_dispositivo"] == 1
+
+    def test_batch_ignora_apenas_serial_limitado(self, api_client_db):
+        api_client_db.post("/init/", json={"serial": "ESP-OUTRO"})
+
+        with patch.dict(os.environ, {'API_LIMITE_LEITURAS_POR_SEGUNDO': '0.001', 'API_LIMITE_RAJADA': '1'}):
+            from src.api.limitador import resetar_limitador
+            resetar_limitador()
+
+            api_client_db.post("/leitura/", json=_leitura())
+            response = api_client_db.post("/leitura/batch", json=[_leitura(), _leitura(serial="ESP-OUTRO")])
+            assert response.json()["seriais_limitados"] == ["ESP-TESTE"]
+            assert response.json()["leituras_salvas"] == 3
+
+            response = api_client_db.post("/leitura/batch", json=[_leitura()])
+            assert response.status_code == 429
+
+
+class TestWebSocketEndpoint:
+    """Testes do canal WebSocket de ingestão."""
+
+    def test_serial_desconhecido_recusado(self, api_client_db):
+        from starlette.websockets import WebSocketDisconnect
+
+        with pytest.raises(WebSocketDisconnect) as erro:
+            with api_client_db.websocket_connect("/leitura/ws?serial=NAO-EXISTE") as websocket:
+                websocket.receive_json()
+        assert erro.value.code == 1008
+
+    def test_frames_confirmados_em_lote(self, api_client_db):
+        from src.database.models.sensor import LeituraSensor
+
+        with patch.dict(os.environ, {'API_WS_ACK_LEITURAS': '3', 'API_WS_ACK_INTERVALO_MS': '60000'}):
+            with api_client_db.websocket_connect("/leitura/ws?serial=ESP-TESTE") as websocket:
+                leitura = _leitura()
+                del leitura["serial"]
+                websocket.send_json(leitura)
+                websocket.send_json([leitura, leitura])
+
+                assert websocket.receive_json() == {"ack": 2, "leituras_salvas": 9}
+
+        assert LeituraSensor.count() == 9
+
+    def test_frame_binario_e_invalido(self, api_client_db):
+        from src.api.formato_binario import codificar_leituras
+
+        with patch.dict(os.environ, {'API_WS_ACK_LEITURAS': '1'}):
+            with api_client_db.websocket_connect("/leitura/ws?serial=ESP-TESTE") as websocket:
+                websocket.send_json(_leitura(serial="OUTRO"))
+                assert websocket.receive_json()["frame"] == 1
+
+                websocket.send_bytes(codificar_leituras([_leitura()]))
+                assert websocket.receive_json() == {"ack": 2, "leituras_salvas": 3}
+
+    def test_reenvio_descartado_no_ack(self, api_client_db):
+        with patch.dict(os.environ, {'API_WS_ACK_LEITURAS': '2'}):
+            with api_client_db.websocket_connect("/leitura/ws?serial=ESP-TESTE") as websocket:
+                websocket.send_json([_leitura(sequencia=1), _leitura(sequencia=1)])
+                assert websocket.receive_json() == {"ack": 1, "leituras_salvas": 3, "leituras_duplicadas": 1}
+
+    def test_confirmacao_por_intervalo(self, api_client_db):
+        with patch.dict(os.environ, {'API_WS_ACK_LEITURAS': '100', 'API_WS_ACK_INTERVALO_MS': '50'}):
+            with api_client_db.websocket_connect("/leitura/ws?serial=ESP-TESTE") as websocket:
+                websocket.send_json(_leitura())
+                assert websocket.receive_json() == {"ack": 1, "leituras_salvas": 3}
+
+    def test_pendentes_gravadas_ao_desconectar(self, api_client_db):
+        import time
+        from src.database.models.sensor import LeituraSensor
+
+        with patch.dict(os.environ, {'API_WS_ACK_LEITURAS': '100', 'API_WS_ACK_INTERVALO_MS': '60000'}):
+            with api_client_db.websocket_connect("/leitura/ws?serial=ESP-TESTE") as websocket:
+                websocket.send_json(_leitura())
+
+        for _ in range(50):
+            if LeituraSensor.count() == 3:
+                break
+            time.sleep(0.02)
+        assert LeituraSensor.count() == 3
+
+
+class TestUdpEndpoint:
+    """Testes para o canal UDP de leituras."""
+
+    def test_datagramas_gravados_e_perdas_no_monitoramento(self, api_client_db):
+        import asyncio
+        from src.api.udp_leitura import ServidorUdpLeituras, codificar_datagrama
+        from src.database.models.sensor import LeituraSensor
+        import src.api.udp_leitura as udp_leitura
+
+        async def cenario():
+            servidor = ServidorUdpLeituras()
+            for sequencia in (10, 11, 13):
+                servidor.datagram_received(codificar_datagrama("ESP-TESTE", sequencia, lux=1.0, temperatura=2.0, vibracao_media=3.0), None)
+            await servidor.gravar()
+            return servidor
+
+        servidor = asyncio.run(cenario())
+
+        assert LeituraSensor.count() == 9
+
+        with patch.object(udp_leitura, '_servidor', servidor):
+            dispositivo = api_client_db.get("/monitoramento/").json()["udp"]["dispositivos"]["ESP-TESTE"]
+
+        assert dispositivo["recebidos"] == 3
+        assert dispositivo["perdidos"] == 1
+
+    def test_udp_desabilitado(self, api_client_db):
+        assert api_client_db.get("/monitoramento/").json()["udp"] is None
+
+
+class TestFormaOndaEndpoint:
+    """Testes para o endpoint /leitura/forma_onda."""
+
+    def test_forma_onda_gravada_no_sensor_de_vibracao(self, api_client_db):
+        from datetime import datetime, timedelta
+        import numpy as np
+        from src.database.models.sensor import FormaOndaSensor, EixoAcelerometroEnum, Sensor, TipoSensor, TipoSensorEnum
+
+        amostras = np.sin(np.linspace(0, 20, 2000)).astype('<f4')
+        response = api_client_db.post(
+            "/leitura/forma_onda",
+            params={"serial": "ESP-TESTE", "eixo": "X", "taxa_amostragem": 1000, "data_inicio": "2025-01-01T00:00:00"},
+            content=amostras.tobytes(),
+            headers={"Content-Type": "application/octet-stream"},
+        )
+
+        assert response.json()["blocos_salvos"] == 2
+
+        bloco = FormaOndaSensor.all()[0]
+        vibracao = [tipo.id for tipo in TipoSensor.all() if tipo.tipo == TipoSensorEnum.VIBRACAO]
+        assert Sensor.get_from_id(bloco.sensor_id).tipo_sensor_id in vibracao
+        forma_onda = FormaOndaSensor.ler_forma_onda(
+            bloco.sensor_id, EixoAcelerometroEnum.X, datetime(2025, 1, 1), datetime(2025, 1, 1) + timedelta(seconds=2)
+        )
+        np.testing.assert_array_equal(forma_onda.amostras, amostras)
+
+    def test_corpo_invalido(self, api_client_db):
+        response = api_client_db.post(
+            "/leitura/forma_onda", params={"serial": "ESP-TESTE", "eixo": "X", "taxa_amostragem": 1000}, content=b"abc"
+        )
+        assert response.status_code == 400
+
+    def test_serial_desconhecido(self, api_client_db):
+        response = api_client_db.post(
+            "/leitura/forma_onda", params={"serial": "NAO-EXISTE", "eixo": "X", "taxa_amostragem": 1000}, content=b"\0" * 8
+        )
+        assert response.json()["status"] == "error"
+
+    def test_corpo_maior_que_o_limite(self, api_client_db, monkeypatch):
+        from src.api import receber_leitura
+        from src.database.models.sensor import FormaOndaSensor
+
+        monkeypatch.setattr(receber_leitura, "MAX_CORPO_FORMA_ONDA_BYTES", 16)
+        parametros = {"serial": "ESP-TESTE", "eixo": "X", "taxa_amostragem": 1000}
+
+        assert api_client_db.post("/leitura/forma_onda", params=parametros, content=b"\0" * 20).status_code == 413
+        # Sem Content-Length, o limite é verificado durante a leitura do corpo
+        assert api_client_db.post("/leitura/forma_onda", params=parametros,
+                                  content=iter([b"\0" * 8, b"\0" * 8, b"\0" * 8])).status_code == 413
+        assert api_client_db.post("/leitura/forma_onda", params=parametros, content=b"\0" * 16).json()["blocos_salvos"] == 1
+        assert FormaOndaSensor.count() == 1
+
+
+class TestMetricasEndpoint:
+    """Testes para o endpoint /metrics."""
+
+    def test_metricas_da_ingestao(self, api_client_db):
+        api_client_db.post("/leitura/batch", json=[_leitura(), _leitura()])
+
+        response = api_client_db.get("/metrics")
+        texto = response.text
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'api_requisicoes_total{metodo="POST",rota="/leitura/batch",status="200"}' in texto
+        assert 'api_requisicao_duracao_segundos_bucket{metodo="POST",rota="/leitura/batch",le="+Inf"}' in texto
+        assert "ingestao_linhas_inseridas_total" in texto
+        assert "db_commit_duracao_segundos_count" in texto
+        assert "cache_sensores_taxa_acerto" in texto
+        assert "db_pool_checkouts_total" in texto
+        assert "db_pool_uso_conexao_segundos_count" in texto
+        assert "db_pool_conexoes_em_uso" in texto
+
+    def test_rota_inexistente_agrupada(self, api_client_db):
+        api_client_db.get("/nao-existe/123")
+        assert 'rota="sem_rota"' in api_client_db.get("/metrics").text
+
+
+class TestAlertasLimiar:
+    """Testes da avaliação de limiares na ingestão."""
+
+    @pytest.fixture
+    def avaliador(self, monkeypatch):
+        from src.api import alertas_limiar
+        avaliador = alertas_limiar.AvaliadorLimiares(cooldown_s=0)
+        monkeypatch.setattr(alertas_limiar, "_avaliador", avaliador)
+        return avaliador
+
+    def _definir_limiar_temperatura(self, maior: float):
+        from src.database.models.sensor import Sensor, TipoSensor, TipoSensorEnum
+        from src.database.tipos_base.database import Database
+        with Database.get_session() as session:
+            tipo = session.query(TipoSensor).filter(TipoSensor.tipo == TipoSensorEnum.TEMPERATURA).one()
+            sensor = session.query(Sensor).filter(Sensor.tipo_sensor_id == tipo.id).one()
+            sensor.limiar_manutencao_maior = maior
+            session.commit()
+            return sensor.id
+
+    def test_violacao_na_ingestao_sem_consulta_extra(self, api_client_db, test_database, avaliador):
+        from sqlalchemy import event
+
+        sensor_id = self._definir_limiar_temperatura(40.0)
+        api_client_db.post("/leitura/", json=_leitura(temperatura=20.0))
+
+        consultas = []
+        engine = test_database.get_engine()
+        registrar = lambda conn, cursor, statement, *args: consultas.append(statement)
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            response = api_client_db.post("/leitura/", json=_leitura(temperatura=45.0))
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+        assert response.status_code == 200
+        assert all(consulta.lstrip().upper().startswith("INSERT") for consulta in consultas)
+        [evento] = avaliador.pendentes()
+        assert (evento.sensor_id, evento.valor, evento.limiar) == (sensor_id, 45.0, 40.0)
+
+    def test_estatisticas_no_monitoramento(self, api_client_db, avaliador):
+        self._definir_limiar_temperatura(40.0)
+        api_client_db.post("/leitura/batch", json=[_leitura(temperatura=45.0), _leitura(temperatura=46.0)])
+
+        alertas = api_client_db.get("/monitoramento/").json()["alertas_limiar"]
+        assert alertas["alertas"] == 1
+        assert alertas["sensores_em_violacao"] == 1
+
+
+class TestCompressaoLeituras:
+    """Testes da compressão das leituras na ingestão e da reconstrução na consulta."""
+
+    @pytest.fixture
+    def compressor(self, monkeypatch):
+        from src.api import compressao_leituras
+        from src.database.models.sensor import TipoSensorEnum
+        compressor = compressao_leituras.CompressorLeituras(
+            compressao_leituras.ModoCompressao.SWINGING_DOOR, {TipoSensorEnum.LUX: 0.5}
+        )
+        monkeypatch.setattr(compressao_leituras, "_compressor", compressor)
+        return compressor
+
+    def test_grava_apenas_os_vertices_e_reconstroi(self, api_client_db, compressor):
+        import orjson
+        from src.api.compressao_leituras import parar_compressao
+        from src.database.models.sensor import LeituraSensor, Sensor, TipoSensorEnum
+
+        # Rampa de 0 a 10 e patamar em 10, uma leitura por segundo
+        valores = [float(i) for i in range(11)] + [10.0] * 10
+        response = api_client_db.post("/leitura/batch", json=[
+            _leitura(data_leitura=f"2030-01-01T10:00:{i:02d}", lux=valor) for i, valor in enumerate(valores)
+        ])
+        assert response.json()["leituras_salvas"] == 3 * len(valores)
+
+        parar_compressao()
+        sensor_lux = Sensor.filter_by_tiposensor(TipoSensorEnum.LUX)[0].id
+        gravadas = [leitura.valor for leitura in LeituraSensor.all() if leitura.sensor_id == sensor_lux]
+        assert gravadas == [0.0, 10.0, 10.0]
+
+        response = api_client_db.get("/leitura/", params={"sensor_id": sensor_lux, "passo_s": 5})
+        linhas = [orjson.loads(linha) for linha in response.text.splitlines()]
+        assert [(linha["data_leitura"], linha["valor"]) for linha in linhas] == [
+            ("2030-01-01T10:00:00", 0.0), ("2030-01-01T10:00:05", 5.0),
+            ("2030-01-01T10:00:10", 10.0), ("2030-01-01T10:00:15", 10.0), ("2030-01-01T10:00:20", 10.0),
+        ]
+        assert all(linha["id"] is None for linha in linhas)
+
+    def test_falha_na_gravacao_preserva_o_vertice_pendente(self, api_client_db, compressor):
+        from src.api.compressao_leituras import parar_compressao
+        from src.database.models.sensor import LeituraSensor, Sensor, TipoSensorEnum
+
+        api_client_db.post("/leitura/batch", json=[
+            _leitura(data_leitura=f"2030-01-01T10:00:{i:02d}", lux=float(i)) for i in range(6)
+        ])
+
+        # A leitura seguinte quebra a rampa: o vértice pendente (10:00:05) é devolvido para gravação
+        queda = [_leitura(data_leitura="2030-01-01T10:00:06", lux=0.0)]
+        with patch.object(LeituraSensor, 'bulk_insert_async', side_effect=RuntimeError("falha")):
+            with pytest.raises(RuntimeError):
+                api_client_db.post("/leitura/batch", json=queda)
+        api_client_db.post("/leitura/batch", json=queda)
+
+        parar_compressao()
+        sensor_lux = Sensor.filter_by_tiposensor(TipoSensorEnum.LUX)[0].id
+        gravadas = [leitura.valor for leitura in LeituraSensor.all() if leitura.sensor_id == sensor_lux]
+        assert gravadas == [0.0, 5.0, 0.0]
+
+    def test_reconstrucao_de_janela_entre_pontos_gravados(self, api_client_db, compressor):
+        import orjson
+        from src.api.compressao_leituras import parar_compressao
+        from src.database.models.sensor import Sensor, TipoSensorEnum
+
+        api_client_db.post("/leitura/batch", json=[
+            _leitura(data_leitura="2030-01-01T10:00:00", lux=0.0), _leitura(data_leitura="2030-01-01T10:05:00", lux=300.0),
+        ])
+        parar_compressao()
+        sensor_lux = Sensor.filter_by_tiposensor(TipoSensorEnum.LUX)[0].id
+
+        response = api_client_db.get("/leitura/", params={
+            "sensor_id": sensor_lux, "passo_s": 30, "inicio": "2030-01-01T10:01:00", "fim": "2030-01-01T10:02:00",
+        })
+        linhas = [orjson.loads(linha) for linha in response.text.splitlines()]
+        assert [(linha["data_leitura"], linha["valor"]) for linha in linhas] == [
+            ("2030-01-01T10:01:00", 60.0), ("2030-01-01T10:01:30", 90.0), ("2030-01-01T10:02:00", 120.0),
+        ]
+
+    def test_reconstrucao_nao_pode_ser_paginada(self, api_client_db):
+        response = api_client_db.get("/leitura/", params={
+            "passo_s": 1, "apos_data_leitura": "2030-01-01T10:00:00", "apos_id": 1,
+        })
+        assert response.status_code == 422
@@ -0,0 +1,123 @@
+"""
+Testes unitários para a avaliação dos limiares de manutenção na ingestão.
+"""
+import time
+from datetime import datetime
+
+import pytest
+
+from src.api.alertas_limiar import AvaliadorLimiares, EventoLimiar, TipoViolacao
+from src.api.cache_sensores import SensorResolvido
+from src.database.models.sensor import TipoSensorEnum
+
+SENSOR = SensorResolvido(1, TipoSensorEnum.TEMPERATURA, limiar_menor=10.0, limiar_maior=50.0)
+
+
+def _linhas(*valores: float, sensor_id: int = 1) -> list[dict]:
+    return [{'sensor_id': sensor_id, 'data_leitura': datetime(2024, 5, 1, 10, 0, i), 'valor': valor}
+            for i, valor in enumerate(valores)]
+
+
+class TestAvaliadorLimiares:
+
+    def test_violacao_gera_evento(self):
+        avaliador = AvaliadorLimiares(cooldown_s=0)
+
+        assert avaliador.avaliar(_linhas(30.0, 55.0), {1: SENSOR}) == 1
+
+        assert avaliador.pendentes() == [
+            EventoLimiar(1, TipoViolacao.ACIMA, 55.0, 50.0, datetime(2024, 5, 1, 10, 0, 1))
+        ]
+
+    def test_violacao_abaixo(self):
+        avaliador = AvaliadorLimiares(cooldown_s=0)
+
+        avaliador.avaliar(_linhas(5.0), {1: SENSOR})
+
+        [evento] = avaliador.pendentes()
+        assert evento.violacao == TipoViolacao.ABAIXO
+        assert evento.limiar == 10.0
+
+    def test_violacao_continua_nao_repete_alerta(self):
+        avaliador = AvaliadorLimiares(cooldown_s=0)
+
+        avaliador.avaliar(_linhas(55.0, 60.0, 52.0), {1: SENSOR})
+
+        assert len(avaliador.pendentes()) == 1
+
+    def test_histerese(self):
+        # Faixa de 40, histerese de 10%: volta ao normal só abaixo de 46
+        avaliador = AvaliadorLimiares(histerese=0.1, cooldown_s=0)
+
+        avaliador.avaliar(_linhas(51.0, 49.0, 51.0, 47.0, 51.0), {1: SENSOR})
+        assert len(avaliador.pendentes()) == 1
+
+        avaliador.avaliar(_linhas(45.0, 51.0), {1: SENSOR})
+        assert len(avaliador.pendentes()) == 1
+
+    def test_histerese_com_um_unico_limiar(self):
+        sensor = SensorResolvido(1, TipoSensorEnum.LUX, limiar_maior=100.0)
+        avaliador = AvaliadorLimiares(histerese=0.1, cooldown_s=0)
+
+        avaliador.avaliar(_linhas(101.0, 95.0, 101.0, 89.0, 101.0), {1: sensor})
+
+        assert len(avaliador.pendentes()) == 2
+
+    def test_cooldown_suprime_novos_alertas(self):
+        avaliador = AvaliadorLimiares(histerese=0, cooldown_s=60)
+
+        avaliador.avaliar(_linhas(55.0, 30.0, 55.0, 30.0, 5.0), {1: SENSOR})
+
+        assert len(avaliador.pendentes()) == 1
+        assert avaliador.estatisticas()["suprimidos_cooldown"] == 2
+
+    def test_violacao_persistente_alerta_apos_cooldown(self):
+        avaliador = AvaliadorLimiares(histerese=0, cooldown_s=0.05)
+
+        avaliador.avaliar(_linhas(55.0, 30.0, 55.0), {1: SENSOR})
+        assert len(avaliador.pendentes()) == 1
+
+        time.sleep(0.06)
+        avaliador.avaliar(_linhas(56.0), {1: SENSOR})
+        assert len(avaliador.pendentes()) == 1
+
+    def test_sensores_sem_limiar_ou_desconhecidos_sao_ignorados(self):
+        sem_limiar = SensorResolvido(2, TipoSensorEnum.VIBRACAO)
+        avaliador = AvaliadorLimiares()
+
+        assert avaliador.avaliar(_linhas(1e9, sensor_id=2) + _linhas(1e9, sensor_id=3), {2: sem_limiar}) == 0
+        assert avaliador.estatisticas()["leituras_avaliadas"] == 0
+
+    def test_fila_cheia_descarta_eventos(self):
+        avaliador = AvaliadorLimiares(cooldown_s=0, capacidade=1)
+        sensores = {i: SensorResolvido(i, TipoSensorEnum.LUX, limiar_maior=1.0) for i in (1, 2)}
+
+        avaliador.avaliar(_linhas(2.0, sensor_id=1) + _linhas(2.0, sensor_id=2), sensores)
+
+        estatisticas = avaliador.estatisticas()
+        assert estatisticas["alertas"] == 1
+        assert estatisticas["descartados"] == 1
+
+    def test_thread_entrega_aos_assinantes(self):
+        recebidos = []
+        avaliador = AvaliadorLimiares(cooldown_s=0)
+
+        def falhar(evento):
+            raise RuntimeError("falha")
+
+        avaliador.assinar(falhar)
+        avaliador.assinar(recebidos.append)
+        avaliador.iniciar()
+        try:
+            avaliador.avaliar(_linhas(55.0), {1: SENSOR})
+        finally:
+            avaliador.parar()
+
+        assert [evento.valor for evento in recebidos] == [55.0]
+        assert avaliador.estatisticas()["erros_entrega"] == 1
+
+    def test_parametros_invalidos(self):
+        with pytest.raises(ValueError):
+            AvaliadorLimiares(histerese=-0.1)
+        with pytest.raises(ValueError):
+            AvaliadorLimiares(capacidade=0)
@@ -0,0 +1,128 @@
+"""
+Testes unitários para o buffer de escrita (write-behind) de leituras da API.
+"""
+import threading
+import time
+
+import pytest
+
+from src.api.buffer_leituras import BufferLeituras, BufferCheioError, PoliticaOverflow
+
+
+def _linhas(quantidade: int) -> list[dict]:
+    return [{'sensor_id': 1, 'data_leitura': None, 'valor': float(i)} for i in range(quantidade)]
+
+
+class TestBufferLeituras:
+
+    def test_descarga_por_quantidade_de_linhas(self):
+        lotes = []
+        buffer = BufferLeituras(capacidade=100, intervalo_ms=60000, max_linhas=10, persistir=lotes.append)
+        buffer.iniciar()
+        try:
+            buffer.adicionar(_linhas(10))
+            for _ in range(100):
+                if lotes:
+                    break
+                time.sleep(0.01)
+        finally:
+            buffer.parar()
+
+        assert [len(lote) for lote in lotes] == [10]
+
+    def test_descarga_por_intervalo(self):
+        lotes = []
+        buffer = BufferLeituras(capacidade=100, intervalo_ms=20, max_linhas=50, persistir=lotes.append)
+        buffer.iniciar()
+        try:
+            buffer.adicionar(_linhas(3))
+            for _ in range(100):
+                if lotes:
+                    break
+                time.sleep(0.01)
+        finally:
+            buffer.parar()
+
+        assert sum(len(lote) for lote in lotes) == 3
+
+    def test_parar_descarrega_pendentes(self):
+        lotes = []
+        buffer = BufferLeituras(capacidade=100, intervalo_ms=60000, max_linhas=50, persistir=lotes.append)
+        buffer.iniciar()
+        buffer.adicionar(_linhas(7))
+        buffer.parar()
+
+        assert sum(len(lote) for lote in lotes) == 7
+        assert buffer.estatisticas()['profundidade'] == 0
+
+    def test_politica_rejeitar(self):
+        buffer = BufferLeituras(capacidade=5, max_linhas=50, politica=PoliticaOverflow.REJEITAR, persistir=len)
+        buffer.adicionar(_linhas(5))
+
+        with pytest.raises(BufferCheioError):
+            buffer.adicionar(_linhas(1))
+
+        assert buffer.estatisticas()['rejeicoes'] == 1
+
+    def test_politica_bloquear_espera_descarga(self):
+        buffer = BufferLeituras(capacidade=5, max_linhas=50, politica=PoliticaOverflow.BLOQUEAR, persistir=len)
+        buffer.adicionar(_linhas(5))
+
+        produtor = threading.Thread(target=buffer.adicionar, args=(_linhas(2),))
+        produtor.start()
+        time.sleep(0.05)
+        assert produtor.is_alive()
+
+        buffer.descarregar()
+        produtor.join(timeout=1)
+
+        assert not produtor.is_alive()
+        assert buffer.estatisticas()['linhas_recebidas'] == 7
+
+    def test_erro_de_persistencia_nao_interrompe_buffer(self):
+        def falhar(_):
+            raise RuntimeError("banco indisponível")
+
+        buffer = BufferLeituras(capacidade=10, max_linhas=5, persistir=falhar, max_tentativas=1)
+        buffer.adicionar(_linhas(3))
+        buffer.descarregar()
+
+        estatisticas = buffer.estatisticas()
+        assert estatisticas['erros'] == 1
+        assert estatisticas['linhas_descartadas'] == 3
+
+    def test_lote_com_falha_e_tentado_novamente(self):
+        lotes = []
+        falhas = [RuntimeError("banco indisponível")]
+
+        def persistir(linhas):
+            if falhas:
+                raise falhas.pop()
+            lotes.append(linhas)
+
+        buffer = BufferLeituras(capacidade=10, max_linhas=5, persistir=persistir)
+        buffer.adicionar(_linhas(3))
+        buffer.descarregar()
+        assert buffer.estatisticas()['profundidade'] == 3
+
+        buffer.descarregar()
+
+        estatisticas = buffer.estatisticas()
+        assert [len(lote) for lote in lotes] == [3]
+        assert estatisticas['reenvios'] == 1
+        assert estatisticas['linhas_descartadas'] == 0
+        assert estatisticas['profundidade'] == 0
+
+    def test_descarte_apos_tentativas_avisa_uma_vez(self):
+        def falhar(_):
+            raise RuntimeError("banco indisponível")
+
+        avisos = []
+        buffer = BufferLeituras(capacidade=10, max_linhas=5, persistir=falhar, max_tentativas=2)
+        buffer.adicionar(_linhas(2), lambda: avisos.append("a"))
+        buffer.adicionar(_linhas(2), lambda: avisos.append("b"))
+        buffer.parar()
+
+        assert sorted(avisos) == ["a", "b"]
+        assert buffer.estatisticas()['linhas_descartadas'] == 4
+        assert buffer.estatisticas()['erros'] == 2
@@ -0,0 +1,182 @@
+"""
+Testes para a inserção em lote (Model.bulk_insert) e o caminho COPY do PostgreSQL.
+"""
+import csv
+import io
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from src.database.tipos_base.database import Database
+from src.database.models.sensor import LeituraSensor, TipoSensor, TipoSensorEnum, Sensor
+from src.database.export_import_db import create_database_zip_export, import_database_zip, salvar_importacao
+
+
+def _criar_sensor() -> Sensor:
+    tipo = TipoSensor(nome="Temperatura", tipo=TipoSensorEnum.TEMPERATURA).save()
+    return Sensor(nome="Sensor T", cod_serial="ESP-1", tipo_sensor_id=tipo.id).save()
+
+
+class TestBulkInsert:
+
+    def test_bulk_insert_sqlite(self, test_database):
+        sensor = _criar_sensor()
+        linhas = [
+            {'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 1, 0, i), 'valor': float(i)}
+            for i in range(50)
+        ]
+
+        assert LeituraSensor.bulk_insert(linhas) == 50
+        assert LeituraSensor.count() == 50
+
+    def test_bulk_insert_vazio(self, test_database):
+        assert LeituraSensor.bulk_insert([]) == 0
+
+    def test_salvar_importacao_zip(self, test_database):
+        sensor = _criar_sensor()
+        LeituraSensor.bulk_insert([
+            {'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 1), 'valor': 1.5},
+            {'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 2), 'valor': 2.5},
+        ])
+        zip_buffer = create_database_zip_export()
+
+        test_database.create_all_tables(drop_if_exists=True)
+        salvar_importacao(import_database_zip(zip_buffer))
+
+        assert LeituraSensor.count() == 2
+        assert Sensor.count() == 1
+
+    def test_salvar_importacao_registros_existentes(self, test_database):
+        """Registros já existentes recaem no salvamento linha a linha, com merge."""
+        _criar_sensor()
+        zip_buffer = create_database_zip_export()
+
+        salvar_importacao(import_database_zip(zip_buffer))
+
+        assert Sensor.count() == 1
+
+
+class TestBulkUpsert:
+
+    def test_conflito_ignorado(self, test_database):
+        sensor = _criar_sensor()
+
+        Sensor.bulk_upsert([
+            {'nome': "Sensor T", 'cod_serial': "ESP-2", 'tipo_sensor_id': sensor.tipo_sensor_id},
+            {'nome': "Sensor N", 'cod_serial': "ESP-2", 'tipo_sensor_id': sensor.tipo_sensor_id},
+        ], ['nome'])
+
+        assert Sensor.count() == 2
+        assert Sensor.get_from_id(sensor.id).cod_serial == "ESP-1"
+
+    def test_conflito_atualizado(self, test_database):
+        sensor = _criar_sensor()
+
+        Sensor.bulk_upsert([{'nome': "Sensor T", 'cod_serial': "ESP-2", 'tipo_sensor_id': sensor.tipo_sensor_id}],
+                           ['nome'], atualizar=['cod_serial'])
+
+        assert Sensor.get_from_id(sensor.id).cod_serial == "ESP-2"
+
+    def test_enum_convertido(self, test_database):
+        TipoSensor.bulk_upsert([{'nome': "Lux", 'tipo': TipoSensorEnum.LUX}] * 2, ['nome'])
+
+        assert [tipo.tipo for tipo in TipoSensor.all()] == [TipoSensorEnum.LUX]
+
+    def test_merge_oracle(self):
+        from sqlalchemy.dialects import oracle
+
+        session = MagicMock()
+        session.get_bind.return_value.dialect = oracle.dialect()
+
+        TipoSensor.bulk_upsert([{'nome': "Lux", 'tipo': TipoSensorEnum.LUX}], ['nome'], session=session)
+
+        comando = str(session.execute.call_args[0][0])
+        assert 'MERGE INTO "TIPO_SENSOR" t USING (SELECT :nome AS nome, :tipo AS tipo FROM dual) s' in comando
+        assert 'ON (t.nome = s.nome)' in comando
+        assert 'WHEN MATCHED' not in comando
+        assert 'VALUES ("TIPO_SENSOR_SEQ_ID".NEXTVAL, s.nome, s.tipo)' in comando
+        session.commit.assert_not_called()
+
+
+class TestCopyFromStdin:
+    """Testa o comando e o CSV gerados para o COPY do PostgreSQL, sem um servidor real."""
+
+    def _sessao(self):
+        session = MagicMock()
+        session.get_bind.return_value.dialect = postgresql.psycopg2.dialect()
+        session.execute.return_value.scalars.return_value.all.return_value = [10, 11]
+        cursor = session.connection.return_value.connection.cursor.return_value
+        copiados = []
+        cursor.copy_expert.side_effect = lambda comando, buffer: copiados.append((comando, buffer.getvalue()))
+        return session, cursor, copiados
+
+    def test_copy_reserva_ids_da_sequence(self):
+        session, cursor, copiados = self._sessao()
+        linhas = [
+            {'sensor_id': 1, 'data_leitura': datetime(2025, 1, 1, 10, 0), 'valor': 1.5},
+            {'sensor_id': 2, 'data_leitura': datetime(2025, 1, 1, 10, 1), 'valor': 2.5},
+        ]
+
+        LeituraSensor._copy_from_stdin(session, linhas)
+
+        comando, conteudo = copiados[0]
+        assert comando == (
+            'COPY "LEITURA_SENSOR" (id, sensor_id, data_leitura, valor) '
+            "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+        assert '"LEITURA_SENSOR_SEQ_ID"' in str(session.execute.call_args[0][0])
+        assert list(csv.reader(io.StringIO(conteudo))) == [
+            ['10', '1', '2025-01-01 10:00:00', '1.5'],
+            ['11', '2', '2025-01-01 10:01:00', '2.5'],
+        ]
+        cursor.close.assert_called_once()
+
+    def test_copy_em_blocos_e_nulos(self):
+        session, _, copiados = self._sessao()
+        linhas = [{'id': i, 'nome': None, 'tipo': TipoSensorEnum.LUX} for i in range(3)]
+
+        TipoSensor._copy_from_stdin(session, linhas, chunk_size=2)
+
+        assert len(copiados) == 2
+        assert copiados[0][1].splitlines() == ['0,\\N,LUX', '1,\\N,LUX']
+        session.execute.assert_not_called()
+
+    def test_reimportacao_com_registros_existentes_pelo_copy(self, test_database, monkeypatch):
+        """A chave duplicada no COPY chega como IntegrityError e a importação recai no salvamento linha a linha."""
+        class Error(Exception):
+            pass
+
+        class IntegrityError(Error):
+            pass
+
+        class UniqueViolation(IntegrityError):
+            pass
+
+        session, cursor, _ = self._sessao()
+        session.get_bind.return_value.dialect.dbapi = SimpleNamespace(Error=Error)
+        cursor.copy_expert.side_effect = UniqueViolation("duplicate key value violates unique constraint")
+
+        get_session = Database.get_session
+        sessoes_copy = [session]
+
+        @contextmanager
+        def get_session_copy(read_only: bool = False):
+            if sessoes_copy:
+                yield sessoes_copy.pop()
+            else:
+                with get_session(read_only) as sessao:
+                    yield sessao
+
+        TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX).save()
+        zip_buffer = create_database_zip_export()
+        importados = import_database_zip(zip_buffer)
+        monkeypatch.setattr(Database, "get_session", staticmethod(get_session_copy))
+
+        assert salvar_importacao(importados) == 1
+
+        session.rollback.assert_called_once()
+        cursor.close.assert_called_once()
+        assert TipoSensor.count() == 1
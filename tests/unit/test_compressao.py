@@ -0,0 +1,100 @@
+"""
+Testes unitários para a compressão dos corpos de requisição e de resposta da API.
+"""
+import gzip
+import zlib
+
+import pytest
+from fastapi import HTTPException
+
+from src.api import compressao
+from src.api.compressao import _Compressor, _Descompressor, escolher_codificacao
+
+
+class TestEscolherCodificacao:
+
+    def test_gzip(self, monkeypatch):
+        monkeypatch.setattr(compressao, "zstandard", None)
+        assert escolher_codificacao("gzip, deflate, br") == "gzip"
+        assert escolher_codificacao("zstd, gzip") == "gzip"
+
+    def test_zstd_preferido(self, monkeypatch):
+        monkeypatch.setattr(compressao, "zstandard", object())
+        assert escolher_codificacao("gzip, zstd") == "zstd"
+        assert escolher_codificacao("gzip;q=1.0, zstd;q=0.5") == "gzip"
+
+    def test_nenhuma_aceita(self):
+        assert escolher_codificacao("") is None
+        assert escolher_codificacao("br") is None
+        assert escolher_codificacao("gzip;q=0") is None
+        assert escolher_codificacao("*") is not None
+
+
+class TestDescompressor:
+
+    def test_blocos(self):
+        dados = gzip.compress(b"leitura" * 1000)
+        descompressor = _Descompressor("gzip", limite=10 ** 6)
+
+        saida = descompressor.descomprimir(dados[:10], final=False) + descompressor.descomprimir(dados[10:], final=True)
+
+        assert saida == b"leitura" * 1000
+
+    def test_limite(self):
+        descompressor = _Descompressor("gzip", limite=1000)
+
+        with pytest.raises(HTTPException) as erro:
+            descompressor.descomprimir(gzip.compress(bytes(10 ** 6)), final=True)
+
+        assert erro.value.status_code == 413
+
+    def test_invalido_e_incompleto(self):
+        with pytest.raises(HTTPException) as erro:
+            _Descompressor("gzip", limite=1000).descomprimir(b"nao e gzip", final=True)
+        assert erro.value.status_code == 400
+
+        with pytest.raises(HTTPException) as erro:
+            _Descompressor("gzip", limite=1000).descomprimir(gzip.compress(b"x" * 100)[:-8], final=True)
+        assert erro.value.status_code == 400
+
+
+@pytest.mark.skipif(compressao.zstandard is None, reason="zstandard não instalado")
+class TestDescompressorZstd:
+
+    def test_blocos(self):
+        dados = compressao.zstandard.ZstdCompressor().compress(b"leitura" * 1000)
+        descompressor = _Descompressor("zstd", limite=10 ** 6)
+
+        saida = descompressor.descomprimir(dados[:10], final=False) + descompressor.descomprimir(dados[10:], final=True)
+
+        assert saida == b"leitura" * 1000
+
+    def test_limite(self):
+        bomba = compressao.zstandard.ZstdCompressor().compress(bytes(10 ** 8))
+        descompressor = _Descompressor("zstd", limite=1000)
+
+        with pytest.raises(HTTPException) as erro:
+            descompressor.descomprimir(bomba, final=True)
+
+        assert erro.value.status_code == 413
+
+    def test_invalido_e_incompleto(self):
+        with pytest.raises(HTTPException) as erro:
+            _Descompressor("zstd", limite=1000).descomprimir(b"nao e zstd", final=True)
+        assert erro.value.status_code == 400
+
+        dados = compressao.zstandard.ZstdCompressor().compress(b"x" * 100)
+        with pytest.raises(HTTPException) as erro:
+            _Descompressor("zstd", limite=1000).descomprimir(dados[:-3], final=True)
+        assert erro.value.status_code == 400
+
+
+class TestCompressor:
+
+    def test_cada_bloco_descomprimivel(self):
+        compressor = _Compressor("gzip")
+        descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        assert descompressor.decompress(compressor.comprimir(b"a" * 100, final=False)) == b"a" * 100
+        assert descompressor.decompress(compressor.comprimir(b"b" * 100, final=True)) == b"b" * 100
+        assert descompressor.eof
@@ -0,0 +1,199 @@
+"""
+Testes unitários para a compressão das leituras na ingestão (deadband e swinging door)
+e para a reconstrução da série na consulta.
+"""
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.api.cache_sensores import SensorResolvido
+from src.api.compressao_leituras import CompressorLeituras, ModoCompressao, ler_tolerancias
+from src.api.consulta_leituras import Interpolacao, _Reconstrucao, _reconstruir_async
+from src.database.models.sensor import TipoSensorEnum
+
+INICIO = datetime(2024, 5, 1, 10, 0, 0)
+SENSORES = {1: SensorResolvido(1, TipoSensorEnum.TEMPERATURA), 2: SensorResolvido(2, TipoSensorEnum.LUX)}
+
+
+def _linhas(valores, sensor_id: int = 1, passo_s: float = 1.0) -> list[dict]:
+    return [{'sensor_id': sensor_id, 'data_leitura': INICIO + timedelta(seconds=i * passo_s), 'valor': valor}
+            for i, valor in enumerate(valores)]
+
+
+def _comprimir(compressor: CompressorLeituras, linhas: list[dict]) -> list[dict]:
+    # Uma chamada por leitura, como na ingestão de um dispositivo
+    gravadas = [gravada for linha in linhas for gravada in compressor.filtrar([linha], SENSORES)]
+    return gravadas + compressor.descarregar()
+
+
+def _erro_maximo(linhas: list[dict], gravadas: list[dict], interpolacao: Interpolacao) -> float:
+    instantes = np.array([(linha['data_leitura'] - INICIO).total_seconds() for linha in linhas])
+    valores = np.array([linha['valor'] for linha in linhas])
+    pontos_t = np.array([(linha['data_leitura'] - INICIO).total_seconds() for linha in gravadas])
+    pontos_v = np.array([linha['valor'] for linha in gravadas])
+
+    if interpolacao == Interpolacao.LINEAR:
+        reconstruidos = np.interp(instantes, pontos_t, pontos_v)
+    else:
+        reconstruidos = pontos_v[np.searchsorted(pontos_t, instantes, side='right') - 1]
+    return float(np.max(np.abs(reconstruidos - valores)))
+
+
+def _passeio_aleatorio(quantidade: int, semente: int = 7) -> list[float]:
+    gerador = random.Random(semente)
+    valor, valores = 25.0, []
+    for _ in range(quantidade):
+        valor += gerador.gauss(0, 0.05)
+        valores.append(valor)
+    return valores
+
+
+class TestCompressorLeituras:
+
+    @pytest.mark.parametrize("modo, interpolacao", [
+        (ModoCompressao.SWINGING_DOOR, Interpolacao.LINEAR),
+        (ModoCompressao.DEADBAND, Interpolacao.DEGRAU),
+    ])
+    def test_reconstrucao_dentro_da_tolerancia(self, modo, interpolacao):
+        linhas = _linhas(_passeio_aleatorio(2000))
+        compressor = CompressorLeituras(modo, {TipoSensorEnum.TEMPERATURA: 0.2}, max_intervalo_s=10000)
+
+        gravadas = _comprimir(compressor, linhas)
+
+        assert len(gravadas) < len(linhas) / 4
+        assert _erro_maximo(linhas, gravadas, interpolacao) <= 0.2 + 1e-9
+
+    def test_swinging_door_grava_apenas_os_vertices_de_uma_rampa(self):
+        compressor = CompressorLeituras(ModoCompressao.SWINGING_DOOR, {TipoSensorEnum.TEMPERATURA: 0.01})
+
+        gravadas = _comprimir(compressor, _linhas([float(i) for i in range(50)] + [49.0] * 50))
+
+        assert [linha['valor'] for linha in gravadas] == [0.0, 49.0, 49.0]
+
+    def test_swinging_door_retem_a_ultima_leitura(self):
+        compressor = CompressorLeituras(ModoCompressao.SWINGING_DOOR, {TipoSensorEnum.TEMPERATURA: 1.0})
+
+        assert len(compressor.filtrar(_linhas([20.0, 20.1, 20.2]), SENSORES)) == 1
+        assert compressor.estatisticas()["pendentes"] == 1
+        assert [linha['valor'] for linha in compressor.descarregar()] == [20.2]
+        assert compressor.descarregar() == []
+
+    def test_deadband_grava_apenas_as_mudancas(self):
+        compressor = CompressorLeituras(ModoCompressao.DEADBAND, {TipoSensorEnum.TEMPERATURA: 0.5})
+
+        gravadas = compressor.filtrar(_linhas([20.0, 20.3, 20.4, 21.0, 21.2, 20.4]), SENSORES)
+
+        assert [linha['valor'] for linha in gravadas] == [20.0, 21.0, 20.4]
+
+    @pytest.mark.parametrize("modo", list(ModoCompressao))
+    def test_intervalo_maximo_entre_pontos(self, modo):
+        compressor = CompressorLeituras(modo, {TipoSensorEnum.TEMPERATURA: 1.0}, max_intervalo_s=10)
+
+        gravadas = _comprimir(compressor, _linhas([20.0] * 100))
+        instantes = [linha['data_leitura'] for linha in gravadas]
+
+        assert max(b - a for a, b in zip(instantes, instantes[1:])) <= timedelta(seconds=10)
+
+    def test_sensores_sem_tolerancia_nao_sao_comprimidos(self):
+        compressor = CompressorLeituras(ModoCompressao.DEADBAND, {TipoSensorEnum.TEMPERATURA: 1.0})
+
+        gravadas = compressor.filtrar(_linhas([100.0] * 10, sensor_id=2) + _linhas([100.0] * 10, sensor_id=3), SENSORES)
+
+        assert len(gravadas) == 20
+
+    def test_tolerancia_do_sensor_tem_precedencia(self):
+        compressor = CompressorLeituras(ModoCompressao.DEADBAND, {TipoSensorEnum.TEMPERATURA: 10.0, 1: 0.0})
+
+        assert len(compressor.filtrar(_linhas([20.0, 20.5, 21.0]), SENSORES)) == 3
+
+    def test_leitura_fora_de_ordem_e_gravada(self):
+        compressor = CompressorLeituras(ModoCompressao.DEADBAND, {TipoSensorEnum.TEMPERATURA: 1.0})
+        compressor.filtrar(_linhas([20.0]), SENSORES)
+
+        atrasada = {'sensor_id': 1, 'data_leitura': INICIO - timedelta(minutes=1), 'valor': 20.0}
+        assert compressor.filtrar([atrasada], SENSORES) == [atrasada]
+
+    def test_ler_tolerancias(self):
+        assert ler_tolerancias("temperatura=0.2, LUX=50,12=0.5") == {
+            TipoSensorEnum.TEMPERATURA: 0.2, TipoSensorEnum.LUX: 50.0, 12: 0.5,
+        }
+        with pytest.raises(ValueError):
+            ler_tolerancias("PRESSAO=1")
+
+
+def _reconstruir(lotes: list[list], passo: timedelta, interpolacao: Interpolacao) -> list[list]:
+    async def gerar():
+        for lote in lotes:
+            yield lote
+
+    async def reconstruir():
+        return [reconstruidas async for reconstruidas in _reconstruir_async(gerar(), _Reconstrucao(passo, interpolacao))]
+
+    return asyncio.run(reconstruir())
+
+
+class TestReconstruir:
+
+    def _linhas(self, pontos: list[tuple[int, float]], sensor_id: int = 1) -> list[tuple]:
+        return [(i, sensor_id, INICIO + timedelta(seconds=segundos), valor) for i, (segundos, valor) in enumerate(pontos)]
+
+    def test_interpolacao_linear(self):
+        lotes = [self._linhas([(0, 0.0), (4, 8.0)])]
+
+        linhas = [linha for lote in _reconstruir(lotes, timedelta(seconds=2), Interpolacao.LINEAR) for linha in lote]
+
+        assert [(data - INICIO).seconds for _, _, data, _ in linhas] == [0, 2, 4]
+        assert [valor for *_, valor in linhas] == [0.0, 4.0, 8.0]
+        assert all(id is None for id, *_ in linhas)
+
+    def test_degrau(self):
+        lotes = [self._linhas([(0, 1.0), (3, 5.0)])]
+
+        linhas = [linha for lote in _reconstruir(lotes, timedelta(seconds=1), Interpolacao.DEGRAU) for linha in lote]
+
+        assert [valor for *_, valor in linhas] == [1.0, 1.0, 1.0, 5.0]
+
+    def test_sensores_intercalados_entre_lotes(self):
+        lotes = [
+            self._linhas([(1, 10.0)], sensor_id=1) + self._linhas([(1, 100.0)], sensor_id=2),
+            self._linhas([(3, 30.0)], sensor_id=1) + self._linhas([(3, 300.0)], sensor_id=2),
+        ]
+
+        linhas = [linha for lote in _reconstruir(lotes, timedelta(seconds=2), Interpolacao.LINEAR) for linha in lote]
+
+        assert sorted((sensor_id, (data - INICIO).seconds, valor) for _, sensor_id, data, valor in linhas) == [
+            (1, 2, 20.0), (2, 2, 200.0),
+        ]
+
+    def test_intervalo_longo_em_blocos_limitados(self):
+        reconstrucao = _Reconstrucao(timedelta(milliseconds=1), Interpolacao.DEGRAU, tamanho_bloco=1000)
+
+        blocos = list(reconstrucao.lote(self._linhas([(0, 1.0), (10, 2.0)])))
+
+        assert [len(bloco) for bloco in blocos] == [1000] * 10
+        assert blocos[-1][-1][2] == INICIO + timedelta(seconds=10) - timedelta(milliseconds=1)
+        assert list(reconstrucao.finais()) == [[(None, 1, INICIO + timedelta(seconds=10), 2.0)]]
+
+    def test_janela_entre_dois_pontos_gravados(self):
+        reconstrucao = _Reconstrucao(timedelta(seconds=10), Interpolacao.LINEAR, inicio=INICIO + timedelta(seconds=100),
+                                     fim=INICIO + timedelta(seconds=120), horizonte=timedelta(seconds=300))
+        reconstrucao.semear(self._linhas([(0, 0.0)]))
+
+        linhas = [linha for bloco in reconstrucao.finais({1: (INICIO + timedelta(seconds=200), 200.0)}) for linha in bloco]
+
+        assert [(data - INICIO).seconds for _, _, data, _ in linhas] == [100, 110, 120]
+        assert [valor for *_, valor in linhas] == pytest.approx([100.0, 110.0, 120.0])
+
+    def test_cauda_ate_o_fim_limitada_ao_horizonte(self):
+        reconstrucao = _Reconstrucao(timedelta(seconds=10), Interpolacao.DEGRAU, fim=INICIO + timedelta(seconds=1000),
+                                     horizonte=timedelta(seconds=30))
+
+        linhas = [linha for bloco in reconstrucao.lote(self._linhas([(0, 1.0), (20, 2.0)])) for linha in bloco]
+        linhas += [linha for bloco in reconstrucao.finais() for linha in bloco]
+
+        assert [((data - INICIO).seconds, valor) for _, _, data, valor in linhas] == [
+            (0, 1.0), (10, 1.0), (20, 2.0), (30, 2.0), (40, 2.0), (50, 2.0),
+        ]
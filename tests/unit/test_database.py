@@ -172,4 +172,379 @@ class TestDatabaseResetCounter:
             assert isinstance(sequences, list)
         except Exception:
             # É aceitável que falhe para SQLite
-            pass
\ No newline at end of file
+            pass
+
+class TestConfiguracaoPool:
+    """Testes da configuração do pool de conexões."""
+
+    def test_padroes_do_sqlalchemy(self, monkeypatch):
+        from src.database.tipos_base.database import ConfiguracaoPool
+
+        for nome in list(os.environ):
+            if nome.startswith("DB_"):
+                monkeypatch.delenv(nome)
+
+        assert ConfiguracaoPool.from_env() == ConfiguracaoPool()
+
+    def test_prefixo_do_processo_tem_precedencia(self, monkeypatch):
+        from src.database.tipos_base.database import ConfiguracaoPool
+
+        monkeypatch.setenv("DB_POOL_SIZE", "3")
+        monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+        monkeypatch.setenv("API_DB_POOL_SIZE", "20")
+        monkeypatch.setenv("API_DB_POOL_TIMEOUT", "2.5")
+
+        pool = ConfiguracaoPool.from_env("API_")
+
+        assert (pool.pool_size, pool.pool_pre_ping, pool.pool_timeout) == (20, True, 2.5)
+        assert ConfiguracaoPool.from_env().pool_size == 3
+
+    def test_argumentos_por_dialeto(self):
+        from src.database.tipos_base.database import ConfiguracaoPool
+
+        pool = ConfiguracaoPool(executemany_mode="values_plus_batch")
+
+        assert pool.argumentos_engine('postgresql')['executemany_mode'] == "values_plus_batch"
+        assert 'executemany_mode' not in pool.argumentos_engine('sqlite')
+        assert 'pool_size' not in ConfiguracaoPool(oracle_pool_sessoes=True).argumentos_engine('oracle')
+
+    def test_init_sqlite_aplica_o_pool(self, tmp_path):
+        from src.database.tipos_base.database import ConfiguracaoPool
+
+        Database.init_sqlite(str(tmp_path / "pool.db"), pool=ConfiguracaoPool(pool_size=2, max_overflow=1, pool_timeout=0.1))
+
+        with Database.get_engine().connect():
+            estatisticas = Database.estatisticas_pool()
+
+        assert estatisticas["tamanho"] == 2
+        assert estatisticas["em_uso"] == 1
+        assert estatisticas["timeout"] == 0.1
+
+
+class TestPerfilSQLite:
+    """Testes do perfil de alta concorrência do SQLite."""
+
+    @pytest.fixture
+    def database_perfil(self, tmp_path):
+        from src.database.tipos_base.database import PerfilSQLite
+
+        Database.init_sqlite(str(tmp_path / "perfil.db"), perfil=PerfilSQLite())
+        Database.create_all_tables(drop_if_exists=True)
+        yield Database
+        Database.init_sqlite(str(tmp_path / "padrao.db"))
+
+    def test_pragmas_aplicados(self, database_perfil):
+        from sqlalchemy import text
+
+        with database_perfil.get_engine().connect() as conexao:
+            assert conexao.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conexao.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert conexao.execute(text("PRAGMA temp_store")).scalar() == 2
+            assert conexao.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            assert conexao.execute(text("PRAGMA cache_size")).scalar() == -64 * 1024
+
+    def test_escritas_pela_conexao_de_escrita(self, database_perfil):
+        from sqlalchemy import event, select
+        from src.database.models.sensor import TipoSensor, TipoSensorEnum
+
+        comandos = {"leitura": [], "escrita": []}
+        engines = {"leitura": database_perfil.get_engine(), "escrita": database_perfil._engine_escrita}
+        registradores = {
+            nome: (lambda nome: lambda conn, cursor, statement, *args: comandos[nome].append(statement.split()[0]))(nome)
+            for nome in engines
+        }
+        for nome, engine in engines.items():
+            event.listen(engine, "before_cursor_execute", registradores[nome])
+
+        try:
+            with database_perfil.get_session() as session:
+                session.execute(select(TipoSensor)).all()
+                session.add(TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX))
+                session.flush()
+                # Depois de escrever, a sessão lê pela mesma conexão e vê o que gravou
+                assert session.execute(select(TipoSensor)).scalars().one().nome == "Lux"
+                session.commit()
+
+            with database_perfil.get_session() as session:
+                session.execute(select(TipoSensor)).all()
+        finally:
+            for nome, engine in engines.items():
+                event.remove(engine, "before_cursor_execute", registradores[nome])
+
+        assert comandos["leitura"] == ["SELECT", "SELECT"]
+        assert comandos["escrita"] == ["INSERT", "SELECT"]
+
+    def test_leitura_nao_bloqueia_escrita(self, database_perfil):
+        from sqlalchemy import select
+        from src.database.models.sensor import TipoSensor, TipoSensorEnum
+
+        with database_perfil.get_session() as session:
+            session.add_all([TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX),
+                             TipoSensor(nome="Temperatura", tipo=TipoSensorEnum.TEMPERATURA)])
+            session.commit()
+
+        with database_perfil.get_engine().connect() as leitura:
+            # Uma consulta em andamento mantém o banco aberto para leitura
+            resultado = leitura.execute(select(TipoSensor.nome))
+            resultado.fetchone()
+
+            with database_perfil.get_session() as escrita:
+                escrita.add(TipoSensor(nome="Vibração", tipo=TipoSensorEnum.VIBRACAO))
+                escrita.commit()
+
+            assert len(resultado.fetchall()) == 1
+
+    def test_from_env(self, monkeypatch):
+        from src.database.tipos_base.database import PerfilSQLite
+
+        monkeypatch.delenv("SQLITE_ALTA_CONCORRENCIA", raising=False)
+        assert PerfilSQLite.from_env() is None
+
+        monkeypatch.setenv("SQLITE_ALTA_CONCORRENCIA", "true")
+        monkeypatch.setenv("SQLITE_ESCRITOR_UNICO", "false")
+        monkeypatch.setenv("SQLITE_MMAP_SIZE_MB", "0")
+        perfil = PerfilSQLite.from_env()
+        assert (perfil.escritor_unico, perfil.mmap_size_mb) == (False, 0)
+
+
+class TestSessaoAssincrona:
+    """Testes das sessões assíncronas do Database."""
+
+    @pytest.fixture(autouse=True)
+    def aiosqlite(self):
+        pytest.importorskip("aiosqlite")
+
+    def test_le_o_que_a_sessao_sincrona_gravou(self, test_database):
+        import asyncio
+        from sqlalchemy import select
+        from src.database.models.sensor import TipoSensor, TipoSensorEnum
+
+        with test_database.get_session() as session:
+            session.add(TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX))
+            session.commit()
+
+        async def consultar():
+            async with test_database.get_async_session() as session:
+                return (await session.execute(select(TipoSensor.nome))).scalars().all()
+
+        assert asyncio.run(consultar()) == ["Lux"]
+        assert test_database._engine_async.dialect.driver == "aiosqlite"
+
+    def test_bulk_insert_e_iterar_leituras_async(self, test_database):
+        import asyncio
+        from datetime import datetime, timedelta
+        from src.database.models.sensor import LeituraSensor
+
+        inicio = datetime(2024, 5, 1)
+        linhas = [{'sensor_id': 1, 'data_leitura': inicio + timedelta(seconds=i), 'valor': float(i)} for i in range(5)]
+
+        async def cenario():
+            await LeituraSensor.bulk_insert_async(linhas)
+            return [linha async for lote in LeituraSensor.iterar_leituras_async(sensor_ids=[1], lote=2) for linha in lote]
+
+        assert [valor for *_, valor in asyncio.run(cenario())] == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert LeituraSensor.count() == 5
+
+    def test_escritor_unico(self, tmp_path):
+        import asyncio
+        from sqlalchemy import text
+        from src.database.models.sensor import TipoSensor, TipoSensorEnum
+        from src.database.tipos_base.database import PerfilSQLite
+
+        Database.init_sqlite(str(tmp_path / "perfil.db"), perfil=PerfilSQLite())
+        Database.create_all_tables()
+
+        async def cenario():
+            async with Database.get_async_session() as session:
+                session.add(TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX))
+                await session.commit()
+                return (await session.execute(text("PRAGMA journal_mode"))).scalar()
+
+        try:
+            assert asyncio.run(cenario()) == "wal"
+            assert Database._engine_escrita_async.sync_engine.pool.checkedin() == 1
+            assert TipoSensor.count() == 1
+        finally:
+            Database.init_sqlite(str(tmp_path / "padrao.db"))
+
+        assert Database._engine_async is None
+
+    def test_escritor_unico_flush_pelo_engine_de_escrita(self, tmp_path):
+        from sqlalchemy import event
+        from src.database.models.sensor import TipoSensor, TipoSensorEnum
+        from src.database.tipos_base.database import PerfilSQLite
+
+        Database.init_sqlite(str(tmp_path / "perfil.db"), perfil=PerfilSQLite())
+        Database.create_all_tables()
+        engine_escrita = Database._engine_escrita
+        inserts = []
+
+        def registrar(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("INSERT"):
+                inserts.append(statement)
+
+        # O INSERT do flush precisa sair pelo engine de escrita
+        event.listen(engine_escrita, "before_cursor_execute", registrar)
+        try:
+            with Database.get_session() as session:
+                session.add(TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX))
+                session.flush()
+                assert session._escrevendo
+                session.rollback()
+                assert not session._escrevendo
+        finally:
+            event.remove(engine_escrita, "before_cursor_execute", registrar)
+            Database.init_sqlite(str(tmp_path / "padrao.db"))
+
+        assert len(inserts) == 1
+
+    def test_argumentos_do_pool_assincrono(self):
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+        from src.database.tipos_base.database import ConfiguracaoPool
+
+        pool = ConfiguracaoPool(oracle_pool_sessoes=True)
+
+        assert pool.argumentos_engine('postgresql', assincrono=True)['poolclass'] is AsyncAdaptedQueuePool
+        assert 'executemany_mode' not in pool.argumentos_engine('postgresql', assincrono=True)
+        assert pool.argumentos_engine('oracle', assincrono=True)['poolclass'] is AsyncAdaptedQueuePool
+
+
+class TestReplicaLeitura:
+    """Testes do roteamento das sessões somente leitura para a réplica."""
+
+    @pytest.fixture
+    def database_replica(self, tmp_path):
+        Database.init_sqlite(str(tmp_path / "principal.db"))
+        Database.create_all_tables()
+        Database.init_sqlite(str(tmp_path / "replica.db"))
+        Database.create_all_tables()
+        Database.init_sqlite(str(tmp_path / "principal.db"))
+        Database.init_replica(f"sqlite:///{tmp_path / 'replica.db'}")
+        yield Database
+        Database.init_sqlite(str(tmp_path / "padrao.db"))
+
+    def test_read_only_consulta_a_replica(self, database_replica):
+        from src.database.models.sensor import TipoSensor, TipoSensorEnum
+
+        with database_replica.get_session() as session:
+            session.add(TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX))
+            session.commit()
+
+        with database_replica.get_session(read_only=True) as session:
+            assert session.query(TipoSensor).count() == 0
+
+        assert TipoSensor.as_dataframe_all().empty
+        assert TipoSensor.filter_dataframe().empty
+        assert TipoSensor.count() == 1
+
+    def test_sem_replica_usa_o_principal(self, test_database):
+        from src.database.models.sensor import TipoSensor, TipoSensorEnum
+
+        TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX).save()
+
+        assert len(TipoSensor.as_dataframe_all()) == 1
+
+    def test_init_descarta_a_replica(self, database_replica, tmp_path):
+        assert database_replica.estatisticas_pool()["replica"]["em_uso"] == 0
+
+        Database.init_sqlite(str(tmp_path / "principal.db"))
+
+        assert Database._engine_leitura is None
+
+    def test_replica_somente_leitura_do_sqlite(self, test_database, test_db_path):
+        from sqlalchemy.exc import OperationalError
+        from src.database.models.sensor import TipoSensor, TipoSensorEnum
+
+        Database.init_replica(f"sqlite:///file:{test_db_path}?mode=ro&uri=true")
+        TipoSensor(nome="Lux", tipo=TipoSensorEnum.LUX).save()
+
+        with Database.get_session(read_only=True) as session:
+            assert session.query(TipoSensor).count() == 1
+            session.add(TipoSensor(nome="Temperatura", tipo=TipoSensorEnum.TEMPERATURA))
+            with pytest.raises(OperationalError):
+                session.flush()
+
+    def test_from_env(self, test_database, monkeypatch, test_db_path):
+        monkeypatch.delenv("DB_REPLICA_URL", raising=False)
+        monkeypatch.delenv("API_DB_REPLICA_URL", raising=False)
+        assert not Database.init_replica_from_env("API_")
+
+        monkeypatch.setenv("API_DB_REPLICA_URL", f"sqlite:///{test_db_path}")
+        assert Database.init_replica_from_env("API_")
+        assert Database._engine_leitura is not None
+
+
+class TestIndicesDeclarados:
+    """Testes dos índices declarados nos models e da sua verificação."""
+
+    def test_create_all_tables_cria_os_indices(self, test_database):
+        from sqlalchemy import inspect
+
+        indices = {indice['name']: indice['column_names'] for indice in inspect(test_database.get_engine()).get_indexes('LEITURA_SENSOR')}
+
+        assert indices['IX_LEITURA_SENSOR_DATA'] == ['sensor_id', 'data_leitura']
+
+    def test_consulta_por_sensor_e_intervalo_usa_o_indice(self, test_database):
+        from sqlalchemy import text
+
+        with test_database.get_engine().connect() as connection:
+            plano = " ".join(str(linha[-1]) for linha in connection.execute(text(
+                'EXPLAIN QUERY PLAN SELECT data_leitura, valor FROM "LEITURA_SENSOR" '
+                'WHERE sensor_id = 1 AND data_leitura >= :inicio ORDER BY data_leitura'
+            ), {"inicio": "2024-01-01"}))
+
+        assert "USING INDEX IX_LEITURA_SENSOR_DATA" in plano
+        assert "TEMP B-TREE" not in plano
+
+    def test_indice_parcial(self, test_database):
+        from sqlalchemy import text
+
+        with test_database.get_engine().connect() as connection:
+            ddl = connection.execute(text("SELECT sql FROM sqlite_master WHERE name = 'IX_SENSOR_COD_SERIAL'")).scalar_one()
+
+        assert "WHERE cod_serial IS NOT NULL" in ddl
+
+    def test_verificador_reporta_e_cria_os_faltantes(self, test_database):
+        from sqlalchemy import text
+        from src.database.verificar_indices import IndiceBanco, criar_indices_faltantes, verificar_indices
+
+        relatorio = verificar_indices()
+        assert relatorio.dialeto == 'sqlite'
+        assert relatorio.faltantes == []
+        assert relatorio.nao_utilizados is None
+
+        with test_database.get_engine().begin() as connection:
+            connection.execute(text('DROP INDEX "IX_LEITURA_SENSOR_DATA"'))
+
+        assert verificar_indices().faltantes == [IndiceBanco('LEITURA_SENSOR', 'IX_LEITURA_SENSOR_DATA')]
+        assert criar_indices_faltantes() == [IndiceBanco('LEITURA_SENSOR', 'IX_LEITURA_SENSOR_DATA')]
+        assert verificar_indices().faltantes == []
+
+    def test_create_all_tables_cria_indices_em_tabelas_existentes(self, test_database):
+        from sqlalchemy import text
+        from src.database.verificar_indices import indices_faltantes
+
+        with test_database.get_engine().begin() as connection:
+            connection.execute(text('DROP INDEX "IX_FORMA_ONDA_SENSOR_DATA"'))
+
+        test_database.create_all_tables()
+
+        assert indices_faltantes() == []
+
+    def test_ddl_inclui_os_indices(self, test_database):
+        assert 'CREATE INDEX "IX_LEITURA_SENSOR_DATA" ON "LEITURA_SENSOR" (sensor_id, data_leitura)' in test_database.generate_ddl()
+
+    def test_opcoes_por_dialeto(self):
+        from sqlalchemy import Column, DateTime, Float, Integer, MetaData, Table
+        from sqlalchemy.dialects import oracle, postgresql
+        from sqlalchemy.schema import CreateIndex
+        from src.database.tipos_base.model_mixins.indices import IndiceModel
+
+        indice = IndiceModel(('sensor_id', 'data_leitura'), incluir=('valor',), onde="valor IS NOT NULL").criar('LEITURA_SENSOR')
+        Table('LEITURA_SENSOR', MetaData(), Column('sensor_id', Integer), Column('data_leitura', DateTime),
+              Column('valor', Float), indice)
+
+        assert indice.name == 'IX_LEITURA_SENSOR_SENSOR_ID_DATA_LEITURA'
+        assert str(CreateIndex(indice).compile(dialect=postgresql.dialect())).endswith(
+            '(sensor_id, data_leitura) INCLUDE (valor) WHERE valor IS NOT NULL')
+        assert str(CreateIndex(indice).compile(dialect=oracle.dialect())).endswith('(sensor_id, data_leitura)')
@@ -0,0 +1,90 @@
+"""
+Testes para o armazenamento de formas de onda do acelerômetro em blocos comprimidos (FormaOndaSensor).
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.database.models.sensor import (
+    EixoAcelerometroEnum, FormaOndaSensor, Sensor, TipoSensor, TipoSensorEnum
+)
+
+
+def _criar_sensor() -> Sensor:
+    tipo = TipoSensor(nome="Vibração", tipo=TipoSensorEnum.VIBRACAO).save()
+    return Sensor(nome="Sensor V", cod_serial="ESP-1", tipo_sensor_id=tipo.id).save()
+
+
+INICIO = datetime(2025, 1, 1, 12, 0, 0)
+
+
+class TestFormaOndaSensor:
+
+    def test_blocos_de_duracao_fixa(self, test_database):
+        sensor = _criar_sensor()
+        amostras = np.arange(2500, dtype=np.float32)
+
+        blocos = FormaOndaSensor.salvar_forma_onda(sensor.id, EixoAcelerometroEnum.X, INICIO, 1000.0, amostras)
+
+        assert blocos == 3
+        salvos = sorted(FormaOndaSensor.all(), key=lambda bloco: bloco.data_inicio)
+        assert [bloco.quantidade_amostras for bloco in salvos] == [1000, 1000, 500]
+        assert salvos[1].data_inicio == INICIO + timedelta(seconds=1)
+        assert salvos[2].data_fim == INICIO + timedelta(seconds=2.5)
+        np.testing.assert_array_equal(salvos[2].amostras_array(), amostras[2000:])
+
+    def test_compressao(self):
+        amostras = np.zeros(10000, dtype=np.float32)
+        assert len(FormaOndaSensor.comprimir(amostras)) < amostras.nbytes / 10
+
+    def test_leitura_do_intervalo(self, test_database):
+        sensor = _criar_sensor()
+        amostras = np.arange(3000, dtype=np.float32)
+        FormaOndaSensor.salvar_forma_onda(sensor.id, EixoAcelerometroEnum.Z, INICIO, 1000.0, amostras)
+
+        forma_onda = FormaOndaSensor.ler_forma_onda(
+            sensor.id, EixoAcelerometroEnum.Z, INICIO + timedelta(seconds=0.5), INICIO + timedelta(seconds=1.5)
+        )
+
+        np.testing.assert_array_equal(forma_onda.amostras, amostras[500:1500])
+        assert forma_onda.instantes[0] == np.datetime64(INICIO + timedelta(seconds=0.5), 'us')
+        assert forma_onda.instantes.dtype == np.dtype('datetime64[us]')
+
+    def test_descomprime_apenas_blocos_sobrepostos(self, test_database, monkeypatch):
+        import zlib
+        from src.database.models import sensor as modulo_sensor
+
+        sensor = _criar_sensor()
+        FormaOndaSensor.salvar_forma_onda(sensor.id, EixoAcelerometroEnum.X, INICIO, 100.0, np.ones(1000))
+
+        descompressoes = []
+        original = zlib.decompress
+
+        def descomprimir(dados):
+            descompressoes.append(len(dados))
+            return original(dados)
+
+        monkeypatch.setattr(modulo_sensor.zlib, 'decompress', descomprimir)
+
+        forma_onda = FormaOndaSensor.ler_forma_onda(
+            sensor.id, EixoAcelerometroEnum.X, INICIO + timedelta(seconds=3.2), INICIO + timedelta(seconds=4.1)
+        )
+
+        assert len(forma_onda.amostras) == 90
+        assert len(descompressoes) == 2
+
+    def test_outro_eixo_e_intervalo_vazio(self, test_database):
+        sensor = _criar_sensor()
+        FormaOndaSensor.salvar_forma_onda(sensor.id, EixoAcelerometroEnum.X, INICIO, 100.0, np.ones(100))
+
+        assert len(FormaOndaSensor.ler_forma_onda(sensor.id, EixoAcelerometroEnum.Y, INICIO, INICIO + timedelta(days=1)).amostras) == 0
+        assert len(FormaOndaSensor.ler_forma_onda(sensor.id, EixoAcelerometroEnum.X, INICIO - timedelta(days=1), INICIO).amostras) == 0
+
+    def test_taxa_invalida(self, test_database):
+        with pytest.raises(ValueError):
+            FormaOndaSensor.salvar_forma_onda(1, EixoAcelerometroEnum.X, INICIO, 0, np.ones(10))
+
+    def test_random(self):
+        bloco = FormaOndaSensor.random()
+        assert len(bloco.amostras_array()) == bloco.quantidade_amostras
@@ -0,0 +1,78 @@
+"""
+Testes unitários para o formato binário compacto de leituras.
+"""
+import struct
+from datetime import datetime
+
+import pytest
+
+from src.api.formato_binario import (
+    codificar_leituras, decodificar_leituras, PayloadBinarioInvalido, DTYPE_REGISTRO
+)
+
+
+class TestFormatoBinario:
+
+    def test_ida_e_volta(self):
+        leituras = [
+            {'serial': 'ESP-1', 'lux': 1.5, 'temperatura': 25.0, 'vibracao_media': 0.25},
+            {'serial': 'ESP-2', 'lux': None, 'temperatura': -10.5, 'vibracao_media': None},
+            {'serial': 'ESP-1', 'lux': 2.0, 'temperatura': 26.0, 'vibracao_media': 0.5},
+        ]
+
+        assert decodificar_leituras(codificar_leituras(leituras)) == leituras
+
+    def test_tamanho_compacto(self):
+        leituras = [{'serial': 'ESP-1', 'lux': 1.0, 'temperatura': 2.0, 'vibracao_media': 3.0}] * 100
+        corpo = codificar_leituras(leituras)
+
+        # cabeçalho: assinatura + versão + qtd seriais + serial + qtd registros
+        assert len(corpo) == 2 + 2 + 1 + 5 + 4 + 100 * DTYPE_REGISTRO.itemsize
+
+    def test_lote_vazio(self):
+        assert decodificar_leituras(codificar_leituras([])) == []
+
+    def test_assinatura_invalida(self):
+        with pytest.raises(PayloadBinarioInvalido):
+            decodificar_leituras(b'XX' + codificar_leituras([])[2:])
+
+    def test_tamanho_invalido(self):
+        corpo = codificar_leituras([{'serial': 'ESP-1', 'lux': 1.0, 'temperatura': 2.0, 'vibracao_media': 3.0}])
+        with pytest.raises(PayloadBinarioInvalido):
+            decodificar_leituras(corpo[:-1])
+
+    def test_indice_de_serial_inexistente(self):
+        corpo = bytearray(codificar_leituras([{'serial': 'ESP-1', 'lux': 1.0, 'temperatura': 2.0, 'vibracao_media': 3.0}]))
+        corpo[-DTYPE_REGISTRO.itemsize] = 7
+        with pytest.raises(PayloadBinarioInvalido):
+            decodificar_leituras(bytes(corpo))
+
+    def test_cabecalho_truncado(self):
+        with pytest.raises(PayloadBinarioInvalido):
+            decodificar_leituras(b'RL' + struct.pack('<BB', 1, 3))
+
+    def test_versao_com_tempo_e_sequencia(self):
+        leituras = [
+            {'serial': 'ESP-1', 'sequencia': 41, 'data_leitura': datetime(2024, 5, 1, 12, 30, 15, 250000),
+             'lux': 1.5, 'temperatura': 25.0, 'vibracao_media': 0.25},
+            {'serial': 'ESP-1', 'sequencia': None, 'data_leitura': None,
+             'lux': None, 'temperatura': 26.0, 'vibracao_media': None},
+        ]
+        corpo = codificar_leituras(leituras)
+
+        assert corpo[2] == 2
+        assert decodificar_leituras(corpo) == leituras
+
+    def test_sequencia_negativa(self):
+        corpo = codificar_leituras([{'serial': 'ESP-1', 'sequencia': 1, 'lux': 1.0, 'temperatura': 2.0, 'vibracao_media': 3.0}])
+        corpo = corpo.replace(struct.pack('<q', 1), struct.pack('<q', -5))
+        with pytest.raises(PayloadBinarioInvalido):
+            decodificar_leituras(corpo)
+
+    @pytest.mark.parametrize("data_leitura_ms", [2 ** 62, -2])
+    def test_data_leitura_fora_do_intervalo(self, data_leitura_ms):
+        corpo = codificar_leituras([{'serial': 'ESP-1', 'data_leitura': datetime(2024, 5, 1), 'lux': 1.0,
+                                     'temperatura': 2.0, 'vibracao_media': 3.0}])
+        corpo = corpo.replace(struct.pack('<q', round(datetime(2024, 5, 1).timestamp() * 1000)), struct.pack('<q', data_leitura_ms))
+        with pytest.raises(PayloadBinarioInvalido):
+            decodificar_leituras(corpo)
@@ -0,0 +1,95 @@
+"""
+Testes para o gerador de carga da API de ingestão.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.api.gerador_carga import DispositivoVirtual, ResultadoCarga, gerar_carga
+
+
+@pytest.fixture
+def transporte_api(test_database):
+    from src.api.api_basica import app
+    from src.api.cache_sensores import CacheSensores
+    from src.api.limitador import resetar_limitador
+    from src.api.sequencia_dispositivos import resetar_rastreador
+
+    CacheSensores.invalidar()
+    resetar_limitador()
+    resetar_rastreador()
+    return httpx.ASGITransport(app=app)
+
+
+class TestResultadoCarga:
+
+    def test_percentis_e_vazao(self):
+        resultado = ResultadoCarga(2, 2.0, 100, 300, {"200": 100}, [float(i) for i in range(1, 101)])
+
+        percentis = resultado.percentis()
+        assert percentis["p50"] == pytest.approx(50.5)
+        assert percentis["p99"] == pytest.approx(99.01)
+        assert resultado.leituras_por_segundo == 150
+        assert resultado.resumo()["requisicoes_por_segundo"] == 50
+
+    def test_sem_requisicoes(self):
+        assert ResultadoCarga(1, 1.0, 0, 0, {}, []).percentis()["p95"] is None
+
+
+class TestDispositivoVirtual:
+
+    def test_sequencia_crescente(self):
+        dispositivo = DispositivoVirtual("ESP-1")
+
+        leituras = [dispositivo.ler(com_tempo=True) for _ in range(3)]
+
+        assert [leitura["sequencia"] for leitura in leituras] == [0, 1, 2]
+        assert "sequencia" not in dispositivo.ler(com_tempo=False)
+
+
+class TestGerarCarga:
+
+    def test_leituras_unicas(self, transporte_api):
+        from src.database.models.sensor import LeituraSensor
+
+        resultado = asyncio.run(gerar_carga(dispositivos=3, taxa=20, duracao=0.5, transport=transporte_api, url="http://api"))
+
+        assert resultado.status.keys() == {"200"}
+        assert resultado.requisicoes == len(resultado.latencias_ms) > 0
+        assert LeituraSensor.count() == resultado.leituras * 3
+
+    def test_lotes_binarios_comprimidos(self, transporte_api):
+        resultado = asyncio.run(gerar_carga(dispositivos=2, taxa=40, duracao=0.5, lote=5, formato="binario",
+                                            comprimir=True, transport=transporte_api, url="http://api"))
+
+        assert resultado.status.keys() == {"200"}
+        assert resultado.leituras == resultado.requisicoes * 5
+
+    def test_leituras_aceitas_pelo_corpo_da_resposta(self):
+        from src.api.gerador_carga import _leituras_aceitas
+
+        def resposta(corpo, status_code=200):
+            return httpx.Response(status_code, json=corpo)
+
+        assert _leituras_aceitas(resposta({"status": "success"}), 1, "ESP-1") == 1
+        assert _leituras_aceitas(resposta({"status": "success", "leituras_duplicadas": 1}), 1, "ESP-1") == 0
+        assert _leituras_aceitas(resposta({"status": "error"}), 1, "ESP-1") == 0
+        assert _leituras_aceitas(resposta({"detail": "limite"}, 429), 1, "ESP-1") == 0
+        assert _leituras_aceitas(resposta({"status": "success", "leituras_duplicadas": 2, "seriais_nao_encontrados": [],
+                                           "seriais_limitados": []}), 5, "ESP-1") == 3
+        assert _leituras_aceitas(resposta({"status": "success", "leituras_duplicadas": 0,
+                                           "seriais_nao_encontrados": ["ESP-1"]}), 5, "ESP-1") == 0
+
+    def test_falha_no_init(self):
+        def responder(request):
+            return httpx.Response(500, json={"detail": "erro"})
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(gerar_carga(dispositivos=1, duracao=0.1, transport=httpx.MockTransport(responder), url="http://api"))
+
+    def test_parametros_invalidos(self):
+        with pytest.raises(ValueError):
+            asyncio.run(gerar_carga(dispositivos=0))
+        with pytest.raises(ValueError):
+            asyncio.run(gerar_carga(formato="xml"))
@@ -0,0 +1,186 @@
+"""
+Testes unitários para o limitador de ingestão (token bucket por serial e limite de escritas).
+"""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.api import limitador as modulo_limitador
+from src.api.limitador import LimitadorIngestao, LimiteExcedidoError
+
+
+class TestTokenBucket:
+
+    def test_rajada_e_limite(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=1, rajada=3)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=100.0):
+            for _ in range(3):
+                limitador.consumir("ESP-1")
+
+            with pytest.raises(LimiteExcedidoError) as erro:
+                limitador.consumir("ESP-1")
+
+        assert erro.value.retry_after_header == "1"
+        assert limitador.estatisticas()["leituras_limitadas_dispositivo"] == 1
+
+    def test_reposicao_com_o_tempo(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=2, rajada=2)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=100.0):
+            limitador.consumir("ESP-1", 2)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=101.0):
+            limitador.consumir("ESP-1", 2)
+
+    def test_dispositivos_independentes(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=1, rajada=1)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=100.0):
+            limitador.consumir("ESP-1")
+            limitador.consumir("ESP-2")
+            with pytest.raises(LimiteExcedidoError):
+                limitador.consumir("ESP-1")
+
+    def test_lote_maior_que_rajada_deixa_saldo_negativo(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=10, rajada=5)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=100.0):
+            limitador.consumir("ESP-1", 20)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=101.0):
+            # saldo: -15 + 10 = -5, ainda negativo
+            with pytest.raises(LimiteExcedidoError) as erro:
+                limitador.consumir("ESP-1")
+        assert erro.value.retry_after == pytest.approx(0.6)
+
+    def test_canais_de_alta_frequencia_tem_bucket_proprio(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=1, rajada=1,
+                                      leituras_por_segundo_alta_frequencia=50, rajada_alta_frequencia=100)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=100.0):
+            limitador.consumir("ESP-1")
+            for _ in range(100):
+                limitador.consumir("ESP-1", alta_frequencia=True)
+            with pytest.raises(LimiteExcedidoError):
+                limitador.consumir("ESP-1", alta_frequencia=True)
+            with pytest.raises(LimiteExcedidoError):
+                limitador.consumir("ESP-1")
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=101.0):
+            # 50 leituras/s, como um dispositivo de 50 Hz
+            limitador.consumir("ESP-1", 50, alta_frequencia=True)
+
+        estatisticas = limitador.estatisticas()
+        assert estatisticas["leituras_limitadas_alta_frequencia"] == 1
+        assert estatisticas["leituras_limitadas_dispositivo"] == 1
+
+    def test_desabilitado(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=0, rajada=1)
+        for _ in range(100):
+            limitador.consumir("ESP-1")
+
+    def test_descarta_buckets_ociosos(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=1, rajada=1, max_dispositivos=2)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=100.0):
+            limitador.consumir("ESP-1")
+            limitador.consumir("ESP-2")
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=110.0):
+            limitador.consumir("ESP-3")
+        assert limitador.estatisticas()["dispositivos_rastreados"] == 1
+
+    def test_ociosos_descartados_abaixo_do_maximo(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=1, rajada=1, max_dispositivos=1000)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=100.0):
+            for i in range(10):
+                limitador.consumir(f"ESP-{i}")
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=110.0):
+            limitador.consumir("ESP-X")
+        assert limitador.estatisticas()["dispositivos_rastreados"] == 1
+
+    def test_maximo_descarta_o_menos_usado_recentemente(self):
+        limitador = LimitadorIngestao(leituras_por_segundo=1, rajada=2, max_dispositivos=2)
+        with patch.object(modulo_limitador.time, 'monotonic', return_value=100.0):
+            limitador.consumir("ESP-1")
+            limitador.consumir("ESP-2")
+            limitador.consumir("ESP-1")
+            # Sem buckets ociosos, o novo serial descarta o ESP-2, usado há mais tempo
+            limitador.consumir("ESP-3")
+
+            assert limitador.estatisticas()["dispositivos_rastreados"] == 2
+            with pytest.raises(LimiteExcedidoError):
+                limitador.consumir("ESP-1")
+            limitador.consumir("ESP-2")
+
+
+class TestLimiteEscritas:
+
+    def test_limite_de_escritas_simultaneas(self):
+        limitador = LimitadorIngestao(max_escritas_simultaneas=1, espera_escrita_ms=10)
+        liberar = threading.Event()
+        dentro = threading.Event()
+
+        def escrever():
+            with limitador.escrita():
+                dentro.set()
+                liberar.wait(1)
+
+        escritor = threading.Thread(target=escrever)
+        escritor.start()
+        dentro.wait(1)
+        try:
+            assert limitador.estatisticas()["escritas_em_andamento"] == 1
+            with pytest.raises(LimiteExcedidoError):
+                with limitador.escrita():
+                    pass
+        finally:
+            liberar.set()
+            escritor.join()
+
+        with limitador.escrita():
+            pass
+        assert limitador.estatisticas()["requisicoes_limitadas_concorrencia"] == 1
+
+    def test_escrita_async_compartilha_as_vagas(self):
+        import asyncio
+
+        limitador = LimitadorIngestao(max_escritas_simultaneas=1, espera_escrita_ms=20)
+
+        async def cenario():
+            with limitador.escrita():
+                with pytest.raises(LimiteExcedidoError):
+                    async with limitador.escrita_async():
+                        pass
+
+            async with limitador.escrita_async():
+                assert limitador.estatisticas()["escritas_em_andamento"] == 1
+
+        asyncio.run(cenario())
+
+        assert limitador.estatisticas()["escritas_em_andamento"] == 0
+        assert limitador.estatisticas()["requisicoes_limitadas_concorrencia"] == 1
+
+    def test_escrita_async_acordada_pela_liberacao_de_uma_thread(self):
+        import asyncio
+
+        limitador = LimitadorIngestao(max_escritas_simultaneas=1, espera_escrita_ms=5000)
+        dentro = threading.Event()
+        liberar = threading.Event()
+
+        def escrever():
+            with limitador.escrita():
+                dentro.set()
+                liberar.wait(1)
+
+        async def cenario():
+            inicio = time.monotonic()
+            async with limitador.escrita_async():
+                return time.monotonic() - inicio
+
+        escritor = threading.Thread(target=escrever)
+        escritor.start()
+        dentro.wait(1)
+        threading.Timer(0.05, liberar.set).start()
+        try:
+            espera = asyncio.run(cenario())
+        finally:
+            liberar.set()
+            escritor.join()
+
+        assert espera < 1
+        assert limitador._esperas_async == []
+        assert limitador.estatisticas()["requisicoes_limitadas_concorrencia"] == 0
@@ -0,0 +1,82 @@
+"""
+Testes unitários para o logging não bloqueante (fila + thread de escrita) e a amostragem de eventos.
+"""
+import logging
+import queue
+
+import pytest
+
+from src.logger import config
+from src.logger.config import FiltroAmostragem, QueueHandlerNaoBloqueante, configurar_logger, parar_logger
+
+
+def _registro(nivel: int) -> logging.LogRecord:
+    return logging.LogRecord("teste", nivel, __file__, 1, "mensagem", None, None)
+
+
+@pytest.fixture
+def logger_raiz():
+    raiz = logging.getLogger()
+    handlers, nivel = raiz.handlers[:], raiz.level
+    yield raiz
+    parar_logger()
+    for handler in raiz.handlers[:]:
+        if handler not in handlers:
+            handler.close()
+            raiz.removeHandler(handler)
+    raiz.setLevel(nivel)
+
+
+class TestFiltroAmostragem:
+
+    def test_debug_amostrado(self):
+        filtro = FiltroAmostragem(taxa=10)
+        aceitos = sum(filtro.filter(_registro(logging.DEBUG)) for _ in range(100))
+        assert aceitos == 10
+
+    def test_outros_niveis_sempre_passam(self):
+        filtro = FiltroAmostragem(taxa=1000)
+        filtro.filter(_registro(logging.DEBUG))
+
+        assert filtro.filter(_registro(logging.INFO))
+        assert filtro.filter(_registro(logging.WARNING))
+
+    def test_taxa_minima(self):
+        filtro = FiltroAmostragem(taxa=0)
+        assert all(filtro.filter(_registro(logging.DEBUG)) for _ in range(5))
+
+
+class TestQueueHandlerNaoBloqueante:
+
+    def test_fila_cheia_descarta(self):
+        handler = QueueHandlerNaoBloqueante(queue.Queue(maxsize=2))
+
+        for _ in range(5):
+            handler.emit(_registro(logging.INFO))
+
+        assert handler.queue.qsize() == 2
+        assert handler.descartados == 3
+
+
+class TestConfigurarLogger:
+
+    def test_escrita_pela_thread(self, logger_raiz, tmp_path, monkeypatch):
+        monkeypatch.setenv("LOGGING_ENABLED", "true")
+        arquivo = tmp_path / "api.log"
+
+        configurar_logger(str(arquivo), force_reconfigure=True)
+        logging.getLogger("teste").warning("leitura descartada serial=%s", "ESP-1")
+        parar_logger()
+
+        assert "leitura descartada serial=ESP-1" in arquivo.read_text()
+
+    def test_apenas_o_queue_handler_no_raiz(self, logger_raiz, tmp_path, monkeypatch):
+        monkeypatch.setenv("LOGGING_ENABLED", "true")
+
+        configurar_logger(str(tmp_path / "a.log"), force_reconfigure=True)
+        configurar_logger(str(tmp_path / "b.log"))
+
+        nomes = [handler.name for handler in logger_raiz.handlers]
+        assert nomes == ["queue_handler_format"]
+        assert config._listener is not None
+        assert not (tmp_path / "b.log").exists()
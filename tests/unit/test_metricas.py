@@ -0,0 +1,125 @@
+"""
+Testes unitários para as métricas da API (formato de texto do Prometheus).
+"""
+import json
+import os
+import threading
+
+import pytest
+
+import src.api.metricas as metricas
+from src.api.metricas import RegistroMetricas
+
+
+@pytest.fixture
+def registro():
+    registro = RegistroMetricas()
+    registro.contador("requisicoes_total", "Requisições.")
+    registro.histograma("duracao_segundos", "Duração.", buckets=(0.1, 1.0))
+    registro.gauge("profundidade", "Profundidade.")
+    return registro
+
+
+class TestRegistroMetricas:
+
+    def test_contador_somado_entre_threads(self, registro):
+        def incrementar():
+            for _ in range(1000):
+                registro.incrementar("requisicoes_total", rota="/x")
+
+        threads = [threading.Thread(target=incrementar) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert 'requisicoes_total{rota="/x"} 4000' in registro.exportar()
+
+    def test_histograma_cumulativo(self, registro):
+        for valor in (0.05, 0.5, 0.5, 3.0):
+            registro.observar("duracao_segundos", valor)
+
+        texto = registro.exportar()
+
+        assert "# TYPE duracao_segundos histogram" in texto
+        assert 'duracao_segundos_bucket{le="0.1"} 1' in texto
+        assert 'duracao_segundos_bucket{le="1"} 3' in texto
+        assert 'duracao_segundos_bucket{le="+Inf"} 4' in texto
+        assert "duracao_segundos_count 4" in texto
+        assert "duracao_segundos_sum 4.05" in texto
+
+    def test_coletor_e_razao(self, registro):
+        registro.contador("hits_total", "Hits.")
+        registro.contador("misses_total", "Misses.")
+        registro.razao("taxa_acerto", "Taxa.", "hits_total", ["hits_total", "misses_total"])
+        registro.registrar_coletor(lambda: [("profundidade", {}, 7), ("hits_total", {}, 3), ("misses_total", {}, 1)])
+
+        texto = registro.exportar()
+
+        assert "profundidade 7" in texto
+        assert "taxa_acerto 0.75" in texto
+
+    def test_metricas_sem_valores_omitidas(self, registro):
+        assert registro.exportar() == "\n"
+
+    def test_rotulos_escapados(self, registro):
+        registro.incrementar("requisicoes_total", rota='a"b\\c')
+        assert 'requisicoes_total{rota="a\\"b\\\\c"} 1' in registro.exportar()
+
+    def test_somar_resumos_de_workers(self, registro):
+        registro.incrementar("requisicoes_total", 2)
+        registro.observar("duracao_segundos", 0.5)
+        resumo = registro.resumo()
+
+        total = RegistroMetricas.somar_resumos([resumo, json.loads(json.dumps(resumo))])
+        texto = registro.exportar(total)
+
+        assert "requisicoes_total 4" in texto
+        assert "duracao_segundos_count 2" in texto
+
+
+class TestMetricasMultiprocesso:
+
+    def test_exportar_soma_resumos_do_diretorio(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("API_METRICAS_DIR", str(tmp_path))
+        monkeypatch.setenv("API_METRICAS_INTERVALO_S", "60")
+
+        outro_worker = RegistroMetricas.somar_resumos([])
+        outro_worker["contadores"]["ingestao_linhas_inseridas_total"] = {"[]": 1000}
+        (tmp_path / f"metricas-{os.getppid()}.json").write_text(json.dumps(outro_worker))
+
+        metricas.iniciar_metricas_from_env()
+        try:
+            metricas.registro.incrementar("ingestao_linhas_inseridas_total", 5)
+            antes = metricas.registro.resumo()["contadores"]["ingestao_linhas_inseridas_total"]["[]"]
+            texto = metricas.exportar_metricas()
+        finally:
+            metricas.parar_metricas()
+
+        assert f"ingestao_linhas_inseridas_total {int(antes) + 1000}" in texto
+
+        metricas.limpar_metricas_dir()
+        assert list(tmp_path.glob("metricas-*.json")) == []
+
+    def test_ignora_resumos_de_workers_encerrados(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("API_METRICAS_DIR", str(tmp_path))
+        monkeypatch.setenv("API_METRICAS_INTERVALO_S", "60")
+
+        outro_worker = RegistroMetricas.somar_resumos([])
+        outro_worker["contadores"]["ingestao_linhas_inseridas_total"] = {"[]": 1000}
+        # pid que não existe e pid existente, mas com o resumo sem atualização há mais de três intervalos
+        (tmp_path / "metricas-999999999.json").write_text(json.dumps(outro_worker))
+        parado = tmp_path / f"metricas-{os.getppid()}.json"
+        parado.write_text(json.dumps(outro_worker))
+        os.utime(parado, (0, 0))
+
+        metricas.iniciar_metricas_from_env()
+        try:
+            antes = metricas.registro.resumo()["contadores"].get("ingestao_linhas_inseridas_total", {}).get("[]", 0)
+            texto = metricas.exportar_metricas()
+            assert (tmp_path / f"metricas-{os.getpid()}.json").exists()
+        finally:
+            metricas.parar_metricas()
+
+        assert f"ingestao_linhas_inseridas_total {int(antes)}" in texto
+        assert not (tmp_path / f"metricas-{os.getpid()}.json").exists()
@@ -581,8 +581,9 @@ class TestObterLeituraMaisRecenteSensorTool:
         result = obter_leitura_mais_recente_sensor(sensor_id=99999)
         assert "não encontrado" in result.lower() or "erro" in result.lower()
     
+    @patch('src.large_language_model.tools.obter_leitura_mais_recente_sensor_tool.LeituraSensor.mais_recentes')
     @patch('src.large_language_model.tools.obter_leitura_mais_recente_sensor_tool.Database.get_session')
-    def test_obter_leitura_no_readings(self, mock_get_session):
+    def test_obter_leitura_no_readings(self, mock_get_session, mock_ultimas_leituras):
         """Test getting reading when no readings exist."""
         # Mock sensor exists
         mock_sensor = Mock()
@@ -608,11 +609,14 @@ class TestObterLeituraMaisRecenteSensorTool:
         mock_session.query.side_effect = session_query_side_effect
         mock_get_session.return_value = mock_session
         
+        mock_ultimas_leituras.return_value = {}
+        
         result = obter_leitura_mais_recente_sensor(sensor_id=1)
         assert "nenhuma leitura" in result.lower() or "não encontrada" in result.lower()
     
+    @patch('src.large_language_model.tools.obter_leitura_mais_recente_sensor_tool.LeituraSensor.mais_recentes')
     @patch('src.large_language_model.tools.obter_leitura_mais_recente_sensor_tool.Database.get_session')
-    def test_obter_leitura_with_reading(self, mock_get_session):
+    def test_obter_leitura_with_reading(self, mock_get_session, mock_ultimas_leituras):
         """Test getting reading when reading exists."""
         # Mock sensor
         mock_sensor = Mock()
@@ -645,6 +649,8 @@ class TestObterLeituraMaisRecenteSensorTool:
         mock_session.query.side_effect = session_query_side_effect
         mock_get_session.return_value = mock_session
         
+        mock_ultimas_leituras.return_value = {1: mock_leitura}
+        
         result = obter_leitura_mais_recente_sensor(sensor_id=1)
         
         assert "Leitura Mais Recente" in result
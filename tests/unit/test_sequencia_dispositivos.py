@@ -0,0 +1,87 @@
+"""
+Testes unitários para o rastreamento de sequência (descarte de leituras repetidas) da API.
+"""
+import pytest
+
+from src.api.sequencia_dispositivos import RastreadorSequencia
+
+
+class TestRastreadorSequencia:
+
+    def test_sequencias_novas_e_repetidas(self):
+        rastreador = RastreadorSequencia(janela=8)
+
+        assert rastreador.reservar("ESP-1", [1, 2, 3]) == [True, True, True]
+        assert rastreador.reservar("ESP-1", [2, 3, 4]) == [False, False, True]
+        assert rastreador.estatisticas()["leituras_duplicadas"] == 2
+
+    def test_repetida_no_mesmo_lote(self):
+        rastreador = RastreadorSequencia(janela=8)
+        assert rastreador.reservar("ESP-1", [5, 5, 6]) == [True, False, True]
+
+    def test_fora_de_ordem_dentro_da_janela(self):
+        rastreador = RastreadorSequencia(janela=8)
+        rastreador.reservar("ESP-1", [10])
+
+        assert rastreador.reservar("ESP-1", [7, 3, 8]) == [True, True, True]
+        assert rastreador.reservar("ESP-1", [7, 3]) == [False, False]
+
+    def test_mais_antiga_que_a_janela_e_descartada(self):
+        rastreador = RastreadorSequencia(janela=8)
+        rastreador.reservar("ESP-1", list(range(1, 101)))
+
+        # Reenvio, após reconectar, de um histórico mais longo que a janela
+        assert not any(rastreador.reservar("ESP-1", list(range(1, 101))))
+        assert rastreador.estatisticas()["leituras_fora_da_janela"] == 92
+
+    def test_sem_boot_volta_a_zero_reinicia(self):
+        rastreador = RastreadorSequencia(janela=8)
+        rastreador.reservar("ESP-1", [100])
+
+        assert rastreador.reservar("ESP-1", [0, 1, 2]) == [True, True, True]
+        assert rastreador.reservar("ESP-1", [1]) == [False]
+        assert rastreador.estatisticas()["reinicios"] == 1
+
+    def test_cada_boot_tem_a_sua_janela(self):
+        rastreador = RastreadorSequencia(janela=8)
+        rastreador.reservar("ESP-1", list(range(100)), boot=1)
+
+        assert rastreador.reservar("ESP-1", [0, 1], boot=2) == [True, True]
+        # Leituras guardadas do boot anterior, ainda não enviadas, e reenvios dele
+        assert rastreador.reservar("ESP-1", [100, 99, 5], boot=1) == [True, False, False]
+        assert rastreador.estatisticas()["reinicios"] == 0
+
+    def test_salto_maior_que_a_janela(self):
+        rastreador = RastreadorSequencia(janela=8)
+        rastreador.reservar("ESP-1", [1, 2])
+
+        assert rastreador.reservar("ESP-1", [10 ** 9, 10 ** 9 - 1]) == [True, True]
+        assert rastreador.reservar("ESP-1", [10 ** 9]) == [False]
+
+    def test_sem_sequencia_sempre_aceita(self):
+        rastreador = RastreadorSequencia(janela=8)
+        assert rastreador.reservar("ESP-1", [None, None]) == [True, True]
+
+    def test_dispositivos_independentes(self):
+        rastreador = RastreadorSequencia(janela=8)
+        rastreador.reservar("ESP-1", [1])
+        assert rastreador.reservar("ESP-2", [1]) == [True]
+
+    def test_liberar_permite_reenvio(self):
+        rastreador = RastreadorSequencia(janela=8)
+        rastreador.reservar("ESP-1", [1, 2, 3])
+        rastreador.liberar("ESP-1", [2, 3])
+
+        assert rastreador.reservar("ESP-1", [1, 2, 3]) == [False, True, True]
+
+    def test_liberar_do_boot(self):
+        rastreador = RastreadorSequencia(janela=8)
+        rastreador.reservar("ESP-1", [1, 2], boot=3)
+        rastreador.liberar("ESP-1", [2], boot=3)
+
+        assert rastreador.reservar("ESP-1", [2]) == [True]
+        assert rastreador.reservar("ESP-1", [1, 2], boot=3) == [False, True]
+
+    def test_janela_invalida(self):
+        with pytest.raises(ValueError):
+            RastreadorSequencia(janela=0)
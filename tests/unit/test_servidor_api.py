@@ -0,0 +1,139 @@
+"""
+Testes unitários para o modo multiprocesso da API (src/api/servidor.py).
+"""
+import asyncio
+import inspect
+import os
+from contextlib import asynccontextmanager
+from unittest.mock import patch, MagicMock
+
+import uvicorn
+from fastapi import FastAPI
+
+from src.api import servidor
+from src.api.servidor import ServidorWorker, SupervisorApi, quantidade_workers_padrao
+
+
+@asynccontextmanager
+async def _lifespan_lento(app):
+    # Registra o início e o fim do lifespan de cada worker no arquivo de eventos do teste
+    with open(os.environ["TESTE_SERVIDOR_EVENTOS"], "a") as arquivo:
+        arquivo.write(f"inicio {os.getpid()}\n")
+    await asyncio.sleep(1)
+    with open(os.environ["TESTE_SERVIDOR_EVENTOS"], "a") as arquivo:
+        arquivo.write(f"pronto {os.getpid()}\n")
+    yield
+    with open(os.environ["TESTE_SERVIDOR_EVENTOS"], "a") as arquivo:
+        arquivo.write(f"fim {os.getpid()}\n")
+
+
+app_teste = FastAPI(lifespan=_lifespan_lento)
+
+
+class TestServidorApi:
+
+    def test_quantidade_workers_do_ambiente(self):
+        with patch.dict(os.environ, {'API_WORKERS': '3'}):
+            assert quantidade_workers_padrao() == 3
+
+    def test_quantidade_workers_padrao_cpus(self):
+        with patch.dict(os.environ, {}, clear=True), patch.object(servidor.os, 'cpu_count', return_value=6):
+            assert quantidade_workers_padrao() == 6
+
+    def test_interface_do_uvicorn_usada_pelo_supervisor(self):
+        # Multiprocess e Process não são API documentada do uvicorn; uma atualização que mude
+        # a interface usada pelo SupervisorApi deve falhar aqui, e não em produção
+        from uvicorn.supervisors.multiprocess import Multiprocess, Process
+
+        assert list(inspect.signature(Process.__init__).parameters) == ['self', 'config', 'target', 'sockets']
+        assert list(inspect.signature(Multiprocess.__init__).parameters) == ['self', 'config', 'target', 'sockets']
+        assert callable(Multiprocess.restart_all)
+        processo = Process(uvicorn.Config(app_teste), target=print, sockets=[])
+        for atributo in ('start', 'terminate', 'kill', 'join', 'pid'):
+            assert atributo in vars(Process)
+        assert callable(processo.process.is_alive)
+
+    def test_workers_iniciais_usam_servidor_worker(self):
+        with patch.object(SupervisorApi, 'run') as run, \
+                patch('src.api.api_basica.iniciar_database_from_env'), \
+                patch('src.database.tipos_base.database.Database.descartar_conexoes'), \
+                patch.object(uvicorn.Config, 'bind_socket', return_value=MagicMock()), \
+                patch.dict(os.environ):
+            capturado = {}
+            original = SupervisorApi.__init__
+
+            def init(supervisor, config, target, sockets):
+                capturado['target'] = target
+                original(supervisor, config, target, sockets)
+
+            with patch.object(SupervisorApi, '__init__', init):
+                servidor.iniciar_api_multiprocesso(workers=2, host="127.0.0.1", port=0)
+
+        run.assert_called_once()
+        assert isinstance(capturado['target'].__self__, ServidorWorker)
+        assert capturado['target'].__self__.pronto is None
+
+    def _supervisor(self, processos):
+        supervisor = SupervisorApi.__new__(SupervisorApi)
+        supervisor.config = MagicMock()
+        supervisor.target = MagicMock()
+        supervisor.sockets = []
+        supervisor.processes = list(processos)
+        return supervisor
+
+    def test_reinicio_gradual_inicia_novo_antes_de_encerrar_antigo(self):
+        eventos = []
+        antigo = MagicMock()
+        antigo.terminate.side_effect = lambda: eventos.append('terminate_antigo')
+        novo = MagicMock()
+        novo.start.side_effect = lambda: eventos.append('start_novo')
+
+        supervisor = self._supervisor([antigo])
+        with patch.object(supervisor, 'novo_worker', return_value=(novo, MagicMock())), \
+                patch.object(supervisor, 'aguardar_pronto', return_value=True):
+            supervisor.restart_all()
+
+        assert eventos == ['start_novo', 'terminate_antigo']
+        assert supervisor.processes == [novo]
+
+    def test_reinicio_mantem_worker_antigo_se_novo_nao_responde(self):
+        antigo = MagicMock()
+        novo = MagicMock()
+
+        supervisor = self._supervisor([antigo])
+        with patch.object(supervisor, 'novo_worker', return_value=(novo, MagicMock())), \
+                patch.object(supervisor, 'aguardar_pronto', return_value=False):
+            supervisor.restart_all()
+
+        antigo.terminate.assert_not_called()
+        novo.kill.assert_called_once()
+        assert supervisor.processes == [antigo]
+
+    def test_reinicio_encerra_antigo_so_depois_do_lifespan_do_novo(self, tmp_path, monkeypatch):
+        eventos = tmp_path / "eventos.txt"
+        monkeypatch.setenv("TESTE_SERVIDOR_EVENTOS", str(eventos))
+
+        config = uvicorn.Config(f"{__name__}:app_teste", host="127.0.0.1", port=0, workers=2, log_level="warning")
+        sock = config.bind_socket()
+        supervisor = self._supervisor([])
+        supervisor.config = config
+        supervisor.sockets = [sock]
+
+        antigo, pronto = supervisor.novo_worker()
+        antigo.start()
+        try:
+            assert supervisor.aguardar_pronto(antigo, pronto)
+            supervisor.processes = [antigo]
+
+            supervisor.restart_all()
+
+            novo = supervisor.processes[0]
+            assert novo is not antigo
+            linhas = eventos.read_text().splitlines()
+            assert linhas.index(f"pronto {novo.pid}") < linhas.index(f"fim {antigo.pid}")
+        finally:
+            for processo in (antigo, *supervisor.processes):
+                if processo.process.is_alive():
+                    processo.terminate()
+                    processo.join()
+            sock.close()
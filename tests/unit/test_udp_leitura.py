@@ -0,0 +1,217 @@
+"""
+Testes unitários para o canal UDP de leituras da API.
+"""
+import asyncio
+import socket
+
+import pytest
+
+from src.api import ingestao
+from src.api.alertas_limiar import AvaliadorLimiares
+from src.api.limitador import resetar_limitador
+from src.api.udp_leitura import (
+    DatagramaInvalido,
+    PerdasDispositivo,
+    ServidorUdpLeituras,
+    codificar_datagrama,
+    decodificar_datagrama,
+)
+from src.api.cache_sensores import SensorResolvido
+from src.database.models.sensor import TipoSensorEnum
+
+
+class TestFormatoDatagrama:
+
+    def test_ida_e_volta(self):
+        datagrama = codificar_datagrama("ESP-1", 7, lux=10.0, temperatura=None, vibracao_media=0.5)
+
+        assert len(datagrama) == 35
+        leitura = decodificar_datagrama(datagrama)
+        assert leitura.serial == "ESP-1"
+        assert leitura.sequencia == 7
+        assert leitura.lux == pytest.approx(10.0)
+        assert leitura.temperatura is None
+        assert leitura.vibracao_media == pytest.approx(0.5)
+
+    def test_sequencia_modulo_32_bits(self):
+        assert decodificar_datagrama(codificar_datagrama("ESP-1", 2 ** 32 + 3)).sequencia == 3
+
+    def test_serial_longo(self):
+        with pytest.raises(ValueError):
+            codificar_datagrama("X" * 17, 1)
+
+    @pytest.mark.parametrize("datagrama", [
+        b"",
+        codificar_datagrama("ESP-1", 1)[:-1],
+        b"XX" + codificar_datagrama("ESP-1", 1)[2:],
+        codificar_datagrama("ESP-1", 1)[:2] + b"\x02" + codificar_datagrama("ESP-1", 1)[3:],
+        codificar_datagrama("", 1),
+    ])
+    def test_datagrama_invalido(self, datagrama):
+        with pytest.raises(DatagramaInvalido):
+            decodificar_datagrama(datagrama)
+
+
+class TestPerdasDispositivo:
+
+    def test_lacuna_contada_como_perda(self):
+        perdas = PerdasDispositivo(1)
+        assert perdas.registrar(2)
+        assert perdas.registrar(5)
+
+        estatisticas = perdas.estatisticas()
+        assert estatisticas["recebidos"] == 3
+        assert estatisticas["perdidos"] == 2
+        assert estatisticas["taxa_perda"] == pytest.approx(0.4)
+
+    def test_atrasado_desconta_perda(self):
+        perdas = PerdasDispositivo(1)
+        perdas.registrar(3)
+        assert perdas.registrar(2)
+
+        assert perdas.perdidos == 0
+        assert perdas.fora_de_ordem == 1
+        assert perdas.ultima == 3
+
+    def test_duplicado_descartado(self):
+        perdas = PerdasDispositivo(1)
+        assert not perdas.registrar(1)
+        assert perdas.duplicados == 1
+        assert perdas.recebidos == 1
+
+    def test_atrasado_repetido_descartado(self):
+        perdas = PerdasDispositivo(1)
+        perdas.registrar(4)
+        assert perdas.registrar(2)
+        assert not perdas.registrar(2)
+
+        assert perdas.duplicados == 1
+        assert perdas.fora_de_ordem == 1
+        assert perdas.perdidos == 1
+
+    def test_reinicio_do_dispositivo(self):
+        perdas = PerdasDispositivo(50000)
+        assert perdas.registrar(0)
+
+        assert perdas.reinicios == 1
+        assert perdas.perdidos == 0
+        assert perdas.ultima == 0
+
+    def test_reinicio_para_contagem_pequena(self):
+        perdas = PerdasDispositivo(0)
+        for sequencia in range(1, 6):
+            perdas.registrar(sequencia)
+
+        assert perdas.registrar(0)
+        assert perdas.reinicios == 1
+        for sequencia in range(1, 8):
+            assert perdas.registrar(sequencia)
+
+        assert perdas.ultima == 7
+        assert perdas.duplicados == 0
+        assert perdas.fora_de_ordem == 0
+        assert perdas.perdidos == 0
+
+    def test_volta_da_sequencia(self):
+        perdas = PerdasDispositivo(2 ** 32 - 1)
+        perdas.registrar(1)
+
+        assert perdas.perdidos == 1
+        assert perdas.reinicios == 0
+
+
+class TestServidorUdpLeituras:
+
+    @pytest.fixture(autouse=True)
+    def _sem_limite(self, monkeypatch):
+        monkeypatch.setenv("API_LIMITE_LEITURAS_POR_SEGUNDO", "0")
+        resetar_limitador()
+        yield
+        resetar_limitador()
+
+    @pytest.fixture
+    def lotes(self, monkeypatch):
+        lotes = []
+
+        def persistir(linhas, ao_descartar=None):
+            lotes.append(linhas)
+            return len(linhas)
+
+        monkeypatch.setattr(ingestao, "persistir_leituras", persistir)
+        return lotes
+
+    @staticmethod
+    def _resolver(seriais):
+        cadastrados = {"ESP-1": [SensorResolvido(1, TipoSensorEnum.LUX), SensorResolvido(2, TipoSensorEnum.TEMPERATURA)]}
+        return {serial: cadastrados[serial] for serial in seriais if serial in cadastrados}
+
+    def test_recebe_e_grava_em_lote(self, lotes):
+        async def cenario():
+            servidor = ServidorUdpLeituras(intervalo_ms=60000, max_leituras=3, resolver=self._resolver)
+            await servidor.iniciar("127.0.0.1", 0)
+
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as cliente:
+                for sequencia in (1, 2, 4):
+                    cliente.sendto(codificar_datagrama("ESP-1", sequencia, lux=1.0, temperatura=2.0), servidor.endereco)
+
+                for _ in range(100):
+                    if lotes:
+                        break
+                    await asyncio.sleep(0.01)
+
+            await servidor.parar()
+            return servidor.estatisticas()
+
+        estatisticas = asyncio.run(cenario())
+
+        assert [len(lote) for lote in lotes] == [6]
+        assert estatisticas["datagramas"] == 3
+        assert estatisticas["dispositivos"]["ESP-1"]["perdidos"] == 1
+
+    def test_serial_desconhecido_e_invalidos(self, lotes):
+        async def cenario():
+            servidor = ServidorUdpLeituras(resolver=self._resolver)
+            servidor.datagram_received(codificar_datagrama("ESP-1", 1, lux=1.0), None)
+            servidor.datagram_received(codificar_datagrama("ESP-1", 1, lux=1.0), None)
+            servidor.datagram_received(codificar_datagrama("DESCONHECIDO", 1, lux=1.0), None)
+            servidor.datagram_received(b"lixo", None)
+            await servidor.parar()
+            return servidor.estatisticas()
+
+        estatisticas = asyncio.run(cenario())
+
+        assert lotes == [[{'sensor_id': 1, 'data_leitura': lotes[0][0]['data_leitura'], 'valor': 1.0}]]
+        assert estatisticas["invalidos"] == 1
+        assert estatisticas["seriais_nao_encontrados"] == 1
+        assert estatisticas["dispositivos"]["ESP-1"]["duplicados"] == 1
+        assert "DESCONHECIDO" not in estatisticas["dispositivos"]
+
+    def test_leitura_acima_do_limiar_gera_alerta(self, lotes, monkeypatch):
+        avaliador = AvaliadorLimiares(cooldown_s=0)
+        monkeypatch.setattr(ingestao, "obter_avaliador", lambda: avaliador)
+
+        def resolver(seriais):
+            return {"ESP-1": [SensorResolvido(1, TipoSensorEnum.TEMPERATURA, limiar_maior=50.0)]}
+
+        async def cenario():
+            servidor = ServidorUdpLeituras(resolver=resolver)
+            servidor.datagram_received(codificar_datagrama("ESP-1", 1, temperatura=20.0), None)
+            servidor.datagram_received(codificar_datagrama("ESP-1", 2, temperatura=55.0), None)
+            await servidor.parar()
+
+        asyncio.run(cenario())
+
+        assert [len(lote) for lote in lotes] == [2]
+        assert [(evento.sensor_id, evento.valor) for evento in avaliador.pendentes()] == [(1, 55.0)]
+
+    def test_descarta_com_fila_cheia(self):
+        async def cenario():
+            servidor = ServidorUdpLeituras(capacidade=2, resolver=self._resolver)
+            for sequencia in range(5):
+                servidor.datagram_received(codificar_datagrama("ESP-1", sequencia, lux=1.0), None)
+            return servidor.estatisticas()
+
+        estatisticas = asyncio.run(cenario())
+
+        assert estatisticas["pendentes"] == 2
+        assert estatisticas["descartados_fila_cheia"] == 3
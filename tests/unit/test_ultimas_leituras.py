@@ -0,0 +1,79 @@
+"""
+Testes unitários para o cache das leituras mais recentes de cada sensor.
+"""
+from datetime import datetime
+
+import pytest
+
+from src.api.ultimas_leituras import CacheUltimasLeituras, UltimaLeitura
+from src.database.models.sensor import LeituraSensor, Sensor, TipoSensor, TipoSensorEnum
+
+
+@pytest.fixture
+def cache(test_database):
+    CacheUltimasLeituras.invalidar()
+    CacheUltimasLeituras.resetar_estatisticas()
+    yield CacheUltimasLeituras
+    CacheUltimasLeituras.invalidar()
+
+
+def _criar_sensor() -> Sensor:
+    tipo = TipoSensor(nome="Temperatura", tipo=TipoSensorEnum.TEMPERATURA).save()
+    return Sensor(nome="Sensor T", cod_serial="ESP-1", tipo_sensor_id=tipo.id).save()
+
+
+class TestCacheUltimasLeituras:
+
+    def test_consulta_uma_vez(self, cache):
+        sensor = _criar_sensor()
+        LeituraSensor.bulk_insert([
+            {'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 1, 10), 'valor': 1.0},
+            {'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 1, 12), 'valor': 2.0},
+            {'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 1, 11), 'valor': 3.0},
+        ])
+
+        assert cache.obter({sensor.id, 999}) == {sensor.id: UltimaLeitura(datetime(2025, 1, 1, 12), 2.0), 999: None}
+        cache.obter({sensor.id, 999})
+
+        assert cache.estatisticas()["misses"] == 2
+        assert cache.estatisticas()["hits"] == 2
+
+    def test_atualizar_ignora_leitura_antiga(self, cache):
+        cache.atualizar([{'sensor_id': 1, 'data_leitura': datetime(2025, 1, 1, 12), 'valor': 2.0}])
+        cache.atualizar([{'sensor_id': 1, 'data_leitura': datetime(2025, 1, 1, 11), 'valor': 3.0}])
+
+        assert cache.obter({1})[1].valor == 2.0
+
+    def test_entrada_expirada_consultada_de_novo(self, cache, monkeypatch):
+        sensor = _criar_sensor()
+        cache.obter({sensor.id})
+        LeituraSensor.bulk_insert([{'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 1), 'valor': 5.0}])
+
+        # bulk_insert direto no modelo não passa pela ingestão; só a expiração revela a leitura
+        assert cache.obter({sensor.id})[sensor.id] is None
+        monkeypatch.setattr(CacheUltimasLeituras, "ttl_s", 0)
+        assert cache.obter({sensor.id})[sensor.id].valor == 5.0
+
+    def test_eventos_do_orm(self, cache):
+        sensor = _criar_sensor()
+        leitura = LeituraSensor(sensor_id=sensor.id, data_leitura=datetime(2025, 1, 1), valor=7.0).save()
+
+        assert cache.obter({sensor.id})[sensor.id].valor == 7.0
+        assert cache.estatisticas()["misses"] == 0
+
+        leitura.delete()
+        assert cache.obter({sensor.id})[sensor.id] is None
+
+    def test_mais_recentes_pelo_model_sem_o_cache(self, cache):
+        sensor = _criar_sensor()
+        LeituraSensor.bulk_insert([
+            {'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 1, 12), 'valor': 2.0},
+            {'sensor_id': sensor.id, 'data_leitura': datetime(2025, 1, 1, 12), 'valor': 4.0},
+        ])
+
+        leituras = LeituraSensor.mais_recentes({sensor.id, 999}, read_only=True)
+
+        # Com duas leituras no mesmo instante, vale a inserida por último
+        assert list(leituras) == [sensor.id]
+        assert (leituras[sensor.id].data_leitura, leituras[sensor.id].valor) == (datetime(2025, 1, 1, 12), 4.0)
+        assert cache.estatisticas()["sensores"] == 0